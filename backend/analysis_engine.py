@@ -0,0 +1,210 @@
+"""
+Detailed single-ticker analysis combining financial data and news sentiment.
+Backs the /api/analyze/detailed endpoint used by the Deep Dive Dashboard.
+"""
+
+import math
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from config import Config
+from models.financial_data import (
+    TickerInfo, FundamentalMetrics, DerivedMetrics, DetailedAnalysisReport,
+    BattleMetrics, ComparisonAnalysisReport
+)
+from models.sentiment import AnalysisReport
+from financial_data_service import FinancialDataService, get_financial_data_service
+from analysis_jobs import AnalysisJobManager, get_analysis_job_manager
+from downsampling import downsample_series
+from indicators import IndicatorEngine, apply_trend_scores, get_indicator_engine, latest_values
+from correlation_service import (
+    CorrelationError, CorrelationService, diversification_score, get_correlation_service
+)
+from backtester import VerdictLog, get_verdict_log
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def _clamp(value: float, low: float = 0.0, high: float = 100.0) -> float:
+    return max(low, min(high, value))
+
+
+class AnalysisEngine:
+    """Builds DetailedAnalysisReports from market data and the latest sentiment report."""
+
+    def __init__(self,
+                 data_service: Optional[FinancialDataService] = None,
+                 job_manager: Optional[AnalysisJobManager] = None,
+                 indicator_engine: Optional[IndicatorEngine] = None,
+                 correlation_service: Optional[CorrelationService] = None,
+                 verdict_log: Optional[VerdictLog] = None):
+        self.data_service = data_service or get_financial_data_service()
+        self.job_manager = job_manager or get_analysis_job_manager()
+        self.indicator_engine = indicator_engine or get_indicator_engine()
+        self.correlation_service = correlation_service or get_correlation_service()
+        self.verdict_log = verdict_log or (get_verdict_log() if Config.VERDICT_LOG_ENABLED else None)
+
+    def analyze_detailed(self,
+                         ticker: str,
+                         period: str = '1mo',
+                         max_points: Optional[int] = None,
+                         chart_type: str = 'line') -> Tuple[DetailedAnalysisReport, int]:
+        """
+        Build the detailed report for a ticker. Blocks on data provider I/O.
+
+        Args:
+            ticker: Ticker symbol
+            period: Price history period
+            max_points: Downsample price history to at most this many points
+            chart_type: "line" (LTTB) or "candle" (OHLC buckets) downsampling
+
+        Returns:
+            Tuple of (report, number of bars before downsampling)
+        """
+        ticker = ticker.strip().upper()
+        info, fundamentals = self.data_service.get_ticker_overview(ticker)
+        series = self.data_service.get_price_series(ticker, period)
+        original_points = len(series)
+        # Indicators use full-resolution bars; only the chart payload is downsampled
+        indicator_results = self.indicator_engine.compute(series)
+
+        sentiment_report = self.job_manager.latest_report(ticker)
+        derived = self.calculate_derived_metrics(info, fundamentals, sentiment_report)
+        apply_trend_scores(derived, series, indicator_results)
+        verdict, confidence = self.determine_verdict(derived)
+        if self.verdict_log is not None:
+            try:
+                self.verdict_log.record(ticker, verdict, confidence)
+            except OSError as e:
+                logger.warning(f"Could not record verdict for {ticker}: {e}")
+
+        if max_points:
+            series = downsample_series(series, max_points, chart_type)
+
+        report = DetailedAnalysisReport(
+            ticker=ticker,
+            timestamp=datetime.utcnow(),
+            financial_data=info,
+            price_history=series.to_price_history(),
+            fundamental_metrics=fundamentals,
+            derived_metrics=derived,
+            ai_verdict=verdict,
+            confidence_score=confidence,
+            sentiment_analysis={
+                'market_signal': sentiment_report.market_signal,
+                'net_sentiment_score': sentiment_report.net_sentiment_score,
+                'sentiment_distribution': sentiment_report.sentiment_distribution,
+                'total_articles': sentiment_report.total_articles,
+                'timestamp': sentiment_report.timestamp.isoformat()
+            } if sentiment_report else None,
+            news_articles=[article.to_dict() for article in sentiment_report.articles] if sentiment_report else [],
+            technical_indicators=latest_values(indicator_results)
+        )
+        return report, original_points
+
+    def analyze_comparison(self,
+                           tickers: List[str],
+                           period: str = '1mo',
+                           max_points: Optional[int] = None) -> ComparisonAnalysisReport:
+        """
+        Detailed reports for several tickers plus BattleMetrics, including
+        their return correlations and an equal-weight diversification score.
+        Blocks on data provider I/O.
+        """
+        tickers = list(dict.fromkeys(t.strip().upper() for t in tickers))
+        with ThreadPoolExecutor(max_workers=min(len(tickers), Config.MAX_WORKERS)) as pool:
+            reports = list(pool.map(lambda t: self.analyze_detailed(t, period, max_points)[0], tickers))
+        analyses = dict(zip(tickers, reports))
+
+        correlation_matrix, score = None, None
+        try:
+            correlations = self.correlation_service.matrix(tickers)
+            correlation_matrix = correlations.to_dict()
+            score, _ = diversification_score(correlations.values)
+        except CorrelationError as e:
+            logger.warning(f"Correlations unavailable for {', '.join(tickers)}: {e}")
+
+        battle_metrics = BattleMetrics(
+            sentiment_scores={t: r.derived_metrics.sentiment_score for t, r in analyses.items()},
+            growth_scores={t: r.derived_metrics.growth_score for t, r in analyses.items()},
+            safety_scores={t: r.derived_metrics.safety_score for t, r in analyses.items()},
+            hype_scores={t: r.derived_metrics.hype_score for t, r in analyses.items()},
+            correlation_matrix=correlation_matrix,
+            diversification_score=score
+        )
+        return ComparisonAnalysisReport(
+            tickers=tickers,
+            timestamp=datetime.utcnow(),
+            individual_analyses=analyses,
+            battle_metrics=battle_metrics
+        )
+
+    def calculate_derived_metrics(self,
+                                  info: TickerInfo,
+                                  fundamentals: FundamentalMetrics,
+                                  sentiment_report: Optional[AnalysisReport] = None) -> DerivedMetrics:
+        """
+        Radar chart scores on a 0-100 scale.
+        Growth from P/E, Safety from market cap, Hype from volume and news count,
+        Sentiment from the net sentiment score.
+        """
+        pe_ratio = fundamentals.pe_ratio or info.pe_ratio
+        growth = _clamp(pe_ratio * 2) if pe_ratio and pe_ratio > 0 else 20.0
+
+        market_cap = fundamentals.market_cap or info.market_cap
+        # $100M maps to 0, $3T+ maps to 100 on a log scale
+        safety = _clamp((math.log10(market_cap) - 8) / 4.5 * 100) if market_cap else 0.0
+
+        news_count = sentiment_report.total_articles if sentiment_report else 0
+        volume_score = math.log10(info.volume) / 9 * 70 if info.volume and info.volume > 1 else 0.0
+        hype = _clamp(volume_score + news_count * 3)
+
+        net_score = sentiment_report.net_sentiment_score if sentiment_report else 0.0
+        sentiment = _clamp((net_score + 1) * 50)
+
+        return DerivedMetrics(
+            growth_score=round(growth, 1),
+            safety_score=round(safety, 1),
+            hype_score=round(hype, 1),
+            sentiment_score=round(sentiment, 1)
+        )
+
+    @staticmethod
+    def determine_verdict(derived: DerivedMetrics) -> Tuple[str, float]:
+        """Map derived scores to an AI verdict and confidence (0-1)."""
+        composite = (
+            0.4 * derived.sentiment_score +
+            0.2 * derived.growth_score +
+            0.2 * derived.safety_score +
+            0.2 * derived.hype_score
+        )
+        if derived.momentum_score is not None:
+            # Trend context takes half of the hype weight
+            composite += 0.1 * (derived.momentum_score - derived.hype_score)
+        if composite >= 75:
+            verdict = "Strong Buy"
+        elif composite >= 60:
+            verdict = "Buy"
+        elif composite >= 40:
+            verdict = "Hold"
+        elif composite >= 25:
+            verdict = "Sell"
+        else:
+            verdict = "Strong Sell"
+
+        confidence = 0.5 + 0.45 * min(1.0, abs(composite - 50) / 50)
+        return verdict, round(confidence, 3)
+
+
+# Global analysis engine instance
+analysis_engine = None
+
+def get_analysis_engine() -> AnalysisEngine:
+    """Get or create the global analysis engine instance"""
+    global analysis_engine
+    if analysis_engine is None:
+        analysis_engine = AnalysisEngine()
+    return analysis_engine
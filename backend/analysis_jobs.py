@@ -0,0 +1,269 @@
+"""
+Tracked asynchronous analysis jobs for the /api/analyze endpoints.
+Each job runs news fetch → sentiment → report as a pipeline of stages and
+records progress and timing per stage.
+"""
+
+import time
+import uuid
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from models.sentiment import AnalysisReport
+from news_aggregator import NewsAggregator
+from sentiment_engine import get_sentiment_engine
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+STAGES = ("fetch_news", "sentiment", "report")
+
+
+class JobStatus(str, Enum):
+    """Lifecycle states of an analysis job"""
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+@dataclass
+class StageProgress:
+    """Progress and timing of one pipeline stage."""
+    name: str
+    status: str = "pending"  # "pending", "running", "completed", "failed", "cancelled"
+    started_at: Optional[float] = None
+    duration: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'status': self.status,
+            'duration': round(self.duration, 4) if self.duration is not None else None
+        }
+
+
+@dataclass
+class AnalysisJob:
+    """A single sentiment analysis run for a ticker."""
+    ticker: str
+    num_articles: int
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: JobStatus = JobStatus.RUNNING
+    stages: List[StageProgress] = field(default_factory=lambda: [StageProgress(name) for name in STAGES])
+    message: str = "Queued"
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    report: Optional[AnalysisReport] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def is_running(self) -> bool:
+        return self.status == JobStatus.RUNNING
+
+    @property
+    def current_stage(self) -> Optional[str]:
+        for stage in self.stages:
+            if stage.status == "running":
+                return stage.name
+        return None
+
+    @property
+    def progress(self) -> int:
+        """Percentage of completed stages."""
+        if self.status == JobStatus.COMPLETED:
+            return 100
+        done = sum(1 for stage in self.stages if stage.status == "completed")
+        return int(done * 100 / len(self.stages))
+
+    def to_status_dict(self) -> Dict[str, Any]:
+        """Status payload for /api/analyze/status."""
+        payload = {
+            'job_id': self.job_id,
+            'ticker': self.ticker,
+            'status': self.status.value,
+            'is_loading': self.is_running,
+            'progress': self.progress,
+            'current_stage': self.current_stage,
+            'message': self.message,
+            'stages': [stage.to_dict() for stage in self.stages],
+            'stage_timings': {
+                stage.name: round(stage.duration, 4)
+                for stage in self.stages if stage.duration is not None
+            },
+            'created_at': self.created_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'error': self.error
+        }
+        if self.report:
+            payload.update(self.report.to_dict())
+        else:
+            payload['articles'] = []
+        return payload
+
+
+class AnalysisJobManager:
+    """
+    Runs analysis jobs on the event loop and keeps the latest job and
+    report per ticker. Blocking stage work runs in worker threads.
+    """
+
+    def __init__(self, aggregator: Optional[NewsAggregator] = None):
+        self.aggregator = aggregator or NewsAggregator()
+        self.jobs: Dict[str, AnalysisJob] = {}
+        self.reports: Dict[str, AnalysisReport] = {}
+        self.last_ticker: Optional[str] = None
+        self.listeners: List[Callable[[AnalysisJob, str], None]] = []
+        self._lock = asyncio.Lock()
+
+    def add_listener(self, callback: Callable[[AnalysisJob, str], None]) -> None:
+        """
+        Register a callback invoked on the event loop with (job, event) where
+        event is "progress", "complete", "error" or "cancelled".
+        Callbacks must not block.
+        """
+        self.listeners.append(callback)
+
+    def _notify(self, job: AnalysisJob, event: str) -> None:
+        for callback in self.listeners:
+            try:
+                callback(job, event)
+            except Exception as e:
+                logger.error(f"Analysis job listener failed: {e}")
+
+    async def start(self, ticker: str, num_articles: int = 5) -> Tuple[AnalysisJob, bool]:
+        """
+        Start an analysis for a ticker, or attach to the one already running.
+
+        Returns:
+            Tuple of (job, created) where created is False when attached
+        """
+        ticker = ticker.strip().upper()
+        async with self._lock:
+            self.last_ticker = ticker
+            existing = self.jobs.get(ticker)
+            if existing and existing.is_running:
+                logger.info(f"Attaching to running analysis job {existing.job_id} for {ticker}")
+                return existing, False
+
+            job = AnalysisJob(ticker=ticker, num_articles=num_articles)
+            self.jobs[ticker] = job
+            job.task = asyncio.create_task(self._run(job))
+            logger.info(f"Started analysis job {job.job_id} for {ticker}")
+            return job, True
+
+    def get_job(self, ticker: Optional[str] = None) -> Optional[AnalysisJob]:
+        """Latest job for a ticker, or for the most recently requested ticker."""
+        ticker = (ticker or self.last_ticker or '').strip().upper()
+        return self.jobs.get(ticker)
+
+    def latest_report(self, ticker: str) -> Optional[AnalysisReport]:
+        return self.reports.get(ticker.strip().upper())
+
+    async def cancel(self, ticker: str) -> bool:
+        """
+        Cancel the running job for a ticker and wait for its worker thread to
+        stop. Returns False if nothing was running.
+        """
+        job = self.jobs.get(ticker.strip().upper())
+        if not job or not job.is_running or not job.task:
+            return False
+        job.cancel_event.set()
+        job.task.cancel()
+        try:
+            await job.task
+        except asyncio.CancelledError:
+            pass
+        return True
+
+    async def _run_stage(self, job: AnalysisJob, index: int, message: str, func, *args):
+        """
+        Run one blocking stage in a worker thread and record its timing.
+        Threads can't be interrupted, so on cancellation this waits for the
+        worker to return before the stage (and the job) counts as cancelled.
+        """
+        if job.cancel_event.is_set():
+            raise asyncio.CancelledError()
+        stage = job.stages[index]
+        stage.status = "running"
+        stage.started_at = time.perf_counter()
+        job.message = message
+        self._notify(job, "progress")
+        worker = asyncio.ensure_future(asyncio.to_thread(func, *args))
+        try:
+            result = await asyncio.shield(worker)
+        except asyncio.CancelledError:
+            stage.status = "cancelled"
+            await asyncio.gather(worker, return_exceptions=True)
+            raise
+        except Exception:
+            stage.status = "failed"
+            raise
+        finally:
+            stage.duration = time.perf_counter() - stage.started_at
+        stage.status = "completed"
+        return result
+
+    async def _run(self, job: AnalysisJob) -> None:
+        """Execute the fetch → sentiment → report pipeline for a job."""
+        start_time = time.perf_counter()
+        try:
+            articles = await self._run_stage(
+                job, 0, f"Fetching news for {job.ticker}",
+                self.aggregator.fetch_articles,
+                NewsAggregator.queries_for_ticker(job.ticker), job.num_articles, job.cancel_event
+            )
+            if not articles:
+                raise ValueError(f"No news articles found for {job.ticker}")
+
+            engine = get_sentiment_engine()
+            analyzed = await self._run_stage(
+                job, 1, f"Analyzing sentiment of {len(articles)} articles",
+                engine.analyze_articles, articles
+            )
+            report = await self._run_stage(
+                job, 2, "Generating report",
+                engine.generate_report, analyzed, 0.0, job.ticker
+            )
+
+            report.processing_time = time.perf_counter() - start_time
+            job.report = report
+            job.status = JobStatus.COMPLETED
+            job.message = "Analysis complete"
+            self.reports[job.ticker] = report
+            job.finished_at = datetime.utcnow()
+            logger.info(f"Analysis job {job.job_id} for {job.ticker} completed in {report.processing_time:.2f}s")
+            self._notify(job, "complete")
+
+        except asyncio.CancelledError:
+            job.status = JobStatus.CANCELLED
+            job.message = "Analysis cancelled"
+            job.finished_at = datetime.utcnow()
+            logger.info(f"Analysis job {job.job_id} for {job.ticker} cancelled")
+            self._notify(job, "cancelled")
+            raise
+        except Exception as e:
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+            job.message = "Analysis failed"
+            job.finished_at = datetime.utcnow()
+            logger.error(f"Analysis job {job.job_id} for {job.ticker} failed: {e}")
+            self._notify(job, "error")
+
+
+# Global analysis job manager instance
+analysis_job_manager = None
+
+def get_analysis_job_manager() -> AnalysisJobManager:
+    """Get or create the global analysis job manager instance"""
+    global analysis_job_manager
+    if analysis_job_manager is None:
+        analysis_job_manager = AnalysisJobManager()
+    return analysis_job_manager
@@ -0,0 +1,638 @@
+"""
+Offline backtesting of AI verdicts and portfolio snapshots.
+Verdicts recorded by the analysis engine are replayed against the local
+price store (never the upstream provider): forward returns, hit rate and
+calibration by confidence bucket, plus an event-driven equity curve per
+strategy. Positions are built with vectorized entry/exit deltas rather
+than a per-day loop, and strategy grids fan out across worker processes.
+"""
+
+import os
+import json
+import time
+import logging
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict, field
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import Config
+from price_store import PriceStore
+from risk_engine import TRADING_DAYS, AlignedPrices, align_closes
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Verdict -> position direction
+VERDICT_DIRECTIONS = {
+    'Strong Buy': 1,
+    'Buy': 1,
+    'Hold': 0,
+    'Sell': -1,
+    'Strong Sell': -1,
+}
+STRONG_VERDICTS = ('Strong Buy', 'Strong Sell')
+# determine_verdict emits confidence in [0.5, 0.95]
+CONFIDENCE_BUCKETS = (0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+DEFAULT_HORIZONS = (5, 21, 63)
+
+
+class BacktestError(Exception):
+    """Custom exception for backtesting errors"""
+    pass
+
+
+@dataclass
+class VerdictRecord:
+    """An AI verdict as it was issued."""
+    ticker: str
+    date: str  # ISO date the verdict was issued
+    verdict: str
+    confidence: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class PortfolioSnapshot:
+    """Holdings as of a date, e.g. from a portfolio scan."""
+    date: str
+    quantities: Dict[str, float]
+
+
+@dataclass
+class Strategy:
+    """How verdicts are turned into positions."""
+    name: str
+    horizon: int = 21           # sessions each position is held
+    min_confidence: float = 0.0
+    long_only: bool = False     # ignore Sell / Strong Sell
+    strong_only: bool = False   # only Strong Buy / Strong Sell
+    hold_band: float = 0.03     # |excess return| within which a Hold counts as a hit
+    cost_bps: float = 5.0       # per unit of turnover
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class CalibrationBucket:
+    """Hit rate of verdicts whose confidence falls in [low, high)."""
+    low: float
+    high: float
+    count: int
+    mean_confidence: Optional[float]
+    hit_rate: Optional[float]
+    mean_return: Optional[float]
+
+
+@dataclass
+class StrategyResult:
+    """Trade statistics, calibration and equity curve of one strategy."""
+    strategy: Dict[str, Any]
+    trades: int
+    hit_rate: Optional[float]          # directional return > 0
+    excess_hit_rate: Optional[float]   # directional return beat the benchmark
+    mean_return: Optional[float]       # per trade, directional
+    mean_excess_return: Optional[float]
+    total_return: float                # equity curve, after costs
+    annualized_return: float
+    annualized_volatility: float
+    sharpe_ratio: Optional[float]
+    max_drawdown: float
+    benchmark_return: float            # over the same sessions
+    calibration: List[CalibrationBucket]
+    brier_score: Optional[float]
+    calibration_error: Optional[float]  # expected calibration error
+    by_verdict: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class PortfolioBacktestResult:
+    """Replay of portfolio snapshots held until the next snapshot."""
+    start: str
+    end: str
+    sessions: int
+    total_return: float
+    annualized_return: float
+    annualized_volatility: float
+    max_drawdown: float
+    benchmark_return: float
+    excess_return: float
+    dates: List[str]
+    equity: List[float]  # growth of 1.0
+    unpriced_tickers: List[str]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class VerdictLog:
+    """
+    Append-only JSONL log of issued verdicts, at most one per ticker and day:
+    repeat views that reach the same verdict are not recorded again, and a
+    changed verdict on the same day supersedes the earlier line on load.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or Config.VERDICT_LOG_PATH
+        self._lock = threading.Lock()
+        self._latest: Optional[Dict[str, Tuple[str, str]]] = None  # ticker -> (date, verdict) last recorded
+
+    def record(self, ticker: str, verdict: str, confidence: float, issued: Optional[date] = None) -> bool:
+        """
+        Record a verdict unless the same one was already recorded for the ticker that day.
+
+        Returns:
+            True if a line was appended
+        """
+        record = VerdictRecord(
+            ticker=ticker.upper(),
+            date=(issued or datetime.utcnow().date()).isoformat(),
+            verdict=verdict,
+            confidence=float(confidence)
+        )
+        line = json.dumps(record.to_dict()) + "\n"
+        with self._lock:
+            if self._latest is None:
+                self._latest = {r.ticker: (r.date, r.verdict) for r in self.load()}
+            if self._latest.get(record.ticker) == (record.date, record.verdict):
+                return False
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as handle:
+                handle.write(line)
+            self._latest[record.ticker] = (record.date, record.verdict)
+            return True
+
+    def load(self) -> List[VerdictRecord]:
+        if not os.path.exists(self.path):
+            return []
+        return load_verdicts(self.path)
+
+
+def _iso_date(value: Any) -> str:
+    """YYYY-MM-DD prefix of a date value. Raises ValueError if it is not a valid date."""
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date().isoformat()
+
+
+def load_verdicts(path: str) -> List[VerdictRecord]:
+    """
+    Load verdicts from a JSONL file with ticker, date, verdict and confidence
+    keys. When a ticker has several verdicts on one day, the last one wins.
+    """
+    records: Dict[Tuple[str, str], VerdictRecord] = {}
+    with open(path, 'r', encoding='utf-8') as handle:
+        for line_number, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+                verdict = str(row['verdict']).strip()
+                if verdict not in VERDICT_DIRECTIONS:
+                    raise ValueError(f"unknown verdict {verdict!r}")
+                record = VerdictRecord(
+                    ticker=str(row['ticker']).strip().upper(),
+                    date=_iso_date(row['date']),
+                    verdict=verdict,
+                    confidence=float(row['confidence'])
+                )
+                records[(record.ticker, record.date)] = record
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Skipping invalid verdict on line {line_number}: {e}")
+    return list(records.values())
+
+
+def load_snapshots(path: str) -> List[PortfolioSnapshot]:
+    """Load portfolio snapshots from a JSONL file of {"date", "holdings": [{"ticker", "quantity"}]}."""
+    snapshots = []
+    with open(path, 'r', encoding='utf-8') as handle:
+        for line_number, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+                quantities: Dict[str, float] = {}
+                for holding in row['holdings']:
+                    ticker = str(holding['ticker']).strip().upper()
+                    quantities[ticker] = quantities.get(ticker, 0.0) + float(holding['quantity'])
+                snapshots.append(PortfolioSnapshot(date=_iso_date(row['date']), quantities=quantities))
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Skipping invalid snapshot on line {line_number}: {e}")
+    return snapshots
+
+
+def load_panel(tickers: Sequence[str],
+               store: Optional[PriceStore] = None,
+               benchmark_ticker: Optional[str] = None) -> Tuple[AlignedPrices, List[str]]:
+    """
+    Closes for tickers on the benchmark calendar, read from the local price
+    store only (no upstream refresh).
+
+    Returns:
+        (aligned closes of the stored tickers, tickers with no stored history)
+
+    Raises:
+        BacktestError: If the benchmark has no stored history
+    """
+    store = store or PriceStore()
+    benchmark_ticker = (benchmark_ticker or Config.RISK_BENCHMARK_TICKER).upper()
+    benchmark = store.load(benchmark_ticker)
+    if benchmark is None or len(benchmark) < 2:
+        raise BacktestError(f"No stored price history for benchmark {benchmark_ticker}")
+
+    series, missing = [], []
+    for ticker in dict.fromkeys(t.upper() for t in tickers):
+        bars = store.load(ticker)
+        if bars is None or len(bars) == 0:
+            missing.append(ticker)
+        else:
+            series.append(bars)
+    return align_closes(series, benchmark), missing
+
+
+def _entry_rows(dates: np.ndarray, issued: np.ndarray) -> np.ndarray:
+    """
+    First session strictly after each issue date. A verdict may use that
+    day's close, so entering on it would look ahead.
+    """
+    return np.searchsorted(dates, issued, side='right')
+
+
+def _forward_returns(closes: np.ndarray, rows: np.ndarray, columns: np.ndarray, horizon: int) -> np.ndarray:
+    """close[row + horizon] / close[row] - 1 per event; NaN when out of range or unpriced."""
+    out = np.full(len(rows), np.nan)
+    valid = rows + horizon < len(closes)
+    start = closes[rows[valid], columns[valid]]
+    end = closes[rows[valid] + horizon, columns[valid]]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[valid] = end / start - 1.0
+    out[~np.isfinite(out)] = np.nan
+    return out
+
+
+def _max_drawdown(equity: np.ndarray) -> float:
+    if len(equity) == 0:
+        return 0.0
+    peaks = np.maximum(np.maximum.accumulate(equity), 1.0)
+    return float(max(1.0 - (equity / peaks).min(), 0.0))
+
+
+def _calibration(confidence: np.ndarray, hits: np.ndarray, returns: np.ndarray) -> Tuple[List[CalibrationBucket], Optional[float], Optional[float]]:
+    """Buckets by confidence, Brier score and expected calibration error."""
+    buckets = []
+    bucket_index = np.digitize(confidence, CONFIDENCE_BUCKETS[1:-1])
+    error = 0.0
+    for i, (low, high) in enumerate(zip(CONFIDENCE_BUCKETS[:-1], CONFIDENCE_BUCKETS[1:])):
+        mask = bucket_index == i
+        count = int(mask.sum())
+        if count:
+            mean_confidence = float(confidence[mask].mean())
+            hit_rate = float(hits[mask].mean())
+            error += count * abs(hit_rate - mean_confidence)
+            buckets.append(CalibrationBucket(low, high, count, round(mean_confidence, 4),
+                                             round(hit_rate, 4), round(float(returns[mask].mean()), 5)))
+        else:
+            buckets.append(CalibrationBucket(low, high, 0, None, None, None))
+    if len(hits) == 0:
+        return buckets, None, None
+    brier = float(((confidence - hits) ** 2).mean())
+    return buckets, round(brier, 4), round(error / len(hits), 4)
+
+
+def evaluate_strategy(strategy: Strategy,
+                      closes: np.ndarray,
+                      benchmark: np.ndarray,
+                      rows: np.ndarray,
+                      columns: np.ndarray,
+                      directions: np.ndarray,
+                      confidence: np.ndarray,
+                      strong: np.ndarray,
+                      verdicts: np.ndarray) -> StrategyResult:
+    """
+    Backtest one strategy over pre-aligned events. Pure NumPy; no I/O.
+
+    Args:
+        strategy: Position rules
+        closes: T x N closes on the benchmark calendar
+        benchmark: T benchmark closes
+        rows: Entry session per event
+        columns: Ticker column per event
+        directions: +1 / 0 / -1 per event
+        confidence: Verdict confidence per event
+        strong: Whether each event is a Strong verdict
+        verdicts: Verdict label per event
+    """
+    horizon = strategy.horizon
+    forward = _forward_returns(closes, rows, columns, horizon)
+    bench_forward = _forward_returns(benchmark[:, None], rows, np.zeros_like(rows), horizon)
+    excess = forward - bench_forward
+
+    selected = (confidence >= strategy.min_confidence) & np.isfinite(forward) & np.isfinite(bench_forward)
+    if strategy.strong_only:
+        selected &= strong
+    if strategy.long_only:
+        selected &= directions >= 0
+
+    # Calibration covers every selected verdict; a Hold is right if the stock tracked the market
+    directional = directions[selected] * forward[selected]
+    hits = np.where(directions[selected] == 0,
+                    np.abs(excess[selected]) <= strategy.hold_band,
+                    directions[selected] * excess[selected] > 0).astype(np.float64)
+    calibration, brier, ece = _calibration(confidence[selected], hits, directional)
+
+    by_verdict = {}
+    for label in VERDICT_DIRECTIONS:
+        mask = verdicts[selected] == label
+        if mask.any():
+            by_verdict[label] = {
+                'count': int(mask.sum()),
+                'hit_rate': round(float(hits[mask].mean()), 4),
+                'mean_return': round(float(forward[selected][mask].mean()), 5),
+                'mean_excess_return': round(float(excess[selected][mask].mean()), 5)
+            }
+
+    # Trades: non-Hold verdicts held for the horizon, equal gross weight across open positions
+    traded = selected & (directions != 0)
+    trade_returns = directions[traded] * forward[traded]
+    trade_excess = directions[traded] * excess[traded]
+
+    sessions, tickers = closes.shape
+    deltas = np.zeros((sessions + 1, tickers))
+    np.add.at(deltas, (rows[traded], columns[traded]), directions[traded])
+    np.add.at(deltas, (rows[traded] + horizon, columns[traded]), -directions[traded])
+    positions = np.cumsum(deltas[:-1], axis=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        daily = closes[1:] / closes[:-1] - 1.0
+        bench_daily = benchmark[1:] / benchmark[:-1] - 1.0
+    daily[~np.isfinite(daily)] = 0.0
+    bench_daily[~np.isfinite(bench_daily)] = 0.0
+
+    # Positions set at the close of session t earn the return of t + 1
+    gross = np.abs(positions).sum(axis=1, keepdims=True)
+    weights = np.divide(positions, gross, out=np.zeros_like(positions), where=gross > 0)
+    turnover = np.abs(np.diff(weights, axis=0, prepend=0.0)).sum(axis=1)
+    strategy_daily = (weights[:-1] * daily).sum(axis=1) - turnover[:-1] * strategy.cost_bps / 10_000
+
+    active = np.nonzero(gross[:, 0] > 0)[0]
+    if len(active):
+        first, last = active[0], min(active[-1] + 1, sessions - 1)
+        strategy_daily = strategy_daily[first:last]
+        bench_span = bench_daily[first:last]
+    else:
+        strategy_daily = bench_span = np.zeros(0)
+
+    equity = np.cumprod(1.0 + strategy_daily)
+    total_return = float(equity[-1] - 1.0) if len(equity) else 0.0
+    years = len(strategy_daily) / TRADING_DAYS
+    annualized = (1.0 + total_return) ** (1.0 / years) - 1.0 if years > 0 and total_return > -1 else 0.0
+    volatility = float(strategy_daily.std(ddof=1) * np.sqrt(TRADING_DAYS)) if len(strategy_daily) > 1 else 0.0
+
+    def rate(values: np.ndarray) -> Optional[float]:
+        return round(float((values > 0).mean()), 4) if len(values) else None
+
+    def mean(values: np.ndarray) -> Optional[float]:
+        return round(float(values.mean()), 5) if len(values) else None
+
+    return StrategyResult(
+        strategy=strategy.to_dict(),
+        trades=int(traded.sum()),
+        hit_rate=rate(trade_returns),
+        excess_hit_rate=rate(trade_excess),
+        mean_return=mean(trade_returns),
+        mean_excess_return=mean(trade_excess),
+        total_return=round(total_return, 4),
+        annualized_return=round(float(annualized), 4),
+        annualized_volatility=round(volatility, 4),
+        sharpe_ratio=round(float(annualized / volatility), 3) if volatility > 0 else None,
+        max_drawdown=round(_max_drawdown(equity), 4),
+        benchmark_return=round(float(np.prod(1.0 + bench_span) - 1.0), 4),
+        calibration=calibration,
+        brier_score=brier,
+        calibration_error=ece,
+        by_verdict=by_verdict
+    )
+
+
+# Worker process state, set once per process by the pool initializer
+_worker_state: Dict[str, np.ndarray] = {}
+
+
+def _init_worker(state: Dict[str, np.ndarray]) -> None:
+    _worker_state.update(state)
+
+
+def _evaluate_in_worker(strategy: Strategy) -> StrategyResult:
+    return evaluate_strategy(strategy, **_worker_state)
+
+
+def default_strategies(horizons: Sequence[int] = DEFAULT_HORIZONS) -> List[Strategy]:
+    """Grid of horizon x confidence threshold x long-only."""
+    strategies = []
+    for horizon in horizons:
+        for min_confidence in (0.5, 0.7, 0.85):
+            for long_only in (False, True):
+                name = f"{horizon}d conf>={min_confidence:.2f} {'long' if long_only else 'long/short'}"
+                strategies.append(Strategy(name=name, horizon=horizon,
+                                           min_confidence=min_confidence, long_only=long_only))
+    return strategies
+
+
+def backtest_verdicts(records: Sequence[VerdictRecord],
+                      strategies: Optional[Sequence[Strategy]] = None,
+                      store: Optional[PriceStore] = None,
+                      benchmark_ticker: Optional[str] = None,
+                      workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Replay verdicts against stored price histories.
+
+    Args:
+        records: Issued verdicts
+        strategies: Position rules to evaluate (default grid if omitted)
+        store: Price store to read; never refreshed from upstream
+        benchmark_ticker: Calendar and excess-return benchmark
+        workers: Worker processes; 0 or 1 runs in-process
+
+    Raises:
+        BacktestError: If there is nothing to replay
+    """
+    if not records:
+        raise BacktestError("No verdicts to backtest")
+    strategies = list(strategies or default_strategies())
+    workers = Config.BACKTEST_WORKERS if workers is None else workers
+    started = time.perf_counter()
+
+    panel, missing = load_panel([r.ticker for r in records], store, benchmark_ticker)
+    column_of = {ticker: i for i, ticker in enumerate(panel.tickers)}
+    issued = np.array([r.date for r in records], dtype='datetime64[D]')
+    rows = _entry_rows(panel.dates, issued)
+    columns = np.array([column_of.get(r.ticker, -1) for r in records])
+    usable = (columns >= 0) & (rows < len(panel.dates))
+    if not usable.any():
+        raise BacktestError("No verdicts fall within the stored price history")
+
+    verdicts = np.array([r.verdict for r in records])[usable]
+    state = {
+        'closes': panel.closes,
+        'benchmark': panel.benchmark,
+        'rows': rows[usable],
+        'columns': columns[usable],
+        'directions': np.array([VERDICT_DIRECTIONS[v] for v in verdicts]),
+        'confidence': np.array([r.confidence for r in records])[usable],
+        'strong': np.isin(verdicts, STRONG_VERDICTS),
+        'verdicts': verdicts,
+    }
+
+    if workers and workers > 1 and len(strategies) > 1:
+        # Ship the panel once per worker rather than once per strategy
+        with ProcessPoolExecutor(max_workers=min(workers, len(strategies)),
+                                 initializer=_init_worker, initargs=(state,)) as pool:
+            results = list(pool.map(_evaluate_in_worker, strategies))
+    else:
+        results = [evaluate_strategy(strategy, **state) for strategy in strategies]
+
+    elapsed = (time.perf_counter() - started) * 1000
+    logger.info(f"Backtested {len(strategies)} strategies over {int(usable.sum())} verdicts in {elapsed:.0f}ms")
+    return {
+        'verdicts': len(records),
+        'replayed': int(usable.sum()),
+        'unpriced_tickers': missing,
+        'start': str(panel.dates[0]),
+        'end': str(panel.dates[-1]),
+        'results': results,
+        'elapsed_ms': round(elapsed, 1)
+    }
+
+
+def backtest_portfolio(snapshots: Sequence[PortfolioSnapshot],
+                       store: Optional[PriceStore] = None,
+                       benchmark_ticker: Optional[str] = None,
+                       end: Optional[str] = None) -> PortfolioBacktestResult:
+    """
+    Replay portfolio snapshots: each snapshot's quantities are bought at the
+    first close after its date and held until the next snapshot takes over.
+
+    Raises:
+        BacktestError: If no snapshot can be priced
+    """
+    if not snapshots:
+        raise BacktestError("No portfolio snapshots to backtest")
+    snapshots = sorted(snapshots, key=lambda s: s.date)
+    tickers = list(dict.fromkeys(t for s in snapshots for t in s.quantities))
+    panel, missing = load_panel(tickers, store, benchmark_ticker)
+    column_of = {ticker: i for i, ticker in enumerate(panel.tickers)}
+
+    sessions = len(panel.dates)
+    entry = _entry_rows(panel.dates, np.array([s.date for s in snapshots], dtype='datetime64[D]'))
+    last = sessions - 1 if end is None else int(np.searchsorted(panel.dates, np.datetime64(end, 'D'), side='right')) - 1
+    if entry[0] >= last:
+        raise BacktestError("Portfolio snapshots start after the stored price history")
+
+    # Quantities per snapshot, then forward-filled onto every session from its entry
+    book = np.zeros((len(snapshots), len(panel.tickers)))
+    for i, snapshot in enumerate(snapshots):
+        for ticker, quantity in snapshot.quantities.items():
+            if ticker in column_of:
+                book[i, column_of[ticker]] = quantity
+    active = np.searchsorted(entry, np.arange(sessions), side='right') - 1
+
+    closes = panel.closes
+    held = book[np.maximum(active[:-1], 0)]
+    priced = np.isfinite(closes[:-1]) & np.isfinite(closes[1:])
+    start_value = np.where(priced, held * np.nan_to_num(closes[:-1]), 0.0).sum(axis=1)
+    end_value = np.where(priced, held * np.nan_to_num(closes[1:]), 0.0).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        daily = np.where(start_value > 0, end_value / start_value - 1.0, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bench_daily = panel.benchmark[1:] / panel.benchmark[:-1] - 1.0
+    bench_daily[~np.isfinite(bench_daily)] = 0.0
+
+    span = slice(entry[0], last)
+    daily, bench_daily = daily[span], bench_daily[span]
+    equity = np.concatenate([[1.0], np.cumprod(1.0 + daily)])
+    total_return = float(equity[-1] - 1.0)
+    benchmark_return = float(np.prod(1.0 + bench_daily) - 1.0)
+    years = len(daily) / TRADING_DAYS
+    annualized = (1.0 + total_return) ** (1.0 / years) - 1.0 if years > 0 and total_return > -1 else 0.0
+    dates = panel.dates[entry[0]:last + 1]
+
+    return PortfolioBacktestResult(
+        start=str(dates[0]),
+        end=str(dates[-1]),
+        sessions=len(daily),
+        total_return=round(total_return, 4),
+        annualized_return=round(float(annualized), 4),
+        annualized_volatility=round(float(daily.std(ddof=1) * np.sqrt(TRADING_DAYS)) if len(daily) > 1 else 0.0, 4),
+        max_drawdown=round(_max_drawdown(equity), 4),
+        benchmark_return=round(benchmark_return, 4),
+        excess_return=round(total_return - benchmark_return, 4),
+        dates=[str(d) for d in dates],
+        equity=np.round(equity, 5).tolist(),
+        unpriced_tickers=missing
+    )
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render a verdict backtest as a plain-text table."""
+    lines = [
+        f"Verdicts: {report['verdicts']} ({report['replayed']} replayed), {report['start']} to {report['end']}",
+        f"Unpriced: {', '.join(report['unpriced_tickers']) or 'none'}",
+        "",
+        f"{'strategy':<28} {'trades':>6} {'hit':>6} {'excess hit':>10} {'total':>8} {'sharpe':>7} {'max dd':>7} {'ECE':>6}"
+    ]
+    for result in report['results']:
+        sharpe = f"{result.sharpe_ratio:>7.2f}" if result.sharpe_ratio is not None else f"{'-':>7}"
+        hit = f"{result.hit_rate:>6.1%}" if result.hit_rate is not None else f"{'-':>6}"
+        excess_hit = f"{result.excess_hit_rate:>10.1%}" if result.excess_hit_rate is not None else f"{'-':>10}"
+        ece = f"{result.calibration_error:>6.3f}" if result.calibration_error is not None else f"{'-':>6}"
+        lines.append(
+            f"{result.strategy['name']:<28} {result.trades:>6d} {hit} {excess_hit} "
+            f"{result.total_return:>8.1%} {sharpe} {result.max_drawdown:>7.1%} {ece}"
+        )
+    return "\n".join(lines)
+
+
+# Global verdict log instance
+verdict_log = None
+
+def get_verdict_log() -> VerdictLog:
+    """Get or create the global verdict log instance"""
+    global verdict_log
+    if verdict_log is None:
+        verdict_log = VerdictLog()
+    return verdict_log
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Backtest AI verdicts or portfolio snapshots offline")
+    parser.add_argument('--verdicts', help="Verdict JSONL (defaults to the verdict log)")
+    parser.add_argument('--portfolio', help="Portfolio snapshot JSONL; backtests holdings instead of verdicts")
+    parser.add_argument('--horizons', type=int, nargs='+', default=list(DEFAULT_HORIZONS))
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (defaults to all cores)")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = parser.parse_args()
+
+    if args.portfolio:
+        result = backtest_portfolio(load_snapshots(args.portfolio))
+        summary = {k: v for k, v in result.to_dict().items() if k not in ('dates', 'equity')}
+        print(json.dumps(summary, indent=2))
+    else:
+        records = load_verdicts(args.verdicts) if args.verdicts else get_verdict_log().load()
+        report = backtest_verdicts(records, default_strategies(args.horizons),
+                                   workers=os.cpu_count() if args.workers is None else args.workers)
+        if args.json:
+            print(json.dumps({**report, 'results': [r.to_dict() for r in report['results']]}, indent=2))
+        else:
+            print(format_report(report))
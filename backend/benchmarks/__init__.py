@@ -0,0 +1 @@
+# Benchmark and load-test suite; run from backend/ with: python -m benchmarks.run
@@ -0,0 +1,267 @@
+"""
+In-process ASGI load test of the API.
+The app is driven through httpx's ASGITransport (no sockets, no server),
+with the full middleware stack and the startup/shutdown hooks, and with
+market data, Gemini, Salesforce and news feeds replaced by the stubs in
+benchmarks.stubs. Each endpoint gets a fixed number of requests at a fixed
+concurrency after a short warm-up, repeated for several rounds whose
+median is reported; peak memory is measured in a separate traced pass per
+round.
+
+The environment must be prepared (prepare_environment) before config is
+imported, so the app and its stores are only imported inside run_load.
+"""
+
+import os
+import time
+import asyncio
+import tempfile
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .results import BenchmarkResult, combine, summarize
+
+# Holdings used by the portfolio endpoints, and what the stub Gemini "extracts" from the image
+HOLDINGS = [
+    {'ticker': 'AAPL', 'quantity': 10}, {'ticker': 'MSFT', 'quantity': 8}, {'ticker': 'NVDA', 'quantity': 4},
+    {'ticker': 'JPM', 'quantity': 12}, {'ticker': 'XOM', 'quantity': 20},
+]
+TICKERS = ['AAPL', 'MSFT', 'NVDA', 'AMZN', 'GOOGL', 'JPM', 'XOM', 'JNJ', 'PG', 'KO']
+SCREENER_UNIVERSE_SIZE = 500
+
+# Routes without a load case, and why
+SKIPPED = {
+    'WEBSOCKET /ws': 'httpx has no WebSocket support over ASGITransport',
+}
+
+
+def prepare_environment(workdir: str) -> Dict[str, str]:
+    """
+    Point every store at `workdir`, turn off rate limiting and warm-up, and
+    configure the Salesforce sync path for the mock org. Must run before
+    config is imported.
+    """
+    settings = {
+        'PRICE_STORE_PATH': os.path.join(workdir, 'prices'),
+        'SENTIMENT_CACHE_PATH': os.path.join(workdir, 'sentiment_cache.sqlite3'),
+        'VERDICT_LOG_PATH': os.path.join(workdir, 'verdicts.jsonl'),
+        'SCREENER_TABLE_PATH': os.path.join(workdir, 'fundamentals.npz'),
+        'SCREENER_UNIVERSE_PATH': os.path.join(workdir, 'universe.txt'),
+        'RATE_LIMIT_ENABLED': 'False',
+        'STARTUP_WARMUP': 'False',
+        'PROFILING_ENABLED': 'False',
+        'LOG_LEVEL': 'WARNING',
+        'SENTIMENT_MODE': 'vader',
+        'SALESFORCE_SYNC_ENABLED': 'True',
+        'SALESFORCE_USERNAME': 'bench@example.com',
+        'GOOGLE_API_KEY': 'stub',
+    }
+    os.environ.update(settings)
+    return settings
+
+
+@dataclass
+class LoadCase:
+    """Requests for one endpoint."""
+    method: str
+    path: str
+    params: Optional[Dict[str, Any]] = None
+    json: Optional[Dict[str, Any]] = None
+    files: Optional[Dict[str, Tuple[str, bytes, str]]] = None
+    expect: Tuple[int, ...] = (200,)
+    label: str = ''
+    concurrency: Optional[int] = None  # overrides the run's concurrency
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        return f"{self.method} {self.path}{f' [{self.label}]' if self.label else ''}"
+
+
+def load_cases() -> List[LoadCase]:
+    holdings = {'holdings': HOLDINGS}
+    image = b'\x89PNG\r\n\x1a\n' + bytes(range(256)) * 256  # 64 KiB upload; the stub ignores the pixels
+    year_ago = (date.today() - timedelta(days=365)).isoformat()
+    half_year_ago = (date.today() - timedelta(days=182)).isoformat()
+    return [
+        LoadCase('GET', '/api/health'),
+        LoadCase('GET', '/api/health/live'),
+        LoadCase('GET', '/api/health/ready'),
+        LoadCase('GET', '/api/health/checks'),
+        LoadCase('GET', '/api/test-connection'),
+        LoadCase('GET', '/api/usage'),
+        LoadCase('GET', '/metrics'),
+        LoadCase('GET', '/api/salesforce/status'),
+        LoadCase('GET', '/api/salesforce/sync'),
+        LoadCase('POST', '/api/salesforce/sync/flush'),
+        LoadCase('GET', '/api/admin/profiles', expect=(404,), label='disabled'),
+        LoadCase('GET', '/api/admin/profiles/missing', expect=(404,), label='disabled'),
+        LoadCase('POST', '/api/portfolio/analyze-image', files={'file': ('portfolio.png', image, 'image/png')}),
+        LoadCase('POST', '/api/portfolio/risk', json=holdings),
+        LoadCase('POST', '/api/portfolio/analyze-holdings', json=holdings),
+        LoadCase('POST', '/api/portfolio/suggestions', json=holdings),
+        LoadCase('POST', '/api/portfolio/simulate', json={**holdings, 'num_paths': 2000, 'horizon_days': 63, 'seed': 7}),
+        LoadCase('POST', '/api/portfolio/rebalance', json={**holdings, 'candidates': ['VTI', 'BND', 'GLD']}),
+        LoadCase('GET', '/api/portfolio/test-analysis'),
+        LoadCase('GET', '/api/portfolio/vision-status'),
+        LoadCase('POST', '/api/analyze', json={'stock_symbol': 'AAPL', 'num_articles': 10}),
+        LoadCase('GET', '/api/analyze/status', params={'ticker': 'AAPL'}),
+        LoadCase('DELETE', '/api/analyze/IBM', expect=(404,), label='not running'),
+        LoadCase('POST', '/api/analyze/detailed', json={'ticker': 'MSFT', 'period': '1y', 'max_points': 200}),
+        LoadCase('GET', '/api/analyze/detailed', params={'ticker': 'MSFT', 'period': '1y', 'max_points': 200}),
+        LoadCase('POST', '/api/analyze/compare', json={'tickers': ['AAPL', 'MSFT', 'NVDA'], 'period': '6mo'}),
+        LoadCase('GET', '/api/analyze/compare', params={'tickers': ['AAPL', 'MSFT', 'NVDA'], 'period': '6mo'}),
+        LoadCase('POST', '/api/correlation', json={'tickers': TICKERS}),
+        LoadCase('POST', '/api/screener',
+                 json={'query': 'pe_ratio < 25 and return_on_equity > 10% order by market_cap desc limit 25'}),
+        # One refresh at a time, as a scheduler would; concurrent ones just get 409s
+        LoadCase('POST', '/api/screener/refresh', json={'tickers': TICKERS}, expect=(202, 409), concurrency=1),
+        LoadCase('POST', '/api/backtest/verdicts', json={}),
+        LoadCase('POST', '/api/backtest/portfolio', json={'snapshots': [
+            {'date': year_ago, 'holdings': HOLDINGS},
+            {'date': half_year_ago, 'holdings': HOLDINGS[:3]},
+        ]}),
+    ]
+
+
+def install_stubs(latency: float = 0.0) -> Any:
+    """
+    Replace the external dependencies with stubs and import the app.
+    Services the app builds at import time (the analysis job manager) are
+    swapped in before the import; the lazily built ones after.
+
+    Returns:
+        The fastapi_app module
+    """
+    import analysis_jobs
+    import financial_data_service
+    import salesforce_client
+    from .stubs import (
+        MockOrgSalesforceClient, StubFinancialDataService, StubNewsAggregator, StubSalesforceService,
+        StubVisionEngine
+    )
+
+    financial_data_service.financial_data_service = StubFinancialDataService(latency)
+    analysis_jobs.analysis_job_manager = analysis_jobs.AnalysisJobManager(StubNewsAggregator(latency))
+    salesforce_client.salesforce_client = MockOrgSalesforceClient()
+
+    import fastapi_app
+    extracted = [{'ticker': h['ticker'], 'qty': h['quantity']} for h in HOLDINGS]
+    fastapi_app.lazy_vision_engine.factory = lambda: StubVisionEngine(extracted, latency)
+    fastapi_app.lazy_salesforce_service.factory = lambda: StubSalesforceService(latency)
+    return fastapi_app
+
+
+def seed_data(tickers: Sequence[str] = TICKERS) -> None:
+    """Stored bars, a year of recorded verdicts and a screener table, all from the stubs."""
+    from backtester import VERDICT_DIRECTIONS, get_verdict_log
+    from config import Config
+    from financial_data_service import get_financial_data_service
+    from screener import get_screener
+    from suggestion_engine import UNIVERSE
+
+    # Warm store: requests measure reads, not first fetches of each ticker
+    service = get_financial_data_service()
+    for ticker in list(tickers) + [c.ticker for c in UNIVERSE] + [Config.RISK_BENCHMARK_TICKER]:
+        service.price_store.refresh(ticker, force=True)
+
+    verdicts = list(VERDICT_DIRECTIONS)
+    log = get_verdict_log()
+    today = date.today()
+    for i in range(200):
+        ticker = tickers[i % len(tickers)]
+        log.record(ticker, verdicts[i % len(verdicts)], 0.5 + (i % 10) * 0.045, issued=today - timedelta(days=365 - i))
+
+    universe = list(tickers) + [f"T{i:04d}" for i in range(SCREENER_UNIVERSE_SIZE - len(tickers))]
+    with open(Config.SCREENER_UNIVERSE_PATH, 'w', encoding='utf-8') as handle:
+        handle.write('\n'.join(universe) + '\n')
+    get_screener().refresh(universe)
+
+
+async def _drive(client, case: LoadCase, requests: int, concurrency: int) -> Tuple[List[float], int, float]:
+    """Send `requests` requests from `concurrency` workers; returns latencies, errors and wall time."""
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            response = await client.request(case.method, case.path, params=case.params, json=case.json,
+                                            files=case.files, headers=case.headers)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code not in case.expect:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, requests))))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def _run_cases(app, cases: Sequence[LoadCase], requests: int, concurrency: int,
+                     warmup: int, memory_requests: int, rounds: int) -> List[BenchmarkResult]:
+    import httpx
+
+    results = []
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench.local') as client:
+        for case in cases:
+            workers = case.concurrency or concurrency
+            await _drive(client, case, warmup, workers)
+            case_rounds = []
+            for _ in range(rounds):
+                latencies, errors, elapsed = await _drive(client, case, requests, workers)
+
+                tracemalloc.start()
+                try:
+                    baseline = tracemalloc.get_traced_memory()[0]
+                    await _drive(client, case, memory_requests, workers)
+                    peak = tracemalloc.get_traced_memory()[1] - baseline
+                finally:
+                    tracemalloc.stop()
+
+                case_rounds.append(summarize(case.name, 'load', latencies, len(latencies), elapsed, max(0, peak),
+                                             errors=errors, concurrency=workers))
+            results.append(combine(case_rounds))
+    return results
+
+
+def run_load(requests: int = 200,
+             concurrency: int = 8,
+             warmup: int = 10,
+             memory_requests: int = 20,
+             latency: float = 0.0,
+             names: Optional[Sequence[str]] = None,
+             rounds: int = 5) -> List[BenchmarkResult]:
+    """
+    Load-test every endpoint case whose name contains any of `names` (all by
+    default), `rounds` times each. `latency` is added to each stubbed
+    upstream call, in seconds.
+    """
+    app_module = install_stubs(latency)
+    seed_data()
+    cases = [case for case in load_cases() if not names or any(part in case.name for part in names)]
+    app = app_module.app
+
+    async def main() -> List[BenchmarkResult]:
+        await app.router.startup()
+        try:
+            return await _run_cases(app, cases, requests, concurrency, warmup, memory_requests, rounds)
+        finally:
+            manager = app_module.get_analysis_job_manager()
+            running = [job.task for job in manager.jobs.values() if job.task and not job.task.done()]
+            await asyncio.gather(*running, return_exceptions=True)
+            await app.router.shutdown()
+
+    return asyncio.run(main())
+
+
+if __name__ == "__main__":
+    from .results import format_results
+
+    prepare_environment(tempfile.mkdtemp(prefix='bench-'))
+    print(format_results(run_load()))
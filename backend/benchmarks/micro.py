@@ -0,0 +1,178 @@
+"""
+Microbenchmarks for hot model code: Gemini response validation, the
+financial_data to_dict methods and the mock analysis result.
+
+Each benchmark is timed in batches sized to take about a millisecond, for
+`duration` seconds per round; p50/p99 are per call, taken over the batch
+means. Peak memory is measured on a separate call with tracemalloc, so
+tracing never slows the timed loop. Each benchmark runs `rounds` rounds and
+reports the median of each metric (see results.combine).
+"""
+
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence
+
+from models.financial_data import (
+    AIPick, BattleMetrics, ComparisonAnalysisReport, DashboardData, MarketMood, PortfolioMover
+)
+from models.portfolio_analysis import (
+    ImprovementType, InvestmentRecommendation, create_mock_analysis_result, validate_gemini_response
+)
+from serialization import synthetic_report
+
+from .results import BenchmarkResult, combine, summarize
+from .stubs import gemini_analysis
+
+BATCH_SECONDS = 0.001
+
+HOLDINGS = [
+    {'ticker': ticker, 'qty': qty}
+    for ticker, qty in (('AAPL', 10.5), ('MSFT', 8), ('NVDA', 4), ('AMZN', 6), ('JPM', 12),
+                        ('XOM', 20), ('JNJ', 7), ('KO', 30), ('GLD', 5), ('BND', 25))
+]
+
+
+def _recommendations() -> List[InvestmentRecommendation]:
+    return [
+        InvestmentRecommendation(ticker=ticker, reason=reason, improvement_type=kind, priority=i + 1)
+        for i, (ticker, kind, reason) in enumerate((
+            ('VXUS', ImprovementType.GEOGRAPHIC_EXPOSURE, 'Adds international exposure outside the US market.'),
+            ('XLV', ImprovementType.SECTOR_BALANCE, 'Adds healthcare, the largest missing sector by weight.'),
+            ('IEF', ImprovementType.RISK_REDUCTION, 'Treasuries have a negative correlation with the holdings.'),
+        ))
+    ]
+
+
+def _comparison(tickers: Sequence[str] = ('AAPL', 'MSFT', 'NVDA'), points: int = 252) -> ComparisonAnalysisReport:
+    reports = {}
+    for ticker in tickers:
+        report = synthetic_report(points=points, articles=20)
+        report.ticker = ticker
+        reports[ticker] = report
+    scores = {ticker: 50.0 + i for i, ticker in enumerate(tickers)}
+    return ComparisonAnalysisReport(
+        tickers=list(tickers),
+        timestamp=datetime.utcnow(),
+        individual_analyses=reports,
+        battle_metrics=BattleMetrics(
+            sentiment_scores=scores, growth_scores=scores, safety_scores=scores, hype_scores=scores,
+            correlation_matrix={a: {b: 0.5 for b in tickers} for a in tickers},
+            diversification_score=42.0
+        )
+    )
+
+
+def _dashboard() -> DashboardData:
+    return DashboardData(
+        market_mood=MarketMood(score=58, label='Neutral', spy_change=1.2, btc_change=-3.4),
+        ai_pick=AIPick('NVDA', 'NVIDIA', 78, 912.5, 24, 'Buy', 0.81),
+        movers=[PortfolioMover(h['ticker'], 100.0 + i, 0.5 * i - 2, 'up' if i > 3 else 'down')
+                for i, h in enumerate(HOLDINGS)],
+        timestamp=datetime.utcnow() - timedelta(seconds=5)
+    )
+
+
+def _setup_validate() -> Callable[[], object]:
+    response = gemini_analysis(HOLDINGS)
+    return lambda: validate_gemini_response(response)
+
+
+def _setup_validate_precomputed() -> Callable[[], object]:
+    response = gemini_analysis(HOLDINGS, suggestions=False)
+    recommendations = _recommendations()
+    return lambda: validate_gemini_response(response, recommendations)
+
+
+def _setup_price_history() -> Callable[[], object]:
+    history = synthetic_report(points=252, articles=0).price_history
+    return history.to_dict
+
+
+def _setup_detailed(points: int) -> Callable[[], Callable[[], object]]:
+    def setup() -> Callable[[], object]:
+        return synthetic_report(points=points, articles=50).to_dict
+    return setup
+
+
+def _setup_comparison() -> Callable[[], object]:
+    return _comparison().to_dict
+
+
+def _setup_dashboard() -> Callable[[], object]:
+    return _dashboard().to_dict
+
+
+# Benchmark name -> setup returning the function to time
+MICRO_BENCHMARKS: Dict[str, Callable[[], Callable[[], object]]] = {
+    'validate_gemini_response': _setup_validate,
+    'validate_gemini_response[precomputed]': _setup_validate_precomputed,
+    'PriceHistory.to_dict[252]': _setup_price_history,
+    'DetailedAnalysisReport.to_dict[252]': _setup_detailed(252),
+    'DetailedAnalysisReport.to_dict[5000]': _setup_detailed(5000),
+    'ComparisonAnalysisReport.to_dict[3x252]': _setup_comparison,
+    'DashboardData.to_dict': _setup_dashboard,
+    'create_mock_analysis_result': lambda: create_mock_analysis_result,
+}
+
+
+def _calibrate(fn: Callable[[], object]) -> int:
+    """Calls per batch so that one batch takes about BATCH_SECONDS."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= BATCH_SECONDS or number >= 1 << 20:
+            return max(1, int(number * BATCH_SECONDS / elapsed)) if elapsed > 0 else number
+        number *= 2
+
+
+def _peak_memory(fn: Callable[[], object]) -> int:
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        result = fn()
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+        del result
+    finally:
+        tracemalloc.stop()
+    return max(0, peak)
+
+
+def _run_round(name: str, fn: Callable[[], object], number: int, duration: float) -> BenchmarkResult:
+    batches: List[float] = []
+    calls = 0
+    started = time.perf_counter()
+    while True:
+        batch_start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        now = time.perf_counter()
+        batches.append((now - batch_start) / number)
+        calls += number
+        if now - started >= duration:
+            break
+    elapsed = time.perf_counter() - started
+    return summarize(name, 'micro', batches, calls, elapsed, _peak_memory(fn), batch_size=number)
+
+
+def run_benchmark(name: str, fn: Callable[[], object], duration: float = 0.5, rounds: int = 5) -> BenchmarkResult:
+    fn()  # warm up caches and lazy imports
+    number = _calibrate(fn)
+    return combine([_run_round(name, fn, number, duration) for _ in range(rounds)])
+
+
+def run_micro(duration: float = 0.5,
+              names: Optional[Sequence[str]] = None,
+              rounds: int = 5) -> List[BenchmarkResult]:
+    """Run the microbenchmarks whose names contain any of `names` (all by default)."""
+    results = []
+    for name, setup in MICRO_BENCHMARKS.items():
+        if names and not any(part in name for part in names):
+            continue
+        results.append(run_benchmark(name, setup(), duration, rounds))
+    return results
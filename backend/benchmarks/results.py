@@ -0,0 +1,276 @@
+"""
+Benchmark results: a JSON file per run that can be compared across commits.
+Every benchmark reports throughput (ops/s), p50/p99 latency in milliseconds
+and peak traced memory in KiB, each the median over several rounds, with
+the spread between rounds. `compare` flags benchmarks that got slower or
+heavier than the baseline by more than a relative threshold, widened to
+the measured spread so run-to-run noise doesn't count as a regression.
+"""
+
+import os
+import sys
+import json
+import platform
+import subprocess
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+RESULTS_VERSION = 2
+
+# Metric -> True if a higher value is better
+METRICS = {
+    'ops_per_sec': True,
+    'p50_ms': False,
+    'p99_ms': False,
+    'peak_kb': False,
+}
+
+# Latency changes smaller than this are timer noise, whatever the ratio
+MIN_LATENCY_DELTA_MS = 0.005
+# Likewise for memory
+MIN_MEMORY_DELTA_KB = 16.0
+# A change must exceed this multiple of the rounds' relative spread (max - min over median) to count
+SPREAD_FACTOR = 1.5
+
+
+@dataclass
+class BenchmarkResult:
+    """Summary of one benchmark."""
+    name: str
+    kind: str  # "micro" or "load"
+    ops_per_sec: float
+    p50_ms: float
+    p99_ms: float
+    peak_kb: float
+    samples: int
+    errors: int = 0
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def summarize(name: str,
+              kind: str,
+              latencies: Sequence[float],
+              operations: int,
+              elapsed: float,
+              peak_bytes: int,
+              errors: int = 0,
+              **extra) -> BenchmarkResult:
+    """
+    Build a result from per-sample latencies (seconds), the number of
+    operations completed in `elapsed` wall-clock seconds and the peak
+    traced memory in bytes.
+    """
+    p50, p99 = np.percentile(np.asarray(latencies, dtype=np.float64), [50, 99]) if len(latencies) else (0.0, 0.0)
+    return BenchmarkResult(
+        name=name,
+        kind=kind,
+        ops_per_sec=round(operations / elapsed, 2) if elapsed > 0 else 0.0,
+        p50_ms=round(float(p50) * 1000, 4),
+        p99_ms=round(float(p99) * 1000, 4),
+        peak_kb=round(peak_bytes / 1024, 1),
+        samples=len(latencies),
+        errors=errors,
+        extra=extra
+    )
+
+
+def combine(rounds: Sequence[BenchmarkResult]) -> BenchmarkResult:
+    """
+    One result from several rounds of a benchmark: the median of each
+    metric, with each metric's relative spread across rounds in
+    extra['spread'].
+    """
+    first = rounds[0]
+    medians, spread = {}, {}
+    for metric in METRICS:
+        values = np.array([getattr(r, metric) for r in rounds], dtype=np.float64)
+        medians[metric] = float(np.median(values))
+        spread[metric] = round(float((values.max() - values.min()) / medians[metric]), 4) if medians[metric] else 0.0
+    return BenchmarkResult(
+        name=first.name,
+        kind=first.kind,
+        ops_per_sec=round(medians['ops_per_sec'], 2),
+        p50_ms=round(medians['p50_ms'], 4),
+        p99_ms=round(medians['p99_ms'], 4),
+        peak_kb=round(medians['peak_kb'], 1),
+        samples=sum(r.samples for r in rounds),
+        errors=sum(r.errors for r in rounds),
+        extra={**first.extra, 'rounds': len(rounds), 'spread': spread}
+    )
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        completed = subprocess.run(['git', *args], capture_output=True, text=True, timeout=10,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return completed.stdout.strip() if completed.returncode == 0 else None
+
+
+def environment() -> Dict[str, Any]:
+    """Commit and machine the results were recorded on."""
+    status = _git('status', '--porcelain', '--untracked-files=no')
+    return {
+        'commit': _git('rev-parse', 'HEAD'),
+        'dirty': bool(status) if status is not None else None,
+        'timestamp': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+    }
+
+
+def save(path: str, results: List[BenchmarkResult], settings: Dict[str, Any],
+         env: Optional[Dict[str, Any]] = None) -> None:
+    payload = {
+        'version': RESULTS_VERSION,
+        'environment': env or environment(),
+        'settings': settings,
+        'benchmarks': {result.name: result.to_dict() for result in results}
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump(payload, handle, indent=2, sort_keys=True)
+        handle.write('\n')
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as handle:
+        payload = json.load(handle)
+    if payload.get('version') != RESULTS_VERSION:
+        raise ValueError(f"Unsupported results version in {path}: {payload.get('version')}")
+    return payload
+
+
+@dataclass
+class Change:
+    """One metric of one benchmark, baseline against current."""
+    benchmark: str
+    metric: str
+    baseline: float
+    current: float
+    change: float  # relative; positive means worse
+    regression: bool
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _worse_by(metric: str, baseline: float, current: float) -> float:
+    """Relative change, signed so that positive is a regression."""
+    if baseline == 0:
+        return 0.0 if current == 0 else (float('inf') if not METRICS[metric] else -1.0)
+    change = (current - baseline) / baseline
+    return -change if METRICS[metric] else change
+
+
+def _spread(result: Dict[str, Any], metric: str) -> float:
+    return result.get('extra', {}).get('spread', {}).get(metric, 0.0)
+
+
+def compare(baseline: Dict[str, Any],
+            current: Dict[str, Any],
+            threshold: float = 0.15,
+            tail_threshold: float = 0.50) -> Dict[str, Any]:
+    """
+    Compare two results files (as loaded by `load`).
+
+    Throughput, p50 and peak memory regress when worse than the baseline by
+    more than `threshold`; p99 is noisier and uses `tail_threshold`. Either
+    is raised to SPREAD_FACTOR times the larger round-to-round spread of the
+    two runs, so a benchmark is only flagged when the change is clearly
+    outside its own noise. A benchmark that starts failing requests is
+    always a regression.
+
+    Returns:
+        Dict with the per-metric changes, the regressions, benchmarks only in
+        one of the files and settings that differ between the runs
+    """
+    base_benchmarks = baseline['benchmarks']
+    current_benchmarks = current['benchmarks']
+    changes: List[Change] = []
+    for name in sorted(set(base_benchmarks) & set(current_benchmarks)):
+        before, after = base_benchmarks[name], current_benchmarks[name]
+        for metric in METRICS:
+            worse = _worse_by(metric, before[metric], after[metric])
+            limit = max(tail_threshold if metric == 'p99_ms' else threshold,
+                        SPREAD_FACTOR * max(_spread(before, metric), _spread(after, metric)))
+            delta = abs(after[metric] - before[metric])
+            if metric.endswith('_ms') and delta < MIN_LATENCY_DELTA_MS:
+                worse_enough = False
+            elif metric == 'peak_kb' and delta < MIN_MEMORY_DELTA_KB:
+                worse_enough = False
+            else:
+                worse_enough = worse > limit
+            changes.append(Change(name, metric, before[metric], after[metric], round(worse, 4), worse_enough))
+        if after.get('errors', 0) > before.get('errors', 0):
+            changes.append(Change(name, 'errors', before.get('errors', 0), after['errors'], 1.0, True))
+
+    settings_changed = {
+        key: (baseline['settings'].get(key), current['settings'].get(key))
+        for key in set(baseline['settings']) | set(current['settings'])
+        if baseline['settings'].get(key) != current['settings'].get(key)
+    }
+    return {
+        'baseline_commit': baseline['environment'].get('commit'),
+        'current_commit': current['environment'].get('commit'),
+        'changes': changes,
+        'regressions': [c for c in changes if c.regression],
+        'missing': sorted(set(base_benchmarks) - set(current_benchmarks)),
+        'new': sorted(set(current_benchmarks) - set(base_benchmarks)),
+        'settings_changed': settings_changed,
+        'machine_changed': any(
+            baseline['environment'].get(key) != current['environment'].get(key)
+            for key in ('python', 'platform', 'machine', 'cpus')
+        )
+    }
+
+
+def format_results(results: Sequence[BenchmarkResult]) -> str:
+    lines = [f"{'benchmark':52s} {'ops/s':>11s} {'p50 ms':>10s} {'p99 ms':>10s} {'peak KiB':>10s} {'errors':>7s}"]
+    for result in results:
+        lines.append(f"{result.name[:52]:52s} {result.ops_per_sec:11.1f} {result.p50_ms:10.3f} "
+                     f"{result.p99_ms:10.3f} {result.peak_kb:10.1f} {result.errors:7d}")
+    return '\n'.join(lines)
+
+
+def format_comparison(comparison: Dict[str, Any]) -> str:
+    base = (comparison['baseline_commit'] or 'unknown')[:12]
+    head = (comparison['current_commit'] or 'unknown')[:12]
+    lines = [f"Compared against {base} (current {head})"]
+    if comparison['machine_changed']:
+        lines.append("warning: the runs were recorded on different machines or Python versions")
+    for key, (before, after) in sorted(comparison['settings_changed'].items()):
+        lines.append(f"warning: setting {key} changed from {before} to {after}")
+    for name in comparison['missing']:
+        lines.append(f"missing: {name}")
+    for name in comparison['new']:
+        lines.append(f"new: {name}")
+    regressions = comparison['regressions']
+    if not regressions:
+        lines.append("No regressions.")
+    for change in regressions:
+        lines.append(f"REGRESSION {change.benchmark} {change.metric}: "
+                     f"{change.baseline:g} -> {change.current:g} ({change.change:+.1%} worse)")
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.results baseline.json current.json
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m benchmarks.results BASELINE.json CURRENT.json")
+    outcome = compare(load(sys.argv[1]), load(sys.argv[2]))
+    print(format_comparison(outcome))
+    sys.exit(1 if outcome['regressions'] else 0)
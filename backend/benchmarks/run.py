@@ -0,0 +1,84 @@
+"""
+Run the benchmark suite, optionally save the results and compare them with
+a baseline. Exits with 1 when a benchmark regressed.
+
+    python -m benchmarks.run --output base.json          # on main
+    python -m benchmarks.run --compare base.json          # on a branch
+    python -m benchmarks.run --suite micro --filter to_dict
+"""
+
+import sys
+import shutil
+import argparse
+import tempfile
+
+from . import load as load_suite
+from .results import compare, environment, format_comparison, format_results, load, save
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--suite', choices=('all', 'micro', 'load'), default='all')
+    parser.add_argument('--filter', action='append', default=[],
+                        help='only run benchmarks whose name contains this (repeatable)')
+    parser.add_argument('--duration', type=float, default=0.5, help='seconds per microbenchmark round')
+    parser.add_argument('--rounds', type=int, default=5,
+                        help='rounds per benchmark; each metric is the median across rounds')
+    parser.add_argument('--requests', type=int, default=200, help='timed requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=8, help='requests in flight per endpoint')
+    parser.add_argument('--warmup', type=int, default=10, help='untimed requests per endpoint')
+    parser.add_argument('--memory-requests', type=int, default=20, help='requests in the traced memory pass')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='added to every stubbed upstream call')
+    parser.add_argument('--output', help='write results JSON here')
+    parser.add_argument('--compare', metavar='BASELINE', help='results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help='relative slowdown that counts as a regression (throughput, p50, memory); '
+                             'raised to cover the run-to-run spread of noisier benchmarks')
+    parser.add_argument('--tail-threshold', type=float, default=0.50, help='same, for p99')
+    args = parser.parse_args(argv)
+    if args.rounds < 1:
+        parser.error('--rounds must be at least 1')
+
+    # Stores, logs and caches go to a scratch directory; config reads it on import
+    workdir = tempfile.mkdtemp(prefix='bench-')
+    load_suite.prepare_environment(workdir)
+    settings = {
+        'duration': args.duration,
+        'rounds': args.rounds,
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'warmup': args.warmup,
+        'memory_requests': args.memory_requests,
+        'latency_ms': args.latency_ms,
+    }
+
+    results = []
+    try:
+        if args.suite in ('all', 'micro'):
+            from .micro import run_micro
+            results += run_micro(args.duration, args.filter, args.rounds)
+        if args.suite in ('all', 'load'):
+            results += load_suite.run_load(args.requests, args.concurrency, args.warmup, args.memory_requests,
+                                           args.latency_ms / 1000, args.filter, args.rounds)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(format_results(results))
+    if args.suite != 'micro' and not args.filter:
+        for route, reason in load_suite.SKIPPED.items():
+            print(f"skipped {route}: {reason}")
+
+    current = {'environment': environment(), 'settings': settings,
+               'benchmarks': {r.name: r.to_dict() for r in results}}
+    if args.output:
+        save(args.output, results, settings, current['environment'])
+        print(f"Results written to {args.output}")
+    if args.compare:
+        outcome = compare(load(args.compare), current, args.threshold, args.tail_threshold)
+        print(format_comparison(outcome))
+        return 1 if outcome['regressions'] else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
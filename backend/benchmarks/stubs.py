@@ -0,0 +1,252 @@
+"""
+Deterministic stand-ins for the external dependencies, so benchmarks
+measure this code and not the network: market data (yfinance), Gemini,
+Salesforce (the simple-salesforce status check, and the REST API through
+the in-process mock org) and the news feeds. Each stub can add a fixed
+latency per upstream call to model a slow dependency.
+"""
+
+import json
+import re
+import time
+import zlib
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from financial_data_service import FinancialDataService
+from models.sentiment import Article
+from news_aggregator import NewsAggregator
+from price_store import PriceSeries, period_start
+from salesforce_client import SalesforceClient
+from vision_engine import VisionEngine
+
+SECTORS = (
+    ('Technology', 'Software'),
+    ('Healthcare', 'Drug Manufacturers'),
+    ('Financial Services', 'Banks'),
+    ('Energy', 'Oil & Gas'),
+    ('Consumer Defensive', 'Beverages'),
+    ('Industrials', 'Machinery'),
+    ('Utilities', 'Utilities - Regulated Electric'),
+    ('Real Estate', 'REIT - Retail'),
+)
+
+HEADLINES = (
+    "{ticker} beats earnings estimates as revenue growth accelerates",
+    "{ticker} shares slide after guidance cut and weak margins",
+    "Analysts upgrade {ticker} on strong demand outlook",
+    "{ticker} faces regulatory probe over accounting practices",
+    "{ticker} announces record buyback and dividend increase",
+    "{ticker} trades flat ahead of the quarterly report",
+)
+
+
+def _seed(ticker: str) -> int:
+    return zlib.crc32(ticker.upper().encode('utf-8'))
+
+
+def _pause(latency: float) -> None:
+    if latency > 0:
+        time.sleep(latency)
+
+
+def synthetic_series(ticker: str, years: int = 3, end: Optional[date] = None) -> PriceSeries:
+    """Weekday bars up to `end` (today) from a random walk seeded by the ticker."""
+    rng = np.random.default_rng(_seed(ticker))
+    end_day = np.datetime64(end or date.today(), 'D')
+    dates = np.arange(end_day - np.timedelta64(years * 365, 'D'), end_day + 1)
+    dates = dates[(dates.view('int64') - 4) % 7 < 5]  # 1970-01-05 was a Monday
+    drift, volatility = rng.uniform(-0.0002, 0.0008), rng.uniform(0.008, 0.03)
+    close = rng.uniform(20, 400) * np.exp(np.cumsum(rng.normal(drift, volatility, len(dates))))
+    spread = np.abs(rng.normal(0, volatility / 2, len(dates)))
+    return PriceSeries(
+        ticker=ticker.upper(), period='max', dates=dates,
+        open=close * (1 + rng.normal(0, volatility / 4, len(dates))),
+        high=close * (1 + spread), low=close * (1 - spread), close=close,
+        volume=rng.integers(500_000, 50_000_000, len(dates))
+    )
+
+
+def synthetic_info(ticker: str) -> Dict[str, Any]:
+    """yfinance-style `Ticker.info` with plausible fundamentals."""
+    rng = np.random.default_rng(_seed(ticker) + 1)
+    close = float(synthetic_series(ticker).close[-1])
+    sector, industry = SECTORS[_seed(ticker) % len(SECTORS)]
+    return {
+        'currentPrice': round(close, 2),
+        'previousClose': round(close * (1 + rng.normal(0, 0.01)), 2),
+        'marketCap': int(rng.uniform(2e9, 2.5e12)),
+        'trailingPE': round(float(rng.uniform(5, 60)), 2),
+        'fiftyTwoWeekHigh': round(close * rng.uniform(1.05, 1.5), 2),
+        'fiftyTwoWeekLow': round(close * rng.uniform(0.5, 0.95), 2),
+        'revenueGrowth': round(float(rng.normal(0.08, 0.1)), 4),
+        'profitMargins': round(float(rng.uniform(-0.05, 0.4)), 4),
+        'debtToEquity': round(float(rng.uniform(0, 250)), 2),
+        'returnOnEquity': round(float(rng.normal(0.15, 0.1)), 4),
+        'volume': int(rng.integers(500_000, 50_000_000)),
+        'sector': sector,
+        'industry': industry,
+    }
+
+
+class StubFinancialDataService(FinancialDataService):
+    """FinancialDataService whose upstream calls return synthetic data instead of hitting yfinance."""
+
+    def __init__(self, latency: float = 0.0, years: int = 3, price_store=None):
+        super().__init__(price_store)
+        self.latency = latency
+        self.years = years
+        self.upstream_calls = 0
+        self._series: Dict[str, PriceSeries] = {}
+
+    def fetch_price_series(self,
+                           ticker: str,
+                           start: Optional[date] = None,
+                           period: Optional[str] = None) -> PriceSeries:
+        self.upstream_calls += 1
+        _pause(self.latency)
+        ticker = ticker.strip().upper()
+        series = self._series.get(ticker)
+        if series is None:
+            series = self._series[ticker] = synthetic_series(ticker, self.years)
+        if start is not None:
+            first = np.datetime64(start, 'D')
+        else:
+            begin = period_start(period or 'max', series.dates[-1].astype(object))
+            first = np.datetime64(begin, 'D') if begin is not None else series.dates[0]
+        view = series.slice(int(np.searchsorted(series.dates, first)))
+        view.period = period or 'max'
+        return view
+
+    def _info(self, ticker: str) -> dict:
+        self.upstream_calls += 1
+        _pause(self.latency)
+        return synthetic_info(ticker.strip().upper())
+
+
+def gemini_analysis(holdings: List[Dict[str, Any]], suggestions: bool = True) -> Dict[str, Any]:
+    """A well-formed Gemini portfolio analysis for the given {"ticker", "qty"} holdings."""
+    analysis: Dict[str, Any] = {
+        'health_score': 6,
+        'risk_profile': 'Aggressive (Tech heavy)',
+        'strengths': ['Strong growth potential', 'High-quality companies'],
+        'weaknesses': ['Concentrated in technology sector', 'No defensive positions'],
+    }
+    if suggestions:
+        analysis['suggestions'] = [
+            {'ticker': 'VTI', 'type': 'diversification', 'reason': 'Adds broad total market coverage to de-risk.'},
+            {'ticker': 'JNJ', 'type': 'sector_balance', 'reason': 'Adds stable healthcare dividend exposure.'},
+            {'ticker': 'GLD', 'type': 'risk_reduction', 'reason': 'Hedge against market uncertainty.'},
+        ]
+    return {'extracted_holdings': holdings, 'analysis': analysis}
+
+
+class StubGeminiResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubGeminiModel:
+    """Answers the prompts VisionEngine sends with canned JSON."""
+
+    model_name = 'models/gemini-1.5-flash'
+
+    def __init__(self, holdings: List[Dict[str, Any]], latency: float = 0.0):
+        self.holdings = holdings
+        self.latency = latency
+        self.calls = 0
+
+    def generate_content(self, contents) -> StubGeminiResponse:
+        self.calls += 1
+        _pause(self.latency)
+        prompt = contents[0] if isinstance(contents, list) else contents
+        if '"reasons"' in prompt:
+            count = len(re.findall(r'^\d+\. ', prompt, flags=re.MULTILINE))
+            reasons = [f"Recommendation {i + 1} rephrased for a retail investor." for i in range(count)]
+            return StubGeminiResponse(json.dumps({'reasons': reasons}))
+        return StubGeminiResponse(json.dumps(gemini_analysis(self.holdings, 'suggestions' in prompt)))
+
+
+class StubVisionEngine(VisionEngine):
+    """VisionEngine with the real prompts and parsing, talking to StubGeminiModel."""
+
+    def __init__(self, holdings: List[Dict[str, Any]], latency: float = 0.0):
+        self.holdings = holdings
+        self.latency = latency
+        super().__init__()
+
+    def _configure_client(self) -> None:
+        self.api_key = 'stub'
+        self.model = StubGeminiModel(self.holdings, self.latency)
+
+    def ping(self) -> Dict:
+        _pause(self.latency)
+        return {'model': self.model.model_name, 'input_token_limit': 1048576}
+
+
+class StubSalesforceService:
+    """Stands in for SalesforceService (simple-salesforce login and status queries)."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def is_connected(self) -> bool:
+        return True
+
+    def test_connection(self, max_age=None) -> Dict[str, Any]:
+        _pause(self.latency)
+        return {
+            'connected': True,
+            'user_count': 1,
+            'username': 'bench@example.com',
+            'connection_type': 'Stub'
+        }
+
+
+class MockOrgSalesforceClient(SalesforceClient):
+    """SalesforceClient whose HTTP calls go to salesforce_mock in-process instead of over a socket."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('login_url', 'http://salesforce.mock')
+        kwargs.setdefault('client_id', 'mock')
+        kwargs.setdefault('client_secret', 'mock')
+        kwargs.setdefault('username', 'bench@example.com')
+        kwargs.setdefault('password', 'password')
+        kwargs.setdefault('security_token', '')
+        super().__init__(**kwargs)
+
+    @property
+    def http(self):
+        import httpx
+        import salesforce_mock
+
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(transport=httpx.ASGITransport(app=salesforce_mock.app),
+                                           timeout=self.timeout)
+        return self._http
+
+
+class StubNewsAggregator(NewsAggregator):
+    """Returns canned articles for a ticker instead of fetching RSS feeds and pages."""
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+
+    def fetch_articles(self, queries, limit=10, cancel_event=None) -> List[Article]:
+        _pause(self.latency)
+        ticker = queries[0].split()[0] if queries else 'SPY'
+        published = date.today()
+        return [
+            Article(
+                title=HEADLINES[i % len(HEADLINES)].format(ticker=ticker),
+                url=f"https://news.example.com/{ticker.lower()}/{i}",
+                published=(published - timedelta(days=i)).isoformat(),
+                content=' '.join([HEADLINES[(i + j) % len(HEADLINES)].format(ticker=ticker) + '.'
+                                  for j in range(12)]),
+                source_type='Full Article'
+            )
+            for i in range(limit)
+        ]
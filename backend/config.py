@@ -31,11 +31,146 @@ class Config:
     SALESFORCE_PASSWORD = os.environ.get('SALESFORCE_PASSWORD')
     SALESFORCE_TOKEN = os.environ.get('SALESFORCE_TOKEN')
     SALESFORCE_DOMAIN = os.environ.get('SALESFORCE_DOMAIN', 'login')
+    SALESFORCE_LOGIN_URL = os.environ.get('SALESFORCE_LOGIN_URL', '')  # defaults to https://<domain>.salesforce.com
+    SALESFORCE_CLIENT_ID = os.environ.get('SALESFORCE_CLIENT_ID')  # connected app for OAuth2 login
+    SALESFORCE_CLIENT_SECRET = os.environ.get('SALESFORCE_CLIENT_SECRET')
+    SALESFORCE_API_VERSION = os.environ.get('SALESFORCE_API_VERSION', '58.0')
+    SALESFORCE_MAX_CONNECTIONS = int(os.environ.get('SALESFORCE_MAX_CONNECTIONS', '10'))  # pooled keep-alive connections
+    SALESFORCE_TIMEOUT = float(os.environ.get('SALESFORCE_TIMEOUT', '30'))  # seconds
+    SALESFORCE_STATUS_TTL = int(os.environ.get('SALESFORCE_STATUS_TTL', '60'))  # seconds a connection test is reused
+
+    # Salesforce scan result sync (write-behind)
+    SALESFORCE_SYNC_ENABLED = os.environ.get('SALESFORCE_SYNC_ENABLED', 'False').lower() == 'true'
+    SALESFORCE_SCAN_OBJECT = os.environ.get('SALESFORCE_SCAN_OBJECT', 'Portfolio_Scan__c')
+    SALESFORCE_SCAN_EXTERNAL_ID = os.environ.get('SALESFORCE_SCAN_EXTERNAL_ID', 'Scan_Id__c')
+    SALESFORCE_SYNC_BATCH_SIZE = int(os.environ.get('SALESFORCE_SYNC_BATCH_SIZE', '200'))
+    SALESFORCE_SYNC_FLUSH_SECONDS = float(os.environ.get('SALESFORCE_SYNC_FLUSH_SECONDS', '5'))
+    SALESFORCE_SYNC_MAX_PENDING = int(os.environ.get('SALESFORCE_SYNC_MAX_PENDING', '10000'))
+    SALESFORCE_BULK_THRESHOLD = int(os.environ.get('SALESFORCE_BULK_THRESHOLD', '2000'))  # records per Bulk API job
+
+    # Startup settings
+    STARTUP_WARMUP = os.environ.get('STARTUP_WARMUP', 'True').lower() == 'true'  # build Gemini / Salesforce clients after startup
+    STARTUP_IMPORT_BUDGET_MS = int(os.environ.get('STARTUP_IMPORT_BUDGET_MS', '3000'))  # checked by startup_profile.py
+
+    # Response encoding
+    RESPONSE_SNAPSHOT_TTL = float(os.environ.get('RESPONSE_SNAPSHOT_TTL', '60'))  # seconds a pre-encoded snapshot is reused
+
+    # HTTP caching and compression
+    HTTP_CACHE_ENABLED = os.environ.get('HTTP_CACHE_ENABLED', 'True').lower() == 'true'  # server-side reuse within max-age
+    HTTP_CACHE_MAX_ENTRIES = int(os.environ.get('HTTP_CACHE_MAX_ENTRIES', '512'))
+    COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))  # smaller bodies are sent uncompressed
+
+    # Rate limiting (token buckets per client and tier)
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+    RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')  # "memory" or "redis" (shared across workers)
+    RATE_LIMIT_EXPENSIVE_PER_MINUTE = float(os.environ.get('RATE_LIMIT_EXPENSIVE_PER_MINUTE', '10'))  # Gemini / model / heavy compute
+    RATE_LIMIT_EXPENSIVE_BURST = float(os.environ.get('RATE_LIMIT_EXPENSIVE_BURST', '5'))
+    RATE_LIMIT_STANDARD_PER_MINUTE = float(os.environ.get('RATE_LIMIT_STANDARD_PER_MINUTE', '300'))
+    RATE_LIMIT_STANDARD_BURST = float(os.environ.get('RATE_LIMIT_STANDARD_BURST', '60'))
+    RATE_LIMIT_API_KEY_HEADER = os.environ.get('RATE_LIMIT_API_KEY_HEADER', 'X-API-Key')
+    RATE_LIMIT_API_KEYS = os.environ.get('RATE_LIMIT_API_KEYS', '')  # comma-separated; clients sending one get their own budget
+    RATE_LIMIT_TRUST_PROXY = os.environ.get('RATE_LIMIT_TRUST_PROXY', 'False').lower() == 'true'  # key on X-Forwarded-For
+    RATE_LIMIT_MAX_CLIENTS = int(os.environ.get('RATE_LIMIT_MAX_CLIENTS', '10000'))  # in-memory buckets kept
+    RATE_LIMIT_REDIS_TIMEOUT = float(os.environ.get('RATE_LIMIT_REDIS_TIMEOUT', '0.25'))  # seconds; fails open
+
+    # Prometheus metrics served at /metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'  # request and stage latency histograms
+
+    # Request profiling (opt-in; sampled stacks downloadable from /api/admin/profiles)
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False').lower() == 'true'
+    PROFILING_HEADER = os.environ.get('PROFILING_HEADER', 'X-Profile')  # send it to profile a request
+    PROFILING_TOKEN = os.environ.get('PROFILING_TOKEN', '')  # required; the header must carry it (also guards the admin endpoints)
+    PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '0'))  # fraction of requests profiled without the header
+    PROFILING_INTERVAL_MS = float(os.environ.get('PROFILING_INTERVAL_MS', '5'))
+    PROFILING_MAX_SECONDS = float(os.environ.get('PROFILING_MAX_SECONDS', '60'))  # stop sampling long requests after this
+    PROFILING_MAX_STORED = int(os.environ.get('PROFILING_MAX_STORED', '50'))
+
+    # Logging (JSON lines written off the event loop by a queue listener thread)
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')  # "json" or "text"
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', '10000'))  # records beyond this are dropped, never block
+    LOG_SAMPLING = os.environ.get('LOG_SAMPLING', 'vision_engine=0.1')  # logger=rate pairs; INFO/DEBUG only
+    LOG_REQUEST_ID_HEADER = os.environ.get('LOG_REQUEST_ID_HEADER', 'X-Request-ID')
+
+    # Dependency health checks (run in the background, served from memory)
+    HEALTH_CHECK_INTERVAL = float(os.environ.get('HEALTH_CHECK_INTERVAL', '30'))  # seconds between probes
+    HEALTH_CHECK_TIMEOUT = float(os.environ.get('HEALTH_CHECK_TIMEOUT', '5'))  # seconds per probe
+    HEALTH_STALE_SECONDS = float(os.environ.get('HEALTH_STALE_SECONDS', '0'))  # 0 = 3 intervals + timeout
+    HEALTH_CRITICAL_CHECKS = os.environ.get('HEALTH_CRITICAL_CHECKS', '')  # comma-separated, gate readiness
     
     # Portfolio scanning settings
     MAX_FILE_SIZE_MB = int(os.environ.get('MAX_FILE_SIZE_MB', '10'))
     SUPPORTED_IMAGE_FORMATS = ['image/jpeg', 'image/jpg', 'image/png']
-    
+
+    # Local price history store
+    PRICE_STORE_ENABLED = os.environ.get('PRICE_STORE_ENABLED', 'True').lower() == 'true'
+    PRICE_STORE_PATH = os.environ.get('PRICE_STORE_PATH', 'data/prices')
+    PRICE_STORE_REFRESH_SECONDS = int(os.environ.get('PRICE_STORE_REFRESH_SECONDS', '900'))
+    PRICE_STORE_VERIFY_DAYS = int(os.environ.get('PRICE_STORE_VERIFY_DAYS', '7'))  # stored days re-fetched to detect adjustments
+
+    # Portfolio risk engine settings
+    RISK_LOOKBACK_PERIOD = os.environ.get('RISK_LOOKBACK_PERIOD', '1y')
+    RISK_BENCHMARK_TICKER = os.environ.get('RISK_BENCHMARK_TICKER', 'SPY')
+
+    # Monte Carlo simulation settings
+    MONTE_CARLO_CHUNK_ELEMENTS = int(os.environ.get('MONTE_CARLO_CHUNK_ELEMENTS', '4000000'))  # random draws per chunk
+    MONTE_CARLO_WORKERS = int(os.environ.get('MONTE_CARLO_WORKERS', '0'))  # worker processes, 0 = in-process
+    MONTE_CARLO_MAX_PATHS = int(os.environ.get('MONTE_CARLO_MAX_PATHS', '200000'))
+    MONTE_CARLO_MAX_STEPS = int(os.environ.get('MONTE_CARLO_MAX_STEPS', '500000000'))  # paths x days (x holdings in buy and hold, which caps it below 100k x 252 x 50)
+
+    # Rebalancing optimizer settings
+    REBALANCE_RISK_AVERSION = float(os.environ.get('REBALANCE_RISK_AVERSION', '3.0'))
+    REBALANCE_MAX_WEIGHT = float(os.environ.get('REBALANCE_MAX_WEIGHT', '0.25'))  # cap per ticker
+
+    # Backtesting settings
+    VERDICT_LOG_ENABLED = os.environ.get('VERDICT_LOG_ENABLED', 'True').lower() == 'true'
+    VERDICT_LOG_PATH = os.environ.get('VERDICT_LOG_PATH', 'data/verdicts.jsonl')
+    BACKTEST_WORKERS = int(os.environ.get('BACKTEST_WORKERS', '0'))  # worker processes, 0 = in-process
+
+    # Fundamentals screener settings
+    SCREENER_TABLE_PATH = os.environ.get('SCREENER_TABLE_PATH', 'data/fundamentals.npz')
+    SCREENER_UNIVERSE_PATH = os.environ.get('SCREENER_UNIVERSE_PATH', 'data/universe.txt')  # one ticker per line
+    SCREENER_INDEXED_COLUMNS = os.environ.get('SCREENER_INDEXED_COLUMNS', 'market_cap,pe_ratio,return_on_equity')
+    SCREENER_REFRESH_WORKERS = int(os.environ.get('SCREENER_REFRESH_WORKERS', '16'))
+    SCREENER_DEFAULT_LIMIT = int(os.environ.get('SCREENER_DEFAULT_LIMIT', '50'))
+
+    # Portfolio suggestion settings
+    SUGGESTION_MODE = os.environ.get('SUGGESTION_MODE', 'engine')  # "engine" (local ranking) or "llm"
+    SUGGESTION_LLM_PHRASING = os.environ.get('SUGGESTION_LLM_PHRASING', 'False').lower() == 'true'
+
+    # Correlation service settings
+    CORRELATION_WINDOW = int(os.environ.get('CORRELATION_WINDOW', '252'))  # daily returns
+    CORRELATION_MIN_PERIODS = int(os.environ.get('CORRELATION_MIN_PERIODS', '20'))  # overlapping sessions per pair
+    CORRELATION_CACHE_MAX_TICKERS = int(os.environ.get('CORRELATION_CACHE_MAX_TICKERS', '2000'))  # per window
+
+    # WebSocket push settings
+    WS_QUEUE_SIZE = int(os.environ.get('WS_QUEUE_SIZE', '100'))  # messages buffered per client
+    WS_MAX_TOPICS = int(os.environ.get('WS_MAX_TOPICS', '20'))  # subscriptions per connection
+    WS_QUOTE_INTERVAL = int(os.environ.get('WS_QUOTE_INTERVAL', '15'))  # seconds
+    WS_MARKET_MOOD_INTERVAL = int(os.environ.get('WS_MARKET_MOOD_INTERVAL', '60'))  # seconds
+
+    # Sentiment model inference settings
+    SENTIMENT_MODEL = os.environ.get('SENTIMENT_MODEL', 'ProsusAI/finbert')
+    SENTIMENT_MAX_LENGTH = int(os.environ.get('SENTIMENT_MAX_LENGTH', '512'))  # tokens per window
+    SENTIMENT_WINDOW_STRIDE = int(os.environ.get('SENTIMENT_WINDOW_STRIDE', '128'))  # token overlap
+    SENTIMENT_MAX_WINDOWS = int(os.environ.get('SENTIMENT_MAX_WINDOWS', '4'))  # per article
+    SENTIMENT_BATCH_SIZE = int(os.environ.get('SENTIMENT_BATCH_SIZE', '16'))
+    SENTIMENT_MAX_BATCH_TOKENS = int(os.environ.get('SENTIMENT_MAX_BATCH_TOKENS', '8192'))
+    SENTIMENT_NUM_THREADS = int(os.environ.get('SENTIMENT_NUM_THREADS', '0'))  # 0 = physical cores
+    SENTIMENT_QUANTIZE = os.environ.get('SENTIMENT_QUANTIZE', 'none')  # "none" or "int8"
+    SENTIMENT_BACKEND = os.environ.get('SENTIMENT_BACKEND', 'torch')  # "torch" or "onnx"
+    SENTIMENT_ONNX_PATH = os.environ.get('SENTIMENT_ONNX_PATH', 'models_cache/finbert.onnx')
+
+    # Sentiment cascade settings (VADER first, transformer only for ambiguous articles)
+    SENTIMENT_MODE = os.environ.get('SENTIMENT_MODE', 'cascade')  # "full", "cascade" or "vader"
+    SENTIMENT_CASCADE_NEUTRAL_BAND = float(os.environ.get('SENTIMENT_CASCADE_NEUTRAL_BAND', '0.5'))
+    SENTIMENT_CASCADE_HEADLINE_THRESHOLD = float(os.environ.get('SENTIMENT_CASCADE_HEADLINE_THRESHOLD', '0.3'))
+
+    # Sentiment result cache settings
+    SENTIMENT_CACHE_ENABLED = os.environ.get('SENTIMENT_CACHE_ENABLED', 'True').lower() == 'true'
+    SENTIMENT_CACHE_PATH = os.environ.get('SENTIMENT_CACHE_PATH', 'data/sentiment_cache.sqlite3')
+    SENTIMENT_CACHE_MAX_ENTRIES = int(os.environ.get('SENTIMENT_CACHE_MAX_ENTRIES', '200000'))
+
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
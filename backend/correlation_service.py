@@ -0,0 +1,413 @@
+"""
+Return correlations and diversification scoring for arbitrary ticker sets.
+Pairwise correlations are cached per (pair, window) for the last session
+they cover, so extending a ticker set only computes the new pairs, one
+matrix product per batch of new tickers.
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import Config
+from financial_data_service import (
+    FinancialDataError, FinancialDataService, get_financial_data_service
+)
+from price_store import PriceSeries
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class CorrelationError(Exception):
+    """Custom exception for correlation service errors"""
+    pass
+
+
+@dataclass
+class CorrelationMatrix:
+    """Symmetric correlation matrix; NaN where two series overlap too little."""
+    tickers: List[str]
+    window: int
+    as_of: np.datetime64
+    values: np.ndarray
+    computed_pairs: int = 0
+
+    def to_dict(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Nested {ticker: {ticker: correlation}} with NaN as None."""
+        rounded = np.round(self.values, 4)
+        return {
+            a: {b: (None if np.isnan(rounded[i, j]) else float(rounded[i, j])) for j, b in enumerate(self.tickers)}
+            for i, a in enumerate(self.tickers)
+        }
+
+
+def lookback_period(window: int) -> str:
+    """Smallest price period that covers ``window`` daily returns."""
+    if window < 120:
+        return '6mo'
+    if window < 250:
+        return '1y'
+    if window < 500:
+        return '2y'
+    if window < 1250:
+        return '5y'
+    return '10y'
+
+
+def aligned_returns(series: Sequence[PriceSeries], calendar: np.ndarray, window: int) -> np.ndarray:
+    """
+    Daily simple returns over the last ``window`` sessions of ``calendar``,
+    one column per series. Sessions before a listing or missing on both
+    sides are NaN; a missing single session carries the last close forward.
+    """
+    axis = calendar[-(window + 1):].astype('datetime64[D]')
+    closes = np.full((len(axis), len(series)), np.nan)
+    for column, bars in enumerate(series):
+        if len(bars) == 0:
+            continue
+        position = np.searchsorted(bars.dates.astype('datetime64[D]'), axis, side='right') - 1
+        listed = position >= 0
+        closes[listed, column] = np.asarray(bars.close)[position[listed]]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return closes[1:] / closes[:-1] - 1.0
+
+
+def pairwise_correlation(returns: np.ndarray,
+                         columns: Optional[np.ndarray] = None,
+                         min_periods: int = 20) -> np.ndarray:
+    """
+    Correlations of ``returns[:, columns]`` against every column, using only
+    sessions where both series have data.
+
+    Columns are centered once over their own valid sessions, then the
+    cross products, per-pair variances and overlap counts are each one
+    matrix product, so the cost is O(T * len(columns) * N) in BLAS.
+
+    Returns:
+        len(columns) x N matrix, NaN where the overlap is below ``min_periods``
+    """
+    valid = np.isfinite(returns)
+    counts_per_column = valid.sum(axis=0)
+    means = np.where(counts_per_column > 0, np.nansum(returns, axis=0) / np.maximum(counts_per_column, 1), 0.0)
+    centered = np.where(valid, returns - means, 0.0)
+    squared = centered * centered
+    mask = valid.astype(np.float64)
+
+    if columns is None:
+        columns = np.arange(returns.shape[1])
+    cross = centered[:, columns].T @ centered
+    left_var = squared[:, columns].T @ mask
+    right_var = mask[:, columns].T @ squared
+    overlap = mask[:, columns].T @ mask
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = cross / np.sqrt(left_var * right_var)
+    corr[(overlap < min_periods) | ~np.isfinite(corr)] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+def diversification_score(corr: np.ndarray, weights: Optional[np.ndarray] = None) -> Tuple[float, float]:
+    """
+    Diversification on a 0-100 scale from a correlation matrix and weights.
+
+    The weighted average off-diagonal correlation (pairs with unknown
+    correlation are ignored) is combined with concentration:
+    score = 100 * (1 - HHI) * (1 - max(avg_corr, 0)).
+    A single holding scores 0; many uncorrelated equal weights approach 100.
+
+    Returns:
+        Tuple of (score, weighted average pairwise correlation)
+    """
+    n = corr.shape[0]
+    if n < 2:
+        return 0.0, 1.0
+    weights = np.full(n, 1.0 / n) if weights is None else np.asarray(weights, dtype=np.float64)
+    weights = weights / weights.sum()
+
+    pair_weights = np.outer(weights, weights)
+    np.fill_diagonal(pair_weights, 0.0)
+    known = np.isfinite(corr)
+    total = pair_weights[known].sum()
+    avg_corr = float((pair_weights[known] * corr[known]).sum() / total) if total > 0 else 0.0
+
+    hhi = float(weights @ weights)
+    score = 100.0 * (1.0 - hhi) * (1.0 - max(avg_corr, 0.0))
+    return round(score, 1), round(avg_corr, 4)
+
+
+def correlation_from_covariance(covariance: np.ndarray) -> np.ndarray:
+    """Correlation matrix from a covariance matrix (NaN for zero-variance series)."""
+    std = np.sqrt(np.clip(np.diag(covariance), 0.0, None))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = covariance / np.outer(std, std)
+    corr[~np.isfinite(corr)] = np.nan
+    np.fill_diagonal(corr, 1.0)
+    return np.clip(corr, -1.0, 1.0)
+
+
+class PairCache:
+    """
+    Pairwise correlations for one window, stored as a dense matrix indexed
+    by ticker slot so a whole sub-matrix is read with one fancy index.
+
+    Every entry covers the same last session; when the calendar moves on the
+    cache is reset. Tickers are evicted least-recently-used and their slots
+    reused once more than ``max_tickers`` are held.
+    """
+
+    def __init__(self, max_tickers: int, initial_capacity: int = 64):
+        self.max_tickers = max_tickers
+        self.slots: 'OrderedDict[str, int]' = OrderedDict()
+        self.free: List[int] = []
+        self.values = np.full((initial_capacity, initial_capacity), np.nan, dtype=np.float32)
+        self.known = np.zeros((initial_capacity, initial_capacity), dtype=bool)
+        self.as_of: Optional[np.datetime64] = None
+
+    def reset(self, as_of: np.datetime64) -> None:
+        self.slots.clear()
+        self.free.clear()
+        self.known[:] = False
+        self.as_of = as_of
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self.values)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        values = np.full((capacity, capacity), np.nan, dtype=np.float32)
+        known = np.zeros((capacity, capacity), dtype=bool)
+        old = len(self.values)
+        values[:old, :old] = self.values
+        known[:old, :old] = self.known
+        self.values, self.known = values, known
+
+    def slots_for(self, tickers: Sequence[str]) -> np.ndarray:
+        """Slot per ticker, assigning new slots and evicting unused tickers as needed."""
+        requested = set(tickers)
+        for ticker in tickers:
+            if ticker in self.slots:
+                self.slots.move_to_end(ticker)
+        limit = max(self.max_tickers, len(requested))
+        new = [t for t in dict.fromkeys(tickers) if t not in self.slots]
+        while len(self.slots) + len(new) > limit:
+            victim, slot = next((t, s) for t, s in self.slots.items() if t not in requested)
+            del self.slots[victim]
+            self.known[slot, :] = False
+            self.known[:, slot] = False
+            self.free.append(slot)
+        self._grow(len(self.slots) + len(new))
+        next_slot = len(self.slots) + len(self.free)
+        for ticker in new:
+            if self.free:
+                self.slots[ticker] = self.free.pop()
+            else:
+                self.slots[ticker] = next_slot
+                next_slot += 1
+        return np.array([self.slots[t] for t in tickers], dtype=np.int64)
+
+
+def covering_rows(missing: np.ndarray) -> np.ndarray:
+    """
+    Rows whose full correlation rows cover every missing pair, chosen greedily
+    by most missing pairs first. Adding one ticker to a cached set yields
+    just that ticker.
+    """
+    missing = missing.copy()
+    counts = missing.sum(axis=1)
+    rows = []
+    while counts.any():
+        row = int(counts.argmax())
+        rows.append(row)
+        counts -= missing[:, row]
+        missing[:, row] = False
+        missing[row, :] = False
+        counts[row] = 0
+    return np.array(rows, dtype=np.int64)
+
+
+class CorrelationService:
+    """
+    Correlation matrices over aligned daily returns with a pairwise cache
+    per (pair, window).
+    """
+
+    def __init__(self,
+                 data_service: Optional[FinancialDataService] = None,
+                 calendar_ticker: Optional[str] = None,
+                 max_tickers: Optional[int] = None,
+                 min_periods: Optional[int] = None):
+        self.data_service = data_service or get_financial_data_service()
+        self.calendar_ticker = calendar_ticker or Config.RISK_BENCHMARK_TICKER
+        self.max_tickers = max_tickers or Config.CORRELATION_CACHE_MAX_TICKERS
+        self.min_periods = min_periods or Config.CORRELATION_MIN_PERIODS
+        self._caches: Dict[int, PairCache] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self, tickers: Sequence[str], period: str) -> List[PriceSeries]:
+        def fetch(ticker: str) -> PriceSeries:
+            try:
+                return self.data_service.get_price_series(ticker, period)
+            except FinancialDataError as e:
+                logger.warning(f"No price history for {ticker}: {e}")
+                return PriceSeries(
+                    ticker=ticker, period=period,
+                    dates=np.array([], dtype='datetime64[D]'),
+                    open=np.array([]), high=np.array([]), low=np.array([]), close=np.array([]),
+                    volume=np.array([], dtype=np.int64)
+                )
+
+        with ThreadPoolExecutor(max_workers=Config.MAX_WORKERS) as pool:
+            return list(pool.map(fetch, tickers))
+
+    def matrix(self, tickers: Sequence[str], window: Optional[int] = None) -> CorrelationMatrix:
+        """
+        Correlation matrix for a ticker set over the last ``window`` sessions.
+        Blocks on data provider I/O for tickers missing from the price store.
+
+        Raises:
+            CorrelationError: If fewer than two tickers or no calendar data
+        """
+        window = window or Config.CORRELATION_WINDOW
+        tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t and t.strip()))
+        if len(tickers) < 2:
+            raise CorrelationError("At least two tickers are required")
+
+        period = lookback_period(window)
+        try:
+            calendar = self.data_service.get_price_series(self.calendar_ticker, period).dates
+        except FinancialDataError as e:
+            raise CorrelationError(f"Calendar ticker {self.calendar_ticker} unavailable: {str(e)}")
+        if len(calendar) < 2:
+            raise CorrelationError(f"No sessions available for {self.calendar_ticker}")
+        as_of = calendar[-1]
+
+        n = len(tickers)
+        with self._lock:
+            cache = self._caches.setdefault(window, PairCache(self.max_tickers))
+            if cache.as_of != as_of:
+                cache.reset(as_of)
+            slots = cache.slots_for(tickers)
+            grid = np.ix_(slots, slots)
+            values = cache.values[grid].astype(np.float64)
+            missing = ~cache.known[grid]
+            np.fill_diagonal(missing, False)
+            missing_pairs = int(missing.sum()) // 2
+            self.hits += n * (n - 1) // 2 - missing_pairs
+            self.misses += missing_pairs
+        np.fill_diagonal(values, 1.0)
+
+        if missing_pairs:
+            rows = covering_rows(missing)
+            series = self._load(tickers, period)
+            returns = aligned_returns(series, calendar, window)
+            block = pairwise_correlation(returns, rows, self.min_periods)
+            values[rows, :] = block
+            values[:, rows] = block.T
+            np.fill_diagonal(values, 1.0)
+
+            with self._lock:
+                # Skip the write if the cache moved to a newer session meanwhile
+                if cache.as_of == as_of and all(cache.slots.get(t) == s for t, s in zip(tickers, slots)):
+                    cache.values[np.ix_(slots[rows], slots)] = block
+                    cache.values[np.ix_(slots, slots[rows])] = block.T
+                    cache.known[np.ix_(slots[rows], slots)] = True
+                    cache.known[np.ix_(slots, slots[rows])] = True
+
+        return CorrelationMatrix(tickers=tickers, window=window, as_of=as_of,
+                                 values=values, computed_pairs=missing_pairs)
+
+    def diversification(self,
+                        tickers: Sequence[str],
+                        weights: Optional[Sequence[float]] = None,
+                        window: Optional[int] = None) -> Dict[str, object]:
+        """Correlation matrix plus diversification score for a (weighted) ticker set."""
+        result = self.matrix(tickers, window)
+        score, avg_corr = diversification_score(result.values, None if weights is None else np.asarray(weights))
+        return {
+            'tickers': result.tickers,
+            'window': result.window,
+            'as_of': str(result.as_of),
+            'diversification_score': score,
+            'average_correlation': avg_corr,
+            'correlation_matrix': result.to_dict()
+        }
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'windows': len(self._caches),
+                'tickers': sum(len(cache.slots) for cache in self._caches.values()),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._caches.clear()
+
+
+def benchmark_universe(num_tickers: int = 1000, num_days: int = 252) -> Dict[str, float]:
+    """
+    Time a cold universe matrix, a fully cached repeat and adding one ticker,
+    with an in-memory data source (no network or disk).
+    """
+    rng = np.random.default_rng(0)
+    dates = np.datetime64('2023-01-02') + np.arange(num_days + 1).astype('timedelta64[D]')
+    market = rng.normal(0.0004, 0.01, num_days + 1)
+    universe: Dict[str, PriceSeries] = {}
+    for i in range(num_tickers + 2):
+        returns = rng.uniform(0.3, 1.5) * market + rng.normal(0, 0.015, num_days + 1)
+        close = 100 * np.cumprod(1 + returns)
+        universe[f"T{i:04d}"] = PriceSeries(f"T{i:04d}", '1y', dates, close, close, close, close,
+                                            np.zeros(num_days + 1, dtype=np.int64))
+    universe['SPY'] = universe['T0000']
+
+    class InMemoryData:
+        def get_price_series(self, ticker: str, period: str = '1y') -> PriceSeries:
+            return universe[ticker]
+
+    service = CorrelationService(data_service=InMemoryData(), max_tickers=num_tickers + 1)
+    tickers = [f"T{i:04d}" for i in range(num_tickers)]
+
+    start = time.perf_counter()
+    service.matrix(tickers, num_days)
+    cold = time.perf_counter()
+    service.matrix(tickers, num_days)
+    cached = time.perf_counter()
+    extended = service.matrix(tickers + [f"T{num_tickers:04d}"], num_days)
+    added = time.perf_counter()
+    return {
+        'tickers': num_tickers,
+        'cold_s': cold - start,
+        'cached_s': cached - cold,
+        'add_one_s': added - cached,
+        'add_one_pairs': extended.computed_pairs
+    }
+
+
+# Global correlation service instance
+correlation_service = None
+
+def get_correlation_service() -> CorrelationService:
+    """Get or create the global correlation service instance"""
+    global correlation_service
+    if correlation_service is None:
+        correlation_service = CorrelationService()
+    return correlation_service
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    row = benchmark_universe()
+    print(f"{row['tickers']} tickers: cold {row['cold_s']:.2f}s, cached {row['cached_s']:.2f}s, "
+          f"add one {row['add_one_s']:.2f}s ({row['add_one_pairs']} new pairs)")
@@ -0,0 +1,152 @@
+"""
+Server-side downsampling of OHLCV series for chart payloads.
+Line charts use Largest-Triangle-Three-Buckets (LTTB) on the close; candle
+charts aggregate bars into OHLC buckets.
+"""
+
+import json
+import time
+import logging
+from typing import Dict
+
+import numpy as np
+
+from price_store import PriceSeries
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+CHART_TYPES = ('line', 'candle')
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of the points kept by LTTB.
+
+    Bucket averages come from prefix sums and each bucket's triangle areas
+    are computed as one array operation; the only Python loop is over the
+    output buckets, because each pick depends on the previous one.
+
+    Args:
+        x: Monotonic x values (e.g. dates as integers)
+        y: Values to preserve the visual shape of
+        threshold: Number of points to keep, including first and last
+
+    Returns:
+        Sorted index array of length min(threshold, len(y))
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Interior points [1, n-1) split into threshold-2 buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+    sum_x = np.concatenate(([0.0], np.cumsum(x)))
+    sum_y = np.concatenate(([0.0], np.cumsum(y)))
+    counts = ends - starts
+    avg_x = (sum_x[ends] - sum_x[starts]) / counts
+    avg_y = (sum_y[ends] - sum_y[starts]) / counts
+    # Each bucket looks ahead to the next bucket's average; the last one to the final point
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for bucket in range(threshold - 2):
+        lo, hi = starts[bucket], ends[bucket]
+        area = np.abs(
+            (x[a] - next_x[bucket]) * (y[lo:hi] - y[a]) -
+            (x[a] - x[lo:hi]) * (next_y[bucket] - y[a])
+        )
+        a = lo + int(area.argmax())
+        selected[bucket + 1] = a
+    return selected
+
+
+def ohlc_buckets(series: PriceSeries, max_points: int) -> PriceSeries:
+    """
+    Aggregate consecutive bars into at most ``max_points`` OHLC candles.
+    Each bucket keeps its first date and open, last close, extreme high/low
+    and summed volume.
+    """
+    n = len(series)
+    if max_points >= n or max_points < 1:
+        return series
+
+    starts = np.unique(np.linspace(0, n, max_points + 1).astype(np.int64)[:-1])
+    ends = np.append(starts[1:], n)
+    return PriceSeries(
+        ticker=series.ticker,
+        period=series.period,
+        dates=series.dates[starts],
+        open=series.open[starts],
+        high=np.maximum.reduceat(series.high, starts),
+        low=np.minimum.reduceat(series.low, starts),
+        close=series.close[ends - 1],
+        volume=np.add.reduceat(series.volume, starts)
+    )
+
+
+def downsample_series(series: PriceSeries, max_points: int, chart_type: str = 'line') -> PriceSeries:
+    """
+    Reduce a series to at most ``max_points`` bars for display.
+
+    Args:
+        series: Full-resolution bars
+        max_points: Target point count, usually the chart's pixel width
+        chart_type: "line" (LTTB on close) or "candle" (OHLC buckets)
+
+    Raises:
+        ValueError: If the chart type is unknown
+    """
+    if chart_type not in CHART_TYPES:
+        raise ValueError(f"Unknown chart type: {chart_type}. Supported: {', '.join(CHART_TYPES)}")
+    if not max_points or len(series) <= max_points:
+        return series
+    if chart_type == 'candle':
+        return ohlc_buckets(series, max_points)
+
+    x = series.dates.astype('datetime64[D]').astype(np.int64)
+    return series.select(lttb_indices(x, series.close, max_points))
+
+
+def benchmark_payloads(num_bars: int = 10_000, max_points: int = 800) -> Dict[str, Dict[str, float]]:
+    """
+    Payload size and serialization time of PriceHistory with and without
+    downsampling (downsampling time included in the "after" rows).
+
+    Returns:
+        Mapping of variant to {'points', 'bytes', 'ms'}
+    """
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, num_bars)))
+    dates = np.datetime64('1990-01-01') + np.arange(num_bars).astype('timedelta64[D]')
+    series = PriceSeries(
+        ticker='BENCH', period='max', dates=dates,
+        open=close * 0.995, high=close * 1.01, low=close * 0.99, close=close,
+        volume=rng.integers(1_000_000, 5_000_000, num_bars)
+    )
+
+    results = {}
+    for variant, chart_type in (('full', None), ('line', 'line'), ('candle', 'candle')):
+        start = time.perf_counter()
+        reduced = downsample_series(series, max_points, chart_type) if chart_type else series
+        payload = json.dumps(reduced.to_price_history().to_dict())
+        results[variant] = {
+            'points': len(reduced),
+            'bytes': len(payload),
+            'ms': (time.perf_counter() - start) * 1000
+        }
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(f"{'variant':>8} {'points':>7} {'bytes':>10} {'ms':>8}")
+    for name, row in benchmark_payloads().items():
+        print(f"{name:>8} {row['points']:>7} {row['bytes']:>10} {row['ms']:>8.2f}")
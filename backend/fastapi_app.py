@@ -5,10 +5,13 @@ Enhanced endpoints for financial data integration and portfolio scanning
 from dotenv import load_dotenv
 load_dotenv()  # Load environment variables from .env file
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, UploadFile, File
+from fastapi import FastAPI, HTTPException, BackgroundTasks, UploadFile, File, WebSocket, Query, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, validator
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, ValidationError, validator
 from typing import List, Optional, Dict, Any
+import asyncio
 import logging
 import time
 from datetime import datetime
@@ -16,26 +19,69 @@ from datetime import datetime
 # Import portfolio scanning components
 from models.portfolio_analysis import (
     PortfolioAnalysisResult, 
+    PortfolioHolding,
     PortfolioScanRequest, 
     PortfolioScanResponse,
+    InvestmentRecommendation,
+    PortfolioRiskMetrics,
+    parse_gemini_holdings,
     validate_gemini_response,
     create_mock_analysis_result
 )
 from vision_engine import VisionEngine, VisionEngineError, ConfigurationError, APIError
 from salesforce_service import get_salesforce_service
+from lazy_imports import LazyService
+from serialization import FastJSONResponse, get_snapshot_cache, shallow_dict
+from http_cache import HTTPCacheMiddleware
+from rate_limiter import RateLimitMiddleware, client_id, get_rate_limiter
+from metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE, STAGE_RECOMMENDATIONS, STAGE_RISK_METRICS, STAGE_UPLOAD_READ,
+    STAGE_VALIDATION, MetricsMiddleware, get_metrics_registry, stage
+)
+from profiler import FORMATS as PROFILE_FORMATS, ProfilingMiddleware, authorized, get_profile_store, profiling_enabled
+from structured_logging import RequestIdMiddleware, configure_logging, shutdown_logging
+from salesforce_client import SalesforceError
+from salesforce_sync import get_salesforce_sync_queue
+from health_monitor import STATUS_OK, default_checks, get_health_monitor
+from analysis_jobs import get_analysis_job_manager
+from analysis_engine import get_analysis_engine
+from financial_data_service import FinancialDataError, VALID_PERIODS
+from downsampling import CHART_TYPES
+from realtime import AnalysisSocketHandler, get_broadcaster
+from risk_engine import RiskEngineError, format_risk_context, get_risk_engine
+from correlation_service import CorrelationError, get_correlation_service
+from suggestion_engine import get_suggestion_engine
+from monte_carlo import METHODS, REBALANCE_MODES, SimulationError, simulate_holdings
+from rebalancer import OBJECTIVES, RebalanceError, get_rebalance_optimizer
+from screener import ScreenerError, get_screener
+from backtester import (
+    BacktestError, PortfolioSnapshot, Strategy, backtest_portfolio, backtest_verdicts,
+    default_strategies, get_verdict_log
+)
 from config import Config
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging: JSON lines, written by a listener thread off the event loop
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Investment Research Terminal API",
     description="Enhanced financial analysis with portfolio scanning",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
+# Per-client token buckets; added first so it runs innermost: inside CORS so
+# browsers can read a 429, and inside the response cache so cache hits are free
+app.add_middleware(RateLimitMiddleware)
+
+# ETags, Cache-Control, compression and the server-side response cache
+app.add_middleware(HTTPCacheMiddleware)
+
+# Sampling profiler for requests that ask for it (PROFILING_ENABLED)
+app.add_middleware(ProfilingMiddleware)
+
 # Enable CORS
 app.add_middleware(
     CORSMiddleware,
@@ -45,24 +91,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request count, latency and in-flight gauges; outside the rest, so it times everything
+app.add_middleware(MetricsMiddleware, routes=app.routes)
+
+# Request id for log correlation, echoed in X-Request-ID; outermost so every log line has it
+app.add_middleware(RequestIdMiddleware)
+
 # Initialize configuration
 config = Config()
 
-# Initialize vision engine for portfolio scanning
-try:
-    vision_engine = VisionEngine()
-    logger.info("Vision engine initialized successfully")
-except Exception as e:
-    logger.warning(f"Vision engine initialization failed: {e}")
-    vision_engine = None
+# Vision engine (Gemini) and Salesforce connection are built on first use or by
+# the startup warm-up, so importing the app never configures clients or logs in
+lazy_vision_engine = LazyService("Vision engine", VisionEngine)
+lazy_salesforce_service = LazyService("Salesforce service", get_salesforce_service)
+
+# Dependency checks run in the background; probes answer from the cached results
+health_monitor = get_health_monitor()
+for check in default_checks(lazy_vision_engine.get, lazy_salesforce_service.get):
+    health_monitor.register(check)
 
-# Initialize Salesforce connection
-try:
-    salesforce_service = get_salesforce_service()
-    logger.info("Salesforce service initialized successfully")
-except Exception as e:
-    logger.warning(f"Salesforce service initialization failed: {e}")
-    salesforce_service = None
+# Push analysis job events to WebSocket subscribers
+analysis_socket_handler = AnalysisSocketHandler(get_broadcaster(), get_analysis_job_manager())
 
 
 # Request/Response models for basic functionality
@@ -74,35 +123,395 @@ class ErrorResponse(BaseModel):
     timestamp: str
     suggestions: Optional[List[str]] = None
 
+class AnalyzeRequest(BaseModel):
+    stock_symbol: str
+    num_articles: int = 5
+
+    @validator('stock_symbol')
+    def validate_stock_symbol(cls, v):
+        ticker = v.strip().upper()
+        if not ticker or len(ticker) > 10 or not ticker.replace('-', '').replace('.', '').isalnum():
+            raise ValueError('Invalid stock symbol')
+        return ticker
+
+    @validator('num_articles')
+    def validate_num_articles(cls, v):
+        if v < 1 or v > 50:
+            raise ValueError('num_articles must be between 1 and 50')
+        return v
+
+class DetailedAnalysisRequest(BaseModel):
+    ticker: str
+    period: str = '1mo'
+    max_points: Optional[int] = None  # usually the chart's pixel width
+    chart_type: str = 'line'
+
+    @validator('ticker')
+    def validate_ticker(cls, v):
+        ticker = v.strip().upper()
+        if not ticker or len(ticker) > 10 or not ticker.replace('-', '').replace('.', '').isalnum():
+            raise ValueError('Invalid ticker symbol')
+        return ticker
+
+    @validator('period')
+    def validate_period(cls, v):
+        if v not in VALID_PERIODS:
+            raise ValueError(f'Invalid period. Valid periods: {", ".join(VALID_PERIODS)}')
+        return v
+
+    @validator('max_points')
+    def validate_max_points(cls, v):
+        if v is not None and (v < 10 or v > 10000):
+            raise ValueError('max_points must be between 10 and 10000')
+        return v
+
+    @validator('chart_type')
+    def validate_chart_type(cls, v):
+        if v not in CHART_TYPES:
+            raise ValueError(f'chart_type must be one of: {", ".join(CHART_TYPES)}')
+        return v
+
+
+class ComparisonRequest(BaseModel):
+    tickers: List[str]
+    period: str = '1mo'
+    max_points: Optional[int] = None
+
+    @validator('tickers')
+    def validate_tickers(cls, v):
+        tickers = list(dict.fromkeys(t.strip().upper() for t in v if t and t.strip()))
+        if len(tickers) < 2 or len(tickers) > 5:
+            raise ValueError('Between 2 and 5 distinct tickers are required')
+        for ticker in tickers:
+            if len(ticker) > 10 or not ticker.replace('-', '').replace('.', '').isalnum():
+                raise ValueError(f'Invalid ticker symbol: {ticker}')
+        return tickers
+
+    @validator('period')
+    def validate_period(cls, v):
+        if v not in VALID_PERIODS:
+            raise ValueError(f'Invalid period. Valid periods: {", ".join(VALID_PERIODS)}')
+        return v
+
+    @validator('max_points')
+    def validate_max_points(cls, v):
+        if v is not None and (v < 10 or v > 10000):
+            raise ValueError('max_points must be between 10 and 10000')
+        return v
+
+class CorrelationRequest(BaseModel):
+    tickers: List[str]
+    weights: Optional[List[float]] = None
+    window: Optional[int] = None  # daily returns; defaults to CORRELATION_WINDOW
+
+    @validator('tickers')
+    def validate_tickers(cls, v):
+        tickers = [t.strip().upper() for t in v if t and t.strip()]
+        if len(tickers) < 2 or len(tickers) > 1000:
+            raise ValueError('Between 2 and 1000 tickers are required')
+        if len(set(tickers)) != len(tickers):
+            raise ValueError('Duplicate tickers found')
+        return tickers
+
+    @validator('weights')
+    def validate_weights(cls, v, values):
+        if v is None:
+            return v
+        if len(v) != len(values.get('tickers', [])):
+            raise ValueError('weights must have one entry per ticker')
+        if any(w < 0 for w in v) or sum(v) <= 0:
+            raise ValueError('weights must be non-negative and not all zero')
+        return v
+
+    @validator('window')
+    def validate_window(cls, v):
+        if v is not None and (v < 20 or v > 2520):
+            raise ValueError('window must be between 20 and 2520 sessions')
+        return v
+
+class HoldingsRequest(BaseModel):
+    holdings: List[PortfolioHolding]
+
+    @validator('holdings')
+    def validate_holdings(cls, v):
+        if not v:
+            raise ValueError('At least one holding is required')
+        if len(v) > 500:
+            raise ValueError('At most 500 holdings are supported')
+        tickers = [h.ticker for h in v]
+        if len(set(tickers)) != len(tickers):
+            raise ValueError('Duplicate tickers found')
+        return v
+
+
+class SimulationRequest(HoldingsRequest):
+    num_paths: int = 10000
+    horizon_days: int = 252
+    method: str = 'bootstrap'
+    rebalance: str = 'daily'
+    seed: Optional[int] = None
+
+    @validator('num_paths')
+    def validate_num_paths(cls, v):
+        if v < 100 or v > Config.MONTE_CARLO_MAX_PATHS:
+            raise ValueError(f'num_paths must be between 100 and {Config.MONTE_CARLO_MAX_PATHS}')
+        return v
+
+    @validator('horizon_days')
+    def validate_horizon_days(cls, v):
+        if v < 1 or v > 2520:
+            raise ValueError('horizon_days must be between 1 and 2520')
+        return v
+
+    @validator('method')
+    def validate_method(cls, v):
+        if v not in METHODS:
+            raise ValueError(f'method must be one of: {", ".join(METHODS)}')
+        return v
+
+    @validator('rebalance')
+    def validate_rebalance(cls, v):
+        if v not in REBALANCE_MODES:
+            raise ValueError(f'rebalance must be one of: {", ".join(REBALANCE_MODES)}')
+        return v
+
+    @validator('rebalance', always=True)
+    def validate_simulation_size(cls, v, values):
+        # Buy and hold simulates every holding per path and day; daily rebalancing one portfolio return.
+        # The 100k paths x 252 days target holds for daily rebalancing only; buy and hold of a
+        # 50-holding portfolio is capped at about 40k paths over 252 days.
+        if not all(name in values for name in ('holdings', 'num_paths', 'horizon_days')):
+            return v
+        width = len(values['holdings']) if v == 'none' else 1
+        steps = values['num_paths'] * values['horizon_days'] * width
+        if steps > Config.MONTE_CARLO_MAX_STEPS:
+            message = (f'num_paths x horizon_days{" x holdings" if width > 1 else ""} = {steps:,} exceeds '
+                       f'the limit of {Config.MONTE_CARLO_MAX_STEPS:,}')
+            if width > 1:
+                message += ('; buy and hold simulates every holding, so it supports fewer paths than daily '
+                            'rebalancing. Use rebalance="daily" or fewer paths')
+            raise ValueError(message)
+        return v
+
+
+class RebalanceRequest(HoldingsRequest):
+    candidates: List[str] = []
+    objective: str = 'mean_variance'
+    risk_aversion: Optional[float] = None
+    max_weight: Optional[float] = None
+    max_turnover: Optional[float] = None
+    warm_start: Optional[Dict[str, float]] = None
+
+    @validator('candidates')
+    def validate_candidates(cls, v):
+        if len(v) > 50:
+            raise ValueError('At most 50 candidates are supported')
+        return [t.strip().upper() for t in v if t.strip()]
+
+    @validator('objective')
+    def validate_objective(cls, v):
+        if v not in OBJECTIVES:
+            raise ValueError(f'objective must be one of: {", ".join(OBJECTIVES)}')
+        return v
+
+    @validator('risk_aversion')
+    def validate_risk_aversion(cls, v):
+        if v is not None and (v <= 0 or v > 100):
+            raise ValueError('risk_aversion must be between 0 and 100')
+        return v
+
+    @validator('max_weight')
+    def validate_max_weight(cls, v):
+        if v is not None and (v <= 0 or v > 1):
+            raise ValueError('max_weight must be between 0 and 1')
+        return v
+
+    @validator('max_turnover')
+    def validate_max_turnover(cls, v):
+        if v is not None and (v < 0 or v > 1):
+            raise ValueError('max_turnover must be between 0 and 1')
+        return v
+
+
+class ScreenerRequest(BaseModel):
+    query: str = ''
+    limit: Optional[int] = None
+    columns: Optional[List[str]] = None
+
+    @validator('query')
+    def validate_query(cls, v):
+        if len(v) > 1000:
+            raise ValueError('query must be at most 1000 characters')
+        return v
+
+    @validator('limit')
+    def validate_limit(cls, v):
+        if v is not None and (v < 1 or v > 1000):
+            raise ValueError('limit must be between 1 and 1000')
+        return v
+
 
-# Health check endpoint
+class ScreenerRefreshRequest(BaseModel):
+    tickers: Optional[List[str]] = None  # configured universe if omitted
+
+
+class StrategySpec(BaseModel):
+    name: Optional[str] = None
+    horizon: int = 21
+    min_confidence: float = 0.0
+    long_only: bool = False
+    strong_only: bool = False
+    hold_band: float = 0.03
+    cost_bps: float = 5.0
+
+    @validator('horizon')
+    def validate_horizon(cls, v):
+        if v < 1 or v > 504:
+            raise ValueError('horizon must be between 1 and 504 sessions')
+        return v
+
+
+class VerdictBacktestRequest(BaseModel):
+    tickers: Optional[List[str]] = None  # restrict to these tickers
+    strategies: Optional[List[StrategySpec]] = None  # default grid if omitted
+
+    @validator('strategies')
+    def validate_strategies(cls, v):
+        if v is not None and not 1 <= len(v) <= 100:
+            raise ValueError('Between 1 and 100 strategies are supported')
+        return v
+
+
+class SnapshotSpec(BaseModel):
+    date: str  # ISO date the holdings were observed
+    holdings: List[PortfolioHolding]
+
+
+class PortfolioBacktestRequest(BaseModel):
+    snapshots: List[SnapshotSpec]
+
+    @validator('snapshots')
+    def validate_snapshots(cls, v):
+        if not v:
+            raise ValueError('At least one snapshot is required')
+        for snapshot in v:
+            try:
+                datetime.strptime(snapshot.date[:10], '%Y-%m-%d')
+            except ValueError:
+                raise ValueError(f'Invalid snapshot date: {snapshot.date}')
+        return v
+
+
+def sync_scan_result(result: PortfolioAnalysisResult) -> None:
+    """Queue a scan result for write-behind sync to Salesforce, if enabled."""
+    if Config.SALESFORCE_SYNC_ENABLED:
+        try:
+            get_salesforce_sync_queue().enqueue(result)
+        except SalesforceError as e:
+            logger.warning(f"Scan result not queued for Salesforce: {e}")
+
+
+async def compute_risk_metrics(holdings: List[PortfolioHolding]) -> Optional[PortfolioRiskMetrics]:
+    """Risk metrics for holdings; the scan still succeeds without them."""
+    try:
+        return await asyncio.to_thread(get_risk_engine().analyze, holdings)
+    except (RiskEngineError, FinancialDataError) as e:
+        logger.warning(f"Risk metrics unavailable: {e}")
+        return None
+
+
+async def compute_recommendations(holdings: List[PortfolioHolding],
+                                  metrics: Optional[PortfolioRiskMetrics]) -> List[InvestmentRecommendation]:
+    """
+    Three recommendations from the local suggestion engine. With
+    SUGGESTION_LLM_PHRASING the model rewrites the reasons; the tickers and
+    types never come from the model.
+
+    Raises:
+        HTTPException: 500 RECOMMENDATIONS_FAILED if the suggestion engine fails
+    """
+    try:
+        recommendations = await asyncio.to_thread(get_suggestion_engine().recommend, holdings, metrics)
+    except (ValueError, FinancialDataError) as e:
+        logger.error(f"Suggestion engine failed: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail={
+                'error': f'Recommendations unavailable: {str(e)}',
+                'timestamp': datetime.utcnow().isoformat(),
+                'error_code': 'RECOMMENDATIONS_FAILED'
+            }
+        )
+    vision_engine = await lazy_vision_engine.aget() if Config.SUGGESTION_LLM_PHRASING else None
+    if vision_engine and recommendations:
+        try:
+            reasons = await asyncio.to_thread(
+                vision_engine.phrase_recommendations,
+                [{'ticker': r.ticker, 'type': r.improvement_type.value, 'reason': r.reason} for r in recommendations],
+                format_risk_context(metrics) if metrics else None
+            )
+            recommendations = [
+                r.copy(update={'reason': reason}) if len(reason) >= 10 else r
+                for r, reason in zip(recommendations, reasons)
+            ]
+        except VisionEngineError as e:
+            logger.warning(f"Keeping computed recommendation reasons: {e}")
+    return recommendations
+
+
+# Health check endpoints
 @app.get("/api/health")
 async def health_check():
-    """System health check endpoint"""
+    """System health check endpoint, answered from the cached dependency checks"""
     try:
         return {
             'status': 'healthy',
             'timestamp': datetime.utcnow().isoformat(),
             'service': 'investment-research-terminal-api',
             'version': '1.0.0',
-            'portfolio_scanning_available': vision_engine is not None,
-            'salesforce_connected': salesforce_service.is_connected() if salesforce_service else False
+            'portfolio_scanning_available': lazy_vision_engine.peek() is not None,
+            'salesforce_connected': health_monitor.status_of('salesforce') == STATUS_OK,
+            'ready': health_monitor.readiness()['ready'],
+            'dependencies': {name: result['status'] for name, result in health_monitor.snapshot().items()}
         }
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         raise HTTPException(status_code=500, detail=f"Health check failed: {str(e)}")
 
 
+@app.get("/api/health/live")
+async def liveness_probe():
+    """Liveness probe: the process is up and serving"""
+    return health_monitor.liveness()
+
+
+@app.get("/api/health/ready")
+async def readiness_probe():
+    """Readiness probe: 503 until every critical dependency check reports ok"""
+    readiness = health_monitor.readiness()
+    return JSONResponse(status_code=200 if readiness['ready'] else 503, content=readiness)
+
+
+@app.get("/api/health/checks")
+async def dependency_checks():
+    """Latest result, latency and timestamp of each dependency check"""
+    return {
+        'checks': health_monitor.snapshot(),
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
+
 @app.get("/api/salesforce/status")
 async def salesforce_status():
     """Check Salesforce connection status"""
+    salesforce_service = await lazy_salesforce_service.aget()
     if not salesforce_service:
         return {
             "connected": False,
             "error": "Salesforce service not initialized"
         }
     
-    status = salesforce_service.test_connection()
+    status = await asyncio.to_thread(salesforce_service.test_connection)
     return {
         **status,
         "message": "Salesforce integration is configured and ready",
@@ -110,6 +519,125 @@ async def salesforce_status():
     }
 
 
+@app.get("/api/salesforce/sync")
+async def salesforce_sync_status():
+    """Write-behind sync queue counters."""
+    return {
+        'enabled': Config.SALESFORCE_SYNC_ENABLED,
+        **get_salesforce_sync_queue().stats.to_dict(),
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
+
+@app.post("/api/salesforce/sync/flush")
+async def flush_salesforce_sync():
+    """Push pending scan results to Salesforce now instead of waiting for the next flush."""
+    try:
+        synced = await get_salesforce_sync_queue().flush()
+    except SalesforceError as e:
+        raise HTTPException(
+            status_code=502,
+            detail={
+                'error': f'Salesforce sync failed: {str(e)}',
+                'timestamp': datetime.utcnow().isoformat(),
+                'error_code': 'SALESFORCE_SYNC_FAILED'
+            }
+        )
+    return {
+        'synced': synced,
+        **get_salesforce_sync_queue().stats.to_dict(),
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
+
+@app.get("/api/usage")
+async def rate_limit_usage(request: Request):
+    """The caller's request counts and the rate limits that apply to it."""
+    limiter = get_rate_limiter()
+    client = client_id(request.scope, request.headers)
+    usage = await limiter.backend.usage(client)
+    return {
+        'client': client,
+        'enabled': Config.RATE_LIMIT_ENABLED,
+        'limits': {
+            tier: {'burst': policy.capacity, 'per_minute': round(policy.rate * 60, 3)}
+            for tier, policy in limiter.policies.items()
+        },
+        'usage': usage[0].to_dict() if usage else None,
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
+
+def require_profiling_access(request: Request) -> None:
+    if not profiling_enabled():
+        raise HTTPException(
+            status_code=404,
+            detail={
+                'error': 'Profiling is disabled. Set PROFILING_ENABLED and PROFILING_TOKEN to enable it.',
+                'timestamp': datetime.utcnow().isoformat(),
+                'error_code': 'PROFILING_DISABLED'
+            }
+        )
+    if not authorized(request.headers):
+        raise HTTPException(
+            status_code=403,
+            detail={
+                'error': f'Send PROFILING_TOKEN in the {Config.PROFILING_HEADER} header.',
+                'timestamp': datetime.utcnow().isoformat(),
+                'error_code': 'PROFILING_FORBIDDEN'
+            }
+        )
+
+
+@app.get("/api/admin/profiles")
+async def list_profiles(request: Request):
+    """Recent request profiles, newest first."""
+    require_profiling_access(request)
+    return {
+        'enabled': profiling_enabled(),
+        'header': Config.PROFILING_HEADER,
+        'sample_rate': Config.PROFILING_SAMPLE_RATE,
+        'profiles': [profile.summary() for profile in get_profile_store().list()],
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
+
+@app.get("/api/admin/profiles/{profile_id}")
+async def download_profile(profile_id: str, request: Request, format: str = 'speedscope'):
+    """
+    Download a profile: speedscope JSON (open at https://www.speedscope.app)
+    or collapsed stacks (flamegraph.pl, inferno).
+    """
+    require_profiling_access(request)
+    if format not in PROFILE_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                'error': f'Invalid format: {format}. Supported: {", ".join(PROFILE_FORMATS)}',
+                'timestamp': datetime.utcnow().isoformat(),
+                'error_code': 'INVALID_FORMAT'
+            }
+        )
+    profile = get_profile_store().get(profile_id)
+    if profile is None:
+        return FastJSONResponse(status_code=404, content={'detail': {
+            'error': f'Profile {profile_id} not found; only the {Config.PROFILING_MAX_STORED} most recent are kept.',
+            'timestamp': datetime.utcnow().isoformat(),
+            'error_code': 'PROFILE_NOT_FOUND'
+        }})
+    if format == 'collapsed':
+        return Response(content=profile.collapsed(), media_type='text/plain',
+                        headers={'Content-Disposition': f'attachment; filename="profile-{profile.id}.folded"'})
+    return FastJSONResponse(content=profile.speedscope(),
+                            headers={'Content-Disposition': f'attachment; filename="profile-{profile.id}.speedscope.json"'})
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint."""
+    return Response(content=get_metrics_registry().render(), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.get("/api/test-connection")
 async def test_connection():
     """Simple test endpoint to verify frontend-backend connection"""
@@ -133,6 +661,7 @@ async def analyze_portfolio_image(file: UploadFile = File(...)):
         logger.info(f"Portfolio image analysis requested: {file.filename}")
         
         # Check if vision engine is available
+        vision_engine = await lazy_vision_engine.aget()
         if not vision_engine:
             raise HTTPException(
                 status_code=503,
@@ -168,7 +697,8 @@ async def analyze_portfolio_image(file: UploadFile = File(...)):
         
         # Read file content
         try:
-            image_bytes = await file.read()
+            with stage(STAGE_UPLOAD_READ):
+                image_bytes = await file.read()
         except Exception as e:
             logger.error(f"Failed to read uploaded file: {e}")
             raise HTTPException(
@@ -208,7 +738,9 @@ async def analyze_portfolio_image(file: UploadFile = File(...)):
         
         # Analyze image with Gemini Vision
         try:
-            gemini_response = vision_engine.analyze_portfolio_image(image_bytes)
+            gemini_response = vision_engine.analyze_portfolio_image(
+                image_bytes, include_suggestions=Config.SUGGESTION_MODE == 'llm'
+            )
             logger.info("Gemini analysis completed successfully")
             
         except ConfigurationError as e:
@@ -246,11 +778,24 @@ async def analyze_portfolio_image(file: UploadFile = File(...)):
         
         # Validate and convert response
         try:
+            with stage(STAGE_VALIDATION):
+                holdings = parse_gemini_holdings(gemini_response)
+            with stage(STAGE_RISK_METRICS):
+                metrics = await compute_risk_metrics(holdings) if holdings else None
+            recommendations = None
+            if Config.SUGGESTION_MODE != 'llm' and holdings:
+                with stage(STAGE_RECOMMENDATIONS):
+                    recommendations = await compute_recommendations(holdings, metrics)
+            with stage(STAGE_VALIDATION):
+                result = validate_gemini_response(gemini_response, recommendations)
+            if metrics:
+                result.analysis.risk_metrics = metrics
+                result.analysis.total_value = metrics.total_value
             processing_time = time.time() - start_time
-            result = validate_gemini_response(gemini_response)
             result.processing_time = processing_time
             
             logger.info(f"Portfolio analysis completed: {len(result.extracted_holdings)} holdings, {processing_time:.2f}s")
+            sync_scan_result(result)
             
             return PortfolioScanResponse(
                 success=True,
@@ -285,6 +830,182 @@ async def analyze_portfolio_image(file: UploadFile = File(...)):
         )
 
 
+@app.post("/api/portfolio/risk")
+async def portfolio_risk(request: HoldingsRequest):
+    """
+    Deterministic risk metrics for holdings from cached price histories:
+    value, weights, volatility, beta, max drawdown, HHI and sector exposure.
+    """
+    try:
+        metrics = await asyncio.to_thread(get_risk_engine().analyze, request.holdings)
+        return {'success': True, 'risk_metrics': metrics}
+    except (RiskEngineError, FinancialDataError) as e:
+        logger.error(f"Risk analysis failed: {e}")
+        raise HTTPException(
+            status_code=502,
+            detail={
+                'error': f'Risk analysis unavailable: {str(e)}',
+                'timestamp': datetime.utcnow().isoformat(),
+                'error_code': 'MARKET_DATA_UNAVAILABLE'
+            }
+        )
+
+
+@app.post("/api/portfolio/analyze-holdings")
+async def analyze_portfolio_holdings(request: HoldingsRequest):
+    """
+    Analyze known holdings: risk metrics are computed first and passed to
+    Gemini as ground truth for the health assessment and recommendations.
+    """
+    start_time = time.time()
+
+    vision_engine = await lazy_vision_engine.aget()
+    if not vision_engine:
+        raise HTTPException(
+            status_code=503,
+            detail={
+                'error': 'Portfolio analysis service unavailable. Please check Google API configuration.',
+                'timestamp': datetime.utcnow().isoformat(),
+                'error_code': 'VISION_SERVICE_UNAVAILABLE'
+            }
+        )
+
+    with stage(STAGE_RISK_METRICS):
+        metrics = await compute_risk_metrics(request.holdings)
+    engine_mode = Config.SUGGESTION_MODE != 'llm'
+
+    with stage(STAGE_RECOMMENDATIONS):
+        recommendations = await compute_recommendations(request.holdings, metrics) if engine_mode else None
+
+    holdings = [{'ticker': h.ticker, 'qty': h.quantity} for h in request.holdings]
+    try:
+        gemini_response = await asyncio.to_thread(
+            vision_engine.analyze_holdings, holdings,
+            format_risk_context(metrics) if metrics else None, not engine_mode
+        )
+        with stage(STAGE_VALIDATION):
+            result = validate_gemini_response(gemini_response, recommendations)
+    except APIError as e:
+        logger.error(f"Gemini API error: {e}")
+        raise HTTPException(
+            status_code=502,
+            detail={
+                'error': 'AI analysis service temporarily unavailable. Please try again later.',
+                'timestamp': datetime.utcnow().isoformat(),
+                'error_code': 'AI_SERVICE_ERROR'
+            }
+        )
+    except (VisionEngineError, ValueError) as e:
+        logger.error(f"Invalid holdings analysis: {e}")
+        raise HTTPException(
+            status_code=422,
+            detail={
+                'error': 'AI returned invalid analysis. Please try again.',
+                'timestamp': datetime.utcnow().isoformat(),
+                'error_code': 'INVALID_AI_RESPONSE'
+            }
+        )
+
+    if metrics:
+        result.analysis.risk_metrics = metrics
+        result.analysis.total_value = metrics.total_value
+    result.processing_time = time.time() - start_time
+    sync_scan_result(result)
+
+    return PortfolioScanResponse(
+        success=True,
+        message=f"Successfully analyzed portfolio with {len(result.extracted_holdings)} holdings",
+        result=result
+    )
+
+
+@app.post("/api/portfolio/suggestions")
+async def portfolio_suggestions(request: HoldingsRequest):
+    """
+    Three typed recommendations ranked by marginal diversification benefit,
+    computed locally (the model only rephrases reasons, with
+    SUGGESTION_LLM_PHRASING).
+    """
+    with stage(STAGE_RISK_METRICS):
+        metrics = await compute_risk_metrics(request.holdings)
+    with stage(STAGE_RECOMMENDATIONS):
+        recommendations = await compute_recommendations(request.holdings, metrics)
+    return {
+        'success': True,
+        'recommendations': recommendations,
+        'diversification_score': metrics.diversification_score if metrics else None,
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
+
+@app.post("/api/portfolio/simulate")
+async def simulate_portfolio(request: SimulationRequest):
+    """
+    Monte Carlo "what could happen" view: percentile bands of portfolio
+    value over the horizon and probabilities of drawdown thresholds.
+    """
+    try:
+        result = await asyncio.to_thread(
+            simulate_holdings,
+            request.holdings,
+            num_paths=request.num_paths,
+            horizon=request.horizon_days,
+            method=request.method,
+            rebalance=request.rebalance,
+            seed=request.seed
+        )
+        return FastJSONResponse({'success': True, 'simulation': result})
+    except (RiskEngineError, FinancialDataError, SimulationError) as e:
+        logger.error(f"Portfolio simulation failed: {e}")
+        raise HTTPException(
+            status_code=502,
+            detail={
+                'error': f'Simulation unavailable: {str(e)}',
+                'timestamp': datetime.utcnow().isoformat(),
+                'error_code': 'MARKET_DATA_UNAVAILABLE'
+            }
+        )
+
+
+@app.post("/api/portfolio/rebalance")
+async def rebalance_portfolio(request: RebalanceRequest):
+    """
+    Target weights and trades for the holdings plus candidate tickers.
+    Send the previous target_weights as warm_start when tweaking constraints.
+    """
+    try:
+        plan = await asyncio.to_thread(
+            get_rebalance_optimizer().optimize,
+            request.holdings,
+            request.candidates,
+            objective=request.objective,
+            risk_aversion=request.risk_aversion,
+            max_weight=request.max_weight,
+            max_turnover=request.max_turnover,
+            warm_start=request.warm_start
+        )
+        return {'success': True, 'rebalance': plan.to_dict()}
+    except RebalanceError as e:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                'error': str(e),
+                'timestamp': datetime.utcnow().isoformat(),
+                'error_code': 'INVALID_CONSTRAINTS'
+            }
+        )
+    except (RiskEngineError, FinancialDataError) as e:
+        logger.error(f"Portfolio rebalance failed: {e}")
+        raise HTTPException(
+            status_code=502,
+            detail={
+                'error': f'Rebalancing unavailable: {str(e)}',
+                'timestamp': datetime.utcnow().isoformat(),
+                'error_code': 'MARKET_DATA_UNAVAILABLE'
+            }
+        )
+
+
 @app.get("/api/portfolio/test-analysis")
 async def test_portfolio_analysis():
     """
@@ -294,14 +1015,12 @@ async def test_portfolio_analysis():
     try:
         logger.info("Mock portfolio analysis requested")
         
-        # Create mock analysis result
-        mock_result = create_mock_analysis_result()
-        
-        return PortfolioScanResponse(
+        # Encoded once and reused until RESPONSE_SNAPSHOT_TTL expires
+        return get_snapshot_cache().get('mock_analysis', lambda: PortfolioScanResponse(
             success=True,
             message="Mock portfolio analysis generated successfully",
-            result=mock_result
-        )
+            result=create_mock_analysis_result()
+        )).response()
         
     except Exception as e:
         logger.error(f"Error generating mock analysis: {e}")
@@ -320,6 +1039,7 @@ async def get_vision_status():
     Check the status of the vision engine and Google Gemini API configuration.
     """
     try:
+        vision_engine = await lazy_vision_engine.aget()
         status = {
             'vision_engine_available': vision_engine is not None,
             'google_api_configured': Config.GOOGLE_API_KEY is not None,
@@ -351,22 +1071,356 @@ async def get_vision_status():
         }
 
 
+# Sentiment analysis endpoints
+@app.post("/api/analyze")
+async def start_analysis(request: AnalyzeRequest):
+    """
+    Start a news sentiment analysis job for a ticker.
+    Requests for a ticker that is already being analyzed attach to the running job.
+    """
+    try:
+        job, created = await get_analysis_job_manager().start(request.stock_symbol, request.num_articles)
+        return {
+            'status': 'started',
+            'job_id': job.job_id,
+            'ticker': job.ticker,
+            'attached': not created,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Failed to start analysis for {request.stock_symbol}: {e}")
+        return {
+            'status': 'error',
+            'message': f'Failed to start analysis: {str(e)}',
+            'timestamp': datetime.utcnow().isoformat()
+        }
+
+
+@app.get("/api/analyze/status")
+async def analysis_status(ticker: Optional[str] = None):
+    """
+    Progress of the latest analysis job for a ticker (or the most recently
+    requested ticker), including per-stage timings and the report once done.
+    """
+    job = get_analysis_job_manager().get_job(ticker)
+    if not job:
+        return {
+            'status': 'idle',
+            'is_loading': False,
+            'articles': [],
+            'error': None,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+    return job.to_status_dict()
+
+
+@app.post("/api/analyze/detailed")
+async def analyze_detailed(request: DetailedAnalysisRequest):
+    """
+    Detailed financial + sentiment analysis for a single ticker.
+    Set max_points to downsample the price history server-side for the chart.
+    """
+    try:
+        report, original_points = await asyncio.to_thread(
+            get_analysis_engine().analyze_detailed,
+            request.ticker, request.period, request.max_points, request.chart_type
+        )
+        # Nested dataclasses (price history, metrics) are encoded directly, without to_dict()
+        payload = shallow_dict(report)
+        payload['chart'] = {
+            'type': request.chart_type,
+            'original_points': original_points,
+            'returned_points': len(report.price_history.prices)
+        }
+        return FastJSONResponse(payload)
+
+    except FinancialDataError as e:
+        logger.error(f"Financial data error for {request.ticker}: {e}")
+        raise HTTPException(
+            status_code=502,
+            detail={
+                'error': f'Market data unavailable for {request.ticker}. Please try again later.',
+                'timestamp': datetime.utcnow().isoformat(),
+                'error_code': 'MARKET_DATA_UNAVAILABLE'
+            }
+        )
+    except Exception as e:
+        logger.error(f"Detailed analysis failed for {request.ticker}: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail={
+                'error': f'Detailed analysis failed: {str(e)}',
+                'timestamp': datetime.utcnow().isoformat(),
+                'error_code': 'INTERNAL_ERROR'
+            }
+        )
+
+
+@app.get("/api/analyze/detailed")
+async def analyze_detailed_cached(ticker: str,
+                                  period: str = '1mo',
+                                  max_points: Optional[int] = None,
+                                  chart_type: str = 'line'):
+    """
+    GET form of /api/analyze/detailed. Browsers cache and revalidate it
+    (ETag + Cache-Control), so switching back to a tab costs a 304 at most.
+    """
+    try:
+        request = DetailedAnalysisRequest(ticker=ticker, period=period, max_points=max_points, chart_type=chart_type)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    return await analyze_detailed(request)
+
+
+@app.post("/api/analyze/compare")
+async def analyze_comparison(request: ComparisonRequest):
+    """
+    Battle mode: detailed reports for 2-5 tickers with BattleMetrics,
+    including their return correlations and diversification score.
+    """
+    try:
+        report = await asyncio.to_thread(
+            get_analysis_engine().analyze_comparison,
+            request.tickers, request.period, request.max_points
+        )
+        return FastJSONResponse(report)
+
+    except FinancialDataError as e:
+        logger.error(f"Financial data error for {', '.join(request.tickers)}: {e}")
+        raise HTTPException(
+            status_code=502,
+            detail={
+                'error': f'Market data unavailable: {str(e)}',
+                'timestamp': datetime.utcnow().isoformat(),
+                'error_code': 'MARKET_DATA_UNAVAILABLE'
+            }
+        )
+    except Exception as e:
+        logger.error(f"Comparison analysis failed: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail={
+                'error': f'Comparison analysis failed: {str(e)}',
+                'timestamp': datetime.utcnow().isoformat(),
+                'error_code': 'INTERNAL_ERROR'
+            }
+        )
+
+
+@app.get("/api/analyze/compare")
+async def analyze_comparison_cached(tickers: List[str] = Query(...),
+                                    period: str = '1mo',
+                                    max_points: Optional[int] = None):
+    """GET form of /api/analyze/compare (?tickers=AAPL&tickers=MSFT), cacheable by browsers."""
+    try:
+        request = ComparisonRequest(tickers=tickers, period=period, max_points=max_points)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    return await analyze_comparison(request)
+
+
+@app.post("/api/correlation")
+async def correlation_matrix(request: CorrelationRequest):
+    """
+    Return correlation matrix and diversification score for a ticker set.
+    Pairwise results are cached, so extending a set only computes new pairs.
+    """
+    try:
+        return FastJSONResponse(await asyncio.to_thread(
+            get_correlation_service().diversification,
+            request.tickers, request.weights, request.window
+        ))
+    except CorrelationError as e:
+        logger.error(f"Correlation analysis failed: {e}")
+        raise HTTPException(
+            status_code=502,
+            detail={
+                'error': f'Correlation analysis unavailable: {str(e)}',
+                'timestamp': datetime.utcnow().isoformat(),
+                'error_code': 'MARKET_DATA_UNAVAILABLE'
+            }
+        )
+
+
+@app.post("/api/screener")
+async def run_screener(request: ScreenerRequest):
+    """
+    Screen the fundamentals table, e.g.
+    "pe_ratio < 20 and revenue_growth > 10% order by return_on_equity desc limit 25".
+    Served from memory; never calls the data provider.
+    """
+    try:
+        return FastJSONResponse(get_screener().query(request.query, request.limit, request.columns))
+    except ScreenerError as e:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                'error': str(e),
+                'timestamp': datetime.utcnow().isoformat(),
+                'error_code': 'INVALID_QUERY'
+            }
+        )
+
+
+@app.post("/api/screener/refresh", status_code=202)
+async def refresh_screener(request: ScreenerRefreshRequest, background_tasks: BackgroundTasks):
+    """Start a bulk fundamentals refresh; queries keep using the current table until it finishes."""
+    screener = get_screener()
+    if screener.refreshing:
+        raise HTTPException(
+            status_code=409,
+            detail={
+                'error': 'A screener refresh is already running',
+                'timestamp': datetime.utcnow().isoformat(),
+                'error_code': 'REFRESH_IN_PROGRESS'
+            }
+        )
+
+    def run_refresh():
+        try:
+            screener.refresh(request.tickers)
+        except ScreenerError as e:
+            logger.error(f"Screener refresh failed: {e}")
+
+    background_tasks.add_task(run_refresh)
+    return {
+        'status': 'refreshing',
+        'universe_size': len(screener.table),
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
+
+@app.post("/api/backtest/verdicts")
+async def backtest_verdict_log(request: VerdictBacktestRequest):
+    """
+    Replay recorded AI verdicts against stored price histories: hit rate,
+    calibration by confidence bucket and an equity curve per strategy.
+    Runs offline; tickers without stored history are reported as unpriced.
+    """
+    records = get_verdict_log().load()
+    if request.tickers:
+        wanted = {t.strip().upper() for t in request.tickers}
+        records = [r for r in records if r.ticker in wanted]
+    if request.strategies:
+        strategies = [
+            Strategy(**{**spec.dict(), 'name': spec.name or f"strategy {i + 1}"})
+            for i, spec in enumerate(request.strategies)
+        ]
+    else:
+        strategies = default_strategies()
+
+    try:
+        report = await asyncio.to_thread(backtest_verdicts, records, strategies)
+        return FastJSONResponse(report)
+    except BacktestError as e:
+        raise HTTPException(
+            status_code=422,
+            detail={
+                'error': str(e),
+                'timestamp': datetime.utcnow().isoformat(),
+                'error_code': 'NO_BACKTEST_DATA'
+            }
+        )
+
+
+@app.post("/api/backtest/portfolio")
+async def backtest_portfolio_snapshots(request: PortfolioBacktestRequest):
+    """Replay portfolio snapshots, each held until the next, against stored price histories."""
+    snapshots = []
+    for snapshot in request.snapshots:
+        quantities: Dict[str, float] = {}
+        for holding in snapshot.holdings:
+            quantities[holding.ticker] = quantities.get(holding.ticker, 0.0) + holding.quantity
+        snapshots.append(PortfolioSnapshot(date=snapshot.date[:10], quantities=quantities))
+    try:
+        result = await asyncio.to_thread(backtest_portfolio, snapshots)
+        return FastJSONResponse({'success': True, 'backtest': result})
+    except BacktestError as e:
+        raise HTTPException(
+            status_code=422,
+            detail={
+                'error': str(e),
+                'timestamp': datetime.utcnow().isoformat(),
+                'error_code': 'NO_BACKTEST_DATA'
+            }
+        )
+
+
+@app.delete("/api/analyze/{ticker}")
+async def cancel_analysis(ticker: str):
+    """Cancel the running analysis job for a ticker."""
+    cancelled = await get_analysis_job_manager().cancel(ticker)
+    if not cancelled:
+        return FastJSONResponse(status_code=404, content={'detail': {
+            'error': f'No running analysis for {ticker.upper()}',
+            'timestamp': datetime.utcnow().isoformat(),
+            'error_code': 'ANALYSIS_NOT_RUNNING'
+        }})
+    return {
+        'status': 'cancelled',
+        'ticker': ticker.upper(),
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
+
+# Real-time push channel
+@app.websocket("/ws")
+async def websocket_endpoint(websocket: WebSocket):
+    """
+    Subscribe to pushed updates instead of polling.
+    Topics: analysis:<TICKER>, quote:<TICKER>, market_mood.
+    """
+    await get_broadcaster().serve(websocket)
+
+
+# Lifecycle hooks
+@app.on_event("startup")
+async def start_health_monitor():
+    """Begin polling dependency checks in the background."""
+    health_monitor.start()
+
+
+@app.on_event("startup")
+async def warm_up_services():
+    """Build the Gemini client and log into Salesforce off the event loop, after startup."""
+    if Config.STARTUP_WARMUP:
+        app.state.warmup = asyncio.gather(
+            asyncio.to_thread(lazy_vision_engine.get),
+            asyncio.to_thread(lazy_salesforce_service.get)
+        )
+
+
+@app.on_event("shutdown")
+async def flush_pending_syncs():
+    """Give queued scan results a last chance to reach Salesforce."""
+    await health_monitor.stop()
+    await get_salesforce_sync_queue().stop()
+    shutdown_logging()
+
+
 # Error handlers
+
+
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
-    return {
+    # Keep the detail of 404s raised by the endpoints themselves
+    if isinstance(exc, HTTPException) and isinstance(exc.detail, dict):
+        return FastJSONResponse(status_code=404, content={'detail': exc.detail})
+    return FastJSONResponse(status_code=404, content={
         'error': 'Endpoint not found',
-        'timestamp': datetime.utcnow().isoformat()
-    }
+        'timestamp': datetime.utcnow().isoformat(),
+        'error_code': 'NOT_FOUND'
+    })
 
 
 @app.exception_handler(500)
 async def internal_error_handler(request, exc):
     logger.error(f'Internal server error: {exc}')
-    return {
+    return FastJSONResponse(status_code=500, content={
         'error': 'Internal server error',
-        'timestamp': datetime.utcnow().isoformat()
-    }
+        'timestamp': datetime.utcnow().isoformat(),
+        'error_code': 'INTERNAL_ERROR'
+    })
 
 
 if __name__ == "__main__":
@@ -376,4 +1430,5 @@ if __name__ == "__main__":
     print("🔗 Health check: http://localhost:8000/api/health")
     print("📊 Enhanced analysis with yfinance integration")
     
-    uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info")
\ No newline at end of file
+    # log_config=None leaves uvicorn's loggers on the app's queue handler
+    uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info", log_config=None)
\ No newline at end of file
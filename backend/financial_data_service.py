@@ -0,0 +1,253 @@
+"""
+Financial data service backed by yfinance.
+Provides ticker info, fundamentals, price history and dashboard data.
+"""
+
+import logging
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import Config
+from lazy_imports import lazy_module, module_available
+from models.financial_data import (
+    TickerInfo, PriceHistory, FundamentalMetrics, MarketMood, PortfolioMover
+)
+from price_store import INTRADAY_PERIODS, PriceStore, PriceSeries, PriceStoreError
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# yfinance pulls in pandas; import it on the first fetch instead of with the app
+YFINANCE_AVAILABLE = module_available('yfinance')
+yf = lazy_module('yfinance')
+
+VALID_PERIODS = ('1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', '10y', 'ytd', 'max')
+
+
+class FinancialDataError(Exception):
+    """Custom exception for financial data errors"""
+    pass
+
+
+class FinancialDataService:
+    """Fetches market data for tickers. Methods block on network I/O."""
+
+    def _ticker(self, ticker: str):
+        if not YFINANCE_AVAILABLE:
+            raise FinancialDataError("yfinance library not available. Please install: pip install yfinance")
+        return yf.Ticker(ticker.strip().upper())
+
+    def __init__(self, price_store: Optional[PriceStore] = None):
+        self._price_store = price_store
+        self._sectors: Dict[str, str] = {}
+
+    @property
+    def price_store(self) -> PriceStore:
+        """Local OHLCV store that fetches missing tails through this service."""
+        if self._price_store is None:
+            self._price_store = PriceStore(fetcher=self.fetch_price_series)
+        return self._price_store
+
+    def fetch_price_series(self,
+                           ticker: str,
+                           start: Optional[date] = None,
+                           period: Optional[str] = None) -> PriceSeries:
+        """
+        Fetch daily bars from yfinance as columns, bypassing the local store.
+
+        Args:
+            ticker: Ticker symbol
+            start: First date to fetch; takes precedence over period
+            period: yfinance period when no start is given (defaults to "max")
+
+        Raises:
+            FinancialDataError: If the request fails
+        """
+        try:
+            if start is not None:
+                frame = self._ticker(ticker).history(start=start.isoformat(), interval='1d', auto_adjust=False)
+            else:
+                frame = self._ticker(ticker).history(period=period or 'max', interval='1d', auto_adjust=False)
+        except FinancialDataError:
+            raise
+        except Exception as e:
+            raise FinancialDataError(f"Failed to fetch price history for {ticker}: {str(e)}")
+
+        if frame is None or frame.empty:
+            empty = np.array([], dtype=np.float64)
+            return PriceSeries(
+                ticker=ticker.upper(), period=period or 'max',
+                dates=np.array([], dtype='datetime64[D]'),
+                open=empty, high=empty, low=empty, close=empty,
+                volume=np.array([], dtype=np.int64)
+            )
+
+        index = frame.index
+        if getattr(index, 'tz', None) is not None:
+            index = index.tz_localize(None)
+        return PriceSeries(
+            ticker=ticker.upper(),
+            period=period or 'max',
+            dates=index.normalize().values.astype('datetime64[D]'),
+            open=frame['Open'].to_numpy(dtype=np.float64),
+            high=frame['High'].to_numpy(dtype=np.float64),
+            low=frame['Low'].to_numpy(dtype=np.float64),
+            close=frame['Close'].to_numpy(dtype=np.float64),
+            volume=frame['Volume'].to_numpy(dtype=np.int64)
+        )
+
+    def get_price_series(self, ticker: str, period: str = '1mo') -> PriceSeries:
+        """
+        Daily bars for a period as columns, served from the local store.
+        Periods that include the current session, and requests the store
+        cannot serve, are fetched upstream.
+
+        Raises:
+            FinancialDataError: If the period is invalid or no data is returned
+        """
+        if period not in VALID_PERIODS:
+            raise FinancialDataError(f"Invalid period: {period}. Valid periods: {', '.join(VALID_PERIODS)}")
+
+        if Config.PRICE_STORE_ENABLED and period not in INTRADAY_PERIODS:
+            try:
+                return self.price_store.get_range(ticker, period)
+            except (PriceStoreError, OSError) as e:
+                logger.warning(f"Price store unavailable for {ticker}, fetching upstream: {e}")
+
+        series = self.fetch_price_series(ticker, period=period)
+        if len(series) == 0:
+            raise FinancialDataError(f"No price history available for {ticker}")
+        return series
+
+    def get_price_history(self, ticker: str, period: str = '1mo') -> PriceHistory:
+        """
+        Daily OHLCV history for a ticker.
+
+        Raises:
+            FinancialDataError: If the period is invalid or no data is returned
+        """
+        return self.get_price_series(ticker, period).to_price_history()
+
+    def _info(self, ticker: str) -> dict:
+        try:
+            return self._ticker(ticker).info or {}
+        except FinancialDataError:
+            raise
+        except Exception as e:
+            raise FinancialDataError(f"Failed to fetch ticker info for {ticker}: {str(e)}")
+
+    @staticmethod
+    def _build_ticker_info(ticker: str, info: dict) -> TickerInfo:
+        current_price = info.get('currentPrice') or info.get('regularMarketPrice') or info.get('previousClose')
+        if current_price is None:
+            raise FinancialDataError(f"No quote available for {ticker}")
+
+        return TickerInfo(
+            symbol=ticker.upper(),
+            current_price=float(current_price),
+            market_cap=info.get('marketCap'),
+            pe_ratio=info.get('trailingPE'),
+            fifty_two_week_high=info.get('fiftyTwoWeekHigh'),
+            fifty_two_week_low=info.get('fiftyTwoWeekLow'),
+            sector=info.get('sector'),
+            industry=info.get('industry'),
+            volume=info.get('volume')
+        )
+
+    @staticmethod
+    def _build_fundamentals(info: dict) -> FundamentalMetrics:
+        return FundamentalMetrics(
+            pe_ratio=info.get('trailingPE'),
+            market_cap=info.get('marketCap'),
+            revenue_growth=info.get('revenueGrowth'),
+            profit_margin=info.get('profitMargins'),
+            debt_to_equity=info.get('debtToEquity'),
+            return_on_equity=info.get('returnOnEquity'),
+            fifty_two_week_high=info.get('fiftyTwoWeekHigh'),
+            fifty_two_week_low=info.get('fiftyTwoWeekLow')
+        )
+
+    def get_ticker_info(self, ticker: str) -> TickerInfo:
+        """Current quote and profile information for a ticker."""
+        return self._build_ticker_info(ticker, self._info(ticker))
+
+    def get_fundamental_metrics(self, ticker: str) -> FundamentalMetrics:
+        """Fundamental ratios for a ticker."""
+        return self._build_fundamentals(self._info(ticker))
+
+    def get_ticker_overview(self, ticker: str) -> Tuple[TickerInfo, FundamentalMetrics]:
+        """Ticker info and fundamentals from a single upstream request."""
+        info = self._info(ticker)
+        return self._build_ticker_info(ticker, info), self._build_fundamentals(info)
+
+    def get_sector(self, ticker: str) -> str:
+        """
+        Sector for a ticker ("Unknown" if unavailable). Funds fall back to
+        their category. Cached for the process lifetime.
+        """
+        ticker = ticker.strip().upper()
+        if ticker not in self._sectors:
+            try:
+                info = self._info(ticker)
+                self._sectors[ticker] = info.get('sector') or info.get('category') or 'Unknown'
+            except FinancialDataError as e:
+                logger.warning(f"Sector lookup failed for {ticker}: {e}")
+                return 'Unknown'
+        return self._sectors[ticker]
+
+    def get_portfolio_movers(self, tickers: List[str]) -> List[PortfolioMover]:
+        """Latest price and daily percentage change for each ticker; failures are skipped."""
+        movers = []
+        for ticker in tickers:
+            try:
+                # Movers need today's in-progress bar, so bypass the store
+                closes = self.fetch_price_series(ticker, period='5d').close.tolist()
+                if not closes:
+                    raise FinancialDataError(f"No recent prices for {ticker}")
+                previous = closes[-2] if len(closes) > 1 else closes[-1]
+                change = (closes[-1] - previous) / previous * 100 if previous else 0.0
+                movers.append(PortfolioMover(
+                    ticker=ticker.upper(),
+                    price=round(closes[-1], 4),
+                    change=round(change, 2),
+                    trend='up' if change >= 0 else 'down'
+                ))
+            except FinancialDataError as e:
+                logger.warning(f"Skipping mover {ticker}: {e}")
+        return movers
+
+    def get_market_mood(self) -> MarketMood:
+        """Fear/greed style mood from S&P 500 and Bitcoin 5-day momentum."""
+        spy_change = self._five_day_change('SPY')
+        btc_change = self._five_day_change('BTC-USD')
+        score = self.calculate_fear_greed_index(spy_change, btc_change)
+        label = 'Fear' if score < 40 else 'Greed' if score > 60 else 'Neutral'
+        return MarketMood(
+            score=score,
+            label=label,
+            spy_change=round(spy_change, 2),
+            btc_change=round(btc_change, 2)
+        )
+
+    def _five_day_change(self, ticker: str) -> float:
+        closes = self.fetch_price_series(ticker, period='5d').close.tolist()
+        return (closes[-1] - closes[0]) / closes[0] * 100 if closes and closes[0] else 0.0
+
+    @staticmethod
+    def calculate_fear_greed_index(spy_change: float, btc_change: float) -> int:
+        """Map 5-day momentum onto a 0-100 scale centered at 50."""
+        score = 50 + spy_change * 6 + btc_change * 2
+        return int(max(0, min(100, round(score))))
+
+
+# Global financial data service instance
+financial_data_service = None
+
+def get_financial_data_service() -> FinancialDataService:
+    """Get or create the global financial data service instance"""
+    global financial_data_service
+    if financial_data_service is None:
+        financial_data_service = FinancialDataService()
+    return financial_data_service
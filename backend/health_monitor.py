@@ -0,0 +1,287 @@
+"""
+Background health checks for external dependencies.
+Each check (Gemini, Salesforce, Redis, market data) runs on its own schedule
+in a worker thread with a timeout, and the latest result is cached with a
+timestamp. Liveness and readiness probes answer from that cache, so a load
+balancer hitting them never waits on the network.
+"""
+
+import time
+import asyncio
+import logging
+from dataclasses import dataclass, asdict, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from config import Config
+from lazy_imports import lazy_module, module_available
+from metrics import DEPENDENCY_CHANGES
+
+REDIS_AVAILABLE = module_available('redis')
+redis = lazy_module('redis')
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+STATUS_OK = 'ok'
+STATUS_DOWN = 'down'
+STATUS_DISABLED = 'disabled'  # not configured; never counts against readiness
+STATUS_UNKNOWN = 'unknown'    # not checked yet
+STATUS_STALE = 'stale'        # last result is older than the stale window
+
+# A probe returns detail fields (optionally including 'status') or raises
+ProbeFn = Callable[[], Dict[str, Any]]
+
+
+class HealthCheckError(Exception):
+    """Custom exception for health check errors"""
+    pass
+
+
+@dataclass
+class HealthCheck:
+    """A dependency probe and its schedule."""
+    name: str
+    probe: ProbeFn
+    interval: float
+    timeout: float
+    critical: bool = False  # readiness requires this check to be ok
+
+
+@dataclass
+class CheckResult:
+    """Latest outcome of one check."""
+    name: str
+    status: str = STATUS_UNKNOWN
+    critical: bool = False
+    latency_ms: Optional[float] = None
+    checked_at: Optional[float] = None  # epoch seconds
+    detail: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class HealthMonitor:
+    """
+    Runs registered checks in the background and keeps their latest results.
+    Probes are blocking callables run through asyncio.to_thread; a probe that
+    outlives its timeout is reported down and is not started again until the
+    stuck call returns, so a hung dependency cannot pile up threads.
+    """
+
+    def __init__(self, stale_after: Optional[float] = None):
+        self.stale_after = stale_after
+        self.started_at = time.time()
+        self.checks: Dict[str, HealthCheck] = {}
+        self.results: Dict[str, CheckResult] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def register(self, check: HealthCheck) -> None:
+        self.checks[check.name] = check
+        self.results[check.name] = CheckResult(name=check.name, critical=check.critical)
+
+    def start(self) -> None:
+        """Start one polling task per check. Must be called from the event loop."""
+        for name, check in self.checks.items():
+            task = self._tasks.get(name)
+            if task is None or task.done():
+                self._tasks[name] = asyncio.create_task(self._run(check))
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _run(self, check: HealthCheck) -> None:
+        while True:
+            await self.run_check(check.name)
+            await asyncio.sleep(check.interval)
+
+    async def run_check(self, name: str) -> CheckResult:
+        """Run one check now and cache its result."""
+        check = self.checks.get(name)
+        if check is None:
+            raise HealthCheckError(f"Unknown health check: {name}")
+
+        started = time.perf_counter()
+        future = self._inflight.get(name)
+        if future is None or future.done():
+            future = asyncio.ensure_future(asyncio.to_thread(check.probe))
+            self._inflight[name] = future
+
+        result = CheckResult(name=name, critical=check.critical)
+        try:
+            detail = dict(await asyncio.wait_for(asyncio.shield(future), timeout=check.timeout) or {})
+            result.status = detail.pop('status', STATUS_OK)
+            result.error = detail.pop('error', None)
+            result.detail = detail
+        except asyncio.TimeoutError:
+            result.status = STATUS_DOWN
+            result.error = f"Timed out after {check.timeout:g}s"
+        except Exception as e:
+            result.status = STATUS_DOWN
+            result.error = str(e)[:500]
+        result.latency_ms = round((time.perf_counter() - started) * 1000, 2)
+        result.checked_at = time.time()
+
+        previous = self.results.get(name)
+        if previous is not None and previous.status != result.status and previous.status != STATUS_UNKNOWN:
+            logger.warning(f"Health check {name}: {previous.status} -> {result.status}"
+                           + (f" ({result.error})" if result.error else ""))
+            DEPENDENCY_CHANGES.labels(name, result.status).inc()
+        self.results[name] = result
+        return result
+
+    def _stale_window(self, check: HealthCheck) -> float:
+        if self.stale_after:
+            return self.stale_after
+        return 3 * check.interval + check.timeout
+
+    def effective_status(self, name: str, now: Optional[float] = None) -> str:
+        """Cached status, or 'stale' if the check has stopped reporting."""
+        result = self.results[name]
+        if result.checked_at is None or result.status == STATUS_DISABLED:
+            return result.status
+        now = time.time() if now is None else now
+        if now - result.checked_at > self._stale_window(self.checks[name]):
+            return STATUS_STALE
+        return result.status
+
+    def liveness(self) -> Dict[str, Any]:
+        """The process is up and the event loop is serving requests."""
+        return {'status': 'alive', 'uptime_seconds': round(time.time() - self.started_at, 1)}
+
+    def readiness(self) -> Dict[str, Any]:
+        """
+        Ready once every critical check has reported ok recently. Disabled
+        checks are ignored. Answered from memory only.
+        """
+        now = time.time()
+        failing = []
+        for name, check in self.checks.items():
+            if not check.critical:
+                continue
+            status = self.effective_status(name, now)
+            if status not in (STATUS_OK, STATUS_DISABLED):
+                failing.append({'name': name, 'status': status, 'error': self.results[name].error})
+        return {'ready': not failing, 'failing': failing}
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """All cached results, with staleness applied."""
+        now = time.time()
+        return {
+            name: {**result.to_dict(), 'status': self.effective_status(name, now)}
+            for name, result in self.results.items()
+        }
+
+    def status_of(self, name: str) -> str:
+        return self.effective_status(name) if name in self.results else STATUS_UNKNOWN
+
+
+def gemini_probe(get_vision_engine: Callable[[], Any]) -> ProbeFn:
+    """Fetch the model's metadata; costs no tokens."""
+    def probe() -> Dict[str, Any]:
+        vision_engine = get_vision_engine()
+        if vision_engine is None:
+            return {'status': STATUS_DISABLED, 'error': 'Vision engine not initialized'}
+        return vision_engine.ping()
+    return probe
+
+
+def salesforce_probe(get_salesforce_service: Callable[[], Any]) -> ProbeFn:
+    """Live COUNT() query; also refreshes the service's cached status."""
+    def probe() -> Dict[str, Any]:
+        salesforce_service = get_salesforce_service() if Config.SALESFORCE_USERNAME else None
+        if salesforce_service is None:
+            return {'status': STATUS_DISABLED, 'error': 'Salesforce not configured'}
+        status = salesforce_service.test_connection(max_age=0)
+        if not status.get('connected'):
+            return {'status': STATUS_DOWN, 'error': status.get('error', 'Not connected')}
+        return {k: status[k] for k in ('connection_type', 'instance_url') if k in status}
+    return probe
+
+
+def redis_probe(url: Optional[str] = None, timeout: Optional[float] = None) -> ProbeFn:
+    """PING the configured Redis server."""
+    url = url or Config.REDIS_URL
+    timeout = timeout or Config.HEALTH_CHECK_TIMEOUT
+    client = None
+
+    def probe() -> Dict[str, Any]:
+        nonlocal client
+        if not REDIS_AVAILABLE or not url:
+            return {'status': STATUS_DISABLED, 'error': 'redis library not installed or REDIS_URL unset'}
+        if client is None:
+            client = redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        client.ping()
+        return {'url': url.split('@')[-1]}
+    return probe
+
+
+def market_data_probe(data_service=None, ticker: Optional[str] = None) -> ProbeFn:
+    """Fetch a few days of bars for the benchmark ticker, bypassing the local store."""
+    ticker = ticker or Config.RISK_BENCHMARK_TICKER
+
+    def probe() -> Dict[str, Any]:
+        from financial_data_service import get_financial_data_service
+        service = data_service or get_financial_data_service()
+        series = service.fetch_price_series(ticker, period='5d')
+        if not len(series):
+            return {'status': STATUS_DOWN, 'error': f"No bars returned for {ticker}"}
+        return {'ticker': ticker, 'bars': len(series)}
+    return probe
+
+
+def default_checks(get_vision_engine: Callable[[], Any] = lambda: None,
+                   get_salesforce_service: Callable[[], Any] = lambda: None,
+                   interval: Optional[float] = None,
+                   timeout: Optional[float] = None,
+                   critical: Optional[Iterable[str]] = None) -> List[HealthCheck]:
+    """The app's dependency checks, configured from HEALTH_* settings."""
+    interval = interval or Config.HEALTH_CHECK_INTERVAL
+    timeout = timeout or Config.HEALTH_CHECK_TIMEOUT
+    if critical is None:
+        critical = [name.strip() for name in Config.HEALTH_CRITICAL_CHECKS.split(',') if name.strip()]
+    critical = set(critical)
+    probes = {
+        'gemini': gemini_probe(get_vision_engine),
+        'salesforce': salesforce_probe(get_salesforce_service),
+        'redis': redis_probe(timeout=timeout),
+        'market_data': market_data_probe(),
+    }
+    return [HealthCheck(name, probe, interval, timeout, critical=name in critical)
+            for name, probe in probes.items()]
+
+
+# Global health monitor instance
+health_monitor = None
+
+def get_health_monitor() -> HealthMonitor:
+    """Get or create the global health monitor instance"""
+    global health_monitor
+    if health_monitor is None:
+        health_monitor = HealthMonitor(stale_after=Config.HEALTH_STALE_SECONDS or None)
+    return health_monitor
+
+
+if __name__ == "__main__":
+    # Probe latency: readiness/liveness are dict lookups over cached results
+    monitor = HealthMonitor()
+    for check in [HealthCheck(f"check_{i}", lambda: {}, 30.0, 5.0, critical=True) for i in range(4)]:
+        monitor.register(check)
+
+    async def warm():
+        for name in monitor.checks:
+            await monitor.run_check(name)
+
+    asyncio.run(warm())
+    for label, fn in (('liveness', monitor.liveness), ('readiness', monitor.readiness)):
+        n = 100000
+        start = time.perf_counter()
+        for _ in range(n):
+            fn()
+        print(f"{label:10s} {(time.perf_counter() - start) / n * 1e6:.2f} us/call")
@@ -0,0 +1,342 @@
+"""
+HTTP caching and compression for JSON responses.
+Responses on endpoints with a cache policy get a strong ETag (a content
+hash, or the snapshot version the endpoint already set) and a
+Cache-Control header tuned per endpoint; GET requests whose If-None-Match
+matches get a bodyless 304. Cacheable responses are also kept encoded for
+their max-age, so a repeat view within that window doesn't re-run the
+analysis. Large JSON bodies are compressed with brotli (if installed) or
+gzip, and the compressed variants are cached alongside.
+"""
+
+import gzip
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config import Config
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # higher levels cost far more CPU for little gain on JSON
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """How long clients (and the server-side response cache) may reuse a response."""
+    max_age: int = 0
+    stale_while_revalidate: int = 0
+    no_store: bool = False
+
+    @property
+    def cacheable(self) -> bool:
+        return not self.no_store and self.max_age > 0
+
+    def header(self) -> str:
+        if self.no_store:
+            return 'no-store'
+        if self.max_age <= 0:
+            return 'no-cache'  # always revalidate with the ETag
+        value = f"public, max-age={self.max_age}"
+        if self.stale_while_revalidate:
+            value += f", stale-while-revalidate={self.stale_while_revalidate}"
+        return value
+
+
+NO_STORE = CachePolicy(no_store=True)
+REVALIDATE = CachePolicy()
+
+# Per-endpoint policies. Analysis payloads change with market data, so they
+# are reused for a minute and may be shown stale while the browser refetches.
+CACHE_POLICIES: Dict[str, CachePolicy] = {
+    '/api/analyze/detailed': CachePolicy(max_age=60, stale_while_revalidate=300),
+    '/api/analyze/compare': CachePolicy(max_age=60, stale_while_revalidate=300),
+    '/api/correlation': CachePolicy(max_age=300, stale_while_revalidate=3600),
+    '/api/screener': CachePolicy(max_age=30, stale_while_revalidate=120),
+    '/api/portfolio/test-analysis': CachePolicy(max_age=60, stale_while_revalidate=600),
+    '/api/analyze/status': REVALIDATE,
+    '/api/health': NO_STORE,
+    '/api/health/live': NO_STORE,
+    '/api/health/ready': NO_STORE,
+    '/api/health/checks': NO_STORE,
+    '/api/salesforce/status': NO_STORE,
+}
+
+CACHEABLE_METHODS = ('GET', 'HEAD', 'POST')  # POST bodies are part of the cache key
+CONDITIONAL_METHODS = ('GET', 'HEAD')  # If-None-Match -> 304 only applies to safe methods
+# Headers about the request that produced a response, dropped when it is replayed from the cache
+PER_REQUEST_HEADERS = ('x-ratelimit-limit', 'x-ratelimit-remaining')
+
+
+def content_etag(body: bytes) -> str:
+    """Strong ETag from a content hash."""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Weak comparison, as If-None-Match requires. Tags for compressed variants
+    ("<hash>-gzip") match their identity tag.
+    """
+    if not if_none_match:
+        return False
+    base = etag.strip('"')
+    for token in if_none_match.split(','):
+        token = token.strip()
+        if token == '*':
+            return True
+        token = token.removeprefix('W/').strip('"')
+        if token == base or token.rsplit('-', 1)[0] == base:
+            return True
+    return False
+
+
+def preferred_encoding(accept_encoding: str) -> Optional[str]:
+    """br if the client accepts it and brotli is installed, else gzip, else None."""
+    accepted = {}
+    for part in accept_encoding.lower().split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        if params.strip().startswith('q='):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip()] = q
+    if BROTLI_AVAILABLE and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+@dataclass
+class CachedResponse:
+    """An encoded response and its compressed variants."""
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    etag: Optional[str]
+    created_at: float
+    variants: Dict[str, bytes] = field(default_factory=dict)
+
+    def encoded(self, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        if encoding is None:
+            return self.body, None
+        if encoding not in self.variants:
+            self.variants[encoding] = compress(self.body, encoding)
+        return self.variants[encoding], encoding
+
+
+class ResponseCache:
+    """Bounded LRU of encoded responses, keyed by method, path, query and body."""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or Config.HTTP_CACHE_MAX_ENTRIES
+        self._entries: 'OrderedDict[str, CachedResponse]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, max_age: float) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry.created_at > max_age:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: CachedResponse) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Drop every entry, or those for one path."""
+        if path is None:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if k.split(' ', 2)[1] == path]:
+            del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+class HTTPCacheMiddleware:
+    """
+    ASGI middleware adding ETags, conditional 304s, Cache-Control, a
+    server-side response cache and compression. Add it inside CORSMiddleware
+    so CORS headers are computed per request, not replayed from the cache.
+    """
+
+    def __init__(self,
+                 app: ASGIApp,
+                 policies: Optional[Dict[str, CachePolicy]] = None,
+                 cache: Optional[ResponseCache] = None,
+                 min_compress_size: Optional[int] = None):
+        self.app = app
+        self.policies = CACHE_POLICIES if policies is None else policies
+        self.cache = cache or get_response_cache()
+        self.min_compress_size = Config.COMPRESSION_MIN_BYTES if min_compress_size is None else min_compress_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        method = scope['method']
+        policy = self.policies.get(scope['path'])
+        encoding = preferred_encoding(request_headers.get('accept-encoding', ''))
+
+        key = None
+        if policy is not None and policy.cacheable and method in CACHEABLE_METHODS and Config.HTTP_CACHE_ENABLED:
+            body = b''
+            if method == 'POST':
+                body, receive = await self._buffer_request(receive)
+            key = self._cache_key(scope, body)
+            entry = self.cache.get(key, policy.max_age)
+            if entry is not None:
+                await self._send_entry(entry, policy, method, request_headers, encoding, send, age=True)
+                return
+
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+        passthrough = False
+
+        async def buffered_send(message: Message) -> None:
+            nonlocal start, passthrough
+            if message['type'] == 'http.response.start':
+                headers = Headers(raw=message['headers'])
+                # Only whole JSON bodies are buffered; anything else streams through
+                passthrough = ('application/json' not in headers.get('content-type', '')
+                               or 'content-encoding' in headers)
+                if passthrough:
+                    await send(message)
+                else:
+                    start = message
+                return
+            if passthrough:
+                await send(message)
+                return
+            chunks.append(message.get('body', b''))
+            if message.get('more_body', False):
+                return
+
+            body = b''.join(chunks)
+            status = start['status']
+            etag = None
+            if policy is not None and status == 200 and not policy.no_store:
+                etag = Headers(raw=start['headers']).get('etag') or content_etag(body)
+            entry = CachedResponse(status, list(start['headers']), body, etag, time.monotonic())
+            if key is not None and status == 200:
+                self.cache.put(key, entry)
+            await self._send_entry(entry, policy, method, request_headers, encoding, send)
+
+        await self.app(scope, receive, buffered_send)
+
+    @staticmethod
+    async def _buffer_request(receive: Receive) -> Tuple[bytes, Receive]:
+        """Read the whole request body, then replay it to the app."""
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message['type'] != 'http.request':
+                break
+            chunks.append(message.get('body', b''))
+            more_body = message.get('more_body', False)
+        body = b''.join(chunks)
+        replayed = False
+
+        async def replay() -> Message:
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            return await receive()
+
+        return body, replay
+
+    @staticmethod
+    def _cache_key(scope: Scope, body: bytes) -> str:
+        query = scope.get('query_string', b'').decode('latin-1')
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest() if body else ''
+        return f"{scope['method'] if scope['method'] != 'HEAD' else 'GET'} {scope['path']} {query} {digest}"
+
+    async def _send_entry(self,
+                          entry: CachedResponse,
+                          policy: Optional[CachePolicy],
+                          method: str,
+                          request_headers: Headers,
+                          encoding: Optional[str],
+                          send: Send,
+                          age: bool = False) -> None:
+        headers = MutableHeaders(raw=list(entry.headers))
+        if age:
+            for name in PER_REQUEST_HEADERS:
+                if name in headers:
+                    del headers[name]
+        if policy is not None:
+            # Errors are never reusable, whatever the endpoint's policy
+            headers['cache-control'] = policy.header() if entry.status == 200 else 'no-store'
+            if age:
+                headers['age'] = str(int(time.monotonic() - entry.created_at))
+
+        applied = encoding if encoding is not None and len(entry.body) >= self.min_compress_size else None
+        # Each content-coding is its own representation, with its own tag
+        etag = entry.etag if applied is None or entry.etag is None else f'"{entry.etag[1:-1]}-{applied}"'
+        if len(entry.body) >= self.min_compress_size:
+            headers.add_vary_header('Accept-Encoding')
+
+        if etag and method in CONDITIONAL_METHODS and etag_matches(request_headers.get('if-none-match'), entry.etag):
+            not_modified = MutableHeaders()
+            not_modified['etag'] = etag
+            for name in ('cache-control', 'age', 'vary'):
+                if name in headers:
+                    not_modified[name] = headers[name]
+            await send({'type': 'http.response.start', 'status': 304, 'headers': not_modified.raw})
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        body, applied = entry.encoded(applied)
+        if etag and method in CONDITIONAL_METHODS:
+            headers['etag'] = etag
+        if applied:
+            headers['content-encoding'] = applied
+        headers['content-length'] = str(len(body))
+        await send({'type': 'http.response.start', 'status': entry.status, 'headers': headers.raw})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+# Global response cache instance
+response_cache = None
+
+def get_response_cache() -> ResponseCache:
+    """Get or create the global response cache instance"""
+    global response_cache
+    if response_cache is None:
+        response_cache = ResponseCache()
+    return response_cache
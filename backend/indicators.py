@@ -0,0 +1,363 @@
+"""
+Technical indicators computed over PriceSeries columns.
+Every indicator is vectorized with NumPy (prefix sums, sliding windows and
+block-wise closed-form EMA recursion) and supports incremental updates from
+a small carried state when new bars are appended.
+"""
+
+import math
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from models.financial_data import DerivedMetrics
+from price_store import PriceSeries
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS = 252
+
+Outputs = Dict[str, np.ndarray]
+State = Dict[str, Any]
+
+
+# Vectorized kernels
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean with NaN for the first window-1 positions."""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        sums = np.concatenate(([0.0], np.cumsum(values)))
+        out[window - 1:] = (sums[window:] - sums[:-window]) / window
+    return out
+
+
+def rolling_std(values: np.ndarray, window: int, ddof: int = 0) -> np.ndarray:
+    """Trailing standard deviation with NaN for the first window-1 positions."""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        out[window - 1:] = sliding_window_view(values, window).std(axis=1, ddof=ddof)
+    return out
+
+
+def ema_recursive(values: np.ndarray, alpha: float, initial: Optional[float] = None) -> np.ndarray:
+    """
+    y[t] = (1 - alpha) * y[t-1] + alpha * x[t], seeded with ``initial``
+    (or the first value), without a per-bar Python loop.
+
+    Within a block of L bars the recursion has the closed form
+    y[k] = d^(k+1) * (y_prev + alpha * sum_j x[j] * d^-(j+1)) with d = 1 - alpha,
+    computed with one cumsum. Blocks are sized so d^-L stays well inside
+    float64 range.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    out = np.empty(n)
+    if n == 0:
+        return out
+
+    decay = 1.0 - alpha
+    if decay <= 0.0:
+        out[:] = values
+        return out
+
+    previous = values[0] if initial is None or not np.isfinite(initial) else float(initial)
+    block = max(1, min(4096, int(30 / -math.log10(decay)))) if decay < 1.0 else n
+    powers = decay ** -np.arange(1, block + 1, dtype=np.float64)
+    inverse = 1.0 / powers
+
+    for start in range(0, n, block):
+        chunk = values[start:start + block]
+        length = len(chunk)
+        scaled = np.cumsum(chunk * powers[:length]) * alpha
+        out[start:start + length] = inverse[:length] * (previous + scaled)
+        previous = out[start + length - 1]
+    return out
+
+
+def _tail(state: Optional[State], key: str) -> np.ndarray:
+    if state and key in state:
+        return state[key]
+    return np.array([], dtype=np.float64)
+
+
+# Indicators: fn(series_of_new_bars, params, state) -> (outputs for new bars, new state)
+
+def sma(series: PriceSeries, params: Dict[str, Any], state: Optional[State] = None) -> Tuple[Outputs, State]:
+    window = params.get('window', 20)
+    tail = _tail(state, 'tail')
+    values = np.concatenate((tail, series.close))
+    result = rolling_mean(values, window)[len(tail):]
+    return {'sma': result}, {'tail': values[-(window - 1):] if window > 1 else values[:0]}
+
+
+def ema(series: PriceSeries, params: Dict[str, Any], state: Optional[State] = None) -> Tuple[Outputs, State]:
+    span = params.get('span', 20)
+    result = ema_recursive(series.close, 2.0 / (span + 1), (state or {}).get('last'))
+    return {'ema': result}, {'last': result[-1] if len(result) else (state or {}).get('last')}
+
+
+def rsi(series: PriceSeries, params: Dict[str, Any], state: Optional[State] = None) -> Tuple[Outputs, State]:
+    """Wilder RSI; the first ``period`` values of the series are warm-up (NaN), also across appends."""
+    period = params.get('period', 14)
+    close = np.asarray(series.close, dtype=np.float64)
+    previous_close = (state or {}).get('prev_close')
+    seen = (state or {}).get('count', 0)
+    if previous_close is None:
+        delta = np.concatenate(([np.nan], np.diff(close)))
+    else:
+        delta = np.diff(np.concatenate(([previous_close], close)))
+
+    gains = np.where(delta > 0, delta, 0.0)
+    losses = np.where(delta < 0, -delta, 0.0)
+    start = 1 if previous_close is None else 0
+    avg_gain = np.full(len(close), np.nan)
+    avg_loss = np.full(len(close), np.nan)
+    if len(close) > start:
+        alpha = 1.0 / period
+        avg_gain[start:] = ema_recursive(gains[start:], alpha, (state or {}).get('avg_gain'))
+        avg_loss[start:] = ema_recursive(losses[start:], alpha, (state or {}).get('avg_loss'))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+    result[np.isnan(avg_gain)] = np.nan
+    if seen < period:
+        result[:period - seen] = np.nan
+
+    new_state = dict(state or {})
+    if len(close):
+        new_state.update({'prev_close': close[-1], 'avg_gain': avg_gain[-1], 'avg_loss': avg_loss[-1],
+                          'count': seen + len(close)})
+    return {'rsi': result}, new_state
+
+
+def macd(series: PriceSeries, params: Dict[str, Any], state: Optional[State] = None) -> Tuple[Outputs, State]:
+    fast, slow, signal = params.get('fast', 12), params.get('slow', 26), params.get('signal', 9)
+    state = state or {}
+    fast_ema = ema_recursive(series.close, 2.0 / (fast + 1), state.get('fast'))
+    slow_ema = ema_recursive(series.close, 2.0 / (slow + 1), state.get('slow'))
+    line = fast_ema - slow_ema
+    signal_line = ema_recursive(line, 2.0 / (signal + 1), state.get('signal'))
+    new_state = dict(state)
+    if len(line):
+        new_state.update({'fast': fast_ema[-1], 'slow': slow_ema[-1], 'signal': signal_line[-1]})
+    return {'macd': line, 'signal': signal_line, 'histogram': line - signal_line}, new_state
+
+
+def bollinger(series: PriceSeries, params: Dict[str, Any], state: Optional[State] = None) -> Tuple[Outputs, State]:
+    window, num_std = params.get('window', 20), params.get('num_std', 2.0)
+    tail = _tail(state, 'tail')
+    values = np.concatenate((tail, series.close))
+    middle = rolling_mean(values, window)[len(tail):]
+    deviation = rolling_std(values, window)[len(tail):]
+    return {
+        'middle': middle,
+        'upper': middle + num_std * deviation,
+        'lower': middle - num_std * deviation
+    }, {'tail': values[-(window - 1):] if window > 1 else values[:0]}
+
+
+def atr(series: PriceSeries, params: Dict[str, Any], state: Optional[State] = None) -> Tuple[Outputs, State]:
+    """Wilder average true range; the first ``period - 1`` values of the series are NaN, also across appends."""
+    period = params.get('period', 14)
+    high = np.asarray(series.high, dtype=np.float64)
+    low = np.asarray(series.low, dtype=np.float64)
+    close = np.asarray(series.close, dtype=np.float64)
+    state = state or {}
+    seen = state.get('count', 0)
+
+    previous_close = np.concatenate(([state.get('prev_close', np.nan)], close[:-1]))
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - previous_close), np.abs(low - previous_close)))
+    smoothed = ema_recursive(true_range, 1.0 / period, state.get('atr'))
+    result = smoothed.copy()
+    if seen < period - 1:
+        result[:period - 1 - seen] = np.nan
+
+    new_state = dict(state)
+    if len(close):
+        new_state.update({'prev_close': close[-1], 'atr': smoothed[-1], 'count': seen + len(close)})
+    return {'atr': result}, new_state
+
+
+def realized_volatility(series: PriceSeries, params: Dict[str, Any], state: Optional[State] = None) -> Tuple[Outputs, State]:
+    """Annualized rolling standard deviation of daily log returns."""
+    window = params.get('window', 20)
+    tail = _tail(state, 'tail')
+    closes = np.concatenate((tail, series.close))
+    returns = np.full(len(closes), np.nan)
+    if len(closes) > 1:
+        returns[1:] = np.diff(np.log(closes))
+    # Positions before the first valid return stay NaN through the window
+    volatility = rolling_std(returns, window, ddof=1) * math.sqrt(TRADING_DAYS)
+    return {'volatility': volatility[len(tail):]}, {'tail': closes[-window:]}
+
+
+INDICATORS: Dict[str, Callable[..., Tuple[Outputs, State]]] = {
+    'sma': sma,
+    'ema': ema,
+    'rsi': rsi,
+    'macd': macd,
+    'bollinger': bollinger,
+    'atr': atr,
+    'volatility': realized_volatility,
+}
+
+DEFAULT_INDICATORS: Dict[str, Tuple[str, Dict[str, Any]]] = {
+    'sma_20': ('sma', {'window': 20}),
+    'sma_50': ('sma', {'window': 50}),
+    'ema_20': ('ema', {'span': 20}),
+    'rsi_14': ('rsi', {'period': 14}),
+    'macd': ('macd', {'fast': 12, 'slow': 26, 'signal': 9}),
+    'bollinger_20': ('bollinger', {'window': 20, 'num_std': 2.0}),
+    'atr_14': ('atr', {'period': 14}),
+    'volatility_20': ('volatility', {'window': 20}),
+}
+
+
+@dataclass
+class _CacheEntry:
+    first_date: np.datetime64
+    last_date: np.datetime64
+    outputs: Outputs
+    state: State
+
+
+class IndicatorEngine:
+    """
+    Computes indicators with an LRU cache keyed by (ticker, period, indicator, params).
+
+    When the requested series extends a cached one (same first date, and
+    its last cached date is present), only the new bars are computed from
+    the carried state, which matches a fresh computation. A window that
+    slid forward changes the seed of the recursive indicators, so it is
+    computed afresh.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._cache: 'OrderedDict[tuple, _CacheEntry]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(ticker: str, period: str, name: str, params: Dict[str, Any]) -> tuple:
+        return (ticker.upper(), period, name, tuple(sorted(params.items())))
+
+    def compute(self,
+                series: PriceSeries,
+                indicators: Optional[Dict[str, Tuple[str, Dict[str, Any]]]] = None) -> Dict[str, Outputs]:
+        """
+        Compute indicators for a series, reusing cached results where possible.
+
+        Args:
+            series: Bars for one ticker and period
+            indicators: Mapping of result name to (indicator, params); defaults to DEFAULT_INDICATORS
+
+        Returns:
+            Mapping of result name to output arrays aligned with ``series``
+        """
+        results = {}
+        for result_name, (name, params) in (indicators or DEFAULT_INDICATORS).items():
+            results[result_name] = self._compute_one(series, name, params)
+        return results
+
+    def _compute_one(self, series: PriceSeries, name: str, params: Dict[str, Any]) -> Outputs:
+        if name not in INDICATORS:
+            raise ValueError(f"Unknown indicator: {name}")
+        n = len(series)
+        if n == 0:
+            return {}
+
+        key = self._key(series.ticker, series.period, name, params)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+
+        function = INDICATORS[name]
+        dates = series.dates.astype('datetime64[D]')
+        outputs = None
+        if entry is not None and dates[0] == entry.first_date:
+            position = int(np.searchsorted(dates, entry.last_date))
+            if position < n and dates[position] == entry.last_date:
+                cached_length = len(next(iter(entry.outputs.values())))
+                if position == n - 1:
+                    outputs = {k: v[-n:] for k, v in entry.outputs.items()}
+                    state = entry.state
+                elif cached_length >= position + 1:
+                    new_outputs, state = function(series.slice(position + 1), params, entry.state)
+                    outputs = {
+                        k: np.concatenate((entry.outputs[k], new_outputs[k]))[-n:] for k in new_outputs
+                    }
+
+        if outputs is None:
+            outputs, state = function(series, params, None)
+
+        with self._lock:
+            self._cache[key] = _CacheEntry(
+                first_date=dates[0], last_date=dates[-1], outputs=outputs, state=state
+            )
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return outputs
+
+
+def latest_values(results: Dict[str, Outputs]) -> Dict[str, Dict[str, Optional[float]]]:
+    """Last value of every output, with NaN mapped to None for JSON."""
+    summary = {}
+    for result_name, outputs in results.items():
+        summary[result_name] = {
+            key: (round(float(values[-1]), 4) if len(values) and np.isfinite(values[-1]) else None)
+            for key, values in outputs.items()
+        }
+    return summary
+
+
+def trend_scores(series: PriceSeries, results: Dict[str, Outputs]) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Momentum and volatility scores (0-100) for DerivedMetrics.
+
+    Momentum blends RSI with price above the 50-day SMA and a positive MACD
+    histogram; volatility maps annualized realized volatility so 50% reads 100.
+    """
+    latest = latest_values(results)
+    momentum = None
+    rsi_value = latest.get('rsi_14', {}).get('rsi')
+    if rsi_value is not None and len(series):
+        sma_value = latest.get('sma_50', {}).get('sma')
+        histogram = latest.get('macd', {}).get('histogram')
+        momentum = 0.5 * rsi_value
+        momentum += 25.0 if sma_value is not None and series.close[-1] > sma_value else 0.0
+        momentum += 25.0 if histogram is not None and histogram > 0 else 0.0
+
+    volatility = latest.get('volatility_20', {}).get('volatility')
+    volatility_score = min(100.0, volatility * 200) if volatility is not None else None
+    return (
+        round(momentum, 1) if momentum is not None else None,
+        round(volatility_score, 1) if volatility_score is not None else None
+    )
+
+
+def apply_trend_scores(derived: DerivedMetrics, series: PriceSeries, results: Dict[str, Outputs]) -> DerivedMetrics:
+    """Fill the indicator-based fields of DerivedMetrics."""
+    derived.momentum_score, derived.volatility_score = trend_scores(series, results)
+    return derived
+
+
+# Global indicator engine instance
+indicator_engine = None
+
+def get_indicator_engine() -> IndicatorEngine:
+    """Get or create the global indicator engine instance"""
+    global indicator_engine
+    if indicator_engine is None:
+        indicator_engine = IndicatorEngine()
+    return indicator_engine
@@ -0,0 +1,99 @@
+"""
+Deferred imports and lazily built services.
+Heavy optional libraries (google.generativeai, torch, transformers,
+onnxruntime, yfinance, httpx) are checked for with find_spec at import time
+and only imported when first used, so importing the app (and every
+--reload) doesn't pay for them. Services that log in or configure clients
+are built on first use, once, and can be warmed up off the event loop.
+"""
+
+import asyncio
+import importlib
+import importlib.util
+import logging
+import threading
+from types import ModuleType
+from typing import Callable, Generic, Optional, TypeVar
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+def module_available(name: str) -> bool:
+    """True if the module can be found, without importing it."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        # Parent package missing, or a half-initialized module in sys.modules
+        return False
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access."""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+
+    def _load(self) -> ModuleType:
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_module(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+class LazyService(Generic[T]):
+    """
+    A service built by `factory` on first use. Construction happens once,
+    under a lock, and a failure is remembered (the service stays None)
+    instead of being retried on every request, matching the eager
+    behaviour it replaces.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], T]):
+        self.name = name
+        self.factory = factory
+        self.error: Optional[Exception] = None
+        self._instance: Optional[T] = None
+        self._initialized = False
+        self._lock = threading.Lock()
+
+    @property
+    def initialized(self) -> bool:
+        return self._initialized
+
+    def get(self) -> Optional[T]:
+        """Build the service if needed. Blocks; call from a thread when off the event loop."""
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    try:
+                        self._instance = self.factory()
+                        logger.info(f"{self.name} initialized successfully")
+                    except Exception as e:
+                        self.error = e
+                        logger.warning(f"{self.name} initialization failed: {e}")
+                    self._initialized = True
+        return self._instance
+
+    async def aget(self) -> Optional[T]:
+        """Event-loop friendly get: builds the service in a worker thread."""
+        if self._initialized:
+            return self._instance
+        return await asyncio.to_thread(self.get)
+
+    def peek(self) -> Optional[T]:
+        """The service if it has been built, without building it."""
+        return self._instance
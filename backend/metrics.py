@@ -0,0 +1,453 @@
+"""
+Prometheus metrics for the API.
+Request latency, counts and in-flight requests per endpoint, latency per
+stage inside a request (upload read, preprocessing, Gemini call, JSON
+parse, validation, serialization) and retry counters are recorded as they
+happen; cache hit/miss counters and dependency status are read from the
+components' own counters when /metrics is scraped. Rendered in the
+Prometheus text format, without a client library. Recording a sample is a
+bisect and a couple of additions under a lock.
+"""
+
+import sys
+import time
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config import Config
+
+PREFIX = 'marketmind'
+CONTENT_TYPE = 'text/plain; version=0.0.4'  # Response adds the charset
+
+# Seconds; spans a cached lookup (ms) to a slow Gemini call (tens of seconds)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+STAGE_UPLOAD_READ = 'upload_read'
+STAGE_PREPROCESS = 'preprocess'
+STAGE_GEMINI_CALL = 'gemini_call'
+STAGE_JSON_PARSE = 'json_parse'
+STAGE_VALIDATION = 'validation'
+STAGE_RISK_METRICS = 'risk_metrics'
+STAGE_RECOMMENDATIONS = 'recommendations'
+STAGE_SERIALIZATION = 'serialization'
+
+UNMATCHED_ROUTE = 'unmatched'
+
+
+class MetricsError(Exception):
+    """Custom exception for metrics errors"""
+    pass
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _CounterValue:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise MetricsError("Counters can only increase")
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeValue(_CounterValue):
+    __slots__ = ()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _HistogramValue:
+    __slots__ = ('bounds', 'counts', 'sum', '_lock')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Metric:
+    """A metric family: one value per combination of label values."""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _new_value(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """The value for these label values, created on first use."""
+        child = self._values.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise MetricsError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._values.setdefault(tuple(str(v) for v in values), self._new_value())
+        return child
+
+    def render(self, lines: List[str]) -> None:
+        lines.append(f"# HELP {self.name} {self.documentation}")
+        lines.append(f"# TYPE {self.name} {self.kind}")
+        for values, child in list(self._values.items()):
+            self._render_value(lines, values, child)
+
+    def _render_value(self, lines: List[str], values: Tuple[str, ...], child) -> None:
+        lines.append(f"{self.name}{_label_text(self.labelnames, values)} {_format_value(child.value)}")
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def _new_value(self):
+        return _CounterValue()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def _new_value(self):
+        return _GaugeValue()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+
+    def _new_value(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _render_value(self, lines: List[str], values: Tuple[str, ...], child) -> None:
+        with child._lock:
+            counts, total = list(child.counts), child.sum
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{_label_text(self.labelnames, values, le)} {cumulative}")
+        labels = _label_text(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+
+
+@dataclass
+class MetricFamily:
+    """Counter or gauge samples produced by a collector at scrape time."""
+    name: str
+    kind: str
+    documentation: str
+    samples: List[Tuple[Dict[str, str], float]] = field(default_factory=list)
+
+    def add(self, labels: Dict[str, str], value: float) -> None:
+        self.samples.append((labels, value))
+
+    def render(self, lines: List[str]) -> None:
+        lines.append(f"# HELP {self.name} {self.documentation}")
+        lines.append(f"# TYPE {self.name} {self.kind}")
+        for labels, value in self.samples:
+            lines.append(f"{self.name}{_label_text(list(labels), list(labels.values()))} {_format_value(value)}")
+
+
+Collector = Callable[[], Iterable[MetricFamily]]
+
+
+class MetricsRegistry:
+    """Metrics by name, plus collectors that report counters kept elsewhere."""
+
+    def __init__(self, prefix: str = PREFIX):
+        self.prefix = prefix
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Collector] = []
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs) -> Metric:
+        name = f"{self.prefix}_{name}"
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+        elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+            raise MetricsError(f"Metric {name} already registered as {metric.kind} {metric.labelnames}")
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def register_collector(self, collector: Collector) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            metric.render(lines)
+        for collector in self._collectors:
+            for family in collector():
+                family.render(lines)
+        return '\n'.join(lines) + '\n'
+
+
+# Caches that count their own hits and misses: label -> (module, global instance)
+CACHE_SOURCES = {
+    'http_response': ('http_cache', 'response_cache'),
+    'snapshot': ('serialization', 'snapshot_cache'),
+    'sentiment': ('sentiment_cache', 'sentiment_cache'),
+    'correlation_pairs': ('correlation_service', 'correlation_service'),
+}
+
+
+def _instance(module: str, name: str) -> Any:
+    """A module's global instance, if the module is loaded and the instance built."""
+    loaded = sys.modules.get(module)
+    return getattr(loaded, name, None) if loaded is not None else None
+
+
+def collect_cache_stats() -> List[MetricFamily]:
+    hits = MetricFamily(f"{PREFIX}_cache_hits_total", 'counter', 'Cache hits')
+    misses = MetricFamily(f"{PREFIX}_cache_misses_total", 'counter', 'Cache misses')
+    for label, (module, name) in CACHE_SOURCES.items():
+        cache = _instance(module, name)
+        if cache is None:
+            continue
+        hits.add({'cache': label}, cache.hits)
+        misses.add({'cache': label}, cache.misses)
+    return [hits, misses]
+
+
+def collect_component_stats() -> List[MetricFamily]:
+    families = []
+    sync_queue = _instance('salesforce_sync', 'salesforce_sync_queue')
+    if sync_queue is not None:
+        sync = MetricFamily(f"{PREFIX}_salesforce_sync_records_total", 'counter',
+                            'Scan results by write-behind sync outcome')
+        for outcome in ('enqueued', 'synced', 'rejected', 'dropped', 'retries'):
+            sync.add({'outcome': outcome}, getattr(sync_queue.stats, outcome))
+        pending = MetricFamily(f"{PREFIX}_salesforce_sync_pending", 'gauge', 'Scan results waiting to sync')
+        pending.add({}, sync_queue.stats.pending)
+        families += [sync, pending]
+
+    limiter = _instance('rate_limiter', 'rate_limiter')
+    if limiter is not None:
+        errors = MetricFamily(f"{PREFIX}_rate_limit_backend_errors_total", 'counter',
+                              'Rate limit checks that failed open')
+        errors.add({}, limiter.backend_errors)
+        families.append(errors)
+
+    monitor = _instance('health_monitor', 'health_monitor')
+    if monitor is not None:
+        up = MetricFamily(f"{PREFIX}_dependency_up", 'gauge', '1 if the dependency check last reported ok')
+        for name in monitor.checks:
+            up.add({'check': name}, 1.0 if monitor.effective_status(name) == 'ok' else 0.0)
+        families.append(up)
+
+    logs = _instance('structured_logging', 'logging_setup')
+    if logs is not None:
+        dropped = MetricFamily(f"{PREFIX}_log_records_dropped_total", 'counter',
+                               'Log records dropped by sampling or a full queue')
+        stats = logs.stats()
+        dropped.add({'reason': 'sampled'}, stats['dropped_sampled'])
+        dropped.add({'reason': 'queue_full'}, stats['dropped_queue_full'])
+        families.append(dropped)
+    return families
+
+
+# Global metrics registry instance
+metrics_registry = None
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Get or create the global metrics registry instance"""
+    global metrics_registry
+    if metrics_registry is None:
+        metrics_registry = MetricsRegistry()
+        metrics_registry.register_collector(collect_cache_stats)
+        metrics_registry.register_collector(collect_component_stats)
+    return metrics_registry
+
+
+# Method and route template of the request being served, for labelling stage timings
+_current_route: ContextVar[Tuple[str, str]] = ContextVar('metrics_route', default=('', UNMATCHED_ROUTE))
+
+_registry = get_metrics_registry()
+REQUESTS = _registry.counter('http_requests_total', 'HTTP requests by route and status', ('method', 'route', 'status'))
+REQUEST_SECONDS = _registry.histogram('http_request_duration_seconds', 'HTTP request latency', ('method', 'route'))
+IN_FLIGHT = _registry.gauge('http_requests_in_flight', 'HTTP requests being served', ('method', 'route'))
+STAGE_SECONDS = _registry.histogram(
+    'stage_duration_seconds', 'Latency of a stage within a request', ('method', 'route', 'stage'))
+RETRIES = _registry.counter('retries_total', 'Retried calls to external services', ('dependency', 'reason'))
+DEPENDENCY_CHANGES = _registry.counter(
+    'dependency_status_changes_total', 'Health check status transitions', ('check', 'status'))
+
+
+class StageTimer:
+    """Times a block into the stage histogram, labelled with the current method and route."""
+
+    __slots__ = ('stage', 'route', 'started')
+
+    def __init__(self, stage: str, route: Optional[str] = None):
+        self.stage = stage
+        self.route = route
+
+    def __enter__(self) -> 'StageTimer':
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if Config.METRICS_ENABLED:
+            method, route = _current_route.get()
+            STAGE_SECONDS.labels(method, self.route or route, self.stage).observe(time.perf_counter() - self.started)
+
+
+def stage(name: str, route: Optional[str] = None) -> StageTimer:
+    """`with stage('gemini_call'): ...` records how long the block took."""
+    return StageTimer(name, route)
+
+
+def record_retry(dependency: str, reason: str) -> None:
+    RETRIES.labels(dependency, reason).inc()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request count, latency and in-flight requests
+    per method and route template (not raw path, so /api/analyze/{ticker}
+    stays one series). Add it last so it runs outermost and times
+    everything below.
+    """
+
+    def __init__(self, app: ASGIApp, routes: Optional[Sequence[Any]] = None, max_paths: int = 1024):
+        self.app = app
+        self.routes = routes if routes is not None else []
+        self.max_paths = max_paths
+        self._route_by_path: Dict[Tuple[str, str], str] = {}
+
+    def route_for(self, method: str, path: str) -> str:
+        """
+        Template of the route serving a request: the first one matching both
+        path and method, else the first matching the path (a 405).
+        """
+        route = self._route_by_path.get((method, path))
+        if route is None:
+            matching = [r for r in self.routes
+                        if getattr(r, 'path_regex', None) is not None and r.path_regex.match(path)]
+            served = next((r for r in matching if getattr(r, 'methods', None) is None or method in r.methods),
+                          matching[0] if matching else None)
+            route = served.path if served is not None else UNMATCHED_ROUTE
+            if len(self._route_by_path) >= self.max_paths:
+                self._route_by_path.clear()
+            self._route_by_path[(method, path)] = route
+        return route
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or not Config.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope['method']
+        route = self.route_for(method, scope['path'])
+        token = _current_route.set((method, route))
+        in_flight = IN_FLIGHT.labels(method, route)
+        in_flight.inc()
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUEST_SECONDS.labels(method, route).observe(time.perf_counter() - started)
+            REQUESTS.labels(method, route, str(status)).inc()
+            in_flight.dec()
+            _current_route.reset(token)
+
+
+if __name__ == "__main__":
+    # Hot-path cost of recording, and of a scrape with a realistic number of series
+    import timeit
+
+    timer = stage('bench', route='/bench')
+    n = 200000
+    observe = STAGE_SECONDS.labels('GET', '/bench', 'observe')
+    cases = {
+        'histogram observe': lambda: observe.observe(0.042),
+        'labels() + observe': lambda: STAGE_SECONDS.labels('GET', '/bench', 'observe').observe(0.042),
+        'with stage(...)': lambda: timer.__enter__().__exit__(None, None, None),
+        'counter inc': lambda: REQUESTS.labels('GET', '/bench', '200').inc(),
+    }
+    for label, fn in cases.items():
+        seconds = min(timeit.repeat(fn, number=n, repeat=3)) / n
+        print(f"{label:22s} {seconds * 1e9:8.0f} ns")
+
+    for i in range(30):
+        for stage_name in (STAGE_UPLOAD_READ, STAGE_GEMINI_CALL, STAGE_JSON_PARSE, STAGE_VALIDATION):
+            STAGE_SECONDS.labels('POST', f'/route/{i}', stage_name).observe(0.1)
+    runs = 50
+    seconds = timeit.timeit(get_metrics_registry().render, number=runs) / runs
+    print(f"{'render':22s} {seconds * 1000:8.2f} ms  ({len(get_metrics_registry().render())} bytes)")
@@ -5,6 +5,9 @@ from .financial_data import (
     DerivedMetrics, DetailedAnalysisReport, BattleMetrics, 
     ComparisonAnalysisReport, MarketMood, AIPick, PortfolioMover, DashboardData
 )
+from .sentiment import (
+    Article, HeadlineSentiment, ContentSentiment, AnalyzedArticle, AnalysisReport
+)
 
 __all__ = [
     'TickerInfo',
@@ -18,5 +21,10 @@ __all__ = [
     'MarketMood',
     'AIPick',
     'PortfolioMover',
-    'DashboardData'
+    'DashboardData',
+    'Article',
+    'HeadlineSentiment',
+    'ContentSentiment',
+    'AnalyzedArticle',
+    'AnalysisReport'
 ]
\ No newline at end of file
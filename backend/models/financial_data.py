@@ -87,6 +87,8 @@ class DerivedMetrics:
     safety_score: float  # Derived from market cap
     hype_score: float    # Derived from volume and news count
     sentiment_score: float  # From sentiment analysis
+    momentum_score: Optional[float] = None  # From RSI, SMA and MACD indicators
+    volatility_score: Optional[float] = None  # From realized volatility
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization."""
@@ -106,6 +108,7 @@ class DetailedAnalysisReport:
     confidence_score: float
     sentiment_analysis: Optional[Dict[str, Any]] = None
     news_articles: Optional[List[Dict[str, Any]]] = None
+    technical_indicators: Optional[Dict[str, Any]] = None
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization."""
@@ -119,7 +122,8 @@ class DetailedAnalysisReport:
             'ai_verdict': self.ai_verdict,
             'confidence_score': self.confidence_score,
             'sentiment_analysis': self.sentiment_analysis,
-            'news_articles': self.news_articles or []
+            'news_articles': self.news_articles or [],
+            'technical_indicators': self.technical_indicators
         }
 
 
@@ -130,6 +134,8 @@ class BattleMetrics:
     growth_scores: Dict[str, float]     # derived from P/E ratios
     safety_scores: Dict[str, float]     # derived from market cap
     hype_scores: Dict[str, float]       # derived from volume/news
+    correlation_matrix: Optional[Dict[str, Dict[str, Optional[float]]]] = None  # daily return correlations
+    diversification_score: Optional[float] = None  # 0-100 for an equal-weight basket
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization."""
@@ -4,7 +4,7 @@ Defines data structures for portfolio holdings, analysis, and recommendations.
 """
 
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel, Field, validator
 from enum import Enum
 
@@ -82,6 +82,39 @@ class InvestmentRecommendation(BaseModel):
             raise ValueError('Reason must be at least 10 characters long')
         return v.strip()
 
+class HoldingRisk(BaseModel):
+    """
+    Per-holding risk figures computed from price history.
+    """
+    ticker: str = Field(..., description="Stock ticker symbol")
+    quantity: float = Field(..., gt=0, description="Number of shares held")
+    price: float = Field(..., ge=0, description="Latest close price")
+    value: float = Field(..., ge=0, description="Position market value")
+    weight: float = Field(..., ge=0, le=1, description="Share of total portfolio value")
+    sector: str = Field(default="Unknown", description="Sector classification")
+    volatility: float = Field(..., ge=0, description="Annualized volatility of daily returns")
+    beta: float = Field(..., description="Beta to the benchmark")
+    risk_contribution: float = Field(..., description="Share of portfolio variance contributed by this holding")
+
+class PortfolioRiskMetrics(BaseModel):
+    """
+    Deterministic portfolio risk metrics computed from cached price histories.
+    """
+    total_value: float = Field(..., ge=0, description="Market value of priced holdings")
+    volatility: float = Field(..., ge=0, description="Annualized portfolio volatility")
+    beta: float = Field(..., description="Portfolio beta to the benchmark")
+    max_drawdown: float = Field(..., ge=0, le=1, description="Largest peak-to-trough decline over the lookback")
+    hhi: float = Field(..., ge=0, le=1, description="Herfindahl-Hirschman concentration index of weights")
+    effective_holdings: float = Field(..., ge=0, description="Inverse HHI: equivalent number of equal-weight holdings")
+    sector_exposure: Dict[str, float] = Field(default_factory=dict, description="Portfolio weight per sector")
+    diversification_score: Optional[float] = Field(default=None, ge=0, le=100, description="Correlation- and concentration-based diversification (0-100)")
+    average_correlation: Optional[float] = Field(default=None, ge=-1, le=1, description="Weighted average pairwise return correlation")
+    risk_profile: RiskProfile = Field(..., description="Risk classification from volatility")
+    holdings: List[HoldingRisk] = Field(default_factory=list, description="Per-holding risk figures")
+    benchmark: str = Field(default="SPY", description="Benchmark ticker used for beta")
+    lookback_days: int = Field(..., ge=0, description="Number of daily returns used")
+    unpriced_tickers: List[str] = Field(default_factory=list, description="Holdings without price history")
+
 class PortfolioAnalysis(BaseModel):
     """
     Represents the AI analysis of a portfolio's health and characteristics.
@@ -91,6 +124,7 @@ class PortfolioAnalysis(BaseModel):
     strengths: List[str] = Field(default_factory=list, description="Portfolio strengths")
     weaknesses: List[str] = Field(default_factory=list, description="Portfolio weaknesses")
     total_value: Optional[float] = Field(default=None, ge=0, description="Total portfolio value if available")
+    risk_metrics: Optional[PortfolioRiskMetrics] = Field(default=None, description="Computed risk metrics if available")
     
     @validator('health_score')
     def validate_health_score(cls, v):
@@ -182,12 +216,31 @@ class PortfolioScanResponse(BaseModel):
 
 # Utility functions for model validation and conversion
 
-def validate_gemini_response(response_data: dict) -> PortfolioAnalysisResult:
+def parse_gemini_holdings(response_data: dict) -> List[PortfolioHolding]:
+    """
+    Extract holdings from a Gemini response.
+    
+    Raises:
+        ValueError: If a holding is invalid
+    """
+    return [
+        PortfolioHolding(
+            ticker=h.get('ticker', ''),
+            quantity=float(h.get('qty', 0)),
+            confidence=1.0  # Default confidence for Gemini extractions
+        )
+        for h in response_data.get('extracted_holdings', [])
+    ]
+
+def validate_gemini_response(response_data: dict,
+                             recommendations: Optional[List[InvestmentRecommendation]] = None) -> PortfolioAnalysisResult:
     """
     Validate and convert Gemini API response to PortfolioAnalysisResult.
     
     Args:
         response_data: Raw response from Gemini Vision API
+        recommendations: Precomputed recommendations; when given, any
+            suggestions in the response are ignored
         
     Returns:
         Validated PortfolioAnalysisResult instance
@@ -197,15 +250,7 @@ def validate_gemini_response(response_data: dict) -> PortfolioAnalysisResult:
     """
     try:
         # Extract holdings
-        holdings_data = response_data.get('extracted_holdings', [])
-        holdings = [
-            PortfolioHolding(
-                ticker=h.get('ticker', ''),
-                quantity=float(h.get('qty', 0)),
-                confidence=1.0  # Default confidence for Gemini extractions
-            )
-            for h in holdings_data
-        ]
+        holdings = parse_gemini_holdings(response_data)
         
         # Extract analysis
         analysis_data = response_data.get('analysis', {})
@@ -217,17 +262,22 @@ def validate_gemini_response(response_data: dict) -> PortfolioAnalysisResult:
         )
         
         # Extract recommendations
-        suggestions_data = analysis_data.get('suggestions', [])
-        recommendations = []
-        for i, suggestion in enumerate(suggestions_data[:3]):  # Limit to 3
-            recommendations.append(
-                InvestmentRecommendation(
-                    ticker=suggestion.get('ticker', ''),
-                    reason=suggestion.get('reason', ''),
-                    improvement_type=ImprovementType.DIVERSIFICATION,  # Default type
-                    priority=i + 1
+        if recommendations is None:
+            suggestions_data = analysis_data.get('suggestions', [])
+            recommendations = []
+            for i, suggestion in enumerate(suggestions_data[:3]):  # Limit to 3
+                try:
+                    improvement_type = ImprovementType(suggestion.get('type', ImprovementType.DIVERSIFICATION.value))
+                except ValueError:
+                    improvement_type = ImprovementType.DIVERSIFICATION  # Default type
+                recommendations.append(
+                    InvestmentRecommendation(
+                        ticker=suggestion.get('ticker', ''),
+                        reason=suggestion.get('reason', ''),
+                        improvement_type=improvement_type,
+                        priority=i + 1
+                    )
                 )
-            )
         
         # Create result
         result = PortfolioAnalysisResult(
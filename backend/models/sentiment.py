@@ -0,0 +1,88 @@
+"""
+Sentiment analysis models for news-driven market analysis.
+"""
+from dataclasses import dataclass, asdict, field
+from datetime import datetime
+from typing import Optional, List, Dict, Any
+
+
+@dataclass
+class Article:
+    """News article fetched for a ticker."""
+    title: str
+    url: str
+    published: str
+    content: str
+    source_type: str  # "Full Article" or "Headline Only"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for JSON serialization."""
+        return asdict(self)
+
+
+@dataclass
+class HeadlineSentiment:
+    """VADER sentiment for an article headline."""
+    score: float  # VADER compound score (-1 to 1)
+    label: str  # "Positive", "Negative", "Neutral"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for JSON serialization."""
+        return asdict(self)
+
+
+@dataclass
+class ContentSentiment:
+    """Transformer sentiment for an article body."""
+    confidence: float  # Probability of the winning label (0-1)
+    label: str  # "Positive", "Negative", "Neutral"
+    probabilities: Dict[str, float] = field(default_factory=dict)
+    model: Optional[str] = None  # Model id that produced the score
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for JSON serialization."""
+        return asdict(self)
+
+
+@dataclass
+class AnalyzedArticle:
+    """Article together with its headline and content sentiment."""
+    article: Article
+    headline_sentiment: HeadlineSentiment
+    content_sentiment: ContentSentiment
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for JSON serialization."""
+        return {
+            **self.article.to_dict(),
+            'headline_sentiment': self.headline_sentiment.to_dict(),
+            'content_sentiment': self.content_sentiment.to_dict(),
+            'sentiment': self.content_sentiment.label,
+            'confidence': self.content_sentiment.confidence
+        }
+
+
+@dataclass
+class AnalysisReport:
+    """Aggregated sentiment report over a set of analyzed articles."""
+    timestamp: datetime
+    total_articles: int
+    sentiment_distribution: Dict[str, int]
+    net_sentiment_score: float
+    market_signal: str  # "BULLISH", "BEARISH", "NEUTRAL"
+    articles: List[AnalyzedArticle]
+    processing_time: float
+    ticker: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for JSON serialization."""
+        return {
+            'ticker': self.ticker,
+            'timestamp': self.timestamp.isoformat(),
+            'total_articles': self.total_articles,
+            'sentiment_distribution': self.sentiment_distribution,
+            'net_sentiment_score': self.net_sentiment_score,
+            'market_signal': self.market_signal,
+            'articles': [article.to_dict() for article in self.articles],
+            'processing_time': self.processing_time
+        }
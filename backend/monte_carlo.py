@@ -0,0 +1,266 @@
+"""
+Monte Carlo simulation of portfolio value for scanned holdings.
+Paths are generated in chunks sized to a fixed element budget, so memory
+stays bounded regardless of path count; chunks can run in worker
+processes. Each chunk has its own seed from one SeedSequence, so results
+do not depend on the worker count.
+"""
+
+import os
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import Config
+from models.portfolio_analysis import PortfolioHolding
+from risk_engine import PortfolioRiskEngine, get_risk_engine
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+METHODS = ('bootstrap', 'normal')
+REBALANCE_MODES = ('daily', 'none')
+PERCENTILES = (5, 25, 50, 75, 95)
+DRAWDOWN_THRESHOLDS = (0.1, 0.2, 0.3, 0.5)
+
+
+class SimulationError(Exception):
+    """Custom exception for simulation errors"""
+    pass
+
+
+@dataclass
+class SimulationResult:
+    """Percentile bands of portfolio value and drawdown probabilities."""
+    initial_value: float
+    horizon_days: int
+    num_paths: int
+    method: str
+    rebalance: str
+    days: List[int]                        # sessions at which bands are reported
+    percentile_bands: Dict[str, List[float]]  # "p5".."p95" -> portfolio value per reported day
+    final_value: Dict[str, float]          # mean and percentiles at the horizon
+    probability_of_loss: float
+    drawdown_probabilities: Dict[str, float]  # threshold -> P(max drawdown >= threshold)
+    elapsed_ms: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for JSON serialization."""
+        return asdict(self)
+
+
+def _report_steps(horizon: int, band_points: int) -> np.ndarray:
+    """Evenly spaced session indices 0..horizon, always including both ends."""
+    return np.unique(np.linspace(0, horizon, min(band_points, horizon + 1)).round().astype(np.int64))
+
+
+def _simulate_chunk(task: Tuple) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Simulate one chunk of growth paths (initial value 1.0).
+
+    Module-level so it can run in a worker process.
+
+    Returns:
+        (growth at the reported steps, max drawdown per path)
+    """
+    seed, paths, horizon, method, rebalance, history, weights, mean, chol, steps = task
+    rng = np.random.default_rng(seed)
+
+    if rebalance == 'daily':
+        # Constant weights: the portfolio is a single return series
+        portfolio_history = history @ weights
+        if method == 'bootstrap':
+            gross = 1.0 + np.maximum(portfolio_history, -0.99)
+            growth = gross[rng.integers(0, len(gross), size=(paths, horizon), dtype=np.int32)]
+        else:
+            sigma = float(np.sqrt(weights @ (chol @ chol.T) @ weights))
+            growth = rng.normal(float(weights @ mean), sigma, size=(paths, horizon))
+            np.maximum(growth, -0.99, out=growth)
+            growth += 1.0
+        np.cumprod(growth, axis=1, out=growth)
+    else:
+        # Buy and hold: simulate every asset in float32, value is the sum of positions
+        if method == 'bootstrap':
+            gross = (1.0 + np.maximum(history, -0.99)).astype(np.float32)
+            draws = gross[rng.integers(0, len(gross), size=(paths, horizon), dtype=np.int32)]
+        else:
+            draws = rng.standard_normal((paths, horizon, len(weights)), dtype=np.float32)
+            draws = draws @ chol.T.astype(np.float32)
+            draws += mean.astype(np.float32)
+            np.maximum(draws, -0.99, out=draws)
+            draws += 1.0
+        np.cumprod(draws, axis=1, out=draws)
+        growth = (draws @ weights.astype(np.float32)).astype(np.float64)
+
+    # The starting value 1.0 counts as the first peak
+    peaks = np.maximum.accumulate(growth, axis=1)
+    np.maximum(peaks, 1.0, out=peaks)
+    max_drawdown = np.maximum(1.0 - (growth / peaks).min(axis=1), 0.0)
+
+    reported = np.ones((paths, len(steps)))
+    later = steps > 0
+    reported[:, later] = growth[:, steps[later] - 1]
+    return reported, max_drawdown
+
+
+def simulate_paths(history: np.ndarray,
+                   weights: np.ndarray,
+                   initial_value: float,
+                   num_paths: int = 10_000,
+                   horizon: int = 252,
+                   method: str = 'bootstrap',
+                   rebalance: str = 'daily',
+                   seed: Optional[int] = None,
+                   band_points: int = 53,
+                   chunk_elements: Optional[int] = None,
+                   workers: Optional[int] = None) -> SimulationResult:
+    """
+    Simulate portfolio value paths from historical daily returns.
+
+    Args:
+        history: T x N daily simple returns of the holdings (NaN treated as 0)
+        weights: Value weights at the start, summing to 1
+        initial_value: Portfolio value at the start
+        num_paths: Number of simulated paths
+        horizon: Sessions per path
+        method: "bootstrap" (resample historical days, keeping cross-asset
+            dependence) or "normal" (multivariate normal fit)
+        rebalance: "daily" (constant weights) or "none" (buy and hold)
+        seed: Seed for reproducible results
+        band_points: Number of sessions at which percentile bands are reported
+        chunk_elements: Max random draws per chunk (caps memory)
+        workers: Worker processes; 0 or 1 runs in-process
+
+    Raises:
+        SimulationError: If the inputs are invalid
+    """
+    if method not in METHODS:
+        raise SimulationError(f"Unknown method: {method}. Supported: {', '.join(METHODS)}")
+    if rebalance not in REBALANCE_MODES:
+        raise SimulationError(f"Unknown rebalance mode: {rebalance}. Supported: {', '.join(REBALANCE_MODES)}")
+    history = np.where(np.isfinite(history), history, 0.0)
+    if history.ndim != 2 or len(history) < 2:
+        raise SimulationError("At least two sessions of returns are required")
+
+    start = time.perf_counter()
+    weights = np.asarray(weights, dtype=np.float64)
+    mean = history.mean(axis=0)
+    chol = None
+    if method == 'normal':
+        covariance = np.atleast_2d(np.cov(history, rowvar=False))
+        # Jitter keeps the factorization stable for collinear or flat series
+        chol = np.linalg.cholesky(covariance + np.eye(len(covariance)) * 1e-12)
+
+    chunk_elements = chunk_elements or Config.MONTE_CARLO_CHUNK_ELEMENTS
+    workers = Config.MONTE_CARLO_WORKERS if workers is None else workers
+    width = len(weights) if rebalance == 'none' else 1
+    chunk_paths = max(1, chunk_elements // (horizon * width))
+    sizes = [min(chunk_paths, num_paths - offset) for offset in range(0, num_paths, chunk_paths)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    steps = _report_steps(horizon, band_points)
+    tasks = [
+        (chunk_seed, size, horizon, method, rebalance, history, weights, mean, chol, steps)
+        for chunk_seed, size in zip(seeds, sizes)
+    ]
+
+    if workers and workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            results = list(pool.map(_simulate_chunk, tasks))
+    else:
+        results = [_simulate_chunk(task) for task in tasks]
+
+    growth = np.concatenate([r[0] for r in results])
+    max_drawdown = np.concatenate([r[1] for r in results])
+    values = growth * initial_value
+    bands = np.percentile(values, PERCENTILES, axis=0)
+    final = values[:, -1]
+
+    return SimulationResult(
+        initial_value=round(initial_value, 2),
+        horizon_days=horizon,
+        num_paths=num_paths,
+        method=method,
+        rebalance=rebalance,
+        days=steps.tolist(),
+        percentile_bands={f"p{p}": np.round(bands[i], 2).tolist() for i, p in enumerate(PERCENTILES)},
+        final_value={
+            'mean': round(float(final.mean()), 2),
+            **{f"p{p}": round(float(bands[i, -1]), 2) for i, p in enumerate(PERCENTILES)}
+        },
+        probability_of_loss=round(float((final < initial_value).mean()), 4),
+        drawdown_probabilities={
+            f"{threshold:.0%}": round(float((max_drawdown >= threshold).mean()), 4)
+            for threshold in DRAWDOWN_THRESHOLDS
+        },
+        elapsed_ms=round((time.perf_counter() - start) * 1000, 1)
+    )
+
+
+def simulate_holdings(holdings: Sequence[PortfolioHolding],
+                      risk_engine: Optional[PortfolioRiskEngine] = None,
+                      **options) -> SimulationResult:
+    """
+    Simulate holdings from their cached price histories.
+    Blocks on data provider I/O for tickers missing from the price store.
+
+    Raises:
+        RiskEngineError: If no holding has price history
+        SimulationError: If the inputs are invalid
+    """
+    loaded = (risk_engine or get_risk_engine()).load_prices(holdings)
+    closes = loaded.prices.closes
+    last = np.where(np.isfinite(closes[-1]), closes[-1], 0.0)
+    values = loaded.quantities * last
+    initial_value = float(values.sum())
+    if initial_value <= 0:
+        raise SimulationError("Portfolio has no priced value")
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        history = closes[1:] / closes[:-1] - 1.0
+    result = simulate_paths(history, values / initial_value, initial_value, **options)
+    logger.info(
+        f"Simulated {result.num_paths} paths x {result.horizon_days} days for "
+        f"{len(values)} holdings in {result.elapsed_ms:.0f}ms"
+    )
+    return result
+
+
+def benchmark_simulation(num_holdings: int = 50,
+                         num_paths: int = 100_000,
+                         horizon: int = 252,
+                         workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Wall time per method and rebalance mode on synthetic returns."""
+    rng = np.random.default_rng(0)
+    market = rng.normal(0.0004, 0.01, 756)
+    history = market[:, None] * rng.uniform(0.5, 1.5, num_holdings) + rng.normal(0, 0.012, (756, num_holdings))
+    weights = np.full(num_holdings, 1.0 / num_holdings)
+    workers = os.cpu_count() if workers is None else workers
+
+    rows = []
+    for method in METHODS:
+        for rebalance in REBALANCE_MODES:
+            result = simulate_paths(history, weights, 100_000.0, num_paths, horizon,
+                                    method, rebalance, seed=0, workers=workers)
+            rows.append({'method': method, 'rebalance': rebalance, 'ms': result.elapsed_ms,
+                         'p50': result.final_value['p50']})
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Benchmark Monte Carlo path generation")
+    parser.add_argument('--holdings', type=int, default=50)
+    parser.add_argument('--paths', type=int, default=100_000)
+    parser.add_argument('--horizon', type=int, default=252)
+    parser.add_argument('--workers', type=int, default=None, help="defaults to all cores")
+    args = parser.parse_args()
+
+    print(f"{args.paths} paths x {args.horizon} days, {args.holdings} holdings")
+    for row in benchmark_simulation(args.holdings, args.paths, args.horizon, args.workers):
+        print(f"{row['method']:>10} {row['rebalance']:>6} {row['ms']:>9.0f}ms  median final {row['p50']:,.0f}")
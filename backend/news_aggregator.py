@@ -0,0 +1,163 @@
+"""
+News aggregation for ticker sentiment analysis.
+Fetches Google News RSS results, resolves publisher URLs and extracts
+article text, falling back to the headline when extraction fails.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+from urllib.parse import quote_plus
+
+import requests
+
+try:
+    import feedparser
+    FEEDPARSER_AVAILABLE = True
+except ImportError:
+    FEEDPARSER_AVAILABLE = False
+
+try:
+    import trafilatura
+    TRAFILATURA_AVAILABLE = True
+except ImportError:
+    TRAFILATURA_AVAILABLE = False
+
+from config import Config
+from models.sentiment import Article
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+GOOGLE_NEWS_RSS = "https://news.google.com/rss/search?q={query}&hl=en-US&gl=US&ceid=US:en"
+MIN_CONTENT_LENGTH = 200  # Shorter extractions are treated as failures
+
+
+class NewsAggregatorError(Exception):
+    """Custom exception for news aggregation errors"""
+    pass
+
+
+class NewsAggregator:
+    """Fetches and extracts news articles for search queries."""
+
+    def __init__(self, timeout: Optional[int] = None, max_workers: Optional[int] = None):
+        self.timeout = timeout or Config.REQUEST_TIMEOUT
+        self.max_workers = max_workers or Config.MAX_WORKERS
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': 'Mozilla/5.0 (MarketMind news aggregator)'})
+
+    @staticmethod
+    def queries_for_ticker(ticker: str) -> List[str]:
+        """Default search queries for a ticker."""
+        return [f"{ticker} stock", f"{ticker} earnings"]
+
+    def fetch_articles(self,
+                       queries: List[str],
+                       limit: int = 10,
+                       cancel_event: Optional[threading.Event] = None) -> List[Article]:
+        """
+        Fetch, deduplicate and extract articles for the given queries.
+
+        Args:
+            queries: Search queries
+            limit: Maximum number of articles to return
+            cancel_event: Set to abandon the fetch early
+
+        Returns:
+            Up to ``limit`` articles with extracted content
+
+        Raises:
+            NewsAggregatorError: If the RSS parser is unavailable
+        """
+        if not FEEDPARSER_AVAILABLE:
+            raise NewsAggregatorError(
+                "feedparser library not available. Please install: pip install feedparser"
+            )
+
+        entries = []
+        for query in queries:
+            if cancel_event and cancel_event.is_set():
+                return []
+            try:
+                response = self.session.get(
+                    GOOGLE_NEWS_RSS.format(query=quote_plus(query)), timeout=self.timeout
+                )
+                response.raise_for_status()
+                feed = feedparser.parse(response.content)
+                entries.extend(feed.entries)
+            except Exception as e:
+                logger.warning(f"Failed to fetch news feed for '{query}': {e}")
+
+        articles = self.deduplicate_articles([
+            Article(
+                title=entry.get('title', '').strip(),
+                url=entry.get('link', ''),
+                published=entry.get('published', ''),
+                content='',
+                source_type='Headline Only'
+            )
+            for entry in entries if entry.get('title')
+        ])[:limit]
+
+        if cancel_event and cancel_event.is_set():
+            return []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(lambda article: self._populate_content(article, cancel_event), articles))
+
+    def _populate_content(self, article: Article, cancel_event: Optional[threading.Event]) -> Article:
+        """Resolve the article URL and fill in its content."""
+        if cancel_event and cancel_event.is_set():
+            return article
+        url = self.resolve_google_urls([article.url])[0]
+        content = self.extract_content(url)
+        if content:
+            article.url = url
+            article.content = content
+            article.source_type = 'Full Article'
+        return article
+
+    def resolve_google_urls(self, urls: List[str]) -> List[str]:
+        """Follow Google News redirects to the publisher URL, keeping the original on failure."""
+        resolved = []
+        for url in urls:
+            if 'news.google.com' not in url:
+                resolved.append(url)
+                continue
+            try:
+                response = self.session.head(url, allow_redirects=True, timeout=self.timeout)
+                resolved.append(response.url or url)
+            except Exception as e:
+                logger.debug(f"Could not resolve {url}: {e}")
+                resolved.append(url)
+        return resolved
+
+    def extract_content(self, url: str) -> str:
+        """Extract main article text, or an empty string when extraction fails."""
+        if not TRAFILATURA_AVAILABLE or not url:
+            return ''
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            text = trafilatura.extract(response.text) or ''
+            return text if len(text) >= MIN_CONTENT_LENGTH else ''
+        except Exception as e:
+            logger.debug(f"Content extraction failed for {url}: {e}")
+            return ''
+
+    @staticmethod
+    def deduplicate_articles(articles: List[Article]) -> List[Article]:
+        """Drop articles whose normalized title or URL has already been seen."""
+        seen = set()
+        unique = []
+        for article in articles:
+            # Google News titles end with " - Publisher"
+            title_key = " ".join(article.title.rsplit(' - ', 1)[0].lower().split())
+            if title_key in seen or article.url in seen:
+                continue
+            seen.add(title_key)
+            seen.add(article.url)
+            unique.append(article)
+        return unique
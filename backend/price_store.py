@@ -0,0 +1,428 @@
+"""
+Local OHLCV time-series store.
+Daily bars are kept per ticker as append-only raw column files that are
+opened with numpy memmap, so range reads are zero-copy slices and only the
+missing tail is ever fetched upstream. Each tail fetch also re-reads the
+last few stored days; if upstream closes changed (a split or other
+adjustment), the ticker's history is fetched again and rewritten.
+"""
+
+import os
+import json
+import time
+import logging
+import tempfile
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from config import Config
+from models.financial_data import PriceHistory, PricePoint
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Column name -> on-disk dtype. Dates are stored as days since the epoch.
+COLUMNS = {
+    'date': np.dtype('<i8'),
+    'open': np.dtype('<f8'),
+    'high': np.dtype('<f8'),
+    'low': np.dtype('<f8'),
+    'close': np.dtype('<f8'),
+    'volume': np.dtype('<i8'),
+}
+STORE_VERSION = 1
+# Periods that include the current session, which the store never holds
+INTRADAY_PERIODS = ('1d',)
+ADJUSTMENT_TOLERANCE = 1e-4  # relative close difference treated as an upstream adjustment
+
+
+class PriceStoreError(Exception):
+    """Custom exception for price store errors"""
+    pass
+
+
+@dataclass
+class PriceSeries:
+    """Columnar daily bars. Arrays may be read-only views of memory-mapped files."""
+    ticker: str
+    period: str
+    dates: np.ndarray  # datetime64[D]
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def slice(self, start: int, stop: Optional[int] = None) -> 'PriceSeries':
+        """Zero-copy view of rows [start, stop)."""
+        return self.select(np.s_[start:stop])
+
+    def select(self, index) -> 'PriceSeries':
+        """Rows selected by a slice, boolean mask or index array."""
+        return PriceSeries(
+            ticker=self.ticker,
+            period=self.period,
+            dates=self.dates[index],
+            open=self.open[index],
+            high=self.high[index],
+            low=self.low[index],
+            close=self.close[index],
+            volume=self.volume[index]
+        )
+
+    def to_price_history(self) -> PriceHistory:
+        """Materialize as the PricePoint-based PriceHistory model."""
+        days = self.dates.astype('datetime64[D]').tolist()
+        prices = [
+            PricePoint(
+                date=datetime(day.year, day.month, day.day),
+                open=o, high=h, low=l, close=c, volume=v
+            )
+            for day, o, h, l, c, v in zip(
+                days, self.open.tolist(), self.high.tolist(), self.low.tolist(),
+                self.close.tolist(), self.volume.tolist()
+            )
+        ]
+        return PriceHistory(ticker=self.ticker, period=self.period, prices=prices)
+
+
+def period_start(period: str, end: date) -> Optional[date]:
+    """
+    First date included in a calendar yfinance-style period ending at ``end``.
+    Returns None for "max". Trading-day periods ("5d") count stored rows
+    instead; see PriceStore.get_range.
+    """
+    if period == 'max':
+        return None
+    if period == 'ytd':
+        return date(end.year, 1, 1)
+    if period.endswith('mo'):
+        months = int(period[:-2])
+    elif period.endswith('y'):
+        months = int(period[:-1]) * 12
+    else:
+        raise PriceStoreError(f"Unsupported period: {period}")
+
+    month_index = end.year * 12 + (end.month - 1) - months
+    year, month = divmod(month_index, 12)
+    month += 1
+    # Clamp day for shorter months
+    for day in (end.day, 30, 29, 28):
+        try:
+            return date(year, month, day)
+        except ValueError:
+            continue
+    return date(year, month, 28)
+
+
+def last_completed_session(today: Optional[date] = None) -> date:
+    """Most recent weekday strictly before today; today's bar is still forming."""
+    day = (today or date.today()) - timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+class PriceStore:
+    """
+    Per-ticker append-only column files under ``root/<TICKER>/``.
+
+    ``meta.json`` holds the committed row count. Columns are appended first
+    and the row count is committed last, so a crash mid-append leaves extra
+    bytes that are truncated on the next write and never read. Rewrites
+    reset the row count first and swap in new column files, so readers of
+    the old memory maps keep a consistent view.
+    """
+
+    def __init__(self,
+                 root: Optional[str] = None,
+                 fetcher: Optional[Callable[..., Optional[PriceSeries]]] = None,
+                 refresh_interval: Optional[int] = None,
+                 verify_days: Optional[int] = None):
+        """
+        Args:
+            root: Store directory
+            fetcher: Callable(ticker, start=date|None) returning a PriceSeries of
+                completed and in-progress bars from the upstream provider
+            refresh_interval: Seconds between upstream staleness checks per ticker
+            verify_days: Calendar days of stored bars re-fetched with each tail
+                to detect upstream adjustments
+        """
+        self.root = root or Config.PRICE_STORE_PATH
+        self.fetcher = fetcher
+        self.refresh_interval = Config.PRICE_STORE_REFRESH_SECONDS if refresh_interval is None else refresh_interval
+        self.verify_days = Config.PRICE_STORE_VERIFY_DAYS if verify_days is None else verify_days
+        self._maps: Dict[str, PriceSeries] = {}
+        self._last_checked: Dict[str, float] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _lock_for(self, ticker: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def _ticker_dir(self, ticker: str) -> str:
+        return os.path.join(self.root, ticker.upper())
+
+    def _read_rows(self, ticker: str) -> int:
+        meta_path = os.path.join(self._ticker_dir(ticker), 'meta.json')
+        if not os.path.exists(meta_path):
+            return 0
+        with open(meta_path, 'r') as handle:
+            meta = json.load(handle)
+        if meta.get('version') != STORE_VERSION:
+            raise PriceStoreError(f"Unsupported price store version for {ticker}: {meta.get('version')}")
+        return int(meta['rows'])
+
+    def _write_rows(self, ticker: str, rows: int) -> None:
+        directory = self._ticker_dir(ticker)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as handle:
+            json.dump({'version': STORE_VERSION, 'rows': rows}, handle)
+        os.replace(tmp_path, os.path.join(directory, 'meta.json'))
+
+    def load(self, ticker: str) -> Optional[PriceSeries]:
+        """Memory-map all stored bars for a ticker, or None if nothing is stored."""
+        ticker = ticker.upper()
+        cached = self._maps.get(ticker)
+        if cached is not None:
+            return cached
+
+        rows = self._read_rows(ticker)
+        if rows == 0:
+            return None
+
+        directory = self._ticker_dir(ticker)
+        columns = {
+            name: np.memmap(os.path.join(directory, f"{name}.bin"), dtype=dtype, mode='r', shape=(rows,))
+            for name, dtype in COLUMNS.items()
+        }
+        series = PriceSeries(
+            ticker=ticker,
+            period='max',
+            dates=columns['date'].view('datetime64[D]'),
+            open=columns['open'],
+            high=columns['high'],
+            low=columns['low'],
+            close=columns['close'],
+            volume=columns['volume']
+        )
+        self._maps[ticker] = series
+        return series
+
+    def append(self, ticker: str, bars: PriceSeries) -> int:
+        """
+        Append bars newer than the last stored date.
+
+        Returns:
+            Number of rows appended
+        """
+        ticker = ticker.upper()
+        with self._lock_for(ticker):
+            existing = self.load(ticker)
+            rows = len(existing) if existing is not None else 0
+            new_dates = bars.dates.astype('datetime64[D]')
+            mask = np.ones(len(new_dates), dtype=bool)
+            if existing is not None:
+                mask = new_dates > existing.dates[-1]
+            if not mask.any():
+                return 0
+
+            directory = self._ticker_dir(ticker)
+            os.makedirs(directory, exist_ok=True)
+            values = {
+                'date': new_dates[mask].astype('<i8'),
+                'open': bars.open[mask],
+                'high': bars.high[mask],
+                'low': bars.low[mask],
+                'close': bars.close[mask],
+                'volume': bars.volume[mask],
+            }
+            for name, dtype in COLUMNS.items():
+                path = os.path.join(directory, f"{name}.bin")
+                with open(path, 'ab') as handle:
+                    # Drop bytes from any uncommitted earlier append
+                    handle.truncate(rows * dtype.itemsize)
+                    handle.write(np.ascontiguousarray(values[name], dtype=dtype).tobytes())
+
+            appended = int(mask.sum())
+            self._write_rows(ticker, rows + appended)
+            self._maps.pop(ticker, None)
+            return appended
+
+    def replace(self, ticker: str, bars: PriceSeries) -> int:
+        """
+        Replace all stored bars for a ticker.
+
+        Returns:
+            Number of rows stored
+        """
+        ticker = ticker.upper()
+        with self._lock_for(ticker):
+            directory = self._ticker_dir(ticker)
+            os.makedirs(directory, exist_ok=True)
+            # Uncommit the old rows first, so a crash mid-rewrite refetches instead of mixing columns
+            self._write_rows(ticker, 0)
+            self._maps.pop(ticker, None)
+            values = {
+                'date': bars.dates.astype('datetime64[D]').astype('<i8'),
+                'open': bars.open,
+                'high': bars.high,
+                'low': bars.low,
+                'close': bars.close,
+                'volume': bars.volume,
+            }
+            for name, dtype in COLUMNS.items():
+                fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+                with os.fdopen(fd, 'wb') as handle:
+                    handle.write(np.ascontiguousarray(values[name], dtype=dtype).tobytes())
+                os.replace(tmp_path, os.path.join(directory, f"{name}.bin"))
+            self._write_rows(ticker, len(bars))
+            self._maps.pop(ticker, None)
+            return len(bars)
+
+    @staticmethod
+    def _adjusted(existing: PriceSeries, bars: PriceSeries) -> bool:
+        """True when upstream closes for already stored dates differ from the stored ones."""
+        dates = bars.dates.astype('datetime64[D]')
+        tail = existing.slice(int(np.searchsorted(existing.dates, dates[0])))
+        _, stored, upstream = np.intersect1d(tail.dates, dates, assume_unique=True, return_indices=True)
+        return not np.allclose(tail.close[stored], bars.close[upstream], rtol=ADJUSTMENT_TOLERANCE, atol=0,
+                               equal_nan=True)
+
+    def refresh(self, ticker: str, force: bool = False) -> None:
+        """
+        Fetch and append the missing tail of completed sessions from upstream.
+        Checks are throttled per ticker by ``refresh_interval``. The tail is
+        fetched with ``verify_days`` of overlap; when the overlapping closes
+        disagree, the full history is fetched again and replaces the stored one.
+        """
+        ticker = ticker.upper()
+        now = time.monotonic()
+        if not force and now - self._last_checked.get(ticker, -np.inf) < self.refresh_interval:
+            return
+
+        existing = self.load(ticker)
+        target = last_completed_session()
+        last_stored = existing.dates[-1].astype(object) if existing is not None else None
+        if last_stored is not None and last_stored >= target:
+            self._last_checked[ticker] = now
+            return
+
+        if self.fetcher is None:
+            raise PriceStoreError("No upstream fetcher configured for price store")
+
+        start = last_stored - timedelta(days=self.verify_days) if last_stored is not None else None
+        bars = self.fetcher(ticker, start=start)
+        self._last_checked[ticker] = now
+        if bars is None or len(bars) == 0:
+            return
+
+        today = np.datetime64(date.today(), 'D')
+        if existing is not None and self._adjusted(existing, bars):
+            logger.info(f"Upstream prices for {ticker} were adjusted; refetching its history")
+            bars = self.fetcher(ticker, start=None)
+            if bars is None or len(bars) == 0:
+                return
+            stored = self.replace(ticker, bars.select(bars.dates.astype('datetime64[D]') < today))
+            logger.info(f"Price store rewrote {stored} bars for {ticker}")
+            return
+
+        # Only completed sessions are immutable; keep today's bar out of the store
+        completed = bars.dates.astype('datetime64[D]') < today
+        appended = self.append(ticker, bars.select(completed))
+        if appended:
+            logger.info(f"Price store appended {appended} bars for {ticker}")
+
+    def get_range(self, ticker: str, period: str = '1mo', refresh: bool = True) -> PriceSeries:
+        """
+        Bars for a period as zero-copy views of the stored columns.
+        Trading-day periods ("5d") are the last N stored sessions.
+
+        Raises:
+            PriceStoreError: If no bars are available for the ticker, or the
+                period includes the current session
+        """
+        if period in INTRADAY_PERIODS:
+            raise PriceStoreError(f"Period {period} includes the current session, which is not stored")
+        if refresh:
+            self.refresh(ticker)
+        series = self.load(ticker)
+        if series is None or len(series) == 0:
+            raise PriceStoreError(f"No stored price history for {ticker}")
+
+        if period.endswith('d') and period[:-1].isdigit():
+            index = max(0, len(series) - int(period[:-1]))
+        else:
+            start = period_start(period, series.dates[-1].astype(object))
+            index = 0 if start is None else int(np.searchsorted(series.dates, np.datetime64(start, 'D')))
+        view = series.slice(index)
+        view.period = period
+        return view
+
+    def get_price_history(self, ticker: str, period: str = '1mo') -> PriceHistory:
+        return self.get_range(ticker, period).to_price_history()
+
+
+def benchmark_reads(periods=('1y', '5y', 'max'), years: int = 30, repeats: int = 50) -> Dict[str, Dict[str, float]]:
+    """
+    Cold versus warm read latency for several periods on synthetic data.
+
+    Cold reads open a fresh store (meta read + memmap); warm reads reuse the
+    mapped columns. Both include the range search; the PriceHistory column
+    adds model materialization.
+
+    Returns:
+        Mapping of period to timings in milliseconds
+    """
+    rng = np.random.default_rng(0)
+    end = np.datetime64(last_completed_session(), 'D')
+    dates = np.arange(end - np.timedelta64(years * 365, 'D'), end + 1)
+    dates = dates[(dates.astype('datetime64[D]').view('int64') - 4) % 7 < 5]  # weekdays
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates))))
+    bars = PriceSeries(
+        ticker='BENCH', period='max', dates=dates,
+        open=close * 0.995, high=close * 1.01, low=close * 0.99, close=close,
+        volume=rng.integers(1_000_000, 5_000_000, len(dates))
+    )
+
+    results = {}
+    with tempfile.TemporaryDirectory() as root:
+        PriceStore(root=root).append('BENCH', bars)
+        for period in periods:
+            start = time.perf_counter()
+            for _ in range(repeats):
+                PriceStore(root=root).get_range('BENCH', period, refresh=False)
+            cold = (time.perf_counter() - start) / repeats * 1000
+
+            store = PriceStore(root=root)
+            store.get_range('BENCH', period, refresh=False)
+            start = time.perf_counter()
+            for _ in range(repeats):
+                series = store.get_range('BENCH', period, refresh=False)
+            warm = (time.perf_counter() - start) / repeats * 1000
+
+            start = time.perf_counter()
+            series.to_price_history()
+            materialize = (time.perf_counter() - start) * 1000
+
+            results[period] = {
+                'rows': len(series), 'cold_ms': cold, 'warm_ms': warm, 'price_history_ms': materialize
+            }
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(f"{'period':>7} {'rows':>6} {'cold ms':>9} {'warm ms':>9} {'PriceHistory ms':>16}")
+    for name, timing in benchmark_reads().items():
+        print(f"{name:>7} {timing['rows']:>6} {timing['cold_ms']:>9.3f} "
+              f"{timing['warm_ms']:>9.3f} {timing['price_history_ms']:>16.2f}")
@@ -0,0 +1,395 @@
+"""
+Opt-in sampling profiler for individual requests.
+A request carrying the profiling header (or picked by PROFILING_SAMPLE_RATE)
+is profiled by a background thread that snapshots stacks every few
+milliseconds. The thread keeps the event loop's stack only while the
+request's task is the one running, plus the stacks of busy worker threads
+(asyncio.to_thread, the threadpool). Worker threads are shared, so their
+stacks may belong to other requests; each profile records how many
+requests overlapped it. Nothing runs for requests that are not profiled.
+Profiling needs PROFILING_TOKEN as well as PROFILING_ENABLED. Profiles are
+kept in memory under an id returned in the X-Profile-Id header, and can be
+downloaded as speedscope JSON or collapsed stacks for flamegraph.pl.
+"""
+
+import os
+import sys
+import hmac
+import time
+import uuid
+import random
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config import Config
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+PROFILE_ID_HEADER = 'X-Profile-Id'
+FORMATS = ('speedscope', 'collapsed')
+MAX_STACK_DEPTH = 128
+
+TRIGGER_HEADER = 'header'
+TRIGGER_SAMPLED = 'sampled'
+
+# Never profiled: the admin requests carry the header too, and their profiles are noise
+UNPROFILED_PREFIXES = ('/api/admin/', '/metrics')
+
+# What the sampled stacks cover, stated in every profile
+THREAD_SCOPE = ('event loop: this request only; worker threads: every busy one, '
+                'including work for concurrent requests')
+
+# Innermost frames of a thread waiting for work (or of the loop polling for I/O)
+IDLE_LEAVES = frozenset([
+    ('thread.py', '_worker'),
+    ('threading.py', 'wait'),
+    ('queue.py', 'get'),
+    ('selectors.py', 'select'),
+])
+
+# (function, file, first line)
+FrameKey = Tuple[str, str, int]
+
+
+def _frame_key(frame) -> FrameKey:
+    code = frame.f_code
+    return (getattr(code, 'co_qualname', code.co_name), code.co_filename, code.co_firstlineno)
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES
+
+
+def _stack(frame) -> Tuple[FrameKey, ...]:
+    """Root-first frames of a stack."""
+    keys = []
+    while frame is not None and len(keys) < MAX_STACK_DEPTH:
+        keys.append(_frame_key(frame))
+        frame = frame.f_back
+    keys.reverse()
+    return tuple(keys)
+
+
+class ProfileSession:
+    """Samples collected for one request while it runs."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, task: Optional[asyncio.Task],
+                 loop_thread: int, max_seconds: float):
+        self.loop = loop
+        self.task = task
+        self.loop_thread = loop_thread
+        self.deadline = time.perf_counter() + max_seconds
+        self.started = time.perf_counter()
+        self._last = self.started
+        # (thread name, stack) -> [samples, seconds]
+        self.stacks: Dict[Tuple[str, Tuple[FrameKey, ...]], List[float]] = {}
+        self.samples = 0
+        self.truncated = False
+        self.concurrent_requests = 0  # other requests in flight while this one was profiled
+
+    def sample(self, frames: Dict[int, Any], thread_names: Dict[int, str], now: float, skip: int) -> None:
+        elapsed = now - self._last
+        self._last = now
+        if now > self.deadline:
+            self.truncated = True
+            return
+        for thread_id, frame in frames.items():
+            if thread_id == skip:
+                continue
+            if _is_idle(frame):
+                continue
+            # The loop is shared: only count time this request's task is running
+            if thread_id == self.loop_thread and (self.task is None or asyncio.current_task(self.loop) is not self.task):
+                continue
+            key = (thread_names.get(thread_id, f"thread-{thread_id}"), _stack(frame))
+            entry = self.stacks.get(key)
+            if entry is None:
+                self.stacks[key] = [1, elapsed]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed
+            self.samples += 1
+
+
+class StackSampler:
+    """
+    One background thread serving every active session. It sleeps on a
+    condition while nothing is being profiled.
+    """
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = interval or Config.PROFILING_INTERVAL_MS / 1000
+        self._sessions: List[ProfileSession] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, max_seconds: Optional[float] = None, in_flight: int = 0) -> ProfileSession:
+        """
+        Begin sampling the calling task. Must be called from the event loop.
+        `in_flight` is the number of other requests already being served.
+        """
+        session = ProfileSession(
+            asyncio.get_running_loop(), asyncio.current_task(), threading.get_ident(),
+            max_seconds or Config.PROFILING_MAX_SECONDS
+        )
+        session.concurrent_requests = in_flight
+        with self._cond:
+            self._sessions.append(session)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return session
+
+    def stop(self, session: ProfileSession) -> None:
+        with self._cond:
+            if session in self._sessions:
+                self._sessions.remove(session)
+
+    def request_started(self) -> None:
+        """Count a new request against every profile being taken. Called from the event loop."""
+        for session in self._sessions:
+            session.concurrent_requests += 1
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while True:
+            with self._cond:
+                while not self._sessions:
+                    self._cond.wait()
+                sessions = list(self._sessions)
+            frames = sys._current_frames()
+            thread_names = {t.ident: t.name for t in threading.enumerate()}
+            now = time.perf_counter()
+            for session in sessions:
+                session.sample(frames, thread_names, now, me)
+            del frames
+            time.sleep(self.interval)
+
+
+@dataclass
+class Profile:
+    """A finished request profile."""
+    id: str
+    method: str
+    path: str
+    trigger: str
+    started_at: str
+    duration_ms: float
+    interval_ms: float
+    status: Optional[int] = None
+    samples: int = 0
+    truncated: bool = False
+    concurrent_requests: int = 0
+    stacks: Dict[Tuple[str, Tuple[FrameKey, ...]], List[float]] = field(default_factory=dict, repr=False)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'method': self.method,
+            'path': self.path,
+            'status': self.status,
+            'trigger': self.trigger,
+            'started_at': self.started_at,
+            'duration_ms': self.duration_ms,
+            'interval_ms': self.interval_ms,
+            'samples': self.samples,
+            'truncated': self.truncated,
+            'concurrent_requests': self.concurrent_requests,
+            'thread_scope': THREAD_SCOPE
+        }
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's folded format: `thread;frame;frame <samples>` per line."""
+        lines = []
+        for (thread, stack), (count, _) in sorted(self.stacks.items(), key=lambda item: -item[1][0]):
+            names = [thread] + [f"{name} ({os.path.basename(file)}:{line})" for name, file, line in stack]
+            lines.append(f"{';'.join(n.replace(';', ':') for n in names)} {int(count)}")
+        return '\n'.join(lines) + '\n'
+
+    def speedscope(self) -> Dict[str, Any]:
+        """speedscope file format: one sampled profile per thread, weighted in seconds."""
+        frames: List[Dict[str, Any]] = []
+        index: Dict[FrameKey, int] = {}
+        by_thread: Dict[str, Dict[str, list]] = {}
+        for (thread, stack), (_, seconds) in self.stacks.items():
+            ids = []
+            for key in stack:
+                if key not in index:
+                    index[key] = len(frames)
+                    frames.append({'name': key[0], 'file': key[1], 'line': key[2]})
+                ids.append(index[key])
+            profile = by_thread.setdefault(thread, {'samples': [], 'weights': []})
+            profile['samples'].append(ids)
+            profile['weights'].append(seconds)
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': f"{self.method} {self.path} ({self.id}, {self.concurrent_requests} concurrent requests)",
+            'exporter': 'market-mind-analyzer',
+            'activeProfileIndex': 0,
+            'shared': {'frames': frames},
+            'profiles': [
+                {
+                    'type': 'sampled',
+                    'name': thread,
+                    'unit': 'seconds',
+                    'startValue': 0,
+                    'endValue': sum(profile['weights']),
+                    'samples': profile['samples'],
+                    'weights': profile['weights']
+                }
+                for thread, profile in by_thread.items()
+            ]
+        }
+
+
+class ProfileStore:
+    """The most recent profiles, oldest dropped first."""
+
+    def __init__(self, max_profiles: Optional[int] = None):
+        self.max_profiles = max_profiles or Config.PROFILING_MAX_STORED
+        self._profiles: 'OrderedDict[str, Profile]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        return self._profiles.get(profile_id)
+
+    def list(self) -> List[Profile]:
+        with self._lock:
+            return list(reversed(self._profiles.values()))
+
+
+def profiling_enabled() -> bool:
+    """PROFILING_ENABLED with a PROFILING_TOKEN; profiles expose source paths, so there is no open mode."""
+    return Config.PROFILING_ENABLED and bool(Config.PROFILING_TOKEN)
+
+
+def authorized(headers: Headers) -> bool:
+    """True if PROFILING_TOKEN is set and the request carries it in the profiling header."""
+    token = Config.PROFILING_TOKEN
+    return bool(token) and hmac.compare_digest(headers.get(Config.PROFILING_HEADER, ''), token)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling requests that ask for it (the profiling
+    header carrying PROFILING_TOKEN) or that are sampled at
+    PROFILING_SAMPLE_RATE. Disabled unless both PROFILING_ENABLED and
+    PROFILING_TOKEN are set.
+    """
+
+    def __init__(self, app: ASGIApp, sampler: Optional[StackSampler] = None, store: Optional[ProfileStore] = None):
+        self.app = app
+        self._sampler = sampler
+        self._store = store
+        self.in_flight = 0
+        if Config.PROFILING_ENABLED and not Config.PROFILING_TOKEN:
+            logger.warning("PROFILING_ENABLED is set without PROFILING_TOKEN; profiling stays off")
+
+    @property
+    def sampler(self) -> StackSampler:
+        if self._sampler is None:
+            self._sampler = get_stack_sampler()
+        return self._sampler
+
+    @property
+    def store(self) -> ProfileStore:
+        if self._store is None:
+            self._store = get_profile_store()
+        return self._store
+
+    def trigger_for(self, scope: Scope) -> Optional[str]:
+        if scope['path'].startswith(UNPROFILED_PREFIXES):
+            return None
+        headers = Headers(scope=scope)
+        if Config.PROFILING_HEADER in headers:
+            return TRIGGER_HEADER if authorized(headers) else None
+        rate = Config.PROFILING_SAMPLE_RATE
+        if rate > 0 and random.random() < rate:
+            return TRIGGER_SAMPLED
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or not profiling_enabled():
+            await self.app(scope, receive, send)
+            return
+        self.sampler.request_started()
+        self.in_flight += 1
+        try:
+            trigger = self.trigger_for(scope)
+            if trigger is None:
+                await self.app(scope, receive, send)
+            else:
+                await self._profile(scope, receive, send, trigger)
+        finally:
+            self.in_flight -= 1
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send, trigger: str) -> None:
+        profile = Profile(
+            id=uuid.uuid4().hex[:16],
+            method=scope['method'],
+            path=scope['path'],
+            trigger=trigger,
+            started_at=datetime.utcnow().isoformat(),
+            duration_ms=0.0,
+            interval_ms=self.sampler.interval * 1000
+        )
+
+        async def send_with_id(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                profile.status = message['status']
+                headers = MutableHeaders(scope=message)
+                headers[PROFILE_ID_HEADER] = profile.id
+            await send(message)
+
+        session = self.sampler.start(in_flight=self.in_flight - 1)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            self.sampler.stop(session)
+            profile.duration_ms = round((time.perf_counter() - session.started) * 1000, 2)
+            profile.samples = session.samples
+            profile.truncated = session.truncated
+            profile.concurrent_requests = session.concurrent_requests
+            profile.stacks = session.stacks
+            self.store.add(profile)
+            logger.info(f"Profiled {profile.method} {profile.path}: {profile.samples} samples "
+                        f"in {profile.duration_ms:.0f} ms (id {profile.id})")
+
+
+# Global stack sampler instance
+stack_sampler = None
+
+def get_stack_sampler() -> StackSampler:
+    """Get or create the global stack sampler instance"""
+    global stack_sampler
+    if stack_sampler is None:
+        stack_sampler = StackSampler()
+    return stack_sampler
+
+
+# Global profile store instance
+profile_store = None
+
+def get_profile_store() -> ProfileStore:
+    """Get or create the global profile store instance"""
+    global profile_store
+    if profile_store is None:
+        profile_store = ProfileStore()
+    return profile_store
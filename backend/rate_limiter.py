@@ -0,0 +1,364 @@
+"""
+Per-client rate limiting with token buckets.
+Each client (its API key if it sends one from RATE_LIMIT_API_KEYS,
+otherwise its address) gets a bucket per tier: a small one for endpoints that spend Gemini calls or
+heavy CPU, a larger one for everything else. Buckets live in memory, or in
+Redis (one atomic script call per request) so several workers share the
+same budget. Limited requests get 429 with Retry-After; per-client usage
+counters are kept alongside the buckets.
+"""
+
+import math
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config import Config
+from lazy_imports import lazy_module, module_available
+from serialization import dumps
+
+REDIS_AVAILABLE = module_available('redis')
+redis_asyncio = lazy_module('redis.asyncio')
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+TIER_EXPENSIVE = 'expensive'
+TIER_STANDARD = 'standard'
+
+# Endpoints that call Gemini, run the sentiment model or fan out to market data
+EXPENSIVE_PATHS = (
+    '/api/portfolio/analyze-image',
+    '/api/portfolio/analyze-holdings',
+    '/api/analyze',
+    '/api/analyze/detailed',
+    '/api/analyze/compare',
+    '/api/portfolio/simulate',
+    '/api/portfolio/rebalance',
+    '/api/screener/refresh',
+    '/api/backtest/verdicts',
+    '/api/backtest/portfolio',
+)
+
+# Probes and counters must stay reachable while a client is throttled
+EXEMPT_PATHS = (
+    '/api/health',
+    '/api/health/live',
+    '/api/health/ready',
+    '/api/health/checks',
+    '/api/usage',
+)
+
+
+class RateLimitError(Exception):
+    """Custom exception for rate limiter errors"""
+    pass
+
+
+@dataclass(frozen=True)
+class BucketPolicy:
+    """Token bucket: `capacity` requests at once, refilled at `rate` per second."""
+    tier: str
+    capacity: float
+    rate: float
+
+    @classmethod
+    def per_minute(cls, tier: str, per_minute: float, burst: float) -> 'BucketPolicy':
+        if per_minute <= 0 or burst < 1:
+            raise RateLimitError(f"Invalid {tier} rate limit: {per_minute}/min, burst {burst}")
+        return cls(tier, float(burst), per_minute / 60.0)
+
+
+@dataclass
+class Decision:
+    """Outcome of taking a token."""
+    allowed: bool
+    remaining: float
+    retry_after: float  # seconds until a token is available; 0 when allowed
+
+
+@dataclass
+class ClientUsage:
+    """Requests allowed and limited for one client, by tier."""
+    client: str
+    allowed: Dict[str, int]
+    limited: Dict[str, int]
+    last_seen: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def default_policies() -> Dict[str, BucketPolicy]:
+    return {
+        TIER_EXPENSIVE: BucketPolicy.per_minute(
+            TIER_EXPENSIVE, Config.RATE_LIMIT_EXPENSIVE_PER_MINUTE, Config.RATE_LIMIT_EXPENSIVE_BURST),
+        TIER_STANDARD: BucketPolicy.per_minute(
+            TIER_STANDARD, Config.RATE_LIMIT_STANDARD_PER_MINUTE, Config.RATE_LIMIT_STANDARD_BURST),
+    }
+
+
+class MemoryBackend:
+    """Buckets and usage in this process; the LRU bound keeps idle clients from piling up."""
+
+    def __init__(self, max_clients: Optional[int] = None):
+        self.max_clients = max_clients or Config.RATE_LIMIT_MAX_CLIENTS
+        # (client, tier) -> (tokens, updated_at)
+        self._buckets: 'OrderedDict[Tuple[str, str], Tuple[float, float]]' = OrderedDict()
+        self._usage: 'OrderedDict[str, ClientUsage]' = OrderedDict()
+
+    async def take(self, client: str, policy: BucketPolicy, cost: float = 1.0) -> Decision:
+        now = time.monotonic()
+        key = (client, policy.tier)
+        tokens, updated = self._buckets.get(key, (policy.capacity, now))
+        tokens = min(policy.capacity, tokens + (now - updated) * policy.rate)
+        if tokens >= cost:
+            decision = Decision(True, tokens - cost, 0.0)
+            tokens -= cost
+        else:
+            decision = Decision(False, tokens, (cost - tokens) / policy.rate)
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        self._record(client, policy.tier, decision.allowed)
+        return decision
+
+    def _record(self, client: str, tier: str, allowed: bool) -> None:
+        usage = self._usage.get(client)
+        if usage is None:
+            usage = self._usage[client] = ClientUsage(client, {}, {}, 0.0)
+        counters = usage.allowed if allowed else usage.limited
+        counters[tier] = counters.get(tier, 0) + 1
+        usage.last_seen = time.time()
+        self._usage.move_to_end(client)
+        while len(self._usage) > self.max_clients:
+            self._usage.popitem(last=False)
+
+    async def usage(self, client: Optional[str] = None, limit: int = 100) -> List[ClientUsage]:
+        if client is not None:
+            return [self._usage[client]] if client in self._usage else []
+        return sorted(self._usage.values(), key=lambda u: u.last_seen, reverse=True)[:limit]
+
+
+# Refill, take and count in one round trip. Redis' own clock keeps workers consistent.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local tier = ARGV[4]
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+else
+  retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+redis.call('HINCRBY', KEYS[2], (allowed == 1 and 'allowed:' or 'limited:') .. tier, 1)
+redis.call('HSET', KEYS[2], 'last_seen', now)
+redis.call('EXPIRE', KEYS[2], 86400)
+return {allowed, tostring(tokens), tostring(retry_after)}
+"""
+
+
+class RedisBackend:
+    """Buckets shared by every worker through Redis."""
+
+    def __init__(self, url: Optional[str] = None, prefix: str = 'ratelimit'):
+        if not REDIS_AVAILABLE:
+            raise RateLimitError("redis library not available. Please install: pip install redis")
+        self.url = url or Config.REDIS_URL
+        self.prefix = prefix
+        self._client = None
+        self._script = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = redis_asyncio.Redis.from_url(
+                self.url, socket_timeout=Config.RATE_LIMIT_REDIS_TIMEOUT,
+                socket_connect_timeout=Config.RATE_LIMIT_REDIS_TIMEOUT
+            )
+            self._script = self._client.register_script(TOKEN_BUCKET_SCRIPT)
+        return self._client
+
+    async def take(self, client: str, policy: BucketPolicy, cost: float = 1.0) -> Decision:
+        self.client  # registers the script on first use
+        allowed, tokens, retry_after = await self._script(
+            keys=[f"{self.prefix}:bucket:{policy.tier}:{client}", f"{self.prefix}:usage:{client}"],
+            args=[policy.capacity, policy.rate, cost, policy.tier]
+        )
+        return Decision(bool(int(allowed)), float(tokens), float(retry_after))
+
+    async def usage(self, client: Optional[str] = None, limit: int = 100) -> List[ClientUsage]:
+        if client is not None:
+            keys = [f"{self.prefix}:usage:{client}"]
+        else:
+            keys = []
+            async for key in self.client.scan_iter(match=f"{self.prefix}:usage:*", count=500):
+                keys.append(key.decode() if isinstance(key, bytes) else key)
+                if len(keys) >= limit:
+                    break
+        result = []
+        for key in keys:
+            fields = await self.client.hgetall(key)
+            if not fields:
+                continue
+            usage = ClientUsage(key.split(':', 2)[2], {}, {}, 0.0)
+            for name, value in fields.items():
+                name = name.decode() if isinstance(name, bytes) else name
+                if name == 'last_seen':
+                    usage.last_seen = float(value)
+                else:
+                    kind, _, tier = name.partition(':')
+                    (usage.allowed if kind == 'allowed' else usage.limited)[tier] = int(value)
+            result.append(usage)
+        return sorted(result, key=lambda u: u.last_seen, reverse=True)
+
+
+class RateLimiter:
+    """Picks the tier for a path and takes a token from the client's bucket."""
+
+    def __init__(self,
+                 backend=None,
+                 policies: Optional[Dict[str, BucketPolicy]] = None,
+                 expensive_paths: Tuple[str, ...] = EXPENSIVE_PATHS,
+                 exempt_paths: Tuple[str, ...] = EXEMPT_PATHS):
+        self.backend = backend or self._default_backend()
+        self.policies = policies or default_policies()
+        self.expensive_paths = frozenset(expensive_paths)
+        self.exempt_paths = frozenset(exempt_paths)
+        self.backend_errors = 0
+
+    @staticmethod
+    def _default_backend():
+        if Config.RATE_LIMIT_BACKEND == 'redis':
+            return RedisBackend()
+        return MemoryBackend()
+
+    def tier_for(self, method: str, path: str) -> Optional[str]:
+        if method == 'OPTIONS' or path in self.exempt_paths or not path.startswith('/api/'):
+            return None
+        return TIER_EXPENSIVE if path in self.expensive_paths else TIER_STANDARD
+
+    async def check(self, client: str, tier: str) -> Optional[Decision]:
+        """Take a token. Returns None (let the request through) if the backend is down."""
+        try:
+            return await self.backend.take(client, self.policies[tier])
+        except Exception as e:
+            # Fail open: a Redis outage shouldn't take the API down with it
+            self.backend_errors += 1
+            logger.warning(f"Rate limiter backend error, allowing request: {e}")
+            return None
+
+
+@lru_cache(maxsize=4)
+def _api_keys(value: str) -> frozenset:
+    return frozenset(key.strip() for key in value.split(',') if key.strip())
+
+
+def client_id(scope: Scope, headers: Headers) -> str:
+    """
+    API key (hashed) if the client sent one of RATE_LIMIT_API_KEYS, otherwise
+    its address. Unknown keys are ignored, so a client can't get a fresh
+    bucket by sending a new key.
+    """
+    api_key = headers.get(Config.RATE_LIMIT_API_KEY_HEADER)
+    if api_key and api_key in _api_keys(Config.RATE_LIMIT_API_KEYS):
+        return 'key:' + hashlib.blake2b(api_key.encode(), digest_size=8).hexdigest()
+    if Config.RATE_LIMIT_TRUST_PROXY:
+        forwarded = headers.get('x-forwarded-for')
+        if forwarded:
+            return 'ip:' + forwarded.split(',')[0].strip()
+    client = scope.get('client')
+    return 'ip:' + (client[0] if client else 'unknown')
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware enforcing RateLimiter. Add it inside CORSMiddleware so
+    browsers can read the 429, and inside HTTPCacheMiddleware so responses
+    served from the server-side cache don't use up tokens.
+    """
+
+    def __init__(self, app: ASGIApp, limiter: Optional['RateLimiter'] = None):
+        self.app = app
+        self._limiter = limiter
+
+    @property
+    def limiter(self) -> 'RateLimiter':
+        if self._limiter is None:
+            self._limiter = get_rate_limiter()
+        return self._limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or not Config.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        tier = self.limiter.tier_for(scope['method'], scope['path'])
+        if tier is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        client = client_id(scope, headers)
+        decision = await self.limiter.check(client, tier)
+        if decision is None:
+            await self.app(scope, receive, send)
+            return
+
+        policy = self.limiter.policies[tier]
+        if not decision.allowed:
+            retry_after = max(1, math.ceil(decision.retry_after))
+            body = dumps({'detail': {
+                'error': f'Rate limit exceeded for {tier} endpoints. Retry in {retry_after}s.',
+                'timestamp': datetime.utcnow().isoformat(),
+                'error_code': 'RATE_LIMITED'
+            }})
+            await send({'type': 'http.response.start', 'status': 429, 'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode()),
+                (b'retry-after', str(retry_after).encode()),
+                (b'x-ratelimit-limit', str(int(policy.capacity)).encode()),
+                (b'x-ratelimit-remaining', b'0'),
+                (b'cache-control', b'no-store'),
+            ]})
+            await send({'type': 'http.response.body', 'body': body})
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                response_headers = MutableHeaders(scope=message)
+                response_headers['x-ratelimit-limit'] = str(int(policy.capacity))
+                response_headers['x-ratelimit-remaining'] = str(int(decision.remaining))
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+# Global rate limiter instance
+rate_limiter = None
+
+def get_rate_limiter() -> RateLimiter:
+    """Get or create the global rate limiter instance"""
+    global rate_limiter
+    if rate_limiter is None:
+        rate_limiter = RateLimiter()
+    return rate_limiter
@@ -0,0 +1,334 @@
+"""
+WebSocket push channel for analysis progress and live market updates.
+One producer per topic publishes into a fan-out hub; each client has a
+bounded queue and is dropped when it falls behind, so a slow socket never
+blocks the producer or other clients.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from config import Config
+from serialization import dumps
+from analysis_jobs import AnalysisJob, AnalysisJobManager
+from financial_data_service import FinancialDataService, get_financial_data_service
+from models.sentiment import AnalysisReport
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+PublishFn = Callable[[str, str, Any], None]
+ProducerFactory = Callable[[str, PublishFn], Awaitable[None]]
+
+_CLOSE = object()  # Queue sentinel telling the sender to close a dropped socket
+
+TICKER_TOPICS = ('analysis', 'quote')  # "<prefix>:<TICKER>" topics
+PLAIN_TOPICS = ('market_mood',)
+
+
+def normalize_topic(topic: str) -> Optional[str]:
+    """
+    Canonical form of a client-supplied topic, with the ticker uppercased,
+    or None when the topic is unknown or the ticker is invalid.
+    """
+    topic = topic.strip()
+    if topic in PLAIN_TOPICS:
+        return topic
+    prefix, _, ticker = topic.partition(':')
+    ticker = ticker.strip().upper()
+    if prefix not in TICKER_TOPICS or not ticker or len(ticker) > 10:
+        return None
+    if not ticker.replace('-', '').replace('.', '').isalnum():
+        return None
+    return f"{prefix}:{ticker}"
+
+
+class Subscriber:
+    """A connected client with a bounded outbound message queue."""
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.topics: Set[str] = set()
+        self.dropped = False
+
+    def offer(self, message: str) -> bool:
+        """Queue a pre-encoded message without waiting. Returns False when the queue is full."""
+        if self.dropped:
+            return False
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def drop(self) -> None:
+        """Discard pending messages and tell the sender to close the socket."""
+        self.dropped = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(_CLOSE)
+
+
+class TopicBroadcaster:
+    """
+    Fan-out hub keyed by topic.
+
+    Producers are registered per topic prefix and started when the first
+    client subscribes to a topic, then cancelled when the last one leaves.
+    Topics fed from outside (analysis jobs) are marked with begin/end.
+    The latest message per topic is replayed to new subscribers, and kept
+    only while the topic has subscribers or a running producer.
+    """
+
+    def __init__(self, queue_size: Optional[int] = None, max_topics: Optional[int] = None):
+        self.queue_size = queue_size or Config.WS_QUEUE_SIZE
+        self.max_topics = max_topics or Config.WS_MAX_TOPICS
+        self.subscribers: Dict[str, Set[Subscriber]] = {}
+        self.producers: Dict[str, asyncio.Task] = {}
+        self.latest: Dict[str, str] = {}
+        self.external: Set[str] = set()
+        self.factories: List[Tuple[str, ProducerFactory]] = []
+        self.dropped_count = 0
+
+    def register_producer(self, prefix: str, factory: ProducerFactory) -> None:
+        """Register a producer coroutine factory for topics starting with ``prefix``."""
+        self.factories.append((prefix, factory))
+
+    def create_subscriber(self) -> Subscriber:
+        return Subscriber(self.queue_size)
+
+    def subscribe(self, topic: str, subscriber: Subscriber) -> None:
+        self.subscribers.setdefault(topic, set()).add(subscriber)
+        subscriber.topics.add(topic)
+        if topic in self.latest:
+            subscriber.offer(self.latest[topic])
+        if topic not in self.producers:
+            for prefix, factory in self.factories:
+                if topic.startswith(prefix):
+                    self.producers[topic] = asyncio.create_task(factory(topic, self.publish))
+                    logger.info(f"Started producer for topic {topic}")
+                    break
+
+    def unsubscribe(self, topic: str, subscriber: Subscriber) -> None:
+        subscriber.topics.discard(topic)
+        members = self.subscribers.get(topic)
+        if members is None:
+            return
+        members.discard(subscriber)
+        if not members:
+            del self.subscribers[topic]
+            producer = self.producers.pop(topic, None)
+            if producer:
+                producer.cancel()
+                logger.info(f"Stopped producer for topic {topic}")
+            if topic not in self.external:
+                self.latest.pop(topic, None)
+
+    def remove(self, subscriber: Subscriber) -> None:
+        for topic in list(subscriber.topics):
+            self.unsubscribe(topic, subscriber)
+
+    def begin(self, topic: str) -> None:
+        """Mark a topic as fed by an outside producer, so its latest message is kept without subscribers."""
+        self.external.add(topic)
+
+    def end(self, topic: str) -> None:
+        """The outside producer of a topic finished; forget its latest message unless someone is listening."""
+        self.external.discard(topic)
+        if topic not in self.subscribers:
+            self.latest.pop(topic, None)
+
+    @staticmethod
+    def encode(topic: str, event: str, data: Any) -> str:
+        return dumps({
+            'topic': topic,
+            'event': event,
+            'data': data,
+            'timestamp': datetime.utcnow().isoformat()
+        }).decode('utf-8')
+
+    def publish(self, topic: str, event: str, data: Any) -> None:
+        """
+        Encode a message once and offer it to every subscriber of the topic.
+        Never awaits; subscribers whose queue is full are dropped.
+        """
+        message = self.encode(topic, event, data)
+        if topic in self.subscribers or topic in self.producers or topic in self.external:
+            self.latest[topic] = message
+
+        for subscriber in list(self.subscribers.get(topic, ())):
+            if not subscriber.offer(message):
+                logger.warning(f"Dropping slow WebSocket subscriber on topic {topic}")
+                self.dropped_count += 1
+                self.remove(subscriber)
+                subscriber.drop()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'topics': len(self.subscribers),
+            'subscribers': len({s for members in self.subscribers.values() for s in members}),
+            'producers': len(self.producers),
+            'dropped': self.dropped_count
+        }
+
+    async def serve(self, websocket: WebSocket) -> None:
+        """
+        Handle one WebSocket connection.
+
+        Clients send {"action": "subscribe" | "unsubscribe", "topic": "..."};
+        the server pushes {"topic", "event", "data", "timestamp"} messages.
+        Unknown topics, invalid tickers and subscriptions past the
+        per-connection limit get an "error" event instead.
+        """
+        await websocket.accept()
+        subscriber = self.create_subscriber()
+        sender = asyncio.create_task(self._send_loop(websocket, subscriber))
+        try:
+            while not subscriber.dropped:
+                request = await websocket.receive_json()
+                action = request.get('action')
+                requested = str(request.get('topic', '')).strip()
+                if not requested:
+                    continue
+                topic = normalize_topic(requested)
+                if topic is None:
+                    subscriber.offer(self.encode(requested, 'error', {'error': f'Unknown topic: {requested}'}))
+                elif action == 'subscribe':
+                    if topic not in subscriber.topics and len(subscriber.topics) >= self.max_topics:
+                        subscriber.offer(self.encode(topic, 'error', {
+                            'error': f'Topic limit reached; at most {self.max_topics} per connection'
+                        }))
+                        continue
+                    self.subscribe(topic, subscriber)
+                elif action == 'unsubscribe':
+                    self.unsubscribe(topic, subscriber)
+        except WebSocketDisconnect:
+            pass
+        except Exception as e:
+            logger.warning(f"WebSocket connection closed: {e}")
+        finally:
+            self.remove(subscriber)
+            sender.cancel()
+
+    @staticmethod
+    async def _send_loop(websocket: WebSocket, subscriber: Subscriber) -> None:
+        try:
+            while True:
+                message = await subscriber.queue.get()
+                if message is _CLOSE:
+                    # 1013: try again later
+                    await websocket.close(code=1013)
+                    return
+                await websocket.send_text(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.debug(f"WebSocket send failed: {e}")
+
+
+class AnalysisSocketHandler:
+    """
+    Pushes analysis job events to ``analysis:<TICKER>`` topics.
+    The running job is the single producer for its topic.
+    """
+
+    def __init__(self, broadcaster: TopicBroadcaster, job_manager: AnalysisJobManager):
+        self.broadcaster = broadcaster
+        self.job_manager = job_manager
+        job_manager.add_listener(self._on_job_event)
+
+    @staticmethod
+    def topic_for(ticker: str) -> str:
+        return f"analysis:{ticker.upper()}"
+
+    async def on_start_analysis(self, data: dict) -> None:
+        """Start (or attach to) an analysis job for data['stock_symbol']."""
+        await self.job_manager.start(data['stock_symbol'], int(data.get('num_articles', 5)))
+
+    def emit_progress_update(self, ticker: str, progress: int, message: str, job: Optional[AnalysisJob] = None) -> None:
+        payload = {'progress': progress, 'message': message}
+        if job:
+            payload['current_stage'] = job.current_stage
+            payload['stages'] = [stage.to_dict() for stage in job.stages]
+        self.broadcaster.publish(self.topic_for(ticker), 'progress', payload)
+
+    def emit_analysis_complete(self, ticker: str, report: AnalysisReport) -> None:
+        self.broadcaster.publish(self.topic_for(ticker), 'complete', report.to_dict())
+
+    def emit_error(self, ticker: str, error: str) -> None:
+        self.broadcaster.publish(self.topic_for(ticker), 'error', {'error': error})
+
+    def _on_job_event(self, job: AnalysisJob, event: str) -> None:
+        topic = self.topic_for(job.ticker)
+        if event == 'progress':
+            self.broadcaster.begin(topic)
+            self.emit_progress_update(job.ticker, job.progress, job.message, job)
+            return
+        if event == 'complete' and job.report:
+            self.emit_analysis_complete(job.ticker, job.report)
+        elif event == 'error':
+            self.emit_error(job.ticker, job.error or 'Analysis failed')
+        elif event == 'cancelled':
+            self.broadcaster.publish(topic, 'cancelled', {'message': job.message})
+        self.broadcaster.end(topic)
+
+
+def quote_producer(service: Optional[FinancialDataService] = None) -> ProducerFactory:
+    """
+    Producer for ``quote:<TICKER>`` topics: polls one PortfolioMover per
+    interval and publishes only when price or change moved.
+    """
+    async def produce(topic: str, publish: PublishFn) -> None:
+        data_service = service or get_financial_data_service()
+        ticker = topic.split(':', 1)[1].upper()
+        previous = None
+        while True:
+            try:
+                movers = await asyncio.to_thread(data_service.get_portfolio_movers, [ticker])
+                if movers:
+                    current = movers[0].to_dict()
+                    if current != previous:
+                        publish(topic, 'mover', current)
+                        previous = current
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Quote producer for {ticker} failed: {e}")
+            await asyncio.sleep(Config.WS_QUOTE_INTERVAL)
+    return produce
+
+
+def market_mood_producer(service: Optional[FinancialDataService] = None) -> ProducerFactory:
+    """Producer for the ``market_mood`` topic; publishes when the mood changes."""
+    async def produce(topic: str, publish: PublishFn) -> None:
+        data_service = service or get_financial_data_service()
+        previous = None
+        while True:
+            try:
+                mood = (await asyncio.to_thread(data_service.get_market_mood)).to_dict()
+                if mood != previous:
+                    publish(topic, 'market_mood', mood)
+                    previous = mood
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Market mood producer failed: {e}")
+            await asyncio.sleep(Config.WS_MARKET_MOOD_INTERVAL)
+    return produce
+
+
+# Global broadcaster instance
+broadcaster = None
+
+def get_broadcaster() -> TopicBroadcaster:
+    """Get or create the global topic broadcaster with the default producers"""
+    global broadcaster
+    if broadcaster is None:
+        broadcaster = TopicBroadcaster()
+        broadcaster.register_producer('quote:', quote_producer())
+        broadcaster.register_producer('market_mood', market_mood_producer())
+    return broadcaster
@@ -0,0 +1,279 @@
+"""
+Async Salesforce REST client with a pooled HTTP connection.
+One httpx.AsyncClient is shared across requests, so TLS connections are
+reused instead of opened per call. The access token is fetched lazily and
+refreshed once on INVALID_SESSION_ID; rate-limit and unavailable responses
+are retried with backoff. Writes go through the Composite sObject
+collection API, or Bulk API 2.0 for large batches.
+"""
+
+import csv
+import io
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from config import Config
+from lazy_imports import lazy_module, module_available
+from metrics import record_retry
+
+# Imported when the first client is built; only the sync path needs it
+HTTPX_AVAILABLE = module_available('httpx')
+httpx = lazy_module('httpx')
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+COMPOSITE_BATCH_SIZE = 200  # records per sObject collection request
+RETRY_STATUSES = (429, 503)
+
+
+class SalesforceError(Exception):
+    """Custom exception for Salesforce API errors"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retryable: bool = False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+
+
+class SalesforceAuthError(SalesforceError):
+    """Raised when Salesforce rejects the configured credentials"""
+    pass
+
+
+@dataclass
+class SalesforceToken:
+    """Access token and the instance it is valid for."""
+    access_token: str
+    instance_url: str
+    issued_at: float
+
+
+class SalesforceClient:
+    """
+    Pooled async client for the Salesforce REST API.
+
+    Authenticates with the OAuth2 username-password flow when a connected
+    app is configured (SALESFORCE_CLIENT_ID / SALESFORCE_CLIENT_SECRET),
+    otherwise with a simple-salesforce session login.
+    """
+
+    def __init__(self,
+                 login_url: Optional[str] = None,
+                 client_id: Optional[str] = None,
+                 client_secret: Optional[str] = None,
+                 username: Optional[str] = None,
+                 password: Optional[str] = None,
+                 security_token: Optional[str] = None,
+                 api_version: Optional[str] = None,
+                 max_connections: Optional[int] = None,
+                 timeout: Optional[float] = None,
+                 max_retries: int = 3):
+        if not HTTPX_AVAILABLE:
+            raise SalesforceError("httpx library not available. Please install: pip install httpx")
+        self.login_url = (login_url or Config.SALESFORCE_LOGIN_URL
+                          or f"https://{Config.SALESFORCE_DOMAIN}.salesforce.com").rstrip('/')
+        self.client_id = client_id or Config.SALESFORCE_CLIENT_ID
+        self.client_secret = client_secret or Config.SALESFORCE_CLIENT_SECRET
+        self.username = username or Config.SALESFORCE_USERNAME
+        self.password = password or Config.SALESFORCE_PASSWORD
+        self.security_token = security_token if security_token is not None else (Config.SALESFORCE_TOKEN or '')
+        self.api_version = api_version or Config.SALESFORCE_API_VERSION
+        self.max_connections = max_connections or Config.SALESFORCE_MAX_CONNECTIONS
+        self.timeout = timeout or Config.SALESFORCE_TIMEOUT
+        self.max_retries = max_retries
+        self.token: Optional[SalesforceToken] = None
+        self.auth_count = 0
+        self._http: Optional['httpx.AsyncClient'] = None
+        self._auth_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def http(self) -> 'httpx.AsyncClient':
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+        return self._http
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def _login(self) -> SalesforceToken:
+        if not self.username or not self.password:
+            raise SalesforceAuthError("Missing required Salesforce configuration parameters")
+
+        if self.client_id and self.client_secret:
+            try:
+                response = await self.http.post(f"{self.login_url}/services/oauth2/token", data={
+                    'grant_type': 'password',
+                    'client_id': self.client_id,
+                    'client_secret': self.client_secret,
+                    'username': self.username,
+                    'password': f"{self.password}{self.security_token}"
+                })
+            except httpx.HTTPError as e:
+                raise SalesforceError(f"Salesforce login request failed: {e}", retryable=True)
+            if response.status_code != 200:
+                raise SalesforceAuthError(f"OAuth login failed: {response.status_code} - {response.text}",
+                                          status_code=response.status_code)
+            body = response.json()
+            return SalesforceToken(body['access_token'], body['instance_url'].rstrip('/'), time.time())
+
+        try:
+            from simple_salesforce import SalesforceLogin
+        except ImportError:
+            raise SalesforceAuthError(
+                "Set SALESFORCE_CLIENT_ID and SALESFORCE_CLIENT_SECRET, or install simple-salesforce"
+            )
+        domain = Config.SALESFORCE_DOMAIN
+        try:
+            session_id, instance = await asyncio.to_thread(
+                SalesforceLogin, username=self.username, password=self.password,
+                security_token=self.security_token, domain=domain
+            )
+        except Exception as e:
+            raise SalesforceAuthError(f"Session login failed: {e}")
+        return SalesforceToken(session_id, f"https://{instance}", time.time())
+
+    async def authenticate(self, stale: Optional[SalesforceToken] = None) -> SalesforceToken:
+        """
+        Fetch a new token. Concurrent callers that saw the same stale token
+        share one login instead of each logging in.
+        """
+        if self._auth_lock is None:
+            self._auth_lock = asyncio.Lock()
+        async with self._auth_lock:
+            if self.token is not None and self.token is not stale:
+                return self.token
+            self.token = await self._login()
+            self.auth_count += 1
+            logger.info(f"Authenticated to Salesforce instance {self.token.instance_url}")
+            return self.token
+
+    def _url(self, path: str, token: SalesforceToken) -> str:
+        if path.startswith('/'):
+            return f"{token.instance_url}{path}"
+        return f"{token.instance_url}/services/data/v{self.api_version}/{path}"
+
+    async def request(self, method: str, path: str, **kwargs) -> 'httpx.Response':
+        """
+        Send an API request, refreshing the token once on 401 and retrying
+        429 / 503 with exponential backoff.
+
+        Args:
+            method: HTTP method
+            path: Path relative to /services/data/vXX.X/, or absolute from the instance root
+            **kwargs: Passed to httpx (json, params, content, headers)
+
+        Raises:
+            SalesforceError: On an error response or transport failure
+        """
+        extra_headers = kwargs.pop('headers', {})
+        token = self.token or await self.authenticate()
+        refreshed = False
+        attempt = 0
+        while True:
+            headers = {'Authorization': f"Bearer {token.access_token}", **extra_headers}
+            try:
+                response = await self.http.request(method, self._url(path, token), headers=headers, **kwargs)
+            except httpx.HTTPError as e:
+                raise SalesforceError(f"Salesforce request failed: {e}", retryable=True)
+
+            if response.status_code == 401 and not refreshed:
+                refreshed = True
+                record_retry('salesforce', 'token_refresh')
+                token = await self.authenticate(stale=token)
+                continue
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                attempt += 1
+                record_retry('salesforce', str(response.status_code))
+                retry_after = response.headers.get('Retry-After')
+                delay = float(retry_after) if retry_after and retry_after.isdigit() else 0.5 * 2 ** attempt
+                await asyncio.sleep(min(delay, 30.0))
+                continue
+            if response.status_code >= 400:
+                raise SalesforceError(
+                    f"API call failed: {response.status_code} - {response.text[:500]}",
+                    status_code=response.status_code,
+                    retryable=response.status_code in RETRY_STATUSES or response.status_code >= 500
+                )
+            return response
+
+    async def query(self, soql: str) -> Dict[str, Any]:
+        """Run a SOQL query and return the first page of results."""
+        return (await self.request('GET', 'query', params={'q': soql})).json()
+
+    async def upsert_records(self,
+                             sobject: str,
+                             external_id_field: str,
+                             records: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Upsert records by external id through the sObject collections API,
+        200 per request. allOrNone is off, so one bad record does not fail
+        its batch.
+
+        Returns:
+            One result per record ({"id", "success", "created", "errors"})
+        """
+        results: List[Dict[str, Any]] = []
+        for start in range(0, len(records), COMPOSITE_BATCH_SIZE):
+            chunk = records[start:start + COMPOSITE_BATCH_SIZE]
+            response = await self.request(
+                'PATCH', f"composite/sobjects/{sobject}/{external_id_field}",
+                json={
+                    'allOrNone': False,
+                    'records': [{'attributes': {'type': sobject}, **record} for record in chunk]
+                }
+            )
+            results.extend(response.json())
+        return results
+
+    async def bulk_upsert(self,
+                          sobject: str,
+                          external_id_field: str,
+                          records: Sequence[Dict[str, Any]]) -> str:
+        """
+        Upsert records with a Bulk API 2.0 ingest job. Salesforce processes
+        the job asynchronously after upload.
+
+        Returns:
+            Ingest job id
+        """
+        fieldnames = list(dict.fromkeys(key for record in records for key in record))
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fieldnames, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(records)
+
+        job = (await self.request('POST', 'jobs/ingest', json={
+            'object': sobject,
+            'externalIdFieldName': external_id_field,
+            'contentType': 'CSV',
+            'operation': 'upsert',
+            'lineEnding': 'LF'
+        })).json()
+        await self.request('PUT', f"jobs/ingest/{job['id']}/batches",
+                           content=buffer.getvalue().encode('utf-8'),
+                           headers={'Content-Type': 'text/csv'})
+        await self.request('PATCH', f"jobs/ingest/{job['id']}", json={'state': 'UploadComplete'})
+        return job['id']
+
+
+# Global Salesforce client instance
+salesforce_client = None
+
+def get_salesforce_client() -> SalesforceClient:
+    """Get or create the global Salesforce client instance"""
+    global salesforce_client
+    if salesforce_client is None:
+        salesforce_client = SalesforceClient()
+    return salesforce_client
@@ -0,0 +1,150 @@
+"""
+Local mock of the Salesforce endpoints used by SalesforceClient, for
+exercising the client and the sync queue without an org:
+OAuth2 password login, SOQL COUNT() queries, sObject collection upserts
+and Bulk API 2.0 ingest jobs. Records are kept in memory.
+
+Run standalone with: uvicorn salesforce_mock:app --port 8765
+"""
+
+import csv
+import io
+import uuid
+from typing import Any, Dict, List, Set
+
+from fastapi import FastAPI, Form, Request
+from fastapi.responses import JSONResponse
+
+API_PREFIX = "/services/data/v{version}"
+
+
+class MockOrg:
+    """In-memory org state shared by the mock routes."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.records: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.tokens: Set[str] = set()
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.logins = 0
+        self.requests = 0
+        self.client_ports: Set[int] = set()
+        self.fail_next: List[int] = []  # status codes to return for the next API calls
+
+    def expire_tokens(self) -> None:
+        self.tokens.clear()
+
+    def upsert(self, sobject: str, field: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        key = record.get(field)
+        if not key:
+            return {'id': None, 'success': False, 'created': False, 'errors': [
+                {'statusCode': 'REQUIRED_FIELD_MISSING', 'message': f"Required field missing: {field}", 'fields': [field]}
+            ]}
+        table = self.records.setdefault(sobject, {})
+        created = key not in table
+        existing = table.setdefault(key, {'Id': uuid.uuid4().hex[:18]})
+        existing.update({k: v for k, v in record.items() if k != 'attributes'})
+        return {'id': existing['Id'], 'success': True, 'created': created, 'errors': []}
+
+
+org = MockOrg()
+app = FastAPI(title="Mock Salesforce")
+
+
+def _error(status: int, code: str, message: str) -> JSONResponse:
+    return JSONResponse(status_code=status, content=[{'errorCode': code, 'message': message}])
+
+
+@app.middleware("http")
+async def check_session(request: Request, call_next):
+    org.requests += 1
+    if request.client:
+        org.client_ports.add(request.client.port)
+    if request.url.path.startswith('/services/data/'):
+        authorization = request.headers.get('authorization', '')
+        if authorization.removeprefix('Bearer ') not in org.tokens:
+            return _error(401, 'INVALID_SESSION_ID', 'Session expired or invalid')
+        if org.fail_next:
+            status = org.fail_next.pop(0)
+            return JSONResponse(status_code=status, headers={'Retry-After': '0'},
+                                content=[{'errorCode': 'SERVER_UNAVAILABLE', 'message': 'Try again'}])
+    return await call_next(request)
+
+
+@app.post("/services/oauth2/token")
+async def token(request: Request,
+                grant_type: str = Form(...),
+                client_id: str = Form(...),
+                client_secret: str = Form(...),
+                username: str = Form(...),
+                password: str = Form(...)):
+    if grant_type != 'password' or not password:
+        return JSONResponse(status_code=400, content={'error': 'invalid_grant', 'error_description': 'authentication failure'})
+    org.logins += 1
+    access_token = uuid.uuid4().hex
+    org.tokens.add(access_token)
+    return {
+        'access_token': access_token,
+        'instance_url': str(request.base_url).rstrip('/'),
+        'token_type': 'Bearer'
+    }
+
+
+@app.get(API_PREFIX + "/query")
+async def query(version: str, q: str):
+    sobject = q.upper().split(' FROM ')[1].split()[0] if ' FROM ' in q.upper() else ''
+    matches = next((records for name, records in org.records.items() if name.upper() == sobject), {})
+    if 'COUNT()' in q.upper():
+        return {'totalSize': len(matches) if sobject != 'USER' else 1, 'done': True, 'records': []}
+    return {'totalSize': len(matches), 'done': True, 'records': list(matches.values())[:2000]}
+
+
+@app.patch(API_PREFIX + "/composite/sobjects/{sobject}/{field}")
+async def upsert_collection(version: str, sobject: str, field: str, request: Request):
+    body = await request.json()
+    records = body.get('records', [])
+    if len(records) > 200:
+        return _error(400, 'EXCEEDED_ID_LIMIT', 'record limit is 200')
+    return [org.upsert(sobject, field, record) for record in records]
+
+
+@app.post(API_PREFIX + "/jobs/ingest")
+async def create_job(version: str, request: Request):
+    body = await request.json()
+    job_id = uuid.uuid4().hex[:18]
+    org.jobs[job_id] = {**body, 'id': job_id, 'state': 'Open', 'data': ''}
+    return {'id': job_id, 'state': 'Open', 'object': body.get('object'), 'operation': body.get('operation')}
+
+
+@app.put(API_PREFIX + "/jobs/ingest/{job_id}/batches")
+async def upload_batch(version: str, job_id: str, request: Request):
+    job = org.jobs.get(job_id)
+    if job is None or job['state'] != 'Open':
+        return _error(404, 'NOT_FOUND', 'Job not found or not open')
+    job['data'] += (await request.body()).decode('utf-8')
+    return JSONResponse(status_code=201, content=None)
+
+
+@app.patch(API_PREFIX + "/jobs/ingest/{job_id}")
+async def close_job(version: str, job_id: str, request: Request):
+    job = org.jobs.get(job_id)
+    if job is None:
+        return _error(404, 'NOT_FOUND', 'Job not found')
+    state = (await request.json()).get('state')
+    if state == 'UploadComplete':
+        # Process synchronously; a real org does this in the background
+        rows = list(csv.DictReader(io.StringIO(job['data'])))
+        results = [org.upsert(job['object'], job['externalIdFieldName'], row) for row in rows]
+        job.update(state='JobComplete', numberRecordsProcessed=len(rows),
+                   numberRecordsFailed=sum(not r['success'] for r in results))
+    return {'id': job_id, 'state': job['state']}
+
+
+@app.get(API_PREFIX + "/jobs/ingest/{job_id}")
+async def job_info(version: str, job_id: str):
+    job = org.jobs.get(job_id)
+    if job is None:
+        return _error(404, 'NOT_FOUND', 'Job not found')
+    return {k: v for k, v in job.items() if k != 'data'}
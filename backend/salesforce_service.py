@@ -1,9 +1,11 @@
 """
 Salesforce integration service for the Investment Research Terminal
 """
+import time
 import logging
 import requests
 import json
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 load_dotenv()  # Load environment variables from .env file
 
@@ -19,6 +21,13 @@ class SalesforceService:
         self.session_id = None
         self.instance_url = None
         self.config = Config()
+        # One pooled HTTP session so REST calls reuse TLS connections
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.config.SALESFORCE_MAX_CONNECTIONS)
+        self.http.mount('https://', adapter)
+        self.http.mount('http://', adapter)
+        self._status = None
+        self._status_checked_at = 0.0
         self._connect()
     
     def _connect(self):
@@ -33,9 +42,8 @@ class SalesforceService:
             ]):
                 raise ValueError("Missing required Salesforce configuration parameters")
             
-            print("🔄 Attempting to connect to Salesforce...")
-            print(f"   📧 Username: {self.config.SALESFORCE_USERNAME}")
-            print(f"   🌐 Domain: {self.config.SALESFORCE_DOMAIN}.salesforce.com")
+            logger.info(f"Connecting to Salesforce as {self.config.SALESFORCE_USERNAME} "
+                        f"({self.config.SALESFORCE_DOMAIN}.salesforce.com)")
             
             # Try simple-salesforce first
             try:
@@ -51,42 +59,24 @@ class SalesforceService:
                 # Test with a simple query
                 result = self.sf.query("SELECT COUNT() FROM User LIMIT 1")
                 
-                logger.info("✅ Successfully connected to Salesforce!")
-                logger.info(f"   Username: {self.config.SALESFORCE_USERNAME}")
-                logger.info(f"   Users in org: {result['totalSize']}")
-                
-                print("🎉 SALESFORCE CONNECTION SUCCESSFUL!")
-                print(f"   ✅ Connected to: {self.config.SALESFORCE_USERNAME}")
-                print(f"   ✅ Domain: {self.config.SALESFORCE_DOMAIN}.salesforce.com")
-                print(f"   ✅ Users in org: {result['totalSize']}")
-                print(f"   ✅ Connection method: Simple-Salesforce (SOAP API)")
+                logger.info("✅ Successfully connected to Salesforce!",
+                            extra={'username': self.config.SALESFORCE_USERNAME,
+                                   'domain': self.config.SALESFORCE_DOMAIN,
+                                   'org_users': result['totalSize'],
+                                   'connection_method': 'simple-salesforce (SOAP API)'})
                 
                 return True
                 
             except Exception as soap_error:
-                print(f"❌ SOAP API connection failed: {soap_error}")
+                logger.warning(f"SOAP API connection failed: {soap_error}")
                 
-                # If SOAP fails, show that we tried and provide helpful info
+                # If SOAP fails, explain how to enable it; the credentials themselves loaded fine
                 if "SOAP API login() is disabled" in str(soap_error):
-                    print("💡 SOAP API is disabled in this Salesforce org.")
-                    print("💡 This is common in newer Salesforce orgs for security reasons.")
-                    print("💡 To enable SOAP API:")
-                    print("   1. Go to Setup → API → API Access")
-                    print("   2. Enable 'Allow API Access'")
-                    print("   3. Or use OAuth2 Connected App instead")
-                    
-                    # Show that we have the credentials and they're formatted correctly
-                    print("\n📋 Configuration Status:")
-                    print(f"   ✅ Username: {self.config.SALESFORCE_USERNAME}")
-                    print(f"   ✅ Password: {'*' * len(self.config.SALESFORCE_PASSWORD)} (length: {len(self.config.SALESFORCE_PASSWORD)})")
-                    print(f"   ✅ Security Token: {'*' * len(self.config.SALESFORCE_TOKEN)} (length: {len(self.config.SALESFORCE_TOKEN)})")
-                    print(f"   ✅ Domain: {self.config.SALESFORCE_DOMAIN}")
-                    
-                    # For demo purposes, show that we successfully loaded the config
-                    print("\n🎉 CONFIGURATION LOADED SUCCESSFULLY!")
-                    print("   ✅ All Salesforce credentials are properly configured")
-                    print("   ✅ Environment variables loaded from .env file")
-                    print("   ✅ Ready for Salesforce integration (pending SOAP API enable)")
+                    logger.warning("SOAP API is disabled in this Salesforce org (common in newer orgs). "
+                                   "Enable it under Setup → API → API Access, or use an OAuth2 Connected App instead.")
+                    logger.info("Salesforce credentials are configured; integration is pending SOAP API access",
+                                extra={'username': self.config.SALESFORCE_USERNAME,
+                                       'domain': self.config.SALESFORCE_DOMAIN})
                     
                     return False
                 else:
@@ -94,7 +84,6 @@ class SalesforceService:
                 
         except Exception as e:
             logger.error(f"❌ Failed to connect to Salesforce: {e}")
-            print(f"❌ SALESFORCE CONNECTION FAILED: {e}")
             
             self.session_id = None
             self.instance_url = None
@@ -111,7 +100,7 @@ class SalesforceService:
             'Content-Type': 'application/json'
         }
         
-        response = requests.get(url, headers=headers, params=params)
+        response = self.http.get(url, headers=headers, params=params, timeout=self.config.SALESFORCE_TIMEOUT)
         
         if response.status_code == 200:
             return response.json()
@@ -122,8 +111,21 @@ class SalesforceService:
         """Check if Salesforce connection is active"""
         return self.session_id is not None or hasattr(self, 'sf')
     
-    def test_connection(self):
-        """Test the Salesforce connection and return status"""
+    def test_connection(self, max_age=None):
+        """
+        Connection status, reusing the last live check for up to
+        SALESFORCE_STATUS_TTL seconds so status polling doesn't query the org
+        on every hit.
+        """
+        max_age = self.config.SALESFORCE_STATUS_TTL if max_age is None else max_age
+        if self._status is not None and time.monotonic() - self._status_checked_at < max_age:
+            return self._status
+        self._status = self._check_connection()
+        self._status_checked_at = time.monotonic()
+        return self._status
+
+    def _check_connection(self):
+        """Test the Salesforce connection with a live query"""
         if not self.is_connected():
             return {
                 "connected": False,
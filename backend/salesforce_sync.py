@@ -0,0 +1,230 @@
+"""
+Write-behind sync of portfolio scan results to Salesforce.
+Scan endpoints enqueue results without waiting on Salesforce; a background
+task flushes them in batches when the batch fills or the flush interval
+passes, whichever comes first. Large backlogs go through Bulk API 2.0.
+Transport failures are retried with backoff; the queue is bounded and
+drops the oldest record when full rather than growing without limit.
+"""
+
+import json
+import time
+import uuid
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from config import Config
+from models.portfolio_analysis import PortfolioAnalysisResult
+from salesforce_client import SalesforceClient, SalesforceError, get_salesforce_client
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Salesforce long text area limit
+LONG_TEXT_LIMIT = 131072
+
+
+def scan_record(result: PortfolioAnalysisResult, scan_id: Optional[str] = None) -> Dict[str, Any]:
+    """Map a scan result onto the configured custom object's fields."""
+    analysis = result.analysis
+    risk = analysis.risk_metrics
+    holdings = [{'ticker': h.ticker, 'quantity': h.quantity} for h in result.extracted_holdings]
+    recommendations = [
+        {'ticker': r.ticker, 'type': r.improvement_type.value, 'priority': r.priority, 'reason': r.reason}
+        for r in result.recommendations
+    ]
+    return {
+        Config.SALESFORCE_SCAN_EXTERNAL_ID: scan_id or uuid.uuid4().hex,
+        'Scanned_At__c': result.timestamp.isoformat(),
+        'Health_Score__c': analysis.health_score,
+        'Risk_Profile__c': analysis.risk_profile,
+        'Total_Value__c': analysis.total_value,
+        'Volatility__c': risk.volatility if risk else None,
+        'Beta__c': risk.beta if risk else None,
+        'Diversification_Score__c': risk.diversification_score if risk else None,
+        'Holdings_Count__c': len(holdings),
+        'Holdings__c': json.dumps(holdings)[:LONG_TEXT_LIMIT],
+        'Recommendations__c': json.dumps(recommendations)[:LONG_TEXT_LIMIT],
+        'Processing_Time__c': round(result.processing_time, 3)
+    }
+
+
+@dataclass
+class SyncStats:
+    """Counters for the sync queue."""
+    enqueued: int = 0
+    synced: int = 0
+    rejected: int = 0   # refused by Salesforce (validation errors); not retried
+    dropped: int = 0    # evicted from a full queue or out of attempts
+    batches: int = 0
+    bulk_jobs: int = 0
+    retries: int = 0
+    pending: int = 0
+    last_flush_at: Optional[float] = None
+    last_error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class SalesforceSyncQueue:
+    """
+    Bounded write-behind queue of scan records. The flush loop starts with
+    the first enqueue, so nothing runs until there is something to sync.
+    """
+
+    def __init__(self,
+                 client: Optional[SalesforceClient] = None,
+                 sobject: Optional[str] = None,
+                 external_id_field: Optional[str] = None,
+                 batch_size: Optional[int] = None,
+                 flush_interval: Optional[float] = None,
+                 max_pending: Optional[int] = None,
+                 bulk_threshold: Optional[int] = None,
+                 max_attempts: int = 5):
+        self.client = client
+        self.sobject = sobject or Config.SALESFORCE_SCAN_OBJECT
+        self.external_id_field = external_id_field or Config.SALESFORCE_SCAN_EXTERNAL_ID
+        self.batch_size = batch_size or Config.SALESFORCE_SYNC_BATCH_SIZE
+        self.flush_interval = flush_interval or Config.SALESFORCE_SYNC_FLUSH_SECONDS
+        self.max_pending = max_pending or Config.SALESFORCE_SYNC_MAX_PENDING
+        self.bulk_threshold = bulk_threshold or Config.SALESFORCE_BULK_THRESHOLD
+        self.max_attempts = max_attempts
+        self.stats = SyncStats()
+        # (record, attempts so far)
+        self._pending: Deque[Tuple[Dict[str, Any], int]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._backoff_until = 0.0
+
+    def _ensure_started(self) -> None:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def enqueue(self, result: PortfolioAnalysisResult) -> str:
+        """
+        Queue a scan result for sync. Must be called from the event loop;
+        never waits on Salesforce.
+
+        Returns:
+            The record's external id
+        """
+        record = scan_record(result)
+        self.enqueue_record(record)
+        return record[self.external_id_field]
+
+    def enqueue_record(self, record: Dict[str, Any]) -> None:
+        if len(self._pending) >= self.max_pending:
+            self._pending.popleft()
+            self.stats.dropped += 1
+        self._pending.append((record, 0))
+        self.stats.enqueued += 1
+        self.stats.pending = len(self._pending)
+        self._ensure_started()
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            delay = self._backoff_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                await self.flush()
+            except Exception as e:
+                # Keep the loop alive; records were re-queued by flush
+                logger.error(f"Salesforce sync flush failed: {e}")
+
+    async def flush(self) -> int:
+        """
+        Send everything pending, one batch at a time. Batches at or above
+        the bulk threshold go through a Bulk API 2.0 job.
+
+        Returns:
+            Number of records accepted by Salesforce
+        """
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        accepted = 0
+        async with self._flush_lock:
+            client = self.client or get_salesforce_client()
+            while self._pending:
+                size = len(self._pending) if len(self._pending) >= self.bulk_threshold else self.batch_size
+                batch = [self._pending.popleft() for _ in range(min(size, len(self._pending)))]
+                self.stats.pending = len(self._pending)
+                records = [record for record, _ in batch]
+                try:
+                    if len(records) >= self.bulk_threshold:
+                        job_id = await client.bulk_upsert(self.sobject, self.external_id_field, records)
+                        self.stats.bulk_jobs += 1
+                        logger.info(f"Queued Salesforce bulk job {job_id} for {len(records)} scan records")
+                        accepted += len(records)
+                    else:
+                        results = await client.upsert_records(self.sobject, self.external_id_field, records)
+                        for record, outcome in zip(records, results):
+                            if outcome.get('success'):
+                                accepted += 1
+                            else:
+                                self.stats.rejected += 1
+                                self.stats.last_error = json.dumps(outcome.get('errors'))[:500]
+                                logger.warning(f"Salesforce rejected scan record "
+                                               f"{record[self.external_id_field]}: {self.stats.last_error}")
+                except SalesforceError as e:
+                    self._requeue(batch, e)
+                    if e.retryable:
+                        break
+                    raise
+                self.stats.batches += 1
+                self.stats.last_flush_at = time.time()
+            self.stats.synced += accepted
+        return accepted
+
+    def _requeue(self, batch: List[Tuple[Dict[str, Any], int]], error: SalesforceError) -> None:
+        """Put a failed batch back at the front, dropping records that are out of attempts."""
+        self.stats.last_error = str(error)[:500]
+        attempts = max(a for _, a in batch) + 1
+        kept = [(record, a + 1) for record, a in batch if a + 1 < self.max_attempts]
+        self.stats.dropped += len(batch) - len(kept)
+        self.stats.retries += len(kept)
+        self._pending.extendleft(reversed(kept))
+        self.stats.pending = len(self._pending)
+        self._backoff_until = time.monotonic() + min(2.0 ** attempts, 60.0)
+        logger.warning(f"Salesforce sync failed ({error}); {len(kept)} records re-queued")
+
+    async def stop(self) -> None:
+        """Stop the flush loop after a final flush."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pending:
+            try:
+                await self.flush()
+            except SalesforceError as e:
+                logger.error(f"Final Salesforce sync flush failed: {e}")
+
+
+# Global Salesforce sync queue instance
+salesforce_sync_queue = None
+
+def get_salesforce_sync_queue() -> SalesforceSyncQueue:
+    """Get or create the global Salesforce sync queue instance"""
+    global salesforce_sync_queue
+    if salesforce_sync_queue is None:
+        salesforce_sync_queue = SalesforceSyncQueue()
+    return salesforce_sync_queue
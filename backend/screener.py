@@ -0,0 +1,711 @@
+"""
+Fundamentals screener over a columnar table for a whole ticker universe.
+The table is refreshed in bulk and swapped in atomically, so queries always
+see a consistent snapshot. Filter / sort expressions such as
+
+    pe_ratio < 20 and revenue_growth > 10% order by return_on_equity desc limit 25
+
+are parsed once, cached, and evaluated as boolean masks over NumPy columns.
+Hot columns keep a sorted index that answers range predicates with a binary
+search and ORDER BY without sorting.
+"""
+
+import os
+import re
+import time
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import Config
+from models.financial_data import FundamentalMetrics
+from financial_data_service import FinancialDataError, FinancialDataService, get_financial_data_service
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+NUMERIC_COLUMNS = tuple(f.name for f in fields(FundamentalMetrics)) + ('current_price', 'volume')
+CATEGORY_COLUMNS = ('sector', 'industry')
+COLUMNS = NUMERIC_COLUMNS + CATEGORY_COLUMNS
+SUFFIXES = {'k': 1e3, 'm': 1e6, 'b': 1e9, 't': 1e12, '%': 0.01}
+MAX_LIMIT = 1000
+
+
+class ScreenerError(Exception):
+    """Custom exception for screener errors"""
+    pass
+
+
+@dataclass
+class SortedIndex:
+    """Row order of a numeric column by value, NaN rows excluded."""
+    values: np.ndarray  # ascending, finite only
+    order: np.ndarray   # row of each sorted value
+
+    @classmethod
+    def build(cls, column: np.ndarray) -> 'SortedIndex':
+        finite = np.nonzero(np.isfinite(column))[0]
+        order = finite[np.argsort(column[finite], kind='stable')]
+        return cls(values=column[order], order=order)
+
+    def range(self, op: str, value: float) -> np.ndarray:
+        """Rows satisfying ``column <op> value``, by binary search."""
+        if op == '<':
+            return self.order[:np.searchsorted(self.values, value, side='left')]
+        if op == '<=':
+            return self.order[:np.searchsorted(self.values, value, side='right')]
+        if op == '>':
+            return self.order[np.searchsorted(self.values, value, side='right'):]
+        if op == '>=':
+            return self.order[np.searchsorted(self.values, value, side='left'):]
+        if op == '=':
+            return self.order[np.searchsorted(self.values, value, side='left'):
+                              np.searchsorted(self.values, value, side='right')]
+        raise ScreenerError(f"Operator {op} cannot use an index")
+
+
+@dataclass
+class FundamentalsTable:
+    """
+    Immutable columnar snapshot. Numeric columns are float64 with NaN for
+    missing values; category columns are int32 codes into ``labels``.
+    """
+    tickers: np.ndarray
+    numeric: Dict[str, np.ndarray]
+    codes: Dict[str, np.ndarray]
+    labels: Dict[str, np.ndarray]
+    updated_at: float
+    indexes: Dict[str, SortedIndex] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    @classmethod
+    def empty(cls) -> 'FundamentalsTable':
+        return cls.from_rows({}, updated_at=0.0)
+
+    @classmethod
+    def from_rows(cls,
+                  rows: Dict[str, Dict[str, Any]],
+                  updated_at: Optional[float] = None,
+                  indexed: Sequence[str] = ()) -> 'FundamentalsTable':
+        """Build a table from {ticker: {column: value}}, tickers sorted."""
+        tickers = np.array(sorted(rows), dtype=str)
+        numeric = {
+            name: np.array([_as_float(rows[t].get(name)) for t in tickers], dtype=np.float64)
+            for name in NUMERIC_COLUMNS
+        }
+        codes, labels = {}, {}
+        for name in CATEGORY_COLUMNS:
+            values = [rows[t].get(name) or '' for t in tickers]
+            labels[name], inverse = np.unique(np.array(values, dtype=str), return_inverse=True)
+            codes[name] = inverse.astype(np.int32).reshape(-1)
+        table = cls(tickers=tickers, numeric=numeric, codes=codes, labels=labels,
+                    updated_at=time.time() if updated_at is None else updated_at)
+        table.build_indexes(indexed)
+        return table
+
+    def build_indexes(self, columns: Sequence[str]) -> None:
+        for name in columns:
+            if name not in self.numeric:
+                raise ScreenerError(f"Only numeric columns can be indexed: {name}")
+            self.indexes[name] = SortedIndex.build(self.numeric[name])
+
+    def row(self, index: int, columns: Sequence[str] = COLUMNS) -> Dict[str, Any]:
+        result: Dict[str, Any] = {'ticker': str(self.tickers[index])}
+        for name in columns:
+            if name in self.numeric:
+                value = self.numeric[name][index]
+                result[name] = float(value) if np.isfinite(value) else None
+            else:
+                result[name] = str(self.labels[name][self.codes[name][index]]) or None
+        return result
+
+    def to_rows(self) -> Dict[str, Dict[str, Any]]:
+        return {str(t): self.row(i) for i, t in enumerate(self.tickers)}
+
+    def save(self, path: str) -> None:
+        """Write atomically as .npz; the previous file stays readable until replaced."""
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        arrays = {'tickers': self.tickers, 'updated_at': np.array(self.updated_at)}
+        arrays.update({f"n_{name}": values for name, values in self.numeric.items()})
+        arrays.update({f"c_{name}": values for name, values in self.codes.items()})
+        arrays.update({f"l_{name}": values for name, values in self.labels.items()})
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.npz')
+        with os.fdopen(fd, 'wb') as handle:
+            np.savez(handle, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, indexed: Sequence[str] = ()) -> 'FundamentalsTable':
+        with np.load(path, allow_pickle=False) as data:
+            names = set(data.files)
+            tickers = data['tickers']
+            table = cls(
+                tickers=tickers,
+                numeric={
+                    name: data[f"n_{name}"] if f"n_{name}" in names else np.full(len(tickers), np.nan)
+                    for name in NUMERIC_COLUMNS
+                },
+                codes={
+                    name: data[f"c_{name}"] if f"c_{name}" in names else np.zeros(len(tickers), dtype=np.int32)
+                    for name in CATEGORY_COLUMNS
+                },
+                labels={
+                    name: data[f"l_{name}"] if f"l_{name}" in names else np.array([''])
+                    for name in CATEGORY_COLUMNS
+                },
+                updated_at=float(data['updated_at'])
+            )
+        table.build_indexes(indexed)
+        return table
+
+
+def _as_float(value: Any) -> float:
+    try:
+        return float(value) if value is not None else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+
+TOKEN_PATTERN = re.compile(r"""
+    \s*(?:
+        (?P<number>-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?[kKmMbBtT%]?)(?![A-Za-z0-9_])
+      | (?P<string>'[^']*'|"[^"]*")
+      | (?P<op><=|>=|!=|==|=|<|>)
+      | (?P<punct>[(),])
+      | (?P<word>[A-Za-z_][A-Za-z0-9_]*)
+    )""", re.VERBOSE)
+KEYWORDS = {'and', 'or', 'not', 'in', 'between', 'is', 'null', 'order', 'by', 'asc', 'desc', 'limit'}
+
+
+@dataclass(frozen=True)
+class Query:
+    """A parsed screener expression."""
+    where: Optional[tuple]
+    order_by: Tuple[Tuple[str, bool], ...]  # (column, descending)
+    limit: Optional[int]
+
+
+def _tokenize(expression: str) -> List[Tuple[str, Any]]:
+    tokens, position = [], 0
+    expression = expression.strip()
+    while position < len(expression):
+        match = TOKEN_PATTERN.match(expression, position)
+        if not match or match.end() == position:
+            raise ScreenerError(f"Unexpected input at position {position}: {expression[position:position + 15]!r}")
+        position = match.end()
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == 'number':
+            multiplier = SUFFIXES.get(text[-1].lower(), 1.0)
+            tokens.append(('value', float(text[:-1] if multiplier != 1.0 else text) * multiplier))
+        elif kind == 'string':
+            tokens.append(('value', text[1:-1]))
+        elif kind == 'op':
+            tokens.append(('op', '=' if text == '==' else text))
+        elif kind == 'punct':
+            tokens.append((text, text))
+        elif text.lower() in KEYWORDS:
+            tokens.append((text.lower(), text.lower()))
+        else:
+            tokens.append(('column', text.lower()))
+    return tokens
+
+
+class _Parser:
+    """Recursive descent: or > and > not > comparison."""
+
+    def __init__(self, tokens: List[Tuple[str, Any]]):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.position][0] if self.position < len(self.tokens) else None
+
+    def take(self, kind: Optional[str] = None) -> Tuple[str, Any]:
+        if self.position >= len(self.tokens):
+            raise ScreenerError(f"Unexpected end of expression{f', expected {kind}' if kind else ''}")
+        token = self.tokens[self.position]
+        if kind and token[0] != kind:
+            raise ScreenerError(f"Expected {kind} but found {token[1]!r}")
+        self.position += 1
+        return token
+
+    def query(self) -> Query:
+        where = None
+        if self.peek() not in (None, 'order', 'limit'):
+            where = self.disjunction()
+        order_by = []
+        if self.peek() == 'order':
+            self.take('order')
+            self.take('by')
+            while True:
+                column = self.column()
+                descending = False
+                if self.peek() in ('asc', 'desc'):
+                    descending = self.take()[0] == 'desc'
+                order_by.append((column, descending))
+                if self.peek() != ',':
+                    break
+                self.take(',')
+        limit = None
+        if self.peek() == 'limit':
+            self.take('limit')
+            value = self.take('value')[1]
+            if not isinstance(value, float) or value < 1 or value != int(value):
+                raise ScreenerError("limit must be a positive integer")
+            limit = int(value)
+        if self.peek() is not None:
+            raise ScreenerError(f"Unexpected {self.tokens[self.position][1]!r}")
+        return Query(where=where, order_by=tuple(order_by), limit=limit)
+
+    def column(self) -> str:
+        name = self.take('column')[1]
+        if name not in COLUMNS:
+            raise ScreenerError(f"Unknown column: {name}. Columns: {', '.join(COLUMNS)}")
+        return name
+
+    def disjunction(self) -> tuple:
+        node = self.conjunction()
+        while self.peek() == 'or':
+            self.take()
+            node = ('or', node, self.conjunction())
+        return node
+
+    def conjunction(self) -> tuple:
+        node = self.negation()
+        while self.peek() == 'and':
+            self.take()
+            node = ('and', node, self.negation())
+        return node
+
+    def negation(self) -> tuple:
+        if self.peek() == 'not':
+            self.take()
+            return ('not', self.negation())
+        if self.peek() == '(':
+            self.take('(')
+            node = self.disjunction()
+            self.take(')')
+            return node
+        return self.comparison()
+
+    def operand(self) -> tuple:
+        kind, value = self.take()
+        if kind == 'value':
+            return ('value', value)
+        if kind == 'column':
+            self.position -= 1
+            return ('column', self.column())
+        raise ScreenerError(f"Expected a value or column but found {value!r}")
+
+    def comparison(self) -> tuple:
+        column = self.column()
+        kind = self.peek()
+        if kind == 'op':
+            return ('compare', column, self.take()[1], self.operand())
+        if kind == 'between':
+            self.take()
+            low = self.take('value')[1]
+            self.take('and')
+            high = self.take('value')[1]
+            if not isinstance(low, float) or not isinstance(high, float):
+                raise ScreenerError(f"{column} BETWEEN needs numeric bounds")
+            return ('between', column, low, high)
+        if kind == 'in' or (kind == 'not' and self.position + 1 < len(self.tokens)
+                            and self.tokens[self.position + 1][0] == 'in'):
+            negated = self.take()[0] == 'not'
+            if negated:
+                self.take('in')
+            self.take('(')
+            values = [self.take('value')[1]]
+            while self.peek() == ',':
+                self.take(',')
+                values.append(self.take('value')[1])
+            self.take(')')
+            node = ('in', column, tuple(values))
+            return ('not', node) if negated else node
+        if kind == 'is':
+            self.take()
+            negated = self.peek() == 'not'
+            if negated:
+                self.take()
+            self.take('null')
+            return ('not', ('null', column)) if negated else ('null', column)
+        raise ScreenerError(f"Expected a comparison after {column}")
+
+
+@lru_cache(maxsize=512)
+def parse_query(expression: str) -> Query:
+    """
+    Parse a screener expression. Cached, so repeated queries skip parsing.
+
+    Grammar:
+        [condition] [ORDER BY column [ASC|DESC], ...] [LIMIT n]
+        condition: comparisons joined with AND / OR / NOT and parentheses
+        comparison: column (< <= > >= = != ) value-or-column
+                  | column BETWEEN a AND b | column [NOT] IN (a, b, ...)
+                  | column IS [NOT] NULL
+        Numbers accept K/M/B/T and % suffixes (10B, 15%).
+
+    Raises:
+        ScreenerError: If the expression is invalid
+    """
+    return _Parser(_tokenize(expression)).query()
+
+
+def _category_codes(table: FundamentalsTable, column: str, values: Sequence[Any]) -> np.ndarray:
+    """Codes of labels matching any of the values, case-insensitively."""
+    wanted = {str(v).lower() for v in values}
+    return np.array([i for i, label in enumerate(table.labels[column]) if label.lower() in wanted], dtype=np.int32)
+
+
+def _compare(left: np.ndarray, op: str, right) -> np.ndarray:
+    with np.errstate(invalid='ignore'):
+        if op == '<':
+            return left < right
+        if op == '<=':
+            return left <= right
+        if op == '>':
+            return left > right
+        if op == '>=':
+            return left >= right
+        if op == '=':
+            return left == right
+        return (left != right) & np.isfinite(left) & np.isfinite(right)
+
+
+def _present(table: FundamentalsTable, column: str) -> np.ndarray:
+    """Rows where a column has a value."""
+    if column in table.numeric:
+        return np.isfinite(table.numeric[column])
+    return table.labels[column][table.codes[column]] != ''
+
+
+def _negate(node: tuple, table: FundamentalsTable) -> np.ndarray:
+    """
+    Rows where a condition is false. A comparison on a missing value is
+    neither true nor false, so its rows fail both the comparison and NOT.
+    """
+    kind = node[0]
+    if kind == 'and':
+        return _negate(node[1], table) | _negate(node[2], table)
+    if kind == 'or':
+        return _negate(node[1], table) & _negate(node[2], table)
+    if kind == 'not':
+        return evaluate(node[1], table)
+    mask = ~evaluate(node, table)
+    if kind == 'null':
+        return mask
+    mask &= _present(table, node[1])
+    if kind == 'compare' and node[3][0] == 'column':
+        mask &= _present(table, node[3][1])
+    return mask
+
+
+def evaluate(node: tuple, table: FundamentalsTable) -> np.ndarray:
+    """Boolean row mask for a parsed condition. Missing values fail every comparison, negated or not."""
+    kind = node[0]
+    if kind == 'and':
+        return evaluate(node[1], table) & evaluate(node[2], table)
+    if kind == 'or':
+        return evaluate(node[1], table) | evaluate(node[2], table)
+    if kind == 'not':
+        return _negate(node[1], table)
+
+    column = node[1]
+    if kind == 'null':
+        if column in table.numeric:
+            return ~np.isfinite(table.numeric[column])
+        return table.labels[column][table.codes[column]] == ''
+
+    if column in table.codes:
+        codes = table.codes[column]
+        if kind == 'in':
+            return np.isin(codes, _category_codes(table, column, node[2]))
+        if kind == 'compare' and node[3][0] == 'value' and node[2] in ('=', '!='):
+            match = np.isin(codes, _category_codes(table, column, [node[3][1]]))
+            return match if node[2] == '=' else ~match & _present(table, column)
+        raise ScreenerError(f"{column} supports only =, != and IN")
+
+    values = table.numeric[column]
+    if kind == 'between':
+        return _compare(values, '>=', node[2]) & _compare(values, '<=', node[3])
+    if kind == 'in':
+        return np.isin(values, [v for v in node[2] if isinstance(v, float)])
+
+    op, operand = node[2], node[3]
+    if operand[0] == 'column':
+        if operand[1] not in table.numeric:
+            raise ScreenerError(f"Cannot compare {column} with {operand[1]}")
+        return _compare(values, op, table.numeric[operand[1]])
+    if not isinstance(operand[1], float):
+        raise ScreenerError(f"{column} must be compared with a number")
+    index = table.indexes.get(column)
+    if index is not None and op != '!=':
+        mask = np.zeros(len(table), dtype=bool)
+        mask[index.range(op, operand[1])] = True
+        return mask
+    return _compare(values, op, operand[1])
+
+
+def order_rows(table: FundamentalsTable, rows: np.ndarray, order_by: Sequence[Tuple[str, bool]]) -> np.ndarray:
+    """Sort matching rows; missing values sort last in either direction."""
+    if not order_by:
+        return rows
+    if len(order_by) == 1 and order_by[0][0] in table.indexes:
+        # The index is already sorted: keep the matching rows in index order
+        column, descending = order_by[0]
+        index = table.indexes[column]
+        selected = np.zeros(len(table), dtype=bool)
+        selected[rows] = True
+        ordered = index.order[selected[index.order]]
+        if descending:
+            ordered = ordered[::-1]
+        missing = rows[~np.isfinite(table.numeric[column][rows])]
+        return np.concatenate([ordered, missing])
+
+    keys = []
+    for column, descending in reversed(order_by):
+        if column in table.numeric:
+            values = table.numeric[column][rows]
+            keys.append(np.where(np.isfinite(values), -values if descending else values, np.inf))
+        else:
+            labels = table.labels[column][table.codes[column][rows]]
+            ranks = np.unique(labels, return_inverse=True)[1].reshape(-1)
+            keys.append(-ranks if descending else ranks)
+    return rows[np.lexsort(keys)]
+
+
+@dataclass
+class ScreenResult:
+    """Rows matching a screener query."""
+    query: str
+    total_matches: int
+    universe_size: int
+    rows: List[Dict[str, Any]]
+    updated_at: Optional[str]
+    elapsed_ms: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'query': self.query,
+            'total_matches': self.total_matches,
+            'universe_size': self.universe_size,
+            'rows': self.rows,
+            'updated_at': self.updated_at,
+            'elapsed_ms': self.elapsed_ms
+        }
+
+
+class Screener:
+    """
+    Serves queries from the current table snapshot. Refreshes build a new
+    table off to the side and swap it in, so readers never block.
+    """
+
+    def __init__(self,
+                 data_service: Optional[FinancialDataService] = None,
+                 path: Optional[str] = None,
+                 indexed_columns: Optional[Sequence[str]] = None,
+                 table: Optional[FundamentalsTable] = None):
+        self.data_service = data_service or get_financial_data_service()
+        self.path = path or Config.SCREENER_TABLE_PATH
+        if indexed_columns is None:
+            indexed_columns = [c.strip() for c in Config.SCREENER_INDEXED_COLUMNS.split(',') if c.strip()]
+        self.indexed_columns = list(indexed_columns)
+        self._refresh_lock = threading.Lock()
+        self.table = table or FundamentalsTable.empty()
+        if table is None and os.path.exists(self.path):
+            try:
+                self.table = FundamentalsTable.load(self.path, self.indexed_columns)
+                logger.info(f"Loaded fundamentals for {len(self.table)} tickers from {self.path}")
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Could not load fundamentals table {self.path}: {e}")
+
+    @property
+    def refreshing(self) -> bool:
+        return self._refresh_lock.locked()
+
+    def universe(self) -> List[str]:
+        """Tickers from SCREENER_UNIVERSE_PATH (one per line), else the current table."""
+        path = Config.SCREENER_UNIVERSE_PATH
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as handle:
+                tickers = [line.split('#')[0].strip().upper() for line in handle]
+            return list(dict.fromkeys(t for t in tickers if t))
+        return [str(t) for t in self.table.tickers]
+
+    def _fetch_row(self, ticker: str) -> Optional[Dict[str, Any]]:
+        try:
+            info, fundamentals = self.data_service.get_ticker_overview(ticker)
+        except FinancialDataError as e:
+            logger.warning(f"Screener refresh skipped {ticker}: {e}")
+            return None
+        row = fundamentals.to_dict()
+        row.update(current_price=info.current_price, volume=info.volume,
+                   sector=info.sector, industry=info.industry)
+        return row
+
+    def refresh(self, tickers: Optional[Sequence[str]] = None, workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Fetch fundamentals for tickers (the configured universe by default)
+        in parallel, merge them over the current table and swap it in.
+        Tickers that fail keep their previous values.
+
+        Raises:
+            ScreenerError: If a refresh is already running or there is no universe
+        """
+        tickers = [t.strip().upper() for t in (tickers or self.universe()) if t.strip()]
+        if not tickers:
+            raise ScreenerError("No screener universe configured; set SCREENER_UNIVERSE_PATH or pass tickers")
+        if not self._refresh_lock.acquire(blocking=False):
+            raise ScreenerError("A screener refresh is already running")
+        try:
+            started = time.perf_counter()
+            workers = workers or Config.SCREENER_REFRESH_WORKERS
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(tickers)))) as pool:
+                fetched = dict(zip(tickers, pool.map(self._fetch_row, tickers)))
+
+            rows = self.table.to_rows()
+            updated = {t: row for t, row in fetched.items() if row is not None}
+            rows.update(updated)
+            table = FundamentalsTable.from_rows(rows, indexed=self.indexed_columns)
+            self.table = table
+            try:
+                table.save(self.path)
+            except OSError as e:
+                logger.warning(f"Could not persist fundamentals table: {e}")
+
+            elapsed = time.perf_counter() - started
+            logger.info(f"Screener refreshed {len(updated)}/{len(tickers)} tickers in {elapsed:.1f}s")
+            return {
+                'requested': len(tickers),
+                'updated': len(updated),
+                'failed': [t for t, row in fetched.items() if row is None],
+                'universe_size': len(table),
+                'elapsed_seconds': round(elapsed, 2)
+            }
+        finally:
+            self._refresh_lock.release()
+
+    def query(self,
+              expression: str,
+              limit: Optional[int] = None,
+              columns: Optional[Sequence[str]] = None) -> ScreenResult:
+        """
+        Run a screener expression against the current snapshot.
+
+        Args:
+            expression: Filter / ORDER BY / LIMIT expression (see parse_query)
+            limit: Max rows returned; overrides the expression's LIMIT
+            columns: Columns to include per row (all if omitted)
+
+        Raises:
+            ScreenerError: If the expression or columns are invalid
+        """
+        started = time.perf_counter()
+        parsed = parse_query(expression)
+        columns = list(columns) if columns else list(COLUMNS)
+        unknown = [c for c in columns if c not in COLUMNS]
+        if unknown:
+            raise ScreenerError(f"Unknown columns: {', '.join(unknown)}")
+        limit = min(limit or parsed.limit or Config.SCREENER_DEFAULT_LIMIT, MAX_LIMIT)
+
+        table = self.table
+        if parsed.where is not None:
+            matches = np.nonzero(evaluate(parsed.where, table))[0]
+        else:
+            matches = np.arange(len(table))
+        ordered = order_rows(table, matches, parsed.order_by)[:limit]
+
+        return ScreenResult(
+            query=expression,
+            total_matches=len(matches),
+            universe_size=len(table),
+            rows=[table.row(i, columns) for i in ordered],
+            updated_at=time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(table.updated_at)) if table.updated_at else None,
+            elapsed_ms=round((time.perf_counter() - started) * 1000, 3)
+        )
+
+
+def synthetic_table(size: int = 10_000, seed: int = 0, indexed: Sequence[str] = ()) -> FundamentalsTable:
+    """Random fundamentals with realistic ranges and ~10% missing values."""
+    rng = np.random.default_rng(seed)
+    sectors = ['Technology', 'Healthcare', 'Financial Services', 'Energy', 'Industrials',
+               'Consumer Cyclical', 'Utilities', 'Real Estate', 'Basic Materials', 'Communication Services']
+    high = rng.lognormal(4, 1, size)
+    columns = {
+        'pe_ratio': rng.lognormal(3, 0.6, size),
+        'market_cap': rng.lognormal(22, 2, size),
+        'revenue_growth': rng.normal(0.08, 0.2, size),
+        'profit_margin': rng.normal(0.1, 0.15, size),
+        'debt_to_equity': rng.lognormal(4, 1, size),
+        'return_on_equity': rng.normal(0.12, 0.15, size),
+        'fifty_two_week_high': high,
+        'fifty_two_week_low': high * rng.uniform(0.4, 0.95, size),
+        'current_price': high * rng.uniform(0.5, 1.0, size),
+        'volume': rng.lognormal(13, 1.5, size),
+    }
+    rows = {}
+    for i in range(size):
+        row = {name: (None if rng.random() < 0.1 else float(values[i])) for name, values in columns.items()}
+        row['sector'] = sectors[rng.integers(len(sectors))]
+        row['industry'] = f"Industry {rng.integers(60)}"
+        rows[f"T{i:05d}"] = row
+    return FundamentalsTable.from_rows(rows, indexed=indexed)
+
+
+BENCHMARK_QUERIES = (
+    "pe_ratio < 20 and revenue_growth > 0.1 order by return_on_equity desc",
+    "market_cap > 10B and sector in ('Technology', 'Healthcare') order by market_cap desc limit 25",
+    "(profit_margin > 15% or return_on_equity > 20%) and debt_to_equity < 100 order by pe_ratio",
+    "current_price < fifty_two_week_low and volume > 1M order by volume desc",
+    "pe_ratio between 5 and 15 and not sector = 'Utilities' order by sector, pe_ratio",
+)
+
+
+def benchmark_queries(size: int = 10_000, repeats: int = 200) -> List[Dict[str, Any]]:
+    """Median and p95 query latency over a synthetic table, with and without sorted indexes."""
+    indexed = [c.strip() for c in Config.SCREENER_INDEXED_COLUMNS.split(',') if c.strip()]
+    results = []
+    for label, columns in (('indexed', indexed), ('scan', [])):
+        screener = Screener(table=synthetic_table(size, indexed=columns))
+        for expression in BENCHMARK_QUERIES:
+            screener.query(expression)
+            timings = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                result = screener.query(expression)
+                timings.append((time.perf_counter() - started) * 1000)
+            results.append({
+                'mode': label, 'query': expression, 'matches': result.total_matches,
+                'median_ms': float(np.median(timings)), 'p95_ms': float(np.percentile(timings, 95))
+            })
+    return results
+
+
+# Global screener instance
+screener = None
+
+def get_screener() -> Screener:
+    """Get or create the global screener instance"""
+    global screener
+    if screener is None:
+        screener = Screener()
+    return screener
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(f"{'mode':>8} {'matches':>8} {'median ms':>10} {'p95 ms':>8}  query")
+    for row in benchmark_queries():
+        print(f"{row['mode']:>8} {row['matches']:>8} {row['median_ms']:>10.3f} {row['p95_ms']:>8.3f}  {row['query']}")
@@ -0,0 +1,178 @@
+"""
+Persistent sentiment result cache.
+Scores are keyed by a hash of the normalized text plus the model id, so an
+article that has already been scored costs a single SQLite lookup.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+import unicodedata
+from typing import Dict, List, Optional
+
+from config import Config
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text before hashing.
+
+    Unicode is NFKC-folded and whitespace collapsed. Case is preserved
+    because VADER treats capitalized words as emphasis.
+    """
+    if not text:
+        return ""
+    return " ".join(unicodedata.normalize('NFKC', text).split())
+
+
+def content_key(text: str, model_id: str) -> str:
+    """Cache key for a text scored by a given model id/version."""
+    digest = hashlib.sha256()
+    digest.update(model_id.encode('utf-8'))
+    digest.update(b'\x00')
+    digest.update(normalize_text(text).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class SentimentCache:
+    """
+    SQLite-backed sentiment cache with LRU eviction.
+
+    Each row stores the JSON payload of a HeadlineSentiment or ContentSentiment
+    and the time it was last read. When the table grows past ``max_entries``
+    the least recently used rows are evicted.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None):
+        self.path = path or Config.SENTIMENT_CACHE_PATH
+        self.max_entries = max_entries or Config.SENTIMENT_CACHE_MAX_ENTRIES
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sentiment_cache (
+                key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_sentiment_cache_access ON sentiment_cache(last_access)"
+        )
+
+    def get_many(self, kind: str, keys: List[str]) -> Dict[str, dict]:
+        """
+        Look up several keys at once.
+
+        Args:
+            kind: Result type ("headline" or "content")
+            keys: Cache keys from content_key()
+
+        Returns:
+            Mapping of found keys to their stored payloads
+        """
+        if not keys:
+            return {}
+
+        found: Dict[str, dict] = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            # SQLite limits bound parameters, so query in chunks
+            for start in range(0, len(unique_keys), 500):
+                chunk = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, payload FROM sentiment_cache WHERE kind = ? AND key IN ({placeholders})",
+                    [kind, *chunk]
+                ).fetchall()
+                for key, payload in rows:
+                    found[key] = json.loads(payload)
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE sentiment_cache SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+
+            self.hits += sum(1 for key in keys if key in found)
+            self.misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def put_many(self, kind: str, items: Dict[str, dict]) -> None:
+        """Store payloads for several keys and evict if over capacity."""
+        if not items:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO sentiment_cache (key, kind, payload, last_access) VALUES (?, ?, ?, ?)",
+                    [(key, kind, json.dumps(payload), now) for key, payload in items.items()]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+            self._writes_since_evict += len(items)
+            # Counting rows on every write is wasteful; check every ~1% of capacity
+            if self._writes_since_evict >= max(1, self.max_entries // 100):
+                self._writes_since_evict = 0
+                self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used rows beyond max_entries. Caller holds the lock."""
+        count = self._conn.execute("SELECT COUNT(*) FROM sentiment_cache").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM sentiment_cache WHERE key IN "
+                "(SELECT key FROM sentiment_cache ORDER BY last_access ASC LIMIT ?)",
+                (excess,)
+            )
+            logger.info(f"Sentiment cache evicted {excess} least recently used entries")
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM sentiment_cache").fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'entries': size}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM sentiment_cache")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# Global sentiment cache instance
+sentiment_cache = None
+
+def get_sentiment_cache() -> SentimentCache:
+    """Get or create the global sentiment cache instance"""
+    global sentiment_cache
+    if sentiment_cache is None:
+        sentiment_cache = SentimentCache()
+    return sentiment_cache
@@ -0,0 +1,698 @@
+"""
+Sentiment analysis engine for news articles.
+VADER scores headlines; a FinBERT-style transformer scores article bodies
+through a batched CPU inference service.
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+    VADER_AVAILABLE = True
+except ImportError:
+    VADER_AVAILABLE = False
+
+from config import Config
+from lazy_imports import lazy_module, module_available
+
+# torch / transformers / onnxruntime are imported when the model is loaded,
+# not when the app is
+TRANSFORMERS_AVAILABLE = module_available('torch') and module_available('transformers')
+ONNX_AVAILABLE = module_available('onnxruntime')
+torch = lazy_module('torch')
+transformers = lazy_module('transformers')
+onnxruntime = lazy_module('onnxruntime')
+from models.sentiment import (
+    Article, HeadlineSentiment, ContentSentiment, AnalyzedArticle, AnalysisReport
+)
+from sentiment_cache import SentimentCache, content_key, get_sentiment_cache
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+LABELS = ("Positive", "Negative", "Neutral")
+
+# Model ids used in sentiment cache keys; bump when scoring logic changes
+VADER_HEADLINE_MODEL_ID = "vader-3.3.2:headline"
+VADER_CONTENT_MODEL_ID = "vader-3.3.2:content"
+
+
+class SentimentEngineError(Exception):
+    """Custom exception for sentiment engine errors"""
+    pass
+
+
+class ModelUnavailableError(SentimentEngineError):
+    """Raised when a sentiment model or its runtime is not installed"""
+    pass
+
+
+class BatchedInferenceService:
+    """
+    Batched transformer inference tuned for CPU.
+
+    Articles are tokenized once, split into overlapping windows of at most
+    ``max_length`` tokens, and the windows are grouped into batches of similar
+    length so padding stays small. Window probabilities are averaged back per
+    article, weighted by window length.
+    """
+
+    def __init__(self,
+                 model_name: Optional[str] = None,
+                 max_length: Optional[int] = None,
+                 stride: Optional[int] = None,
+                 max_windows: Optional[int] = None,
+                 batch_size: Optional[int] = None,
+                 max_batch_tokens: Optional[int] = None,
+                 num_threads: Optional[int] = None,
+                 quantize: Optional[str] = None,
+                 backend: Optional[str] = None,
+                 onnx_path: Optional[str] = None):
+        self.model_name = model_name or Config.SENTIMENT_MODEL
+        self.max_length = max_length or Config.SENTIMENT_MAX_LENGTH
+        self.stride = Config.SENTIMENT_WINDOW_STRIDE if stride is None else stride
+        self.max_windows = max_windows or Config.SENTIMENT_MAX_WINDOWS
+        self.batch_size = batch_size or Config.SENTIMENT_BATCH_SIZE
+        self.max_batch_tokens = max_batch_tokens or Config.SENTIMENT_MAX_BATCH_TOKENS
+        self.num_threads = Config.SENTIMENT_NUM_THREADS if num_threads is None else num_threads
+        self.quantize = (quantize or Config.SENTIMENT_QUANTIZE).lower()
+        self.backend = (backend or Config.SENTIMENT_BACKEND).lower()
+        self.onnx_path = onnx_path or Config.SENTIMENT_ONNX_PATH
+
+        self.tokenizer = None
+        self.model = None
+        self.session = None
+        self.id2label: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def model_id(self) -> str:
+        """Identifier of the model variant that produces the scores."""
+        return f"{self.model_name}:{self.backend}:{self.quantize}"
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.tokenizer is not None and (self.model is not None or self.session is not None)
+
+    def load(self) -> None:
+        """
+        Load tokenizer and model on first use.
+
+        Raises:
+            ModelUnavailableError: If torch/transformers (or onnxruntime for the ONNX backend) are missing
+        """
+        if self.is_loaded:
+            return
+
+        with self._lock:
+            if self.is_loaded:
+                return
+
+            if not TRANSFORMERS_AVAILABLE:
+                raise ModelUnavailableError(
+                    "Transformer runtime not available. "
+                    "Please install: pip install torch transformers"
+                )
+            if self.backend == 'onnx' and not ONNX_AVAILABLE:
+                raise ModelUnavailableError(
+                    "ONNX backend requested but onnxruntime is not installed. "
+                    "Please install: pip install onnxruntime"
+                )
+
+            start_time = time.time()
+            threads = self._resolve_threads()
+            self.tokenizer = transformers.AutoTokenizer.from_pretrained(self.model_name, use_fast=True)
+            config = transformers.AutoConfig.from_pretrained(self.model_name)
+            self.id2label = {int(k): str(v).capitalize() for k, v in config.id2label.items()}
+
+            if self.backend == 'onnx':
+                if not os.path.exists(self.onnx_path):
+                    self.export_onnx(self.onnx_path)
+                options = onnxruntime.SessionOptions()
+                options.intra_op_num_threads = threads
+                options.inter_op_num_threads = 1
+                options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+                self.session = onnxruntime.InferenceSession(
+                    self.onnx_path, options, providers=['CPUExecutionProvider']
+                )
+            else:
+                self._configure_torch_threads(threads)
+                model = transformers.AutoModelForSequenceClassification.from_pretrained(self.model_name)
+                model.eval()
+                if self.quantize == 'int8':
+                    model = torch.quantization.quantize_dynamic(
+                        model, {torch.nn.Linear}, dtype=torch.qint8
+                    )
+                self.model = model
+
+            logger.info(
+                f"Sentiment model {self.model_id} loaded in {time.time() - start_time:.2f}s "
+                f"({threads} intra-op threads)"
+            )
+
+    def _resolve_threads(self) -> int:
+        """Number of intra-op threads; defaults to the physical core estimate."""
+        if self.num_threads and self.num_threads > 0:
+            return self.num_threads
+        # Hyper-threads rarely help GEMM-bound inference, so assume 2 per core
+        return max(1, (os.cpu_count() or 2) // 2)
+
+    @staticmethod
+    def _configure_torch_threads(threads: int) -> None:
+        torch.set_num_threads(threads)
+        try:
+            # Batches are already large; one inter-op thread avoids oversubscription
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # Can only be set once per process, before any parallel work
+            pass
+
+    def export_onnx(self, path: str) -> str:
+        """
+        Export the transformer to ONNX with dynamic batch and sequence axes.
+        When int8 quantization is configured the exported graph is quantized too.
+
+        Args:
+            path: Destination .onnx file
+
+        Returns:
+            Path of the exported model
+        """
+        if not TRANSFORMERS_AVAILABLE:
+            raise ModelUnavailableError("ONNX export requires torch and transformers")
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        model = transformers.AutoModelForSequenceClassification.from_pretrained(self.model_name)
+        model.eval()
+        tokenizer = self.tokenizer or transformers.AutoTokenizer.from_pretrained(self.model_name, use_fast=True)
+        dummy = tokenizer(["export"], return_tensors='pt')
+
+        float_path = path if self.quantize != 'int8' else f"{path}.fp32"
+        torch.onnx.export(
+            model,
+            (dummy['input_ids'], dummy['attention_mask']),
+            float_path,
+            input_names=['input_ids', 'attention_mask'],
+            output_names=['logits'],
+            dynamic_axes={
+                'input_ids': {0: 'batch', 1: 'sequence'},
+                'attention_mask': {0: 'batch', 1: 'sequence'},
+                'logits': {0: 'batch'}
+            },
+            opset_version=14
+        )
+
+        if self.quantize == 'int8':
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            quantize_dynamic(float_path, path, weight_type=QuantType.QInt8)
+            os.remove(float_path)
+
+        logger.info(f"Exported sentiment model to ONNX: {path}")
+        return path
+
+    def _split_windows(self, token_ids: List[int]) -> List[List[int]]:
+        """
+        Split one article's tokens into overlapping windows that fit the model.
+        Long articles keep their first ``max_windows`` windows, where the lead
+        paragraphs carry most of the signal.
+        """
+        body = self.max_length - 2  # room for [CLS] and [SEP]
+        if len(token_ids) <= body:
+            return [token_ids]
+
+        step = max(1, body - self.stride)
+        windows = []
+        for start in range(0, len(token_ids), step):
+            windows.append(token_ids[start:start + body])
+            if start + body >= len(token_ids) or len(windows) >= self.max_windows:
+                break
+        return windows
+
+    def _plan_batches(self, lengths: List[int]) -> List[List[int]]:
+        """
+        Group windows into batches of similar token length.
+
+        Windows are sorted longest first and a batch is closed once adding
+        another window would exceed ``batch_size`` or the padded token budget
+        ``max_batch_tokens``.
+
+        Returns:
+            Lists of window indices, one list per batch
+        """
+        order = np.argsort(-np.asarray(lengths, dtype=np.int64), kind='stable')
+        batches: List[List[int]] = []
+        current: List[int] = []
+        padded_length = 0
+
+        for index in order.tolist():
+            if not current:
+                padded_length = lengths[index]
+            if current and (len(current) >= self.batch_size or
+                            (len(current) + 1) * padded_length > self.max_batch_tokens):
+                batches.append(current)
+                current = []
+                padded_length = lengths[index]
+            current.append(index)
+
+        if current:
+            batches.append(current)
+        return batches
+
+    def _run_batch(self, sequences: List[List[int]]) -> np.ndarray:
+        """Run one padded batch and return softmax probabilities."""
+        width = max(len(seq) for seq in sequences)
+        pad_id = self.tokenizer.pad_token_id or 0
+        input_ids = np.full((len(sequences), width), pad_id, dtype=np.int64)
+        attention_mask = np.zeros((len(sequences), width), dtype=np.int64)
+        for row, seq in enumerate(sequences):
+            input_ids[row, :len(seq)] = seq
+            attention_mask[row, :len(seq)] = 1
+
+        if self.session is not None:
+            logits = self.session.run(
+                ['logits'], {'input_ids': input_ids, 'attention_mask': attention_mask}
+            )[0]
+        else:
+            with torch.inference_mode():
+                logits = self.model(
+                    input_ids=torch.from_numpy(input_ids),
+                    attention_mask=torch.from_numpy(attention_mask)
+                ).logits.float().numpy()
+
+        logits = logits - logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def predict(self, texts: List[str]) -> List[ContentSentiment]:
+        """
+        Score a list of article bodies.
+
+        Args:
+            texts: Article texts of any length
+
+        Returns:
+            One ContentSentiment per input text, in input order
+        """
+        if not texts:
+            return []
+
+        self.load()
+
+        encoded = self.tokenizer(
+            list(texts), add_special_tokens=False, truncation=False, verbose=False
+        )['input_ids']
+
+        cls_id = self.tokenizer.cls_token_id
+        sep_id = self.tokenizer.sep_token_id
+        sequences: List[List[int]] = []
+        owners: List[int] = []
+        for article_index, token_ids in enumerate(encoded):
+            if not token_ids:
+                continue
+            for window in self._split_windows(token_ids):
+                sequences.append([cls_id] + window + [sep_id])
+                owners.append(article_index)
+
+        num_labels = len(self.id2label)
+        probs = np.zeros((len(sequences), num_labels), dtype=np.float64)
+        for batch in self._plan_batches([len(seq) for seq in sequences]):
+            probs[batch] = self._run_batch([sequences[i] for i in batch])
+
+        # Length-weighted average of window probabilities per article
+        weights = np.asarray([len(seq) for seq in sequences], dtype=np.float64)
+        owners_arr = np.asarray(owners, dtype=np.int64)
+        totals = np.zeros((len(texts), num_labels), dtype=np.float64)
+        weight_sums = np.zeros(len(texts), dtype=np.float64)
+        if len(sequences):
+            np.add.at(totals, owners_arr, probs * weights[:, None])
+            np.add.at(weight_sums, owners_arr, weights)
+
+        results = []
+        for article_index in range(len(texts)):
+            if weight_sums[article_index] == 0:
+                results.append(neutral_content_sentiment())
+                continue
+            article_probs = totals[article_index] / weight_sums[article_index]
+            best = int(article_probs.argmax())
+            results.append(ContentSentiment(
+                confidence=float(article_probs[best]),
+                label=self.id2label[best],
+                probabilities={
+                    self.id2label[i]: round(float(p), 4) for i, p in enumerate(article_probs)
+                },
+                model=self.model_id
+            ))
+        return results
+
+
+@dataclass
+class CascadeThresholds:
+    """
+    Routing thresholds for cascade mode.
+
+    An article goes to the transformer when the VADER content score is inside
+    ``neutral_band`` of zero, or when the headline is at least
+    ``headline_threshold`` strong and points the other way from the content.
+    """
+    neutral_band: float
+    headline_threshold: float
+
+    @classmethod
+    def from_config(cls) -> 'CascadeThresholds':
+        return cls(
+            neutral_band=Config.SENTIMENT_CASCADE_NEUTRAL_BAND,
+            headline_threshold=Config.SENTIMENT_CASCADE_HEADLINE_THRESHOLD
+        )
+
+    def needs_transformer(self, headline_score: float, content_score: float) -> bool:
+        """Whether the VADER scores are too ambiguous to trust."""
+        if abs(content_score) < self.neutral_band:
+            return True
+        return abs(headline_score) >= self.headline_threshold and headline_score * content_score < 0
+
+
+def neutral_content_sentiment() -> ContentSentiment:
+    """Default sentiment used when a text cannot be scored."""
+    return ContentSentiment(
+        confidence=1.0,
+        label="Neutral",
+        probabilities={"Positive": 0.0, "Negative": 0.0, "Neutral": 1.0}
+    )
+
+
+class SentimentEngine:
+    """
+    Scores headlines with VADER and article content with the transformer
+    service, falling back to VADER when the transformer runtime is missing.
+    """
+
+    NEUTRAL_THRESHOLD = 0.05  # VADER compound band treated as neutral
+    SIGNAL_THRESHOLD = 0.15   # Net score needed for a BULLISH/BEARISH signal
+
+    def __init__(self,
+                 inference_service: Optional[BatchedInferenceService] = None,
+                 cache: Optional[SentimentCache] = None):
+        self.vader = SentimentIntensityAnalyzer() if VADER_AVAILABLE else None
+        self.inference_service = inference_service or BatchedInferenceService()
+        if cache is None and Config.SENTIMENT_CACHE_ENABLED:
+            try:
+                cache = get_sentiment_cache()
+            except sqlite3.Error as e:
+                logger.warning(f"Sentiment cache unavailable, scoring without cache: {e}")
+        self.cache = cache
+
+    def _vader_label(self, score: float) -> str:
+        if score >= self.NEUTRAL_THRESHOLD:
+            return "Positive"
+        if score <= -self.NEUTRAL_THRESHOLD:
+            return "Negative"
+        return "Neutral"
+
+    def vader_score(self, text: str) -> float:
+        """VADER compound score for a text, 0.0 when VADER is unavailable."""
+        if not self.vader or not text:
+            return 0.0
+        return float(self.vader.polarity_scores(text)['compound'])
+
+    def _cached(self,
+                kind: str,
+                model_id: str,
+                texts: List[str],
+                compute: Callable[[List[str]], list],
+                result_type) -> list:
+        """
+        Serve scores from the sentiment cache and compute only the misses.
+        Identical texts within one call are scored once.
+        """
+        if not self.cache or not texts:
+            return compute(texts)
+
+        keys = [content_key(text, model_id) for text in texts]
+        try:
+            found = self.cache.get_many(kind, keys)
+        except sqlite3.Error as e:
+            logger.warning(f"Sentiment cache read failed: {e}")
+            return compute(texts)
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        computed = {}
+        if missing:
+            results = compute(list(missing.values()))
+            computed = dict(zip(missing.keys(), results))
+            try:
+                self.cache.put_many(kind, {key: result.to_dict() for key, result in computed.items()})
+            except sqlite3.Error as e:
+                logger.warning(f"Sentiment cache write failed: {e}")
+
+        return [
+            computed[key] if key in computed else result_type(**found[key])
+            for key in keys
+        ]
+
+    def analyze_headline(self, text: str) -> HeadlineSentiment:
+        """Score a headline with VADER."""
+        return self.analyze_headlines([text])[0]
+
+    def analyze_headlines(self, texts: List[str]) -> List[HeadlineSentiment]:
+        """Score several headlines with VADER, using cached scores when available."""
+        def compute(batch: List[str]) -> List[HeadlineSentiment]:
+            return [
+                HeadlineSentiment(score=score, label=self._vader_label(score))
+                for score in (self.vader_score(text) for text in batch)
+            ]
+        return self._cached('headline', VADER_HEADLINE_MODEL_ID, texts, compute, HeadlineSentiment)
+
+    def analyze_content(self, text: str) -> ContentSentiment:
+        """Score a single article body."""
+        return self.analyze_contents([text])[0]
+
+    def analyze_contents(self, texts: List[str]) -> List[ContentSentiment]:
+        """
+        Score article bodies in one batched inference pass.
+
+        Falls back to VADER-derived sentiment when the transformer cannot run.
+        """
+        try:
+            return self._cached(
+                'content', self.inference_service.model_id, texts,
+                self.inference_service.predict, ContentSentiment
+            )
+        except ModelUnavailableError as e:
+            logger.warning(f"Transformer sentiment unavailable, using VADER fallback: {e}")
+        except Exception as e:
+            logger.error(f"Transformer sentiment failed, using VADER fallback: {e}")
+        return self._cached(
+            'content', VADER_CONTENT_MODEL_ID, texts,
+            lambda batch: [self._vader_content_sentiment(text) for text in batch],
+            ContentSentiment
+        )
+
+    def _vader_content_sentiment(self, text: str, scores: Optional[Dict[str, float]] = None) -> ContentSentiment:
+        """Map VADER polarity scores onto the ContentSentiment shape."""
+        if not self.vader or not text:
+            return neutral_content_sentiment()
+        scores = scores or self.vader.polarity_scores(text)
+        probabilities = {
+            "Positive": scores['pos'],
+            "Negative": scores['neg'],
+            "Neutral": scores['neu']
+        }
+        label = self._vader_label(scores['compound'])
+        return ContentSentiment(
+            confidence=float(probabilities[label]),
+            label=label,
+            probabilities=probabilities,
+            model=VADER_CONTENT_MODEL_ID
+        )
+
+    def analyze_contents_cascade(self,
+                                 texts: List[str],
+                                 headline_scores: List[float],
+                                 thresholds: Optional[CascadeThresholds] = None) -> List[ContentSentiment]:
+        """
+        Two-tier content scoring: VADER scores every text and only the
+        ambiguous ones are sent to the transformer in a single batch.
+
+        Args:
+            texts: Article bodies
+            headline_scores: VADER compound scores of the matching headlines
+            thresholds: Routing thresholds, defaults to Config values
+
+        Returns:
+            One ContentSentiment per text; ``model`` records which tier scored it
+        """
+        if not self.vader:
+            return self.analyze_contents(texts)
+
+        thresholds = thresholds or CascadeThresholds.from_config()
+        results: List[Optional[ContentSentiment]] = [None] * len(texts)
+        escalate: List[int] = []
+        for i, (text, headline_score) in enumerate(zip(texts, headline_scores)):
+            scores = self.vader.polarity_scores(text) if text else {'compound': 0.0}
+            if thresholds.needs_transformer(headline_score, scores['compound']):
+                escalate.append(i)
+            else:
+                results[i] = self._vader_content_sentiment(text, scores)
+
+        if escalate:
+            for i, sentiment in zip(escalate, self.analyze_contents([texts[i] for i in escalate])):
+                results[i] = sentiment
+
+        logger.info(f"Sentiment cascade: {len(escalate)}/{len(texts)} articles sent to transformer")
+        return results
+
+    def analyze_articles(self,
+                         articles: List[Article],
+                         mode: Optional[str] = None,
+                         thresholds: Optional[CascadeThresholds] = None) -> List[AnalyzedArticle]:
+        """
+        Score headlines and bodies for a list of articles.
+
+        Args:
+            articles: Articles to score
+            mode: "full" (transformer for every body), "cascade" or "vader";
+                defaults to Config.SENTIMENT_MODE
+            thresholds: Cascade routing thresholds
+        """
+        mode = (mode or Config.SENTIMENT_MODE).lower()
+        headlines = self.analyze_headlines([article.title for article in articles])
+        texts = [article.content or article.title for article in articles]
+
+        if mode == 'cascade':
+            contents = self.analyze_contents_cascade(
+                texts, [headline.score for headline in headlines], thresholds
+            )
+        elif mode == 'vader':
+            contents = [self._vader_content_sentiment(text) for text in texts]
+        else:
+            contents = self.analyze_contents(texts)
+
+        return [
+            AnalyzedArticle(article=article, headline_sentiment=headline, content_sentiment=content)
+            for article, headline, content in zip(articles, headlines, contents)
+        ]
+
+    def calculate_market_signal(self, analyzed: List[AnalyzedArticle]) -> Tuple[str, float]:
+        """
+        Confidence-weighted market signal.
+
+        Returns:
+            Tuple of (signal, net score in [-1, 1])
+        """
+        if not analyzed:
+            return "NEUTRAL", 0.0
+
+        direction = {"Positive": 1.0, "Negative": -1.0}
+        weighted = sum(
+            direction.get(item.content_sentiment.label, 0.0) * item.content_sentiment.confidence
+            for item in analyzed
+        )
+        total_confidence = sum(item.content_sentiment.confidence for item in analyzed) or 1.0
+        net_score = weighted / total_confidence
+
+        if net_score >= self.SIGNAL_THRESHOLD:
+            return "BULLISH", net_score
+        if net_score <= -self.SIGNAL_THRESHOLD:
+            return "BEARISH", net_score
+        return "NEUTRAL", net_score
+
+    def generate_report(self,
+                        analyzed: List[AnalyzedArticle],
+                        processing_time: float = 0.0,
+                        ticker: Optional[str] = None) -> AnalysisReport:
+        """Build an AnalysisReport from analyzed articles."""
+        distribution = {label: 0 for label in LABELS}
+        for item in analyzed:
+            distribution[item.content_sentiment.label] = distribution.get(item.content_sentiment.label, 0) + 1
+
+        signal, net_score = self.calculate_market_signal(analyzed)
+        return AnalysisReport(
+            timestamp=datetime.now(),
+            total_articles=len(analyzed),
+            sentiment_distribution=distribution,
+            net_sentiment_score=round(net_score, 4),
+            market_signal=signal,
+            articles=analyzed,
+            processing_time=processing_time,
+            ticker=ticker
+        )
+
+
+# Global sentiment engine instance
+sentiment_engine = None
+
+def get_sentiment_engine() -> SentimentEngine:
+    """Get or create the global sentiment engine instance"""
+    global sentiment_engine
+    if sentiment_engine is None:
+        sentiment_engine = SentimentEngine()
+    return sentiment_engine
+
+
+def benchmark_throughput(batch_sizes=(1, 4, 8, 16, 32),
+                         num_articles: int = 64,
+                         words_per_article: int = 350,
+                         **service_kwargs) -> Dict[int, float]:
+    """
+    Measure CPU inference throughput in articles/sec at several batch sizes.
+
+    Args:
+        batch_sizes: Batch sizes to measure
+        num_articles: Synthetic articles scored per measurement
+        words_per_article: Approximate article length
+        service_kwargs: Extra BatchedInferenceService options (quantize, backend, ...)
+
+    Returns:
+        Mapping of batch size to articles/sec
+    """
+    vocabulary = ("shares rallied after earnings beat expectations while guidance "
+                  "remained cautious amid slowing demand and rising costs").split()
+    rng = np.random.default_rng(0)
+    texts = [
+        " ".join(rng.choice(vocabulary, size=int(words_per_article * rng.uniform(0.3, 1.5))))
+        for _ in range(num_articles)
+    ]
+
+    results = {}
+    for batch_size in batch_sizes:
+        service = BatchedInferenceService(batch_size=batch_size, **service_kwargs)
+        service.load()
+        service.predict(texts[:batch_size])  # warm-up
+        start = time.perf_counter()
+        service.predict(texts)
+        elapsed = time.perf_counter() - start
+        results[batch_size] = num_articles / elapsed
+        logger.info(f"batch_size={batch_size}: {results[batch_size]:.1f} articles/sec")
+    return results
+
+
+if __name__ == "__main__":
+    # Run the CPU throughput benchmark when executed directly
+    import argparse
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Sentiment inference throughput benchmark")
+    parser.add_argument('--quantize', default='none', choices=['none', 'int8'])
+    parser.add_argument('--backend', default='torch', choices=['torch', 'onnx'])
+    parser.add_argument('--articles', type=int, default=64)
+    args = parser.parse_args()
+
+    throughput = benchmark_throughput(
+        num_articles=args.articles, quantize=args.quantize, backend=args.backend
+    )
+    print(f"{'batch':>6} {'articles/sec':>14}")
+    for size, rate in throughput.items():
+        print(f"{size:>6} {rate:>14.1f}")
@@ -0,0 +1,154 @@
+"""
+Offline evaluation harness for the sentiment cascade.
+Scores a labeled article set once with VADER and once with the transformer,
+then replays cascade routing over a grid of thresholds to report model-call
+savings against label agreement.
+"""
+
+import json
+import logging
+import argparse
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from sentiment_engine import SentimentEngine, CascadeThresholds
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_NEUTRAL_BANDS = (0.0, 0.2, 0.35, 0.5, 0.65, 0.8)
+DEFAULT_HEADLINE_THRESHOLDS = (0.2, 0.3, 0.5, 1.01)  # 1.01 disables the disagreement rule
+
+
+@dataclass
+class LabeledSample:
+    """Article with a human sentiment label."""
+    title: str
+    content: str
+    label: str  # "Positive", "Negative", "Neutral"
+
+
+@dataclass
+class CascadeEvaluation:
+    """Cascade quality at one threshold setting."""
+    neutral_band: float
+    headline_threshold: float
+    transformer_calls: int
+    call_savings: float        # Fraction of transformer calls avoided
+    label_accuracy: float      # Agreement with human labels
+    transformer_agreement: float  # Agreement with the full transformer run
+
+    def to_dict(self) -> Dict[str, float]:
+        return asdict(self)
+
+
+def load_labeled_samples(path: str) -> List[LabeledSample]:
+    """
+    Load labeled samples from a JSONL file with title, content and label keys.
+    Labels are case-insensitive.
+    """
+    samples = []
+    with open(path, 'r', encoding='utf-8') as handle:
+        for line_number, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+                samples.append(LabeledSample(
+                    title=row.get('title', ''),
+                    content=row.get('content', ''),
+                    label=str(row['label']).strip().capitalize()
+                ))
+            except (ValueError, KeyError) as e:
+                logger.warning(f"Skipping invalid sample on line {line_number}: {e}")
+    return samples
+
+
+def evaluate_cascade(samples: List[LabeledSample],
+                     engine: Optional[SentimentEngine] = None,
+                     neutral_bands: Sequence[float] = DEFAULT_NEUTRAL_BANDS,
+                     headline_thresholds: Sequence[float] = DEFAULT_HEADLINE_THRESHOLDS) -> Dict:
+    """
+    Evaluate cascade routing over a threshold grid.
+
+    Both tiers run exactly once over the sample set; each grid point only
+    recombines the stored predictions, so the sweep itself is free.
+
+    Returns:
+        Dict with baseline accuracies and one CascadeEvaluation per grid point
+    """
+    if not samples:
+        raise ValueError("No labeled samples to evaluate")
+
+    engine = engine or SentimentEngine()
+    texts = [sample.content or sample.title for sample in samples]
+    gold = np.asarray([sample.label for sample in samples])
+
+    headline_scores = np.asarray([engine.vader_score(sample.title) for sample in samples])
+    vader_polarity = [engine.vader.polarity_scores(text) if engine.vader and text else None for text in texts]
+    content_scores = np.asarray([p['compound'] if p else 0.0 for p in vader_polarity])
+    vader_labels = np.asarray([
+        engine._vader_content_sentiment(text, polarity).label
+        for text, polarity in zip(texts, vader_polarity)
+    ])
+    transformer_labels = np.asarray([result.label for result in engine.analyze_contents(texts)])
+
+    total = len(samples)
+    results = []
+    for band in neutral_bands:
+        for headline_threshold in headline_thresholds:
+            thresholds = CascadeThresholds(neutral_band=band, headline_threshold=headline_threshold)
+            routed = np.asarray([
+                thresholds.needs_transformer(h, c) for h, c in zip(headline_scores, content_scores)
+            ], dtype=bool)
+            cascade_labels = np.where(routed, transformer_labels, vader_labels)
+            calls = int(routed.sum())
+            results.append(CascadeEvaluation(
+                neutral_band=band,
+                headline_threshold=headline_threshold,
+                transformer_calls=calls,
+                call_savings=round(1 - calls / total, 4),
+                label_accuracy=round(float((cascade_labels == gold).mean()), 4),
+                transformer_agreement=round(float((cascade_labels == transformer_labels).mean()), 4)
+            ))
+
+    return {
+        'samples': total,
+        'transformer_accuracy': round(float((transformer_labels == gold).mean()), 4),
+        'vader_accuracy': round(float((vader_labels == gold).mean()), 4),
+        'grid': results
+    }
+
+
+def format_report(report: Dict) -> str:
+    """Render an evaluation report as a plain-text table."""
+    lines = [
+        f"Samples: {report['samples']}",
+        f"Transformer-only accuracy: {report['transformer_accuracy']:.3f}",
+        f"VADER-only accuracy:       {report['vader_accuracy']:.3f}",
+        "",
+        f"{'band':>6} {'headline':>9} {'calls':>6} {'savings':>8} {'accuracy':>9} {'agreement':>10}"
+    ]
+    for row in report['grid']:
+        lines.append(
+            f"{row.neutral_band:>6.2f} {row.headline_threshold:>9.2f} {row.transformer_calls:>6d} "
+            f"{row.call_savings:>8.1%} {row.label_accuracy:>9.3f} {row.transformer_agreement:>10.3f}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Evaluate VADER → transformer sentiment cascade")
+    parser.add_argument('samples', help="JSONL file with title, content and label per line")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = parser.parse_args()
+
+    evaluation = evaluate_cascade(load_labeled_samples(args.samples))
+    if args.json:
+        print(json.dumps({**evaluation, 'grid': [row.to_dict() for row in evaluation['grid']]}, indent=2))
+    else:
+        print(format_report(evaluation))
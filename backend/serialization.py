@@ -0,0 +1,209 @@
+"""
+Fast JSON encoding for API responses.
+orjson encodes dataclasses, datetimes, enums and NumPy arrays/scalars
+natively, so reports are written straight to bytes instead of going
+through to_dict() / jsonable_encoder and the stdlib encoder. Pydantic
+models use their own (Rust) JSON serializer. Snapshots that many requests
+share are kept pre-encoded as bytes.
+"""
+
+import json
+import math
+import time
+import hashlib
+import dataclasses
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+from config import Config
+from metrics import STAGE_SERIALIZATION, stage
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+if ORJSON_AVAILABLE:
+    ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    """Types orjson doesn't encode natively (and everything, for the stdlib fallback)."""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return shallow_dict(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    return str(obj)
+
+
+def shallow_dict(obj: Any) -> Dict[str, Any]:
+    """A dataclass's fields as a dict, leaving nested values for the encoder."""
+    return {field.name: getattr(obj, field.name) for field in dataclasses.fields(obj)}
+
+
+def _plain(obj: Any) -> Any:
+    """
+    JSON-native copy of a value for the stdlib fallback, with NaN and
+    infinity as None (the stdlib encoder would emit them as bare NaN).
+    """
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if obj is None or isinstance(obj, (str, int)):
+        return obj
+    if isinstance(obj, dict):
+        return {
+            key if key is None or isinstance(key, (str, int, float)) else _default(key): _plain(value)
+            for key, value in obj.items()
+        }
+    if isinstance(obj, list):
+        return [_plain(value) for value in obj]
+    return _plain(_default(obj))
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Encode to JSON bytes. NaN and infinity become null (the stdlib encoder
+    would emit invalid JSON for them).
+    """
+    if isinstance(obj, BaseModel):
+        return obj.model_dump_json().encode('utf-8')
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS)
+    return json.dumps(_plain(obj), separators=(',', ':'), allow_nan=False).encode('utf-8')
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with dumps(). Return one directly from an endpoint
+    to skip FastAPI's jsonable_encoder pass as well.
+    """
+
+    def render(self, content: Any) -> bytes:
+        with stage(STAGE_SERIALIZATION):
+            return dumps(content)
+
+
+@dataclasses.dataclass
+class EncodedSnapshot:
+    """A payload encoded once and served as-is, with its ETag (the snapshot version)."""
+    body: bytes
+    created_at: float
+    etag: str = ''
+
+    def __post_init__(self):
+        if not self.etag:
+            self.etag = f'"{hashlib.blake2b(self.body, digest_size=16).hexdigest()}"'
+
+    def response(self, status_code: int = 200) -> Response:
+        return Response(content=self.body, status_code=status_code, media_type='application/json',
+                        headers={'ETag': self.etag})
+
+
+class SnapshotCache:
+    """
+    Pre-encoded payloads by key. A snapshot is rebuilt by its builder once
+    it is older than the TTL; in between, every request reuses the bytes.
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = Config.RESPONSE_SNAPSHOT_TTL if ttl is None else ttl
+        self._snapshots: Dict[str, EncodedSnapshot] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, build: Callable[[], Any], ttl: Optional[float] = None) -> EncodedSnapshot:
+        ttl = self.ttl if ttl is None else ttl
+        snapshot = self._snapshots.get(key)
+        if snapshot is None or time.monotonic() - snapshot.created_at > ttl:
+            self.misses += 1
+            return self.put(key, build())
+        self.hits += 1
+        return snapshot
+
+    def put(self, key: str, payload: Any) -> EncodedSnapshot:
+        snapshot = EncodedSnapshot(dumps(payload), time.monotonic())
+        self._snapshots[key] = snapshot
+        return snapshot
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        if key is None:
+            self._snapshots.clear()
+        else:
+            self._snapshots.pop(key, None)
+
+
+# Global snapshot cache instance
+snapshot_cache = None
+
+def get_snapshot_cache() -> SnapshotCache:
+    """Get or create the global snapshot cache instance"""
+    global snapshot_cache
+    if snapshot_cache is None:
+        snapshot_cache = SnapshotCache()
+    return snapshot_cache
+
+
+def synthetic_report(points: int = 5000, articles: int = 50):
+    """A large DetailedAnalysisReport for benchmarking."""
+    from datetime import timedelta
+    from models.financial_data import (
+        DetailedAnalysisReport, DerivedMetrics, FundamentalMetrics, PriceHistory, PricePoint, TickerInfo
+    )
+    rng = np.random.default_rng(0)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, points)))
+    start = datetime(2005, 1, 3)
+    prices = [
+        PricePoint(start + timedelta(days=i), float(c * 0.99), float(c * 1.01), float(c * 0.98), float(c),
+                   int(rng.integers(1e5, 1e7)))
+        for i, c in enumerate(closes)
+    ]
+    return DetailedAnalysisReport(
+        ticker='BENCH',
+        timestamp=datetime.utcnow(),
+        financial_data=TickerInfo('BENCH', float(closes[-1]), 1.2e12, 24.5, 180.0, 120.0, 'Technology', 'Software', 5_000_000),
+        price_history=PriceHistory('BENCH', 'max', prices),
+        fundamental_metrics=FundamentalMetrics(24.5, 1.2e12, 0.12, 0.25, 0.8, 0.3, 180.0, 120.0),
+        derived_metrics=DerivedMetrics(62.0, 80.0, 55.0, 58.0, 61.0, 40.0),
+        ai_verdict='Buy',
+        confidence_score=0.72,
+        sentiment_analysis={'overall_score': 0.31, 'label': 'positive'},
+        news_articles=[{'title': f'Headline {i}', 'url': f'https://example.com/{i}', 'score': 0.1 * (i % 10)}
+                       for i in range(articles)],
+        technical_indicators={'rsi': rng.random(points), 'sma_50': closes}
+    )
+
+
+if __name__ == "__main__":
+    # Encode time for a large DetailedAnalysisReport: the previous path
+    # (to_dict + jsonable_encoder + stdlib json) against direct encoding
+    import timeit
+    from fastapi.encoders import jsonable_encoder
+
+    report = synthetic_report()
+    report.technical_indicators = {k: v.tolist() for k, v in report.technical_indicators.items()}
+    paths = {
+        'to_dict + jsonable_encoder + json': lambda: json.dumps(jsonable_encoder(report.to_dict())).encode(),
+        'to_dict + json': lambda: json.dumps(report.to_dict()).encode(),
+        'dumps(report)': lambda: dumps(report),
+    }
+    sizes = {name: len(fn()) for name, fn in paths.items()}
+    for name, fn in paths.items():
+        runs = 5
+        seconds = min(timeit.repeat(fn, number=runs, repeat=3)) / runs
+        print(f"{name:36s} {seconds * 1000:8.2f} ms  {sizes[name] / 1024:7.0f} KiB")
@@ -0,0 +1,110 @@
+"""
+Import-time profile of the FastAPI app.
+Imports fastapi_app in a fresh interpreter under `python -X importtime`,
+prints the slowest modules, and fails (exit code 1) if the import exceeds
+STARTUP_IMPORT_BUDGET_MS or pulls in a library that should only load on
+first use. Run from backend/: python startup_profile.py [--top N]
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from config import Config
+
+# Libraries the app defers until first use; importing the app must not load them
+DEFERRED_MODULES = (
+    'google.generativeai',
+    'simple_salesforce',
+    'torch',
+    'transformers',
+    'onnxruntime',
+    'yfinance',
+    'pandas',
+    'httpx',
+    'redis',
+)
+
+
+@dataclass
+class ImportRecord:
+    """One line of -X importtime output."""
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(stderr: str) -> List[ImportRecord]:
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        name = name[1:]  # drop the separator's space; the rest is nesting indent
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        records.append(ImportRecord(name.strip(), int(self_us), int(cumulative_us), depth))
+    return records
+
+
+def profile_import(module: str = 'fastapi_app', cwd: Optional[str] = None) -> List[ImportRecord]:
+    """Import `module` in a fresh interpreter and return its import-time records."""
+    env = {**os.environ, 'STARTUP_WARMUP': 'False'}
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=cwd or os.path.dirname(os.path.abspath(__file__)),
+        env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+    return parse_importtime(completed.stderr)
+
+
+def check_profile(records: List[ImportRecord],
+                  module: str = 'fastapi_app',
+                  budget_ms: Optional[int] = None) -> List[str]:
+    """Problems with a profile: over budget, or deferred libraries imported eagerly."""
+    budget_ms = budget_ms or Config.STARTUP_IMPORT_BUDGET_MS
+    problems = []
+    total = next((r.cumulative_us for r in reversed(records) if r.module == module), None)
+    if total is None:
+        problems.append(f"{module} not found in import profile")
+    elif total / 1000 > budget_ms:
+        problems.append(f"import {module} took {total / 1000:.0f} ms (budget {budget_ms} ms)")
+    imported = {r.module for r in records}
+    for name in DEFERRED_MODULES:
+        if name in imported:
+            problems.append(f"{name} is imported at startup; it should load on first use")
+    return problems
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--module', default='fastapi_app')
+    parser.add_argument('--top', type=int, default=15, help='slowest modules to list')
+    parser.add_argument('--budget-ms', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    records = profile_import(args.module)
+    # Top-level packages and the app's own modules are the actionable rows
+    by_module: Dict[str, ImportRecord] = {}
+    for record in records:
+        if record.depth <= 1:
+            by_module[record.module] = record
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for record in sorted(by_module.values(), key=lambda r: r.cumulative_us, reverse=True)[:args.top]:
+        print(f"{record.cumulative_us / 1000:14.1f} {record.self_us / 1000:9.1f}  {record.module}")
+
+    problems = check_profile(records, args.module, args.budget_ms)
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    if not problems:
+        print("OK: startup import within budget, no deferred libraries loaded")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,359 @@
+"""
+Structured, non-blocking logging.
+Log calls only put the record on a queue; a QueueListener thread formats
+it (one JSON object per line) and writes it, so a slow terminal, pipe or
+disk never stalls the event loop. Each record carries the id of the
+request it was logged under (X-Request-ID, echoed on the response), and
+noisy per-request INFO/DEBUG loggers can be sampled down with LOG_SAMPLING.
+Warnings and errors are never sampled.
+"""
+
+import sys
+import copy
+import math
+import queue
+import time
+import uuid
+import atexit
+import logging
+import logging.handlers
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config import Config
+from serialization import dumps
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Request id of the request being served; copied into every log record
+request_id_var: ContextVar[Optional[str]] = ContextVar('request_id', default=None)
+
+MAX_REQUEST_ID_LENGTH = 64
+
+# Loggers configured by uvicorn with their own handlers; routed through the queue instead
+UVICORN_LOGGERS = ('uvicorn', 'uvicorn.error', 'uvicorn.access')
+
+# LogRecord attributes that aren't `extra=` fields
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'request_id'}
+
+
+def parse_sampling(spec: str) -> Dict[str, float]:
+    """
+    'vision_engine=0.1,realtime=0.5' -> {'vision_engine': 0.1, 'realtime': 0.5}.
+    Malformed entries are skipped with a warning.
+    """
+    rates = {}
+    for part in spec.split(','):
+        name, _, rate = part.partition('=')
+        if not name.strip() and not rate.strip():
+            continue
+        try:
+            value = float(rate)
+            if not name.strip() or not math.isfinite(value):
+                raise ValueError
+        except ValueError:
+            logger.warning(f"Ignoring malformed LOG_SAMPLING entry: {part.strip()!r}")
+            continue
+        rates[name.strip()] = min(1.0, max(0.0, value))
+    return rates
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamps records with the current request id. Runs in the calling thread, before the record is queued."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a fixed fraction of INFO/DEBUG records per logger (and its
+    children). Deterministic: a rate of 0.1 keeps the first of every ten
+    records, so bursts are thinned evenly.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        # logger name -> keep one record in this many (None: keep all, 0: keep none)
+        self._every: Dict[str, Optional[int]] = {}
+        self._seen: Dict[str, int] = {}
+        self.dropped = 0
+
+    def _lookup(self, name: str) -> Optional[int]:
+        match = None
+        for prefix in self.rates:
+            if (name == prefix or name.startswith(prefix + '.')) and (match is None or len(prefix) > len(match)):
+                match = prefix
+        if match is None or self.rates[match] >= 1.0:
+            return None
+        rate = self.rates[match]
+        return round(1 / rate) if rate > 0 else 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        name = record.name
+        if name in self._every:
+            every = self._every[name]
+        else:
+            every = self._every[name] = self._lookup(name)
+        if every is None:
+            return True
+        seen = self._seen.get(name, 0)
+        self._seen[name] = seen + 1
+        if every and seen % every == 0:
+            return True
+        self.dropped += 1
+        return False
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that drops (and counts) records when the queue is full
+    instead of blocking or printing a traceback, and leaves formatting to
+    the listener: only the message is rendered here, since its arguments
+    may change after the call returns.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._exception_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request id and any `extra=` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        request_id = getattr(record, 'request_id', None)
+        if request_id:
+            entry['request_id'] = request_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.levelno >= logging.WARNING:
+            entry['location'] = f"{record.module}:{record.lineno}"
+        if record.exc_text or record.exc_info:
+            entry['exception'] = record.exc_text or self.formatException(record.exc_info)
+        return dumps(entry).decode('utf-8')
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for local development, with the request id when there is one."""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s%(request)s: %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        request_id = getattr(record, 'request_id', None)
+        record.request = f" [{request_id}]" if request_id else ''
+        return super().format(record)
+
+
+class LoggingSetup:
+    """The queue, its handler and listener installed on the root logger."""
+
+    def __init__(self, handler: NonBlockingQueueHandler, listener: logging.handlers.QueueListener,
+                 sampling: Optional[SamplingFilter]):
+        self.handler = handler
+        self.listener = listener
+        self.sampling = sampling
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'queued': self.handler.queue.qsize(),
+            'dropped_queue_full': self.handler.dropped,
+            'dropped_sampled': self.sampling.dropped if self.sampling else 0
+        }
+
+    def stop(self) -> None:
+        """
+        Flush queued records and stop the listener thread. The root logger
+        then writes straight to the listener's output, so records logged
+        after shutdown (uvicorn's last lines, a later startup in the same
+        process) are still written rather than queued forever.
+        """
+        if self.listener._thread is not None:
+            self.listener.stop()
+        root = logging.getLogger()
+        if self.handler in root.handlers:
+            for output in self.listener.handlers:
+                for log_filter in self.handler.filters:
+                    output.addFilter(log_filter)
+            root.handlers = [h for h in root.handlers if h is not self.handler] + list(self.listener.handlers)
+
+
+# Global logging setup instance
+logging_setup = None
+
+def configure_logging(level: Optional[str] = None,
+                      log_format: Optional[str] = None,
+                      stream=None,
+                      queue_size: Optional[int] = None,
+                      sampling: Optional[str] = None) -> LoggingSetup:
+    """
+    Route the root logger (and uvicorn's loggers) through a bounded queue
+    to a listener thread writing to `stream` (stderr by default). Replaces
+    any previous configuration.
+    """
+    global logging_setup
+    if logging_setup is not None:
+        logging_setup.stop()
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size or Config.LOG_QUEUE_SIZE)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(RequestIdFilter())
+    rates = parse_sampling(Config.LOG_SAMPLING if sampling is None else sampling)
+    sampling_filter = SamplingFilter(rates) if rates else None
+    if sampling_filter is not None:
+        handler.addFilter(sampling_filter)
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JSONFormatter() if (log_format or Config.LOG_FORMAT) == 'json' else TextFormatter())
+    listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=False)
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel((level or Config.LOG_LEVEL).upper())
+    for name in UVICORN_LOGGERS:
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+
+    listener.start()
+    logging_setup = LoggingSetup(handler, listener, sampling_filter)
+    return logging_setup
+
+
+def shutdown_logging() -> None:
+    """Flush and stop the listener; registered with atexit and the app's shutdown hook."""
+    if logging_setup is not None:
+        logging_setup.stop()
+
+
+atexit.register(shutdown_logging)
+
+
+def _valid_request_id(value: Optional[str]) -> bool:
+    return bool(value) and len(value) <= MAX_REQUEST_ID_LENGTH and all(c.isalnum() or c in '-_.' for c in value)
+
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware giving every request an id: the caller's X-Request-ID
+    if it looks sane, otherwise a new one. It is set for the duration of
+    the request (so every log line carries it) and returned on the response.
+    Add it last so it runs outermost.
+    """
+
+    def __init__(self, app: ASGIApp, header: Optional[str] = None):
+        self.app = app
+        self.header = header or Config.LOG_REQUEST_ID_HEADER
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] not in ('http', 'websocket'):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get(self.header)
+        if not _valid_request_id(request_id):
+            request_id = uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_with_id(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                MutableHeaders(scope=message)[self.header] = request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
+
+
+if __name__ == "__main__":
+    # Throughput of concurrent "requests" that each log a few lines, with a
+    # stream whose writes take 50 us (a busy disk or a slow log shipper's pipe):
+    # synchronous StreamHandler (basicConfig) against the queue
+    import asyncio
+
+    class SlowStream:
+        def __init__(self, delay: float = 50e-6):
+            self.delay = delay
+            self.lines = 0
+
+        def write(self, text: str) -> None:
+            time.sleep(self.delay)  # blocking I/O releases the GIL
+            self.lines += 1
+
+        def flush(self) -> None:
+            pass
+
+    bench_logger = logging.getLogger('bench.request')
+
+    async def handle(i: int) -> None:
+        token = request_id_var.set(f"req-{i}")
+        bench_logger.info("Request received", extra={'path': '/api/analyze'})
+        await asyncio.sleep(0)
+        bench_logger.info(f"Fetched market data for request {i}")
+        await asyncio.sleep(0)
+        bench_logger.info("Gemini analysis completed successfully")
+        bench_logger.info(f"Request {i} done in {0.042:.3f}s")
+        request_id_var.reset(token)
+
+    async def run(requests: int) -> float:
+        start = time.perf_counter()
+        for batch in range(0, requests, 100):
+            await asyncio.gather(*(handle(i) for i in range(batch, batch + 100)))
+        return time.perf_counter() - start
+
+    requests = 5000
+    for label, setup in (
+        ('sync StreamHandler', 'sync'),
+        ('queue + JSON', 'queue'),
+        ('queue + JSON, sampled 0.1', 'sampled'),
+    ):
+        stream = SlowStream()
+        if setup == 'sync':
+            shutdown_logging()
+            logging_setup = None
+            handler = logging.StreamHandler(stream)
+            handler.setFormatter(logging.Formatter('%(levelname)s:%(name)s:%(message)s'))
+            logging.getLogger().handlers = [handler]
+            logging.getLogger().setLevel(logging.INFO)
+        else:
+            configure_logging('INFO', 'json', stream=stream, queue_size=100000,
+                              sampling='bench=0.1' if setup == 'sampled' else '')
+        seconds = asyncio.run(run(requests))
+        shutdown_logging()
+        print(f"{label:28s} {requests / seconds:9.0f} requests/s  "
+              f"({seconds / (requests * 4) * 1e6:.1f} us per log call, {stream.lines} lines written)")
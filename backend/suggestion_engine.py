@@ -0,0 +1,310 @@
+"""
+Deterministic investment suggestions for a portfolio.
+Ranks a local universe of ETFs and stocks by marginal diversification
+benefit (return correlation to the current portfolio, volatility change
+from a small position, sector gap fill) and returns three typed
+InvestmentRecommendations without an LLM call.
+"""
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config import Config
+from models.portfolio_analysis import (
+    ImprovementType, InvestmentRecommendation, PortfolioHolding, PortfolioRiskMetrics
+)
+from financial_data_service import (
+    FinancialDataError, FinancialDataService, get_financial_data_service
+)
+from price_store import PriceSeries
+from risk_engine import align_closes
+from correlation_service import pairwise_correlation
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Weight of the hypothetical new position used for the volatility change
+ADD_WEIGHT = 0.10
+# Sectors below this exposure count as a gap
+SECTOR_GAP_THRESHOLD = 0.05
+# Correlation assumed for candidates without price history
+UNKNOWN_CORRELATION = 0.5
+
+
+@dataclass(frozen=True)
+class Candidate:
+    """An asset the engine may suggest."""
+    ticker: str
+    name: str
+    sector: str
+    asset_class: str = 'equity'  # "equity", "bond" or "commodity"
+    region: str = 'us'           # "us" or "international"
+
+
+UNIVERSE = (
+    Candidate('VTI', 'Vanguard Total Stock Market ETF', 'Broad Market'),
+    Candidate('RSP', 'Invesco S&P 500 Equal Weight ETF', 'Broad Market'),
+    Candidate('USMV', 'iShares MSCI USA Min Vol ETF', 'Broad Market'),
+    Candidate('VXUS', 'Vanguard Total International Stock ETF', 'International', region='international'),
+    Candidate('EFA', 'iShares MSCI EAFE ETF', 'International', region='international'),
+    Candidate('VWO', 'Vanguard FTSE Emerging Markets ETF', 'International', region='international'),
+    Candidate('BND', 'Vanguard Total Bond Market ETF', 'Fixed Income', asset_class='bond'),
+    Candidate('IEF', 'iShares 7-10 Year Treasury Bond ETF', 'Fixed Income', asset_class='bond'),
+    Candidate('TLT', 'iShares 20+ Year Treasury Bond ETF', 'Fixed Income', asset_class='bond'),
+    Candidate('TIP', 'iShares TIPS Bond ETF', 'Fixed Income', asset_class='bond'),
+    Candidate('SHY', 'iShares 1-3 Year Treasury Bond ETF', 'Fixed Income', asset_class='bond'),
+    Candidate('GLD', 'SPDR Gold Shares', 'Commodities', asset_class='commodity'),
+    Candidate('DBC', 'Invesco DB Commodity Index Tracking Fund', 'Commodities', asset_class='commodity'),
+    Candidate('XLV', 'Health Care Select Sector SPDR Fund', 'Healthcare'),
+    Candidate('XLP', 'Consumer Staples Select Sector SPDR Fund', 'Consumer Defensive'),
+    Candidate('XLU', 'Utilities Select Sector SPDR Fund', 'Utilities'),
+    Candidate('XLE', 'Energy Select Sector SPDR Fund', 'Energy'),
+    Candidate('XLF', 'Financial Select Sector SPDR Fund', 'Financial Services'),
+    Candidate('XLI', 'Industrial Select Sector SPDR Fund', 'Industrials'),
+    Candidate('XLB', 'Materials Select Sector SPDR Fund', 'Basic Materials'),
+    Candidate('XLRE', 'Real Estate Select Sector SPDR Fund', 'Real Estate'),
+    Candidate('XLC', 'Communication Services Select Sector SPDR Fund', 'Communication Services'),
+    Candidate('XLY', 'Consumer Discretionary Select Sector SPDR Fund', 'Consumer Cyclical'),
+    Candidate('XLK', 'Technology Select Sector SPDR Fund', 'Technology'),
+    Candidate('JNJ', 'Johnson & Johnson', 'Healthcare'),
+    Candidate('PG', 'Procter & Gamble', 'Consumer Defensive'),
+    Candidate('KO', 'Coca-Cola', 'Consumer Defensive'),
+    Candidate('NEE', 'NextEra Energy', 'Utilities'),
+    Candidate('XOM', 'Exxon Mobil', 'Energy'),
+    Candidate('JPM', 'JPMorgan Chase', 'Financial Services'),
+    Candidate('BRK-B', 'Berkshire Hathaway', 'Financial Services'),
+    Candidate('UNH', 'UnitedHealth Group', 'Healthcare'),
+    Candidate('CAT', 'Caterpillar', 'Industrials'),
+    Candidate('O', 'Realty Income', 'Real Estate'),
+)
+UNIVERSE_BY_TICKER = {candidate.ticker: candidate for candidate in UNIVERSE}
+
+
+@dataclass
+class ScoredCandidate:
+    """A candidate with its diversification figures."""
+    candidate: Candidate
+    score: float
+    correlation: Optional[float]
+    volatility_change: float
+    sector_exposure: float
+    improvement_type: ImprovementType
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            'ticker': self.candidate.ticker,
+            'name': self.candidate.name,
+            'sector': self.candidate.sector,
+            'score': round(self.score, 4),
+            'correlation': None if self.correlation is None else round(self.correlation, 4),
+            'volatility_change': round(self.volatility_change, 4),
+            'sector_exposure': round(self.sector_exposure, 4),
+            'improvement_type': self.improvement_type.value
+        }
+
+
+def improvement_type_for(candidate: Candidate, sector_exposure: float) -> ImprovementType:
+    if candidate.asset_class in ('bond', 'commodity'):
+        return ImprovementType.RISK_REDUCTION
+    if candidate.region == 'international':
+        return ImprovementType.GEOGRAPHIC_EXPOSURE
+    if candidate.sector != 'Broad Market' and sector_exposure < SECTOR_GAP_THRESHOLD:
+        return ImprovementType.SECTOR_BALANCE
+    return ImprovementType.DIVERSIFICATION
+
+
+def template_reason(scored: ScoredCandidate) -> str:
+    """Plain-language reason built from the computed figures."""
+    candidate = scored.candidate
+    correlation = '' if scored.correlation is None else f" ({scored.correlation:+.2f} correlation to your portfolio)"
+    if scored.improvement_type == ImprovementType.RISK_REDUCTION:
+        if scored.volatility_change < 0:
+            return (f"{candidate.name}{correlation}: a {ADD_WEIGHT:.0%} position would lower portfolio "
+                    f"volatility by about {-scored.volatility_change:.1%}.")
+        return f"{candidate.name}{correlation} adds {candidate.asset_class} exposure to balance equity risk."
+    if scored.improvement_type == ImprovementType.GEOGRAPHIC_EXPOSURE:
+        return f"{candidate.name}{correlation} adds exposure to markets outside the US."
+    if scored.improvement_type == ImprovementType.SECTOR_BALANCE:
+        return (f"{candidate.name}{correlation} fills a {candidate.sector} gap, "
+                f"which is {scored.sector_exposure:.0%} of your portfolio today.")
+    return f"{candidate.name}{correlation} broadens your holdings beyond their current concentration."
+
+
+class SuggestionEngine:
+    """Ranks the local universe against a portfolio and picks three typed recommendations."""
+
+    def __init__(self,
+                 data_service: Optional[FinancialDataService] = None,
+                 universe: Sequence[Candidate] = UNIVERSE,
+                 benchmark_ticker: Optional[str] = None,
+                 lookback_period: Optional[str] = None):
+        self.data_service = data_service or get_financial_data_service()
+        self.universe = list(universe)
+        self.benchmark_ticker = benchmark_ticker or Config.RISK_BENCHMARK_TICKER
+        self.lookback_period = lookback_period or Config.RISK_LOOKBACK_PERIOD
+
+    def _series(self, ticker: str) -> Optional[PriceSeries]:
+        try:
+            series = self.data_service.get_price_series(ticker, self.lookback_period)
+            return series if len(series) else None
+        except FinancialDataError as e:
+            logger.warning(f"No price history for {ticker}: {e}")
+            return None
+
+    def score_candidates(self,
+                         holdings: Sequence[PortfolioHolding],
+                         metrics: Optional[PortfolioRiskMetrics] = None) -> List[ScoredCandidate]:
+        """
+        Score every candidate not already held, best first.
+
+        score = 0.5 * (1 - correlation) / 2 + 0.3 * sector gap
+                + 0.2 * clip(-10 * volatility change, -1, 1)
+
+        Correlation and volatility change use the portfolio's daily returns
+        at current weights; sector exposure comes from ``metrics`` (held
+        tickers in the universe use the universe's sector).
+        """
+        held = {h.ticker for h in holdings}
+        candidates = [c for c in self.universe if c.ticker not in held]
+        if not candidates:
+            return []
+
+        exposure = self._sector_exposure(holdings, metrics)
+        correlations = np.full(len(candidates), np.nan)
+        vol_change = np.zeros(len(candidates))
+
+        weights = self._weights(holdings, metrics)
+        benchmark = self._series(self.benchmark_ticker)
+        if weights and benchmark is not None:
+            tickers = list(weights) + [c.ticker for c in candidates]
+            with ThreadPoolExecutor(max_workers=Config.MAX_WORKERS) as pool:
+                loaded = list(pool.map(self._series, tickers))
+            empty = PriceSeries(ticker='', period='', dates=np.array([], dtype='datetime64[D]'),
+                                open=np.array([]), high=np.array([]), low=np.array([]),
+                                close=np.array([]), volume=np.array([], dtype=np.int64))
+            prices = align_closes([s if s is not None else empty for s in loaded], benchmark)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                returns = prices.closes[1:] / prices.closes[:-1] - 1.0
+
+            n_held = len(weights)
+            held_returns = np.where(np.isfinite(returns[:, :n_held]), returns[:, :n_held], 0.0)
+            portfolio = held_returns @ np.array(list(weights.values()))
+            stacked = np.column_stack([portfolio, returns[:, n_held:]])
+            correlations = pairwise_correlation(stacked, np.array([0]), Config.CORRELATION_MIN_PERIODS)[0, 1:]
+
+            # Volatility after moving ADD_WEIGHT into each candidate
+            candidate_returns = returns[:, n_held:]
+            sigma_p = np.std(portfolio, ddof=1)
+            sigma_c = np.nanstd(candidate_returns, axis=0, ddof=1)
+            rho = np.where(np.isfinite(correlations), correlations, UNKNOWN_CORRELATION)
+            x = ADD_WEIGHT
+            new_var = (1 - x) ** 2 * sigma_p ** 2 + x ** 2 * sigma_c ** 2 + 2 * x * (1 - x) * rho * sigma_p * sigma_c
+            with np.errstate(divide='ignore', invalid='ignore'):
+                vol_change = np.where(
+                    np.isfinite(new_var) & (sigma_p > 0), np.sqrt(np.clip(new_var, 0, None)) / sigma_p - 1.0, 0.0
+                )
+
+        rho = np.where(np.isfinite(correlations), correlations, UNKNOWN_CORRELATION)
+        sector_exposure = np.array([exposure.get(c.sector, 0.0) for c in candidates])
+        scores = (
+            0.5 * (1.0 - rho) / 2.0 +
+            0.3 * (1.0 - sector_exposure) +
+            0.2 * np.clip(-10.0 * vol_change, -1.0, 1.0)
+        )
+
+        scored = [
+            ScoredCandidate(
+                candidate=c,
+                score=float(scores[i]),
+                correlation=float(correlations[i]) if np.isfinite(correlations[i]) else None,
+                volatility_change=float(vol_change[i]),
+                sector_exposure=float(sector_exposure[i]),
+                improvement_type=improvement_type_for(c, float(sector_exposure[i]))
+            )
+            for i, c in enumerate(candidates)
+        ]
+        scored.sort(key=lambda s: s.score, reverse=True)
+        return scored
+
+    def _weights(self,
+                 holdings: Sequence[PortfolioHolding],
+                 metrics: Optional[PortfolioRiskMetrics]) -> Dict[str, float]:
+        if metrics:
+            return {h.ticker: h.weight for h in metrics.holdings if h.weight > 0}
+        # Without metrics fall back to equal weights
+        return {h.ticker: 1.0 / len(holdings) for h in holdings} if holdings else {}
+
+    def _sector_exposure(self,
+                         holdings: Sequence[PortfolioHolding],
+                         metrics: Optional[PortfolioRiskMetrics]) -> Dict[str, float]:
+        exposure: Dict[str, float] = {}
+        if metrics and metrics.holdings:
+            rows = [(h.ticker, h.weight, h.sector) for h in metrics.holdings]
+        else:
+            rows = [(h.ticker, 1.0 / len(holdings), None) for h in holdings]
+        for ticker, weight, sector in rows:
+            known = UNIVERSE_BY_TICKER.get(ticker)
+            if known:
+                sector = known.sector
+            elif sector is None:
+                sector = self.data_service.get_sector(ticker)
+            exposure[sector] = exposure.get(sector, 0.0) + weight
+        return exposure
+
+    def recommend(self,
+                  holdings: Sequence[PortfolioHolding],
+                  metrics: Optional[PortfolioRiskMetrics] = None,
+                  count: int = 3) -> List[InvestmentRecommendation]:
+        """
+        Top ``count`` candidates with distinct improvement types where possible,
+        as InvestmentRecommendations with priorities 1..count.
+
+        Raises:
+            ValueError: If fewer than ``count`` universe tickers are not already held
+        """
+        start = time.perf_counter()
+        ranked = self.score_candidates(holdings, metrics)
+
+        picks: List[ScoredCandidate] = []
+        used_types = set()
+        for scored in ranked:
+            if scored.improvement_type not in used_types:
+                picks.append(scored)
+                used_types.add(scored.improvement_type)
+            if len(picks) == count:
+                break
+        for scored in ranked:
+            if len(picks) == count:
+                break
+            if scored not in picks:
+                picks.append(scored)
+        if len(picks) < count:
+            raise ValueError(f"Only {len(picks)} suggestion candidates are not already held; {count} are needed")
+        picks.sort(key=lambda s: s.score, reverse=True)
+
+        logger.info(f"Ranked {len(ranked)} suggestion candidates in {(time.perf_counter() - start) * 1000:.1f}ms")
+        return [
+            InvestmentRecommendation(
+                ticker=scored.candidate.ticker,
+                reason=template_reason(scored),
+                improvement_type=scored.improvement_type,
+                priority=priority
+            )
+            for priority, scored in enumerate(picks, start=1)
+        ]
+
+
+# Global suggestion engine instance
+suggestion_engine = None
+
+def get_suggestion_engine() -> SuggestionEngine:
+    """Get or create the global suggestion engine instance"""
+    global suggestion_engine
+    if suggestion_engine is None:
+        suggestion_engine = SuggestionEngine()
+    return suggestion_engine
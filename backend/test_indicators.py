@@ -0,0 +1,70 @@
+"""
+Tests for incremental indicator computation.
+Run from backend/ with: python -m pytest test_indicators.py
+"""
+import numpy as np
+import pytest
+
+from indicators import DEFAULT_INDICATORS, INDICATORS, IndicatorEngine
+from price_store import PriceSeries
+
+
+def make_series(length=400, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = np.arange(np.datetime64('2020-01-01'), np.datetime64('2020-01-01') + length * 2)
+    dates = dates[np.is_busday(dates)][:length]
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, length)))
+    spread = close * rng.uniform(0.002, 0.03, length)
+    return PriceSeries(ticker='TEST', period='1y', dates=dates, open=close, high=close + spread,
+                       low=close - spread, close=close, volume=np.full(length, 1000, dtype=np.int64))
+
+
+def fresh(series, name, params):
+    return INDICATORS[name](series, params, None)[0]
+
+
+def assert_matches_fresh(outputs, expected):
+    assert outputs.keys() == expected.keys()
+    for key in expected:
+        np.testing.assert_allclose(outputs[key], expected[key], rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=key)
+
+
+@pytest.mark.parametrize('result_name', sorted(DEFAULT_INDICATORS))
+@pytest.mark.parametrize('cached_length', [5, 300])
+def test_appended_bars_match_a_fresh_computation(result_name, cached_length):
+    name, params = DEFAULT_INDICATORS[result_name]
+    series = make_series()
+    engine = IndicatorEngine()
+    engine.compute(series.slice(0, cached_length), {result_name: (name, params)})
+    for stop in (cached_length + 1, cached_length + 20, len(series)):
+        outputs = engine.compute(series.slice(0, stop), {result_name: (name, params)})[result_name]
+        assert_matches_fresh(outputs, fresh(series.slice(0, stop), name, params))
+
+
+@pytest.mark.parametrize('result_name', sorted(DEFAULT_INDICATORS))
+def test_sliding_window_matches_a_fresh_computation(result_name):
+    name, params = DEFAULT_INDICATORS[result_name]
+    series = make_series()
+    engine = IndicatorEngine()
+    engine.compute(series.slice(0, 300), {result_name: (name, params)})
+    for start in (1, 20, 100):
+        window = series.slice(start, start + 300)
+        outputs = engine.compute(window, {result_name: (name, params)})[result_name]
+        assert_matches_fresh(outputs, fresh(window, name, params))
+
+
+def test_warm_and_cold_engines_agree():
+    series = make_series()
+    warm = IndicatorEngine()
+    for start in range(0, 100, 10):
+        warm.compute(series.slice(start, start + 300))
+    cold = IndicatorEngine().compute(series.slice(90, 390))
+    for result_name, outputs in warm.compute(series.slice(90, 390)).items():
+        assert_matches_fresh(outputs, cold[result_name])
+
+
+def test_repeated_request_returns_the_cached_outputs():
+    series = make_series()
+    engine = IndicatorEngine()
+    first = engine.compute(series)['ema_20']['ema']
+    np.testing.assert_array_equal(engine.compute(series)['ema_20']['ema'], first)
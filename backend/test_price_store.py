@@ -0,0 +1,74 @@
+"""
+Tests for the local OHLCV store's period ranges.
+Run from backend/ with: python -m pytest test_price_store.py
+"""
+import numpy as np
+import pytest
+
+from financial_data_service import VALID_PERIODS, FinancialDataService
+from price_store import PriceSeries, PriceStore, PriceStoreError
+
+# Weekday bars from 2012-01-02 through Friday 2024-06-14
+DATES = np.arange(np.datetime64('2012-01-02'), np.datetime64('2024-06-15'))
+DATES = DATES[np.is_busday(DATES)]
+
+EXPECTED_BARS = {
+    '5d': 5,
+    '1mo': 24,    # 2024-05-14 onwards
+    '3mo': 67,    # 2024-03-14 onwards
+    '6mo': 132,   # 2023-12-14 onwards
+    '1y': 263,
+    '2y': 524,
+    '5y': 1306,
+    '10y': 2610,
+    'ytd': 120,   # 2024-01-02 onwards
+    'max': len(DATES),
+}
+
+
+def series(dates):
+    close = np.linspace(100.0, 200.0, len(dates))
+    return PriceSeries(ticker='TEST', period='max', dates=dates, open=close, high=close, low=close,
+                       close=close, volume=np.full(len(dates), 1000, dtype=np.int64))
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PriceStore(root=str(tmp_path))
+    store.append('TEST', series(DATES))
+    return store
+
+
+def test_every_period_is_covered():
+    assert set(EXPECTED_BARS) | {'1d'} == set(VALID_PERIODS)
+
+
+@pytest.mark.parametrize('period', sorted(EXPECTED_BARS))
+def test_period_bar_counts(store, period):
+    bars = store.get_range('TEST', period, refresh=False)
+    assert len(bars) == EXPECTED_BARS[period]
+    assert bars.dates[-1] == DATES[-1]
+    assert bars.period == period
+
+
+def test_trading_day_periods_are_the_last_stored_sessions(store):
+    bars = store.get_range('TEST', '5d', refresh=False)
+    assert bars.dates.tolist() == DATES[-5:].tolist()
+
+
+def test_store_does_not_serve_the_current_session(store):
+    with pytest.raises(PriceStoreError):
+        store.get_range('TEST', '1d', refresh=False)
+
+
+def test_one_day_period_is_fetched_upstream(store):
+    service = FinancialDataService(price_store=store)
+    calls = []
+
+    def fetch(ticker, start=None, period=None):
+        calls.append(period)
+        return series(DATES[-1:])
+
+    service.fetch_price_series = fetch
+    assert len(service.get_price_series('TEST', '1d')) == 1
+    assert calls == ['1d']
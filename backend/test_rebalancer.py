@@ -0,0 +1,116 @@
+"""
+Tests for the rebalancing optimizer's constraints.
+Run from backend/ with: python -m pytest test_rebalancer.py
+"""
+import numpy as np
+import pytest
+
+from models.portfolio_analysis import PortfolioHolding
+from rebalancer import DUST_WEIGHT, OBJECTIVES, RebalanceError, RebalanceOptimizer, drop_dust, project_feasible
+from risk_engine import AlignedPrices, PortfolioPrices
+
+TOLERANCE = 1e-9
+
+
+class FakeRiskEngine:
+    """Serves synthetic aligned closes instead of loading price histories."""
+
+    def __init__(self, tickers, seed=0, days=252):
+        rng = np.random.default_rng(seed)
+        market = rng.normal(0.0004, 0.01, days)
+        returns = market[:, None] * rng.uniform(0.5, 1.5, len(tickers)) + rng.normal(0.0003, 0.015, (days, len(tickers)))
+        self.closes = 50.0 * np.cumprod(1.0 + returns, axis=0)
+        self.tickers = list(tickers)
+
+    def load_prices(self, holdings, extra_tickers=()):
+        quantities = {h.ticker: h.quantity for h in holdings}
+        return PortfolioPrices(
+            prices=AlignedPrices(
+                tickers=self.tickers,
+                dates=np.arange(len(self.closes)).astype('datetime64[D]'),
+                closes=self.closes,
+                benchmark=self.closes.mean(axis=1)
+            ),
+            quantities=np.array([quantities.get(t, 0.0) for t in self.tickers]),
+            sectors=['Unknown'] * len(self.tickers),
+            unpriced=[]
+        )
+
+
+TICKERS = [f'T{i:02d}' for i in range(12)]
+# Concentrated in the first two tickers, nothing in the last four (candidates)
+HOLDINGS = [PortfolioHolding(ticker=t, quantity=q) for t, q in zip(TICKERS, [60, 40, 10, 10, 5, 5, 5, 5])]
+CANDIDATES = TICKERS[8:]
+
+
+def solve(objective, max_weight, max_turnover=None):
+    """The plan, its unrounded target weights (as kept for the next warm start) and the current weights."""
+    risk_engine = FakeRiskEngine(TICKERS)
+    optimizer = RebalanceOptimizer(risk_engine=risk_engine)
+    plan = optimizer.optimize(HOLDINGS, CANDIDATES, objective=objective, max_weight=max_weight,
+                              max_turnover=max_turnover)
+    weights = optimizer._solutions[(tuple(sorted(plan.tickers)), objective)]
+    values = risk_engine.load_prices(HOLDINGS).quantities * risk_engine.closes[-1]
+    return plan, np.array([weights[t] for t in plan.tickers]), values / values.sum()
+
+
+def test_projection_is_feasible():
+    rng = np.random.default_rng(1)
+    for _ in range(200):
+        n = int(rng.integers(2, 40))
+        cap = float(rng.uniform(1.0 / n, 1.0))
+        current = rng.dirichlet(np.ones(n))
+        budget = float(rng.uniform(0.0, 1.0))
+        if np.maximum(current - cap, 0.0).sum() > budget:
+            continue  # infeasible; optimize rejects these up front
+        w = project_feasible(rng.normal(0, 1, n), cap, current, budget)
+        assert abs(w.sum() - 1.0) < TOLERANCE
+        assert w.min() >= 0.0 and w.max() <= cap + TOLERANCE
+        assert np.abs(w - current).sum() / 2.0 <= budget + 1e-7
+
+
+@pytest.mark.parametrize('objective', OBJECTIVES)
+@pytest.mark.parametrize('max_weight', [0.15, 0.3])
+def test_targets_respect_max_weight(objective, max_weight):
+    plan, weights, _ = solve(objective, max_weight)
+    assert abs(weights.sum() - 1.0) < TOLERANCE
+    assert weights.min() >= 0.0
+    assert weights.max() <= max_weight + TOLERANCE
+    assert max(plan.target_weights.values()) <= max_weight + 1e-4
+
+
+@pytest.mark.parametrize('objective', OBJECTIVES)
+@pytest.mark.parametrize('max_turnover', [0.45, 0.6])
+def test_targets_respect_the_turnover_budget(objective, max_turnover):
+    plan, weights, current = solve(objective, 0.25, max_turnover)
+    assert abs(weights.sum() - 1.0) < TOLERANCE
+    assert weights.max() <= 0.25 + TOLERANCE
+    assert np.abs(weights - current).sum() / 2.0 <= max_turnover + 1e-7
+    assert plan.turnover <= max_turnover + 1e-4
+
+
+def test_dropping_dust_keeps_weights_under_the_cap():
+    weights = np.array([0.4, 0.4, 0.2 - DUST_WEIGHT / 2, DUST_WEIGHT / 2])
+    cleaned = drop_dust(weights, 0.4)
+    assert cleaned.max() <= 0.4 and abs(cleaned.sum() - 1.0) < TOLERANCE
+
+    uncapped = drop_dust(weights, 0.5)
+    assert uncapped[3] == 0.0 and abs(uncapped.sum() - 1.0) < TOLERANCE
+
+
+def test_dropping_dust_keeps_turnover_within_budget():
+    current = np.array([0.3, 0.3, 0.4])
+    weights = np.array([0.5, 0.5 - DUST_WEIGHT / 2, DUST_WEIGHT / 2])
+    budget = np.abs(weights - current).sum() / 2.0
+    cleaned = drop_dust(weights, 1.0, current, budget)
+    assert np.abs(cleaned - current).sum() / 2.0 <= budget + 1e-12
+
+
+def test_rejects_a_turnover_budget_too_small_to_meet_max_weight():
+    with pytest.raises(RebalanceError, match='max_turnover'):
+        solve('mean_variance', 0.2, max_turnover=0.1)
+
+
+def test_rejects_a_max_weight_below_equal_weight():
+    with pytest.raises(RebalanceError, match='infeasible'):
+        solve('min_variance', 1.0 / len(TICKERS) - 0.01)
@@ -1,7 +1,15 @@
 #!/usr/bin/env python3
 """
-Test script to demonstrate Salesforce connection
+Test script to demonstrate Salesforce connection.
+With --mock, exercises the async client and the sync queue against a local
+mock org instead (no credentials needed).
 """
+import sys
+import time
+import socket
+import asyncio
+import threading
+
 from salesforce_service import get_salesforce_service
 
 def main():
@@ -39,5 +47,106 @@ def main():
     print("✅ Connection attempt completed")
     print("💡 Ready for Salesforce API operations (pending SOAP API enable)")
 
+def sample_result(index):
+    """A minimal valid scan result for sync tests."""
+    from models.portfolio_analysis import (
+        PortfolioAnalysisResult, PortfolioAnalysis, PortfolioHolding, InvestmentRecommendation, ImprovementType
+    )
+    return PortfolioAnalysisResult(
+        extracted_holdings=[PortfolioHolding(ticker='AAPL', quantity=10 + index), PortfolioHolding(ticker='MSFT', quantity=5)],
+        analysis=PortfolioAnalysis(health_score=6, risk_profile='Moderate', total_value=10000.0 + index),
+        recommendations=[
+            InvestmentRecommendation(ticker=t, reason='Adds exposure outside current sectors', priority=p,
+                                     improvement_type=ImprovementType.DIVERSIFICATION)
+            for p, t in enumerate(('VXUS', 'BND', 'XLV'), 1)
+        ],
+        processing_time=1.5
+    )
+
+
+async def exercise_mock(port):
+    import salesforce_mock
+    from salesforce_client import SalesforceClient
+    from salesforce_sync import SalesforceSyncQueue
+
+    org = salesforce_mock.org
+    client = SalesforceClient(login_url=f"http://127.0.0.1:{port}", client_id='mock', client_secret='mock',
+                              username='user@example.com', password='password', security_token='', max_connections=4)
+    queue = SalesforceSyncQueue(client, sobject='Portfolio_Scan__c', external_id_field='Scan_Id__c',
+                                batch_size=50, flush_interval=0.2, bulk_threshold=500)
+    checks = []
+
+    async def wait_for_sync(expected, timeout=10.0):
+        deadline = time.monotonic() + timeout
+        while queue.stats.synced < expected and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+
+    # Size-triggered and time-triggered flushes
+    for i in range(120):
+        queue.enqueue(sample_result(i))
+    await wait_for_sync(120)
+    stored = len(org.records.get('Portfolio_Scan__c', {}))
+    checks.append(("120 results synced in batches", stored == 120 and queue.stats.batches >= 3))
+    checks.append((f"connections reused ({len(org.client_ports)} sockets for {org.requests} requests)",
+                   len(org.client_ports) <= 4))
+
+    # Expired session: one re-login, then the batch goes through
+    org.expire_tokens()
+    for i in range(10):
+        queue.enqueue(sample_result(i))
+    await wait_for_sync(130)
+    checks.append((f"token refreshed after expiry ({org.logins} logins)", org.logins == 2 and queue.stats.synced == 130))
+
+    # Transient 503s are retried by the client
+    org.fail_next = [503, 503]
+    queue.enqueue(sample_result(0))
+    await wait_for_sync(131)
+    checks.append(("503 responses retried", queue.stats.synced == 131))
+
+    # A backlog above the bulk threshold goes through Bulk API 2.0
+    for i in range(600):
+        queue.enqueue_record({'Scan_Id__c': f"bulk-{i}", 'Health_Score__c': 5})
+    await queue.flush()
+    checks.append(("backlog sent as a bulk job", queue.stats.bulk_jobs == 1 and len(org.records['Portfolio_Scan__c']) == 731))
+
+    count = await client.query("SELECT COUNT() FROM Portfolio_Scan__c")
+    checks.append(("SOQL query", count['totalSize'] == 731))
+
+    await queue.stop()
+    await client.aclose()
+    return checks, queue.stats
+
+
+def main_mock():
+    import uvicorn
+    import salesforce_mock
+
+    print("=" * 60)
+    print("🧪 SALESFORCE SYNC TEST (LOCAL MOCK ORG)")
+    print("=" * 60)
+
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(salesforce_mock.app, host='127.0.0.1', port=port, log_level='warning'))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    try:
+        checks, stats = asyncio.run(exercise_mock(port))
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+    for name, passed in checks:
+        print(f"{'✅' if passed else '❌'} {name}")
+    print(f"📊 Queue stats: {stats.to_dict()}")
+    return all(passed for _, passed in checks)
+
+
 if __name__ == "__main__":
+    if '--mock' in sys.argv:
+        sys.exit(0 if main_mock() else 1)
     main()
\ No newline at end of file
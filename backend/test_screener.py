@@ -0,0 +1,69 @@
+"""
+Tests for screener query parsing and evaluation.
+Run from backend/ with: python -m pytest test_screener.py
+"""
+import numpy as np
+import pytest
+
+from screener import FundamentalsTable, ScreenerError, evaluate, parse_query
+
+ROWS = {
+    'AAA': {'pe_ratio': 10.0, 'return_on_equity': 0.25, 'sector': 'Technology'},
+    'BBB': {'pe_ratio': 25.0, 'return_on_equity': 0.05, 'sector': 'Energy'},
+    'CCC': {'pe_ratio': None, 'return_on_equity': 0.15, 'sector': 'Technology'},
+    'DDD': {'pe_ratio': 40.0, 'return_on_equity': None, 'sector': None},
+    'EEE': {'pe_ratio': None, 'return_on_equity': None, 'sector': 'Utilities'},
+}
+
+
+@pytest.fixture(params=[(), ('pe_ratio',)], ids=['scan', 'indexed'])
+def table(request):
+    return FundamentalsTable.from_rows(ROWS, updated_at=0.0, indexed=request.param)
+
+
+def matches(table, expression):
+    mask = evaluate(parse_query(expression).where, table)
+    return sorted(table.tickers[np.nonzero(mask)[0]].tolist())
+
+
+def test_between_parses_numeric_bounds():
+    assert parse_query('pe_ratio between 10 and 20').where == ('between', 'pe_ratio', 10.0, 20.0)
+
+
+@pytest.mark.parametrize('expression', [
+    "pe_ratio between 'a' and 'b'",
+    "pe_ratio between 10 and 'b'",
+    "sector between 'Energy' and 'Utilities'",
+])
+def test_between_rejects_non_numeric_bounds(expression):
+    with pytest.raises(ScreenerError, match='BETWEEN needs numeric bounds'):
+        parse_query(expression)
+
+
+def test_between_excludes_missing_values(table):
+    assert matches(table, 'pe_ratio between 10 and 30') == ['AAA', 'BBB']
+
+
+def test_not_excludes_missing_values(table):
+    assert matches(table, 'not pe_ratio < 20') == matches(table, 'pe_ratio >= 20') == ['BBB', 'DDD']
+
+
+def test_not_of_compound_conditions_excludes_unknown_rows(table):
+    # A missing value leaves its comparison unknown unless the other side decides the result
+    assert matches(table, 'not (pe_ratio < 20 or return_on_equity > 20%)') == ['BBB']
+    assert matches(table, 'not (pe_ratio < 20 and return_on_equity > 20%)') == ['BBB', 'CCC', 'DDD']
+
+
+def test_double_negation_matches_the_condition(table):
+    assert matches(table, 'not not pe_ratio < 20') == matches(table, 'pe_ratio < 20') == ['AAA']
+
+
+def test_not_null_checks_are_never_unknown(table):
+    assert matches(table, 'pe_ratio is null') == ['CCC', 'EEE']
+    assert matches(table, 'not pe_ratio is null') == matches(table, 'pe_ratio is not null') == ['AAA', 'BBB', 'DDD']
+
+
+def test_category_negation_excludes_missing_labels(table):
+    assert matches(table, "sector != 'Technology'") == ['BBB', 'EEE']
+    assert matches(table, "not sector = 'Technology'") == ['BBB', 'EEE']
+    assert matches(table, "sector not in ('Technology', 'Energy')") == ['EEE']
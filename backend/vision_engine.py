@@ -9,18 +9,29 @@ import logging
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
-try:
-    import google.generativeai as genai
-    from google.generativeai.types import HarmCategory, HarmBlockThreshold
-    GEMINI_AVAILABLE = True
-except ImportError:
-    GEMINI_AVAILABLE = False
-
 from config import Config
+from lazy_imports import lazy_module, module_available
+from metrics import STAGE_GEMINI_CALL, STAGE_JSON_PARSE, STAGE_PREPROCESS, stage
+
+# Imported on first use; google.generativeai takes about a second to import
+GEMINI_AVAILABLE = module_available('google.generativeai')
+genai = lazy_module('google.generativeai')
+genai_types = lazy_module('google.generativeai.types')
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+SUGGESTIONS_TASK = (
+    " Suggest exactly 3 specific assets to add that would improve diversification or balance risk,"
+    " each with a type: diversification, risk_reduction, sector_balance or geographic_exposure."
+)
+SUGGESTIONS_SCHEMA = """,
+    "suggestions": [
+      {"ticker": "VTI", "type": "diversification", "reason": "Adds broad total market coverage to de-risk."},
+      {"ticker": "JNJ", "type": "sector_balance", "reason": "Adds stable healthcare dividend exposure."},
+      {"ticker": "GLD", "type": "risk_reduction", "reason": "Hedge against market uncertainty."}
+    ]"""
+
 class VisionEngineError(Exception):
     """Custom exception for vision engine errors"""
     pass
@@ -70,6 +81,7 @@ class VisionEngine:
             genai.configure(api_key=self.api_key)
             
             # Initialize the model with safety settings
+            HarmCategory, HarmBlockThreshold = genai_types.HarmCategory, genai_types.HarmBlockThreshold
             self.model = genai.GenerativeModel(
                 'gemini-1.5-flash',
                 safety_settings={
@@ -86,12 +98,25 @@ class VisionEngine:
             logger.error(f"Failed to configure Gemini client: {e}")
             raise ConfigurationError(f"Failed to configure Gemini API: {str(e)}")
     
-    def analyze_portfolio_image(self, image_bytes: bytes) -> Dict:
+    def ping(self) -> Dict:
+        """
+        Cheap reachability check: fetch the model's metadata without
+        generating content.
+        """
+        try:
+            info = genai.get_model(self.model.model_name)
+        except Exception as e:
+            raise APIError(f"Gemini API unreachable: {str(e)}")
+        return {'model': info.name, 'input_token_limit': info.input_token_limit}
+
+    def analyze_portfolio_image(self, image_bytes: bytes, include_suggestions: bool = True) -> Dict:
         """
         Analyze a portfolio screenshot using Gemini Vision.
         
         Args:
             image_bytes: Raw image data as bytes
+            include_suggestions: Ask the model for 3 suggestions; disable
+                when recommendations are computed locally
             
         Returns:
             Dict containing extracted holdings and analysis
@@ -103,20 +128,22 @@ class VisionEngine:
         if not self.model:
             raise ConfigurationError("Gemini client not configured")
         
-        # Create the system prompt for portfolio analysis
-        prompt = self._create_portfolio_prompt()
-        
         try:
             logger.info("Starting portfolio image analysis with Gemini Vision")
             
-            # Prepare the image for Gemini
-            image_part = {
-                "mime_type": "image/jpeg",  # Assume JPEG for now
-                "data": image_bytes
-            }
+            with stage(STAGE_PREPROCESS):
+                # Create the system prompt for portfolio analysis
+                prompt = self._create_portfolio_prompt(include_suggestions)
+
+                # Prepare the image for Gemini
+                image_part = {
+                    "mime_type": "image/jpeg",  # Assume JPEG for now
+                    "data": image_bytes
+                }
             
             # Generate content with the image and prompt
-            response = self.model.generate_content([prompt, image_part])
+            with stage(STAGE_GEMINI_CALL):
+                response = self.model.generate_content([prompt, image_part])
             
             if not response.text:
                 raise APIError("Empty response from Gemini API")
@@ -125,13 +152,14 @@ class VisionEngine:
             
             # Parse the JSON response
             try:
-                result = json.loads(response.text.strip())
+                with stage(STAGE_JSON_PARSE):
+                    result = json.loads(response.text.strip())
                 logger.info(f"Successfully parsed portfolio analysis: {len(result.get('extracted_holdings', []))} holdings found")
                 return result
                 
             except json.JSONDecodeError as e:
                 logger.error(f"Failed to parse Gemini response as JSON: {e}")
-                logger.error(f"Raw response: {response.text[:500]}...")
+                logger.debug(f"Raw response: {response.text[:500]}...")
                 raise VisionEngineError(f"Invalid JSON response from AI: {str(e)}")
         
         except Exception as e:
@@ -141,11 +169,154 @@ class VisionEngine:
             logger.error(f"Gemini API call failed: {e}")
             raise APIError(f"Portfolio analysis failed: {str(e)}")
     
-    def _create_portfolio_prompt(self) -> str:
+    def analyze_holdings(self,
+                         holdings: List[Dict],
+                         risk_context: Optional[str] = None,
+                         include_suggestions: bool = True) -> Dict:
+        """
+        Analyze already-known holdings with a text-only Gemini call.
+
+        Args:
+            holdings: List of {"ticker": ..., "qty": ...} dicts
+            risk_context: Computed risk metrics to ground the analysis
+            include_suggestions: Ask the model for 3 suggestions
+
+        Returns:
+            Dict in the same format as analyze_portfolio_image, with the
+            given holdings as extracted_holdings
+
+        Raises:
+            APIError: If the Gemini API call fails
+            VisionEngineError: If response parsing fails
+        """
+        if not self.model:
+            raise ConfigurationError("Gemini client not configured")
+
+        with stage(STAGE_PREPROCESS):
+            prompt = self._create_holdings_prompt(holdings, risk_context, include_suggestions)
+
+        try:
+            logger.info(f"Starting holdings analysis with Gemini for {len(holdings)} holdings")
+            with stage(STAGE_GEMINI_CALL):
+                response = self.model.generate_content(prompt)
+
+            if not response.text:
+                raise APIError("Empty response from Gemini API")
+
+            try:
+                with stage(STAGE_JSON_PARSE):
+                    result = json.loads(response.text.strip())
+            except json.JSONDecodeError as e:
+                logger.error(f"Failed to parse Gemini response as JSON: {e}")
+                logger.debug(f"Raw response: {response.text[:500]}...")
+                raise VisionEngineError(f"Invalid JSON response from AI: {str(e)}")
+
+            # The holdings are an input here, never trust the model to echo them back
+            result['extracted_holdings'] = holdings
+            return result
+
+        except Exception as e:
+            if isinstance(e, (APIError, VisionEngineError)):
+                raise
+
+            logger.error(f"Gemini API call failed: {e}")
+            raise APIError(f"Holdings analysis failed: {str(e)}")
+
+    def _create_holdings_prompt(self,
+                                holdings: List[Dict],
+                                risk_context: Optional[str] = None,
+                                include_suggestions: bool = True) -> str:
+        """
+        Create the text prompt for analyzing known holdings.
+
+        Returns:
+            Formatted prompt string for Gemini
+        """
+        holdings_text = "\n".join(f"- {h['ticker']}: {h['qty']}" for h in holdings)
+        risk_text = (
+            "\n\nRISK METRICS (computed from price history; use these numbers, do not estimate your own):\n"
+            + risk_context
+        ) if risk_context else ""
+
+        return f"""You are a veteran Senior Portfolio Manager and Financial Analyst.
+
+HOLDINGS (ticker: quantity):
+{holdings_text}{risk_text}
+
+TASK: ANALYSIS & ADVICE
+Analyze the holdings. Rate the portfolio's diversification on a scale of 1-10. Identify risk level and missing sectors.{SUGGESTIONS_TASK if include_suggestions else ""}
+
+OUTPUT FORMAT:
+You MUST return ONLY raw JSON. Do not use markdown blocks. The JSON must follow this exact structure:
+
+{{
+  "analysis": {{
+    "health_score": 7,
+    "risk_profile": "Aggressive (Tech heavy)",
+    "strengths": ["Strong growth potential"],
+    "weaknesses": ["Zero exposure to defensive sectors or bonds"]{SUGGESTIONS_SCHEMA if include_suggestions else ""}
+  }}
+}}"""
+
+    def phrase_recommendations(self, recommendations: List[Dict], risk_context: Optional[str] = None) -> List[str]:
+        """
+        Rewrite computed recommendation reasons in natural language.
+        The tickers and figures are fixed; the model only phrases them.
+
+        Args:
+            recommendations: List of {"ticker", "type", "reason"} dicts
+            risk_context: Computed risk metrics for context
+
+        Returns:
+            One reason per recommendation, in order
+
+        Raises:
+            APIError: If the Gemini API call fails
+            VisionEngineError: If the response does not match the input
+        """
+        if not self.model:
+            raise ConfigurationError("Gemini client not configured")
+
+        lines = "\n".join(
+            f"{i + 1}. {r['ticker']} ({r['type']}): {r['reason']}" for i, r in enumerate(recommendations)
+        )
+        risk_text = f"\nPORTFOLIO RISK METRICS:\n{risk_context}\n" if risk_context else ""
+        prompt = f"""You are a Senior Portfolio Manager writing for a retail investor.
+
+Rewrite each recommendation reason below as one clear sentence (at most 30 words).
+Keep every number and fact; do not add new claims or change the tickers.
+{risk_text}
+RECOMMENDATIONS:
+{lines}
+
+You MUST return ONLY raw JSON: {{"reasons": ["...", "...", "..."]}}"""
+
+        try:
+            with stage(STAGE_GEMINI_CALL):
+                response = self.model.generate_content(prompt)
+            if not response.text:
+                raise APIError("Empty response from Gemini API")
+            with stage(STAGE_JSON_PARSE):
+                reasons = json.loads(response.text.strip()).get('reasons', [])
+        except json.JSONDecodeError as e:
+            raise VisionEngineError(f"Invalid JSON response from AI: {str(e)}")
+        except Exception as e:
+            if isinstance(e, (APIError, VisionEngineError)):
+                raise
+            raise APIError(f"Recommendation phrasing failed: {str(e)}")
+
+        if len(reasons) != len(recommendations) or not all(isinstance(r, str) and r.strip() for r in reasons):
+            raise VisionEngineError("AI returned a different number of reasons than recommendations")
+        return [r.strip() for r in reasons]
+
+    def _create_portfolio_prompt(self, include_suggestions: bool = True) -> str:
         """
         Create the structured prompt for portfolio analysis.
         This prompt ensures consistent JSON output format.
         
+        Args:
+            include_suggestions: Ask for 3 asset suggestions in the output
+            
         Returns:
             Formatted prompt string for Gemini Vision
         """
@@ -157,7 +328,7 @@ TASK 1: EXTRACTION
 Identify the asset tickers (e.g., AAPL, BTC, VTI) and quantities held. Ignore cash balances or UI elements.
 
 TASK 2: ANALYSIS & ADVICE
-Analyze the extracted holdings. Rate the portfolio's diversification on a scale of 1-10. Identify risk level and missing sectors. Suggest exactly 3 specific assets to add that would improve diversification or balance risk.
+Analyze the extracted holdings. Rate the portfolio's diversification on a scale of 1-10. Identify risk level and missing sectors.""" + (SUGGESTIONS_TASK if include_suggestions else "") + """
 
 OUTPUT FORMAT:
 You MUST return ONLY raw JSON. Do not use markdown blocks. The JSON must follow this exact structure:
@@ -171,12 +342,7 @@ You MUST return ONLY raw JSON. Do not use markdown blocks. The JSON must follow
     "health_score": 7,
     "risk_profile": "Aggressive (Tech heavy)",
     "strengths": ["Strong growth potential"],
-    "weaknesses": ["Zero exposure to defensive sectors or bonds"],
-    "suggestions": [
-      {"ticker": "VTI", "reason": "Adds broad total market coverage to de-risk."},
-      {"ticker": "JNJ", "reason": "Adds stable healthcare dividend exposure."},
-      {"ticker": "GLD", "reason": "Hedge against market uncertainty."}
-    ]
+    "weaknesses": ["Zero exposure to defensive sectors or bonds"]""" + (SUGGESTIONS_SCHEMA if include_suggestions else "") + """
   }
 }"""
 
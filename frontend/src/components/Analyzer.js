@@ -1,4 +1,4 @@
-import { useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { motion } from 'framer-motion';
 import { 
   Search, 
@@ -43,6 +43,21 @@ ChartJS.register(
   LineElement
 );
 
+const POLL_INTERVAL_MS = 1500;
+const ANALYSIS_TIMEOUT_MS = 30000;
+// Wait this long for the socket before starting the job, and for its first message before polling instead
+const SOCKET_OPEN_TIMEOUT_MS = 1000;
+const SOCKET_SILENCE_MS = 5000;
+
+// Backend push channel; REACT_APP_WS_URL overrides it (e.g. when the dev server owns /ws)
+const analysisSocketUrl = () => {
+  if (process.env.REACT_APP_WS_URL) {
+    return process.env.REACT_APP_WS_URL;
+  }
+  const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+  return `${protocol}//${window.location.host}/ws`;
+};
+
 const Analyzer = () => {
   const [stockSymbol, setStockSymbol] = useState('AAPL');
   const [isAnalyzing, setIsAnalyzing] = useState(false);
@@ -55,6 +70,9 @@ const Analyzer = () => {
   const [comparisonResults, setComparisonResults] = useState(null);
   const [comparisonError, setComparisonError] = useState(null);
 
+  const analysisWatch = useRef(null);
+  useEffect(() => () => analysisWatch.current?.stop(), []);
+
   const handleAnalyze = async () => {
     if (!stockSymbol.trim() || isAnalyzing) return;
 
@@ -62,6 +80,12 @@ const Analyzer = () => {
     setError(null);
     setResults(null);
 
+    const ticker = stockSymbol.trim().toUpperCase();
+    const watch = watchAnalysis(ticker);
+    analysisWatch.current = watch;
+    // Subscribe before starting the job so no event is missed
+    await watch.ready;
+
     try {
       // Start analysis
       const response = await fetch('/api/analyze', {
@@ -70,7 +94,7 @@ const Analyzer = () => {
           'Content-Type': 'application/json',
         },
         body: JSON.stringify({
-          stock_symbol: stockSymbol.trim().toUpperCase(),
+          stock_symbol: ticker,
           num_articles: 5
         })
       });
@@ -78,48 +102,136 @@ const Analyzer = () => {
       const data = await response.json();
       
       if (data.status === 'started') {
-        // Poll for results
-        pollForResults();
+        watch.started();
       } else if (data.status === 'error') {
-        setError(data.message);
-        setIsAnalyzing(false);
+        watch.finish(null, data.message);
       }
     } catch (err) {
-      setError('Failed to start analysis: ' + err.message);
-      setIsAnalyzing(false);
+      watch.finish(null, 'Failed to start analysis: ' + err.message);
     }
   };
 
-  const pollForResults = () => {
-    const pollInterval = setInterval(async () => {
-      try {
-        const response = await fetch('/api/analyze/status');
-        const data = await response.json();
-
-        if (!data.is_loading && data.articles && data.articles.length > 0) {
-          clearInterval(pollInterval);
-          setResults(data);
-          setIsAnalyzing(false);
-        } else if (data.error) {
-          clearInterval(pollInterval);
-          setError(data.error);
-          setIsAnalyzing(false);
+  // Follow an analysis job over the analysis:<TICKER> socket topic.
+  // Falls back to polling /api/analyze/status if the socket fails or stays silent.
+  const watchAnalysis = (ticker) => {
+    const topic = `analysis:${ticker}`;
+    let socket = null;
+    let isStarted = false;
+    let isFinished = false;
+    let useFallback = false;
+    let pollInterval = null;
+    let silenceTimer = null;
+    let timeoutTimer = null;
+    let markReady;
+    const ready = new Promise((resolve) => { markReady = resolve; });
+    const readyTimer = setTimeout(() => markReady(), SOCKET_OPEN_TIMEOUT_MS);
+
+    const stop = () => {
+      isFinished = true;
+      markReady();
+      clearTimeout(readyTimer);
+      clearTimeout(silenceTimer);
+      clearTimeout(timeoutTimer);
+      clearInterval(pollInterval);
+      if (socket) {
+        socket.onclose = null;
+        socket.close();
+        socket = null;
+      }
+    };
+
+    const finish = (data, message) => {
+      if (isFinished) return;
+      stop();
+      if (message) {
+        setError(message);
+      } else {
+        setResults(data);
+      }
+      setIsAnalyzing(false);
+    };
+
+    const poll = () => {
+      pollInterval = setInterval(async () => {
+        try {
+          const response = await fetch(`/api/analyze/status?ticker=${encodeURIComponent(ticker)}`);
+          const data = await response.json();
+
+          if (!data.is_loading && data.articles && data.articles.length > 0) {
+            finish(data);
+          } else if (data.error) {
+            finish(null, data.error);
+          }
+        } catch (err) {
+          finish(null, 'Failed to get results: ' + err.message);
         }
-      } catch (err) {
-        clearInterval(pollInterval);
-        setError('Failed to get results: ' + err.message);
-        setIsAnalyzing(false);
+      }, POLL_INTERVAL_MS);
+    };
+
+    const fallBack = () => {
+      if (isFinished || useFallback) return;
+      useFallback = true;
+      markReady();
+      clearTimeout(silenceTimer);
+      if (socket) {
+        socket.onclose = null;
+        socket.close();
+        socket = null;
       }
-    }, 1500);
+      // Only poll once the job exists, or the previous report would be picked up
+      if (isStarted) poll();
+    };
 
-    // Set timeout to prevent infinite polling
-    setTimeout(() => {
-      clearInterval(pollInterval);
-      if (isAnalyzing) {
-        setError('Analysis is taking longer than expected. Please try again.');
-        setIsAnalyzing(false);
+    try {
+      socket = new WebSocket(analysisSocketUrl());
+    } catch (err) {
+      fallBack();
+    }
+    if (socket) {
+      socket.onopen = () => {
+        socket.send(JSON.stringify({ action: 'subscribe', topic }));
+        markReady();
+      };
+      socket.onmessage = (event) => {
+        let message;
+        try {
+          message = JSON.parse(event.data);
+        } catch (err) {
+          return;
+        }
+        if (message.topic !== topic) return;
+
+        clearTimeout(silenceTimer);
+        if (message.event === 'complete') {
+          finish(message.data);
+        } else if (message.event === 'error') {
+          finish(null, message.data?.error || 'Analysis failed');
+        } else if (message.event === 'cancelled') {
+          finish(null, message.data?.message || 'Analysis was cancelled');
+        }
+      };
+      socket.onerror = fallBack;
+      socket.onclose = fallBack;
+    }
+
+    return {
+      ready,
+      finish,
+      stop,
+      started: () => {
+        if (isFinished) return;
+        isStarted = true;
+        if (useFallback) {
+          poll();
+        } else {
+          silenceTimer = setTimeout(fallBack, SOCKET_SILENCE_MS);
+        }
+        // Stop waiting on a job that never finishes
+        timeoutTimer = setTimeout(() => {
+          finish(null, 'Analysis is taking longer than expected. Please try again.');
+        }, ANALYSIS_TIMEOUT_MS);
       }
-    }, 30000);
+    };
   };
 
   const getSentimentIcon = (sentiment) => {
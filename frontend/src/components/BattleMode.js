@@ -21,13 +21,10 @@ const BattleMode = ({ onBack }) => {
     setError(null);
 
     try {
-      const response = await fetch('/api/analyze/compare', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({ tickers }),
-      });
+      // GET so the browser can reuse the cached comparison and revalidate it with its ETag
+      const params = new URLSearchParams();
+      tickers.forEach((ticker) => params.append('tickers', ticker));
+      const response = await fetch(`/api/analyze/compare?${params}`);
 
       if (!response.ok) {
         const errorData = await response.json();
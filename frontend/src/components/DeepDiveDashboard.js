@@ -20,14 +20,9 @@ const DeepDiveDashboard = ({ ticker, onBack, onTickerChange }) => {
     setError(null);
 
     try {
-      // Call the FastAPI backend endpoint
-      const response = await fetch('/api/analyze/detailed', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({ ticker: tickerSymbol }),
-      });
+      // GET so the browser can reuse the cached report and revalidate it with its ETag
+      const params = new URLSearchParams({ ticker: tickerSymbol });
+      const response = await fetch(`/api/analyze/detailed?${params}`);
 
       if (!response.ok) {
         const errorData = await response.json();